@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark: chart tree size and lookup speed before and after compaction.
+
+Builds a synthetic chart tree of full-size captures (candles, grid and labels on
+1920x1080), then compacts it with chart_archive: the newest day stays PNG, the
+older half of the days is packed into day archives and the rest re-encoded. It
+reports bytes on disk, the time to walk the tree, and the time to read random
+charts by their index path, before and after.
+
+Run with: python benchmarks/bench_archive.py [--days N] [--charts-per-day N] [--format webp] [--quality N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from cyclebot.chart import get_chart_filename
+from cyclebot.chart_archive import ChartReader, RetentionPolicy, compact
+from cyclebot.chart_index import ChartIndex
+
+TIMEFRAMES = ("1h", "30m", "15m", "5m")
+
+
+def draw_chart(seed: int) -> Image.Image:
+    """A chart-like image: dark background, grid, a random walk of candles and axis labels."""
+    rng = random.Random(seed)  # noqa: S311
+    image = Image.new("RGB", (1920, 1080), (19, 23, 34))
+    draw = ImageDraw.Draw(image)
+    for x in range(0, 1920, 120):
+        draw.line((x, 0, x, 1040), fill=(42, 46, 57))
+    for y in range(0, 1040, 80):
+        draw.line((0, y, 1840, y), fill=(42, 46, 57))
+        draw.text((1850, y), f"{rng.uniform(90000, 100000):.1f}", fill=(178, 181, 190))
+    price = 520.0
+    for i in range(180):
+        x = 20 + i * 10
+        move = rng.gauss(0, 12)
+        top, bottom = sorted((price, price + move))
+        color = (8, 153, 129) if move > 0 else (242, 54, 69)
+        draw.line((x + 3, top - rng.uniform(0, 15), x + 3, bottom + rng.uniform(0, 15)), fill=color)
+        draw.rectangle((x, top, x + 6, max(bottom, top + 1)), fill=color)
+        price = min(1000.0, max(40.0, price + move))
+    return image
+
+
+def build_tree(base: Path, days: int, charts_per_day: int, today: date) -> list[Path]:
+    """Write charts_per_day charts for each of the last ``days`` days."""
+    paths = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        date_dir = base / str(day.year) / day.strftime("%b") / day.isoformat()
+        date_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(charts_per_day):
+            timeframe = TIMEFRAMES[i % len(TIMEFRAMES)]
+            timestamp = f"{day.isoformat()}_{i // 60:02d}-{i % 60:02d}-00"
+            path = date_dir / get_chart_filename(timeframe, timestamp)
+            draw_chart(offset * 1000 + i).save(path, optimize=True)
+            paths.append(path)
+    return paths
+
+
+def tree_bytes(base: Path) -> int:
+    """Total size of the files under a directory."""
+    return sum(p.stat().st_size for p in base.rglob("*") if p.is_file())
+
+
+def walk_ms(base: Path, repeat: int = 20) -> tuple[int, float]:
+    """Entries in the tree and the time to walk it (milliseconds per walk)."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        entries = sum(len(dirs) + len(files) for _, dirs, files in os.walk(base))
+    return entries, (time.perf_counter() - start) * 1000 / repeat
+
+
+def read_ms(index: ChartIndex, samples: int) -> float:
+    """Time to read random charts by their index path (milliseconds per chart)."""
+    records = index.range("0000", "9999")
+    chosen = random.Random(0).choices(records, k=samples)  # noqa: S311
+    with ChartReader() as reader:
+        start = time.perf_counter()
+        for record in chosen:
+            reader.read(record.path)
+    return (time.perf_counter() - start) * 1000 / samples
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=6, help="Days of charts to generate")
+    parser.add_argument("--charts-per-day", type=int, default=24, help="Charts per day")
+    parser.add_argument("--format", default="webp", help="Format for re-encoded charts (webp or avif)")
+    parser.add_argument("--quality", type=int, help="Lossy quality (default: lossless WebP)")
+    parser.add_argument("--reads", type=int, default=500, help="Random chart reads to time")
+    args = parser.parse_args()
+
+    today = date(2025, 11, 20)
+    workdir = Path(tempfile.mkdtemp(prefix="bench-archive-"))
+    base = workdir / "charts"
+    try:
+        print(f"Generating {args.days * args.charts_per_day} charts ({args.days} days)...")
+        paths = build_tree(base, args.days, args.charts_per_day, today)
+        with ChartIndex(base, workdir / "index.sqlite3") as index:
+            index.add_many(paths)
+            before_bytes = tree_bytes(base)
+            before_entries, before_walk = walk_ms(base)
+            before_read = read_ms(index, args.reads)
+
+            policy = RetentionPolicy(
+                keep_days=1, archive_days=max(1, args.days // 2), format=args.format, quality=args.quality
+            )
+            start = time.perf_counter()
+            report = compact(index, policy, today=today)
+            compact_s = time.perf_counter() - start
+
+            after_bytes = tree_bytes(base)
+            after_entries, after_walk = walk_ms(base)
+            after_read = read_ms(index, args.reads)
+
+        print(f"Compaction: {report.summary()} in {compact_s:.1f}s")
+        print(f"{'':<22}{'before':>12}{'after':>12}")
+        print(f"{'tree size (MB)':<22}{before_bytes / 1e6:>12.1f}{after_bytes / 1e6:>12.1f}")
+        print(f"{'tree entries':<22}{before_entries:>12}{after_entries:>12}")
+        print(f"{'walk tree (ms)':<22}{before_walk:>12.2f}{after_walk:>12.2f}")
+        print(f"{'read chart (ms)':<22}{before_read:>12.3f}{after_read:>12.3f}")
+        print(f"Saved {100 * (1 - after_bytes / before_bytes):.0f}% of the tree size")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
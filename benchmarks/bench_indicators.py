@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark: indicator computation over year-long captured series.
+
+Generates a year of random-walk candles for each timeframe (5m is ~105k bars),
+then times:
+
+- the indicators of the 5m series computed bar by bar in plain Python, the way a
+  straightforward implementation would
+- the same indicators with the vectorized kernels
+- analyze() over all four timeframes, including the level clustering
+- one incremental update, as done when a new bar arrives
+
+Run with: python benchmarks/bench_indicators.py [--days N] [--repeat N]
+"""
+
+import argparse
+import math
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from cyclebot.chart_data import OHLCV
+from cyclebot.indicators import IncrementalIndicators, IndicatorConfig, analyze, compute
+
+TIMEFRAMES = {"1h": 60, "30m": 30, "15m": 15, "5m": 5}
+
+
+def make_series(minutes: int, days: int, seed: int) -> OHLCV:
+    """Random-walk candles for ``days`` days of one timeframe."""
+    bars = days * 24 * 60 // minutes
+    rng = np.random.default_rng(seed)
+    close = 90000 * np.exp(np.cumsum(rng.normal(0, 0.002 * math.sqrt(minutes / 5), bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = close * rng.uniform(0, 0.002, bars)
+    high, low = np.maximum(open_, close) + spread, np.minimum(open_, close) - spread
+    time_ = 1_700_000_000 + np.arange(bars, dtype=np.int64) * minutes * 60
+    return OHLCV("BENCH", str(minutes), time_, open_, high, low, close, rng.uniform(1, 100, bars))
+
+
+def python_indicators(series: OHLCV, config: IndicatorConfig) -> list[float]:
+    """SMA, fast/slow EMA, RSI and ATR over lists, one bar at a time. Returns the last values."""
+    close, high, low = series.close.tolist(), series.high.tolist(), series.low.tolist()
+    window_sum = 0.0
+    sma = ema_fast = ema_slow = avg_gain = avg_loss = atr = math.nan
+    fast, slow = 2 / (config.ema_fast + 1), 2 / (config.ema_slow + 1)
+    gains, losses, ranges = [], [], []
+    for i, price in enumerate(close):
+        window_sum += price
+        if i >= config.sma:
+            window_sum -= close[i - config.sma]
+        if i >= config.sma - 1:
+            sma = window_sum / config.sma
+        ema_fast = sum(close[: i + 1]) / (i + 1) if i < config.ema_fast else ema_fast + fast * (price - ema_fast)
+        ema_slow = sum(close[: i + 1]) / (i + 1) if i < config.ema_slow else ema_slow + slow * (price - ema_slow)
+        previous = close[i - 1] if i else price
+        ranges.append(max(high[i] - low[i], abs(high[i] - previous), abs(low[i] - previous)))
+        atr = sum(ranges) / len(ranges) if i < config.atr else atr + (ranges[-1] - atr) / config.atr
+        if i:
+            gains.append(max(price - previous, 0.0))
+            losses.append(max(previous - price, 0.0))
+            if i <= config.rsi:
+                avg_gain, avg_loss = sum(gains) / len(gains), sum(losses) / len(losses)
+            else:
+                avg_gain += (gains[-1] - avg_gain) / config.rsi
+                avg_loss += (losses[-1] - avg_loss) / config.rsi
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss) if avg_loss else 100.0
+    return [sma, ema_fast, ema_slow, rsi, atr]
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Best time of ``repeat`` calls, in milliseconds."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365, help="Days of history per timeframe")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    config = IndicatorConfig()
+    series = {tf: make_series(minutes, args.days, seed) for seed, (tf, minutes) in enumerate(TIMEFRAMES.items())}
+    five = series["5m"]
+    print(f"Bars: {', '.join(f'{tf} {len(s)}' for tf, s in series.items())}")
+
+    python_ms = timed(lambda: python_indicators(five, config), max(1, args.repeat // 2))
+    numpy_ms = timed(lambda: compute(five, config), args.repeat)
+    analyze_ms = timed(lambda: analyze(series, config), args.repeat)
+
+    incremental = IncrementalIndicators.from_series("5m", five, config)
+    step = int(five.time[1] - five.time[0])
+    updates = 10_000
+    start = time.perf_counter()
+    for i in range(updates):
+        price = float(five.close[-1])
+        incremental.update(float(five.time[-1]) + step * (i + 1), price * 1.001, price * 0.999, price)
+    update_us = (time.perf_counter() - start) * 1e6 / updates
+
+    print(f"{'5m indicators, Python loop (ms)':<40}{python_ms:>10.1f}")
+    print(f"{'5m indicators, vectorized (ms)':<40}{numpy_ms:>10.1f}  ({python_ms / numpy_ms:.0f}x)")
+    print(f"{'analyze() on all timeframes (ms)':<40}{analyze_ms:>10.1f}")
+    print(f"{'incremental update per bar (us)':<40}{update_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: web notification serialization, old path vs MessageSerializer.
+
+The old path is the isinstance chain that used to live in web.handle_prompt,
+followed by json.dumps (and pydantic model_dump_json for responses). The new path
+is MessageSerializer.serialize followed by serialization.dumps, which uses orjson
+when it is installed.
+
+Run with: python benchmarks/bench_serialization.py [--iterations N] [--tool-result-kb N]
+"""
+
+import argparse
+import json
+import timeit
+from typing import Any
+
+from claude_code_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from cyclebot.serialization import ORJSON_AVAILABLE, MessageSerializer, dumps, notification
+from cyclebot.web import JSONRPCResponse
+
+
+def build_run(tool_result_kb: int) -> list[Any]:
+    """A typical agent run: init, a few tool round trips with large results, and a result."""
+    messages: list[Any] = [
+        SystemMessage("init", {"model": "m", "session_id": "s", "cwd": "/repo", "tools": ["Read"] * 20}),
+    ]
+    output = ("line of tool output " * 50 + "\n") * max(1, tool_result_kb)
+    for i in range(10):
+        messages.append(
+            AssistantMessage(
+                content=[TextBlock(f"Step {i}: reading a file"), ToolUseBlock(f"t{i}", "Read", {"path": f"f{i}.py"})],
+                model="m",
+            )
+        )
+        messages.append(UserMessage(content=[ToolResultBlock(f"t{i}", output, False)]))
+    messages.append(ResultMessage("success", 1000, 800, False, 11, "s", total_cost_usd=0.02))
+    return messages
+
+
+def legacy_serialize(message: Any, turn_count: int) -> tuple[dict[str, Any], int]:
+    """The serialization web.handle_prompt used before MessageSerializer."""
+    msg_data: dict[str, Any] = {"type": "unknown", "data": {}}
+    if isinstance(message, AssistantMessage):
+        turn_count += 1
+        msg_data = {"type": "assistant", "data": {"turn": turn_count, "content": []}}
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                msg_data["data"]["content"].append({"type": "text", "text": block.text})
+            elif isinstance(block, ToolUseBlock):
+                msg_data["data"]["content"].append({"type": "tool_use", "name": block.name, "input": block.input})
+    elif isinstance(message, SystemMessage):
+        msg_data = {
+            "type": "system",
+            "data": {
+                "model": message.data.get("model"),
+                "session_id": message.data.get("session_id"),
+                "cwd": message.data.get("cwd"),
+                "tools": message.data.get("tools"),
+                "permission_mode": message.data.get("permissionMode"),
+            },
+        }
+    elif isinstance(message, UserMessage):
+        msg_data = {"type": "user", "data": {"content": []}}
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                msg_data["data"]["content"].append({"type": "text", "text": block.text})
+            elif isinstance(block, ToolResultBlock):
+                msg_data["data"]["content"].append(
+                    {"type": "tool_result", "content": block.content, "is_error": block.is_error}
+                )
+    elif isinstance(message, ResultMessage):
+        turn_count += 1
+        msg_data = {
+            "type": "result",
+            "data": {
+                "num_turns": message.num_turns,
+                "duration_api_ms": message.duration_api_ms,
+                "duration_ms": message.duration_ms,
+                "is_error": message.is_error,
+                "total_cost_usd": message.total_cost_usd,
+            },
+        }
+    return msg_data, turn_count
+
+
+def run_legacy(messages: list[Any]) -> int:
+    """Serialize a run the old way; returns bytes produced."""
+    size = 0
+    turn_count = 0
+    for message in messages:
+        msg_data, turn_count = legacy_serialize(message, turn_count)
+        msg_data["request_id"] = 1
+        size += len(json.dumps({"jsonrpc": "2.0", "method": "message", "params": msg_data}))
+    response = JSONRPCResponse(result={"turn_count": turn_count, "status": "completed"}, id=1)
+    return size + len(response.model_dump_json())
+
+
+def run_new(messages: list[Any]) -> int:
+    """Serialize a run with MessageSerializer and dumps; returns bytes produced."""
+    size = 0
+    serializer = MessageSerializer()
+    for message in messages:
+        msg_data = serializer.serialize(message)
+        msg_data["request_id"] = 1
+        size += len(dumps(notification(msg_data)))
+    response = JSONRPCResponse(result={"turn_count": serializer.turn_count, "status": "completed"}, id=1)
+    return size + len(dumps(response.model_dump()))
+
+
+def main() -> None:
+    """Time both paths and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="Runs to serialize per measurement")
+    parser.add_argument("--tool-result-kb", type=int, default=16, help="Approximate size of each tool result")
+    args = parser.parse_args()
+
+    messages = build_run(args.tool_result_kb)
+    print(f"{len(messages)} messages per run, {run_new(messages) / 1024:.0f} KB encoded, orjson={ORJSON_AVAILABLE}")
+
+    results = {}
+    for name, func in (("legacy", run_legacy), ("registry", run_new)):
+        best = min(timeit.repeat(lambda func=func: func(messages), number=args.iterations, repeat=5))
+        results[name] = best / args.iterations * 1e6
+        print(f"{name:>8}: {results[name]:9.1f} µs per run")
+    print(f" speedup: {results['legacy'] / results['registry']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
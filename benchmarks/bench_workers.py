@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Load test: web server prompt throughput with 1, 2 and 4 worker processes.
+
+Each run starts ``uvicorn cyclebot.web:app --workers N`` against a synthetic
+agent (CYCLEBOT_AGENT_FACTORY=bench_workers:SyntheticAgent) that spends CPU on
+every message the way the SDK does parsing the CLI's JSON output, then drives it
+with concurrent WebSocket clients sending prompts back to back and reports
+completed prompts per second.
+
+Workers share state through --shared-state; by default an in-process fakeredis
+server is started as the Redis-compatible stand-in. Throughput can only scale up
+to the number of CPU cores available.
+
+Run with: python benchmarks/bench_workers.py [--workers 1 2 4] [--clients 16] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+from claude_code_sdk import AssistantMessage, ResultMessage, SystemMessage, TextBlock
+
+# Agent output each synthetic message stands for, parsed once per message
+CLI_LINE = json.dumps({"type": "assistant", "message": {"content": [{"type": "text", "text": "x" * 200}] * 100}})
+
+
+class _Transport:
+    def is_ready(self) -> bool:
+        return True
+
+
+class SyntheticAgent:
+    """ClaudeSDKClient stand-in that parses a CLI line per message and answers with a few turns."""
+
+    turns = 4
+
+    def __init__(self, options: Any = None) -> None:
+        """Create an unconnected agent."""
+        self.options = options
+        self._transport: Any = None
+        self._session_id = getattr(options, "resume", None) or uuid.uuid4().hex
+
+    async def connect(self) -> None:
+        """Pretend to start the CLI."""
+        self._transport = _Transport()
+
+    async def disconnect(self) -> None:
+        """Pretend to stop the CLI."""
+        self._transport = None
+
+    async def query(self, prompt: str) -> None:
+        """Accept a prompt."""
+        self._prompt = prompt
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        """Yield an init message, a few assistant turns and a result."""
+        json.loads(CLI_LINE)
+        yield SystemMessage("init", {"model": "synthetic", "session_id": self._session_id, "cwd": "/", "tools": []})
+        for turn in range(self.turns):
+            json.loads(CLI_LINE)
+            await asyncio.sleep(0)
+            yield AssistantMessage(content=[TextBlock(f"turn {turn}: {self._prompt}")], model="synthetic")
+        yield ResultMessage("success", 1, 1, False, self.turns, self._session_id, total_cost_usd=0.0)
+
+
+def free_port() -> int:
+    """A TCP port nobody is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_fake_redis() -> str:
+    """Serve fakeredis over TCP in a background thread; returns its URL."""
+    from fakeredis import TcpFakeServer
+
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def start_server(workers: int, shared_state: str, transcripts: Path) -> tuple[subprocess.Popen[bytes], int]:
+    """Start uvicorn with the synthetic agent and wait until it answers."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).parent), os.environ.get("PYTHONPATH")])),
+        "CYCLEBOT_AGENT_FACTORY": "bench_workers:SyntheticAgent",
+        "CYCLEBOT_SHARED_STATE": shared_state,
+        "CYCLEBOT_TRANSCRIPTS": str(transcripts),
+    }
+    command = [sys.executable, "-m", "uvicorn", "cyclebot.web:app", "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen([*command, "--workers", str(workers)], env=env)  # noqa: S603
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process, port
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    msg = f"Server with {workers} workers did not start"
+    raise RuntimeError(msg)
+
+
+async def run_client(port: int, deadline: float, latencies: list[float]) -> None:
+    """Send prompts one after another on one connection until the deadline."""
+    from websockets.asyncio.client import connect
+
+    async with connect(f"ws://127.0.0.1:{port}/ws", max_size=None) as ws:
+        request_id = 0
+        while time.monotonic() < deadline:
+            request_id += 1
+            started = time.perf_counter()
+            request = {"jsonrpc": "2.0", "method": "prompt", "params": {"content": "go"}, "id": request_id}
+            await ws.send(json.dumps(request))
+            done = False
+            while not done:
+                message = json.loads(await ws.recv())
+                for item in message if isinstance(message, list) else [message]:
+                    done = done or (item.get("id") == request_id and "method" not in item)
+            latencies.append(time.perf_counter() - started)
+
+
+async def measure(port: int, clients: int, duration: float) -> tuple[float, list[float]]:
+    """Prompts per second and per-prompt latencies over the run."""
+    latencies: list[float] = []
+    started = time.monotonic()
+    await asyncio.gather(*(run_client(port, started + duration, latencies) for _ in range(clients)))
+    return len(latencies) / (time.monotonic() - started), sorted(latencies)
+
+
+def main() -> None:
+    """Measure each worker count and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to measure")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent WebSocket connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each measurement")
+    parser.add_argument("--shared-state", help="redis:// URL shared by the workers (default: local fakeredis)")
+    args = parser.parse_args()
+
+    shared_state = args.shared_state or start_fake_redis()
+    cpus = os.cpu_count() or 1
+    print(f"{cpus} CPUs, {args.clients} clients, {args.duration:.0f}s per run, shared state {shared_state}")
+    if max(args.workers) > cpus:
+        print(f"Note: more workers than CPUs; beyond {cpus} worker(s) they share cores and add overhead")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            process, port = start_server(workers, shared_state, Path(tmp) / f"transcripts-{workers}.sqlite3")
+            try:
+                throughput, latencies = asyncio.run(measure(port, args.clients, args.duration))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            baseline = baseline or throughput
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            print(
+                f"{workers:>2} workers: {throughput:8.1f} prompts/s  ({throughput / baseline:.2f}x)"
+                f"  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
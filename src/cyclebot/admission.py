@@ -0,0 +1,331 @@
+"""Admission control for agent queries.
+
+Every query starts a Claude CLI process that calls a paid API, so the server
+admits at most ``max_concurrent`` of them at a time across all connections.
+Further requests wait in a priority queue (first come, first served within a
+priority) of at most ``max_queue`` entries, and are told their position as it
+changes. A request is shed, with AdmissionRejected, when:
+
+- the client's token bucket is empty (``rate`` requests per second, ``burst`` at once)
+- the client, or the server as a whole, has spent its budget of ``total_cost_usd``
+  within the last ``budget_window`` seconds
+- the queue is full, or the request waited longer than ``queue_timeout``
+
+Example:
+    >>> admission = AdmissionController(max_concurrent=4, rate=0.2, burst=5, client_budget_usd=5.0)
+    >>> async with admission.admit("203.0.113.7", on_position=report):
+    ...     cost = await run_query()
+    >>> admission.charge("203.0.113.7", cost)
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, NoReturn, Optional
+
+# Reasons a request is shed
+SHED_REASONS = ("rate_limited", "budget_exceeded", "queue_full", "queue_timeout")
+
+# Priorities: lower runs first
+PRIORITY_CONTINUE = 0
+PRIORITY_PROMPT = 1
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class AdmissionRejected(Exception):
+    """The request was shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after: Optional[float] = None) -> None:
+        """Record why.
+
+        Args:
+            reason: One of SHED_REASONS
+            retry_after: Seconds after which the request may succeed, if known
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionStats:
+    """Counters for an admission controller."""
+
+    admitted: int = 0
+    queued: int = 0
+    rate_limited: int = 0
+    budget_exceeded: int = 0
+    queue_full: int = 0
+    queue_timeout: int = 0
+
+
+class TokenBucket:
+    """Allows ``rate`` events per second on average and ``capacity`` in a burst."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Start full."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token if there is one.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until the next one
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def give_back(self) -> None:
+        """Return a token taken for a request that was not admitted after all."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    @property
+    def full(self) -> bool:
+        """Whether the bucket has refilled completely (the client has been idle)."""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class Spending:
+    """Costs recorded over a sliding time window."""
+
+    def __init__(self, window: float) -> None:
+        """Start with nothing spent."""
+        self.window = window
+        self._entries: deque[tuple[float, float]] = deque()
+        self.total = 0.0
+
+    def add(self, cost: float) -> None:
+        """Record a cost now."""
+        self._entries.append((time.monotonic(), cost))
+        self.total += cost
+
+    def spent(self) -> float:
+        """Total cost within the window."""
+        cutoff = time.monotonic() - self.window
+        while self._entries and self._entries[0][0] < cutoff:
+            self.total -= self._entries.popleft()[1]
+        if not self._entries:
+            self.total = 0.0
+        return self.total
+
+    def retry_after(self) -> float:
+        """Seconds until the oldest cost in the window drops out."""
+        if not self._entries:
+            return 0.0
+        return max(0.0, self._entries[0][0] + self.window - time.monotonic())
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+
+
+class AdmissionController:
+    """Limits concurrent queries, queues the excess and sheds over-limit clients."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 64,
+        queue_timeout: float = 300.0,
+        rate: float = 0.2,
+        burst: int = 5,
+        client_budget_usd: Optional[float] = None,
+        budget_usd: Optional[float] = None,
+        budget_window: float = 24 * 3600.0,
+        max_clients: int = 4096,
+    ) -> None:
+        """Configure the limits.
+
+        Args:
+            max_concurrent: Queries running at once
+            max_queue: Requests allowed to wait for a free slot
+            queue_timeout: Seconds a request may wait before it is shed
+            rate: Requests per second each client may start on average
+            burst: Requests a client may start at once
+            client_budget_usd: Spend allowed per client within the window (None for no limit)
+            budget_usd: Spend allowed for the whole server within the window (None for no limit)
+            budget_window: Seconds over which spending is counted
+            max_clients: Clients tracked before idle ones are forgotten
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self.client_budget_usd = client_budget_usd
+        self.budget_usd = budget_usd
+        self.budget_window = budget_window
+        self.max_clients = max_clients
+        self.stats = AdmissionStats()
+        self._running = 0
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._spending: dict[str, Spending] = {}
+        self._total_spending = Spending(budget_window)
+
+    @property
+    def _changed(self) -> asyncio.Condition:
+        # Created on first use: on Python 3.9 a Condition binds to the event loop current
+        # at creation, and this object may be built at import time, before the server's loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @property
+    def running(self) -> int:
+        """Queries admitted and not yet finished."""
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        """Requests waiting in the queue."""
+        return len(self._queue)
+
+    def _shed(self, reason: str, retry_after: Optional[float] = None) -> NoReturn:
+        setattr(self.stats, reason, getattr(self.stats, reason) + 1)
+        raise AdmissionRejected(reason, retry_after)
+
+    def _check_budget(self, client: str) -> None:
+        spending = self._spending.get(client)
+        if self.client_budget_usd is not None and spending is not None and spending.spent() >= self.client_budget_usd:
+            self._shed("budget_exceeded", spending.retry_after())
+        if self.budget_usd is not None and self._total_spending.spent() >= self.budget_usd:
+            self._shed("budget_exceeded", self._total_spending.retry_after())
+
+    def _take_token(self, client: str) -> TokenBucket:
+        if len(self._buckets) >= self.max_clients:
+            # Forget clients that have been idle long enough for their bucket to refill
+            for idle in [key for key, bucket in self._buckets.items() if bucket.full]:
+                del self._buckets[idle]
+            for idle in [key for key, spending in self._spending.items() if not spending.spent()]:
+                del self._spending[idle]
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        wait = bucket.take()
+        if wait:
+            self._shed("rate_limited", wait)
+        return bucket
+
+    def _position(self, waiter: _Waiter) -> int:
+        return 1 + sum(1 for other in self._queue if other < waiter)
+
+    @contextlib.asynccontextmanager
+    async def admit(
+        self, client: str, priority: int = PRIORITY_PROMPT, on_position: Optional[PositionCallback] = None
+    ) -> AsyncIterator[None]:
+        """Hold a query slot for the duration of the block, waiting in the queue if needed.
+
+        Args:
+            client: Who is asking (e.g. the remote address); limits and budgets apply per client
+            priority: Lower is admitted first; equal priorities are first come, first served
+            on_position: Awaited with the 1-based queue position whenever it changes while waiting
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        self._check_budget(client)
+        bucket = self._take_token(client)
+        waiter = _Waiter(priority, next(self._seq))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        reported = 0
+
+        async with self._changed:
+            if self._running >= self.max_concurrent and len(self._queue) >= self.max_queue:
+                bucket.give_back()
+                self._shed("queue_full")
+            heapq.heappush(self._queue, waiter)
+            if self._running >= self.max_concurrent or self._queue[0] is not waiter:
+                self.stats.queued += 1
+
+        try:
+            while True:
+                async with self._changed:
+                    if self._running < self.max_concurrent and self._queue[0] is waiter:
+                        # Queries that finished while this one waited may have used up the budget
+                        self._check_budget(client)
+                        heapq.heappop(self._queue)
+                        self._running += 1
+                        # The next waiter may fit too, and everyone behind moved up
+                        self._changed.notify_all()
+                        break
+                    position = self._position(waiter)
+                    if position == reported or on_position is None:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            self._shed("queue_timeout")
+                        with contextlib.suppress(asyncio.TimeoutError):
+                            await asyncio.wait_for(self._changed.wait(), remaining)
+                        continue
+                # Report outside the lock: sending may wait on a slow client
+                reported = position
+                await on_position(position)
+        except BaseException:
+            # Leave the queue without waiting for the lock, so a cancelled waiter never blocks its head
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+                await asyncio.shield(self._notify())
+            raise
+
+        self.stats.admitted += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            # Wake waiters from a fresh task so the release happens even if this one is cancelled
+            await asyncio.shield(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    def charge(self, client: Optional[str], cost_usd: Optional[float]) -> None:
+        """Record what a finished query cost, against the client's and the server's budget."""
+        if not cost_usd:
+            return
+        if client is not None:
+            spending = self._spending.get(client)
+            if spending is None:
+                spending = self._spending[client] = Spending(self.budget_window)
+            spending.add(cost_usd)
+        self._total_spending.add(cost_usd)
+
+    def spent(self, client: Optional[str] = None) -> float:
+        """Cost within the budget window, for one client or (by default) the whole server."""
+        if client is None:
+            return self._total_spending.spent()
+        spending = self._spending.get(client)
+        return spending.spent() if spending is not None else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counters and sizes for reporting."""
+        return {
+            "running": self._running,
+            "waiting": len(self._queue),
+            "spent_usd": round(self.spent(), 6),
+            **dataclasses.asdict(self.stats),
+        }
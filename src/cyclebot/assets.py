@@ -0,0 +1,183 @@
+"""Fingerprinted, precompressed static assets for the web UI.
+
+At startup every file under the static directory is read once, named by a hash
+of its content (``app.js`` is served as ``/static/app.3f9a1c2b7d.js``) and
+compressed ahead of time with gzip, and with brotli when it is installed
+(pip install "cyclebot[compression]"). HTML pages are rewritten to refer to
+the fingerprinted URLs.
+
+Fingerprinted URLs never change content, so they are served with an immutable,
+year-long Cache-Control; pages and the plain URLs are revalidated with their
+ETag instead, which costs a 304 with no body. Each response uses the smallest
+variant the client accepts.
+
+Example:
+    >>> assets = AssetStore(STATIC_DIR)
+    >>> assets.load()
+    >>> response = assets.response("app.js", request.headers)
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import mimetypes
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+from starlette.responses import Response
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# Cache-Control for fingerprinted URLs, and for pages and plain URLs
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# Hex digits of the content hash used in fingerprinted names
+HASH_LENGTH = 10
+
+
+@dataclass
+class Asset:
+    """One static file and its precompressed variants."""
+
+    path: str
+    url: str
+    content_type: str
+    digest: str
+    body: bytes
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, accept_encoding: str) -> tuple[Optional[str], bytes]:
+        """The smallest variant the client accepts: (content encoding or None, body)."""
+        accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+        best: tuple[Optional[str], bytes] = (None, self.body)
+        for encoding, body in self.encoded.items():
+            if encoding in accepted and len(body) < len(best[1]):
+                best = (encoding, body)
+        return best
+
+
+def _content_type(path: str) -> str:
+    if path.endswith((".js", ".mjs")):
+        return "text/javascript; charset=utf-8"
+    guessed = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"{guessed}; charset=utf-8" if guessed.startswith("text/") else guessed
+
+
+def _fingerprinted(path: str, digest: str) -> str:
+    stem, dot, suffix = path.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{path}.{digest}"
+    return f"{stem}.{digest}.{suffix}"
+
+
+def _compress(body: bytes) -> dict[str, bytes]:
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        import brotli
+
+        encoded["br"] = brotli.compress(body, quality=11)
+    return {encoding: data for encoding, data in encoded.items() if len(data) < len(body)}
+
+
+class AssetStore:
+    """Static files loaded into memory, served by plain or fingerprinted URL."""
+
+    def __init__(self, static_dir: Union[str, Path], url_prefix: str = "/static") -> None:
+        """Point the store at a directory; call load() to read it.
+
+        Args:
+            static_dir: Directory holding the assets
+            url_prefix: URL path the directory is served under
+        """
+        self.static_dir = Path(static_dir)
+        self.url_prefix = url_prefix.rstrip("/")
+        self._assets: dict[str, Asset] = {}
+        self._immutable: dict[str, Asset] = {}
+
+    def load(self) -> None:
+        """Read, fingerprint and compress every file, then rewrite pages to the fingerprinted URLs."""
+        assets: dict[str, Asset] = {}
+        files = sorted(p for p in self.static_dir.rglob("*") if p.is_file())
+        for file in files:
+            path = file.relative_to(self.static_dir).as_posix()
+            if not path.endswith(".html"):
+                assets[path] = self._build(path, file.read_bytes())
+
+        # Pages last, so they can refer to the fingerprinted names of everything else
+        urls = {f"{self.url_prefix}/{path}": asset.url for path, asset in assets.items()}
+        pattern = re.compile("|".join(re.escape(url) for url in sorted(urls, key=len, reverse=True)) or "(?!)")
+        for file in files:
+            path = file.relative_to(self.static_dir).as_posix()
+            if path.endswith(".html"):
+                text = file.read_text(encoding="utf-8")
+                text = pattern.sub(lambda match: urls[match.group(0)], text)
+                assets[path] = self._build(path, text.encode())
+
+        self._assets = assets
+        self._immutable = {asset.url: asset for asset in assets.values()}
+
+    def _build(self, path: str, body: bytes) -> Asset:
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        content_type = _content_type(path)
+        compressible = len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE_TYPES)
+        return Asset(
+            path=path,
+            url=f"{self.url_prefix}/{_fingerprinted(path, digest)}",
+            content_type=content_type,
+            digest=digest,
+            body=body,
+            encoded=_compress(body) if compressible else {},
+        )
+
+    def __len__(self) -> int:
+        """Number of assets loaded."""
+        return len(self._assets)
+
+    def get(self, path: str) -> Optional[Asset]:
+        """Asset by path relative to the static directory (e.g. "app.js")."""
+        return self._assets.get(path)
+
+    def url(self, path: str) -> str:
+        """Fingerprinted URL of an asset.
+
+        Raises:
+            KeyError: If there is no such asset
+        """
+        return self._assets[path].url
+
+    def response(self, path: str, headers: Mapping[str, str]) -> Optional[Response]:
+        """Serve an asset by plain path or fingerprinted name.
+
+        Args:
+            path: Path relative to the static directory, either "app.js" or "app.<hash>.js"
+            headers: Request headers (Accept-Encoding, If-None-Match)
+
+        Returns:
+            The response (304 if the client's copy is current), or None if there is no such asset
+        """
+        asset = self._immutable.get(f"{self.url_prefix}/{path}")
+        cache_control = IMMUTABLE_CACHE
+        if asset is None:
+            asset = self._assets.get(path)
+            cache_control = REVALIDATE_CACHE
+        if asset is None:
+            return None
+
+        encoding, body = asset.variant(headers.get("accept-encoding", ""))
+        etag = f'"{asset.digest}-{encoding}"' if encoding else f'"{asset.digest}"'
+        response_headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if_none_match = headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=response_headers)
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, headers=response_headers, media_type=asset.content_type)
@@ -4,33 +4,168 @@ This module provides shared functionality for chart capture and organization
 across multiple scripts (chart_capture.py, openrouter_hello.py, etc.).
 """
 
-from datetime import datetime, timezone
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
+if TYPE_CHECKING:
+    from cyclebot.chart_index import ChartIndex
 
-def get_chart_directory(base_path: Optional[Union[str, Path]] = None) -> Path:
+# Default base directory for charts (network share)
+DEFAULT_CHART_BASE = Path.home() / "mnt" / "pi-share" / "Trading" / "charts"
+
+# Timeframes captured by chart_capture.py, longest first
+TIMEFRAMES = ["1h", "30m", "15m", "5m"]
+
+
+def resolve_base_path(base_path: Optional[Union[str, Path]] = None) -> Path:
+    """Get the chart base directory, falling back to the default share location.
+
+    Args:
+        base_path: Base directory for charts, or None for ~/mnt/pi-share/Trading/charts
+
+    Returns:
+        Path object for the base directory
+    """
+    return DEFAULT_CHART_BASE if base_path is None else Path(base_path)
+
+
+def get_date_directory(base_path: Path, when: datetime) -> Path:
+    """Get the chart directory for a given date, without touching the filesystem.
+
+    Args:
+        base_path: Base directory for charts
+        when: Date (local time) to build the path for
+
+    Returns:
+        Path in the form {base_path}/{YEAR}/{Month}/{YYYY-MM-DD}
+    """
+    year_dir = base_path / str(when.year)
+    month_dir = year_dir / when.strftime("%b")  # e.g., "Nov"
+    return month_dir / when.strftime("%Y-%m-%d")  # e.g., "2025-11-19"
+
+
+class ChartDirectoryResolver:
+    """Resolve the chart directory for the current local date.
+
+    The path is computed once per local day and reused until the next local
+    midnight, and the directory is created only the first time a caller that
+    writes asks for it. Lookups therefore cost no filesystem calls on the
+    network share after the first write of the day.
+    """
+
+    def __init__(self, base_path: Optional[Union[str, Path]] = None) -> None:
+        """Initialize the resolver.
+
+        Args:
+            base_path: Base directory for charts. Defaults to ~/mnt/pi-share/Trading/charts
+        """
+        self.base_path = resolve_base_path(base_path)
+        self._date_dir: Optional[Path] = None
+        self._valid_from = 0.0
+        self._valid_until = 0.0
+        self._created: Optional[Path] = None
+
+    def resolve(self, now: Optional[datetime] = None) -> Path:
+        """Get the chart directory for the current date without creating it.
+
+        Args:
+            now: Time to resolve for. Defaults to the current time.
+
+        Returns:
+            Path object for the date's chart directory
+        """
+        ts = time.time() if now is None else now.timestamp()
+        if self._date_dir is None or not self._valid_from <= ts < self._valid_until:
+            local = datetime.fromtimestamp(ts, timezone.utc).astimezone()
+            self._date_dir = get_date_directory(self.base_path, local)
+            # Midnights as naive local times so timestamp() accounts for DST changes
+            day_start = datetime(local.year, local.month, local.day)  # noqa: DTZ001
+            self._valid_from = day_start.timestamp()
+            self._valid_until = (day_start + timedelta(days=1)).timestamp()
+        return self._date_dir
+
+    def ensure(self, now: Optional[datetime] = None) -> Path:
+        """Get the chart directory for the current date, creating it on first use.
+
+        Args:
+            now: Time to resolve for. Defaults to the current time.
+
+        Returns:
+            Path object for the date's chart directory
+        """
+        date_dir = self.resolve(now)
+        if date_dir != self._created:
+            date_dir.mkdir(parents=True, exist_ok=True)
+            self._created = date_dir
+        return date_dir
+
+    async def ensure_async(self, now: Optional[datetime] = None) -> Path:
+        """Like ensure(), but creates the directory in a worker thread.
+
+        Once the directory exists this returns without leaving the event loop,
+        so only the first call of each day pays for the thread hop.
+
+        Args:
+            now: Time to resolve for. Defaults to the current time.
+
+        Returns:
+            Path object for the date's chart directory
+        """
+        date_dir = self.resolve(now)
+        if date_dir == self._created:
+            return date_dir
+        return await asyncio.to_thread(self.ensure, now)
+
+
+_resolvers: dict[Path, ChartDirectoryResolver] = {}
+
+
+def get_directory_resolver(base_path: Optional[Union[str, Path]] = None) -> ChartDirectoryResolver:
+    """Get the shared directory resolver for a base directory.
+
+    Args:
+        base_path: Base directory for charts. Defaults to ~/mnt/pi-share/Trading/charts
+
+    Returns:
+        Resolver cached for the lifetime of the process
+    """
+    base = resolve_base_path(base_path)
+    if base not in _resolvers:
+        _resolvers[base] = ChartDirectoryResolver(base)
+    return _resolvers[base]
+
+
+def get_chart_directory(base_path: Optional[Union[str, Path]] = None, create: bool = True) -> Path:
     """Get the timestamped chart directory for the current date.
 
     Creates directory structure: {base_path}/{YEAR}/{Month}/{YYYY-MM-DD}/
 
     Args:
         base_path: Base directory for charts. Defaults to ~/mnt/pi-share/Trading/charts
+        create: Create the directory if needed. Readers should pass False.
 
     Returns:
         Path object for today's chart directory
     """
-    base_path = Path.home() / "mnt" / "pi-share" / "Trading" / "charts" if base_path is None else Path(base_path)
+    resolver = get_directory_resolver(base_path)
+    return resolver.ensure() if create else resolver.resolve()
 
-    now = datetime.now(timezone.utc).astimezone()
-    year_dir = base_path / str(now.year)
-    month_dir = year_dir / now.strftime("%b")  # e.g., "Nov"
-    date_dir = month_dir / now.strftime("%Y-%m-%d")  # e.g., "2025-11-19"
 
-    # Create directory if it doesn't exist
-    date_dir.mkdir(parents=True, exist_ok=True)
+async def get_chart_directory_async(base_path: Optional[Union[str, Path]] = None, create: bool = True) -> Path:
+    """Get today's chart directory without blocking the event loop on the share.
 
-    return date_dir
+    Args:
+        base_path: Base directory for charts. Defaults to ~/mnt/pi-share/Trading/charts
+        create: Create the directory if needed. Readers should pass False.
+
+    Returns:
+        Path object for today's chart directory
+    """
+    resolver = get_directory_resolver(base_path)
+    return await resolver.ensure_async() if create else resolver.resolve()
 
 
 def get_chart_timestamp() -> str:
@@ -58,22 +193,49 @@ def get_chart_filename(timeframe: str, timestamp: Optional[str] = None) -> str:
     return f"{timestamp}-{timeframe}.png"
 
 
-def get_latest_charts(chart_dir: Optional[Path] = None, timeframes: Optional[list[str]] = None) -> dict[str, Path]:
+def get_series_filename(timeframe: str, timestamp: Optional[str] = None) -> str:
+    """Generate the filename of the OHLCV series saved next to a chart.
+
+    Args:
+        timeframe: Chart timeframe (e.g., "1h", "30m", "15m", "5m")
+        timestamp: Optional timestamp. If None, generates current timestamp.
+
+    Returns:
+        Filename in format: {timestamp}-{timeframe}.npz
+    """
+    if timestamp is None:
+        timestamp = get_chart_timestamp()
+    return f"{timestamp}-{timeframe}.npz"
+
+
+def get_latest_charts(
+    chart_dir: Optional[Path] = None, timeframes: Optional[list[str]] = None, index: Optional["ChartIndex"] = None
+) -> dict[str, Path]:
     """Get the most recent chart files for specified timeframes.
 
+    When an index is given, lookups are answered from it instead of listing the
+    chart directory, which avoids globbing the network share.
+
     Args:
         chart_dir: Directory to search. Defaults to today's chart directory.
         timeframes: List of timeframes to find (e.g., ["1h", "30m"]). Defaults to all timeframes.
+        index: Optional chart index to read from instead of globbing chart_dir
 
     Returns:
         Dictionary mapping timeframe to Path of most recent chart file.
         Example: {"1h": Path(".../2025-11-19_15-30-45-1h.png"), ...}
     """
-    if chart_dir is None:
-        chart_dir = get_chart_directory()
-
     if timeframes is None:
-        timeframes = ["1h", "30m", "15m", "5m"]
+        timeframes = TIMEFRAMES
+
+    if index is not None:
+        # Chart directories are named by date, e.g. ".../2025-11-19"
+        date = chart_dir.name if chart_dir is not None else get_chart_timestamp()[:10]
+        latest: dict[str, Path] = index.latest(timeframes, date=date)
+        return latest
+
+    if chart_dir is None:
+        chart_dir = get_chart_directory(create=False)
 
     result = {}
     for timeframe in timeframes:
@@ -83,3 +245,35 @@ def get_latest_charts(chart_dir: Optional[Path] = None, timeframes: Optional[lis
             result[timeframe] = matching_files[0]  # Most recent
 
     return result
+
+
+def get_latest_series(
+    chart_dir: Optional[Path] = None, timeframes: Optional[list[str]] = None, index: Optional["ChartIndex"] = None
+) -> dict[str, Path]:
+    """Get the most recent OHLCV series files for specified timeframes.
+
+    Args:
+        chart_dir: Directory to search. Defaults to today's chart directory.
+        timeframes: List of timeframes to find. Defaults to all timeframes.
+        index: Optional chart index to read from instead of globbing chart_dir
+
+    Returns:
+        Dictionary mapping timeframe to Path of the most recent series file
+    """
+    if timeframes is None:
+        timeframes = TIMEFRAMES
+
+    if index is not None:
+        date = chart_dir.name if chart_dir is not None else get_chart_timestamp()[:10]
+        latest: dict[str, Path] = index.latest_series(timeframes, date=date)
+        return latest
+
+    if chart_dir is None:
+        chart_dir = get_chart_directory(create=False)
+
+    result = {}
+    for timeframe in timeframes:
+        matching_files = sorted(chart_dir.glob(f"*-{timeframe}.npz"), reverse=True)
+        if matching_files:
+            result[timeframe] = matching_files[0]
+    return result
@@ -0,0 +1,166 @@
+"""Chart analysis from pre-computed features, with vision on demand.
+
+A vision analysis sends the four chart screenshots to the model on every run,
+so the request is hundreds of kilobytes of base64 and the model spends most of
+its time reading pixels. When the capture also recorded the OHLCV series
+(--series), the same questions can be answered from the numbers behind the
+charts: per-timeframe trend, key levels and recent pattern flags
+(cyclebot.indicators) fit in about a kilobyte of JSON for a cheaper text model.
+
+Three modes:
+
+- ``features``: send the feature summary to a text model (the default)
+- ``vision``: send the chart images to a vision model
+- ``compare``: run both and report latency, cost and request size side by side
+
+Example:
+    >>> summary = load_market_summary(chart_dir, index)
+    >>> prompt = feature_prompt(summary)
+    >>> print(comparison_report([features_run, vision_run]))
+"""
+
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from cyclebot.chart import TIMEFRAMES, get_latest_series
+from cyclebot.chart_data import NUMPY_AVAILABLE, load_series
+from cyclebot.openrouter import CompletionStats
+
+if TYPE_CHECKING:
+    from cyclebot.chart_index import ChartIndex
+    from cyclebot.indicators import IndicatorConfig, MarketSummary
+
+MODES = ("features", "vision", "compare")
+
+ANALYSIS_QUESTIONS = """Please provide:
+1. Overall trend across all timeframes
+2. Key support and resistance levels
+3. Any notable patterns or formations
+4. Short-term vs long-term trend alignment
+5. Your assessment of current market condition
+
+Be concise but specific."""
+
+VISION_PROMPT = f"""Analyze these TradingView charts (in order: 1 hour, 30 minute, 15 minute, 5 minute timeframes).
+
+{ANALYSIS_QUESTIONS}"""
+
+FEATURES_LEGEND = """Fields: trend is up/down/sideways from the close against the fast and slow EMA; \
+sma, ema_fast, ema_slow, rsi (Wilder) and atr are the latest values; swing_high/swing_low are the last confirmed \
+swings; flags are recent patterns (EMA crosses, RSI extremes, swing structure, range breakouts, volatility \
+changes); levels are support/resistance zones where swings of several timeframes cluster, with touch counts."""
+
+
+def parse_mode(value: Optional[str]) -> str:
+    """Validate an analysis mode, defaulting to "features".
+
+    Raises:
+        ValueError: If the mode is not one of MODES
+    """
+    mode = (value or "features").strip().lower()
+    if mode not in MODES:
+        msg = f"Unknown analysis mode {value!r}, expected one of {', '.join(MODES)}"
+        raise ValueError(msg)
+    return mode
+
+
+def load_market_summary(
+    chart_dir: Optional[Path] = None,
+    index: Optional["ChartIndex"] = None,
+    timeframes: Optional[list[str]] = None,
+    config: Optional["IndicatorConfig"] = None,
+    charts: Optional[dict[str, Path]] = None,
+) -> Optional["MarketSummary"]:
+    """Compute the indicator summary of the latest captured series.
+
+    Args:
+        chart_dir: Directory to search when no index is given
+        index: Chart index to look the series up in
+        timeframes: Timeframes to include, longest first (default: chart.TIMEFRAMES)
+        config: Indicator settings
+        charts: Charts being analyzed, by timeframe; a series is only used if it was
+            saved by the same capture (same file name apart from the suffix)
+
+    Returns:
+        The summary, or None if NumPy is missing or no (matching) series were captured
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    from cyclebot.indicators import analyze
+
+    timeframes = timeframes if timeframes is not None else TIMEFRAMES
+    paths = get_latest_series(chart_dir, timeframes, index=index)
+    if charts is not None:
+        paths = {tf: path for tf, path in paths.items() if tf in charts and path.stem == charts[tf].stem}
+    if not paths:
+        return None
+    return analyze({tf: load_series(paths[tf]) for tf in timeframes if tf in paths}, config)
+
+
+def feature_prompt(summary: "MarketSummary") -> str:
+    """Prompt asking a text model to analyze a feature summary."""
+    features = json.dumps(summary.as_dict(), separators=(",", ":"))
+    timeframes = ", ".join(summary.timeframes)
+    return f"""Analyze the market from these technical features, computed from TradingView OHLCV data \
+({timeframes} timeframes).
+
+{FEATURES_LEGEND}
+
+{features}
+
+{ANALYSIS_QUESTIONS}"""
+
+
+@dataclass(frozen=True)
+class AnalysisRun:
+    """One analysis: the mode and model that answered, the answer and what it took."""
+
+    mode: str
+    model: str
+    text: str
+    stats: CompletionStats
+
+
+def _ratio(value: Optional[float], baseline: Optional[float], better: str, worse: str) -> Optional[str]:
+    if not value or not baseline:
+        return None
+    factor = baseline / value
+    return f"{factor:.1f}x {better}" if factor >= 1 else f"{1 / factor:.1f}x {worse}"
+
+
+def comparison_report(runs: Sequence[AnalysisRun]) -> str:
+    """Table of latency, cost and request size per run, and how each compares to vision.
+
+    Args:
+        runs: Analyses of the same charts in different modes
+
+    Returns:
+        The report text
+    """
+    lines = [f"{'mode':<10}{'model':<44}{'request':>12}{'latency':>10}{'tokens in/out':>16}{'cost':>12}"]
+    for run in runs:
+        stats = run.stats
+        tokens = f"{stats.prompt_tokens if stats.prompt_tokens is not None else '?'}/"
+        tokens += f"{stats.completion_tokens if stats.completion_tokens is not None else '?'}"
+        cost = "cached" if stats.cached else (f"${stats.cost:.6f}" if stats.cost is not None else "n/a")
+        lines.append(
+            f"{run.mode:<10}{run.model[:43]:<44}{stats.request_bytes / 1024:>9.1f} KB"
+            f"{stats.latency_ms:>8.0f}ms{tokens:>16}{cost:>12}"
+        )
+
+    vision = next((run for run in runs if run.mode == "vision"), None)
+    for run in runs:
+        if vision is None or run is vision:
+            continue
+        ratios = [
+            _ratio(run.stats.request_bytes, vision.stats.request_bytes, "smaller request", "larger request"),
+            _ratio(run.stats.latency_ms, vision.stats.latency_ms, "faster", "slower"),
+            _ratio(run.stats.cost, vision.stats.cost, "cheaper", "more expensive"),
+        ]
+        found = [ratio for ratio in ratios if ratio]
+        if found:
+            lines.append(f"{run.mode} vs vision: {', '.join(found)}")
+    return "\n".join(lines)
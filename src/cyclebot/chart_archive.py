@@ -0,0 +1,442 @@
+"""Tiered retention for the chart tree on the share.
+
+Captured charts are lossless 1920x1080 PNGs, and the ``{YEAR}/{Mon}/{YYYY-MM-DD}``
+tree grows by a few hundred of them a day. compact() moves older days down the
+retention tiers:
+
+- The last ``keep_days`` days stay as captured.
+- Older days are re-encoded in place to WebP (lossless unless a quality is given)
+  or AVIF, optionally downscaled. Hard-linked duplicates (see chart_changes) are
+  encoded once and stay linked.
+- Days older than ``archive_days`` are packed into a single uncompressed zip next
+  to the month's date directories, ``2025/Nov/2025-11-19.zip``. Its central
+  directory indexes the members, so reading one chart costs a seek rather than
+  unpacking the day, and the month directory lists one file per day.
+
+The chart index is updated as files move. Archived charts keep an index path with
+the zip standing in for the date directory,
+``2025/Nov/2025-11-19.zip/2025-11-19_15-30-45-1h.webp``, and ChartReader reads
+both kinds of path. Re-encoding needs Pillow (pip install "cyclebot[images]").
+
+    python -m cyclebot.chart_archive --keep-days 7 --archive-days 30 --dry-run
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Union
+
+from cyclebot.chart_index import DAY_ARCHIVE_SUFFIX, ChartIndex, parse_chart_filename
+from cyclebot.images import PILLOW_AVAILABLE
+
+FORMATS = ("webp", "avif")
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How long charts stay in each retention tier."""
+
+    keep_days: int = 7
+    archive_days: Optional[int] = 30
+    format: str = "webp"
+    quality: Optional[int] = None
+    max_width: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Validate the policy."""
+        if self.format not in FORMATS:
+            msg = f"Unsupported chart format {self.format!r}, expected one of {FORMATS}"
+            raise ValueError(msg)
+        if self.archive_days is not None and self.archive_days < self.keep_days:
+            msg = f"archive_days ({self.archive_days}) must not be less than keep_days ({self.keep_days})"
+            raise ValueError(msg)
+
+    @property
+    def suffix(self) -> str:
+        """File suffix of re-encoded charts."""
+        return f".{self.format}"
+
+
+@dataclass
+class CompactionReport:
+    """What a compaction run did, or would do in a dry run."""
+
+    days_reencoded: int = 0
+    days_archived: int = 0
+    charts_reencoded: int = 0
+    charts_archived: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes freed on the share."""
+        return self.bytes_before - self.bytes_after
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        saved = f", {self.bytes_before / 1e6:.1f} MB -> {self.bytes_after / 1e6:.1f} MB" if self.bytes_after else ""
+        return (
+            f"re-encoded {self.charts_reencoded} charts in {self.days_reencoded} days, "
+            f"archived {self.charts_archived} charts in {self.days_archived} days{saved}"
+        )
+
+
+def encode_chart(data: bytes, policy: RetentionPolicy) -> bytes:
+    """Re-encode a chart image for long-term storage.
+
+    Args:
+        data: Source image bytes
+        policy: Target format, quality and width
+
+    Returns:
+        Encoded image bytes
+    """
+    if not PILLOW_AVAILABLE:
+        msg = 'Re-encoding charts needs Pillow: pip install "cyclebot[images]"'
+        raise RuntimeError(msg)
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = source.convert("RGB")
+    if policy.max_width and image.width > policy.max_width:
+        height = round(image.height * policy.max_width / image.width)
+        image = image.resize((policy.max_width, height), Image.Resampling.LANCZOS)
+
+    out = io.BytesIO()
+    if policy.format == "webp" and policy.quality is None:
+        image.save(out, format="WEBP", lossless=True, method=4)
+    elif policy.quality is None:
+        image.save(out, format=policy.format.upper())
+    else:
+        image.save(out, format=policy.format.upper(), quality=policy.quality)
+    return out.getvalue()
+
+
+def archive_member(path: Union[str, Path]) -> Optional[tuple[Path, str]]:
+    """Split the index path of an archived chart into its day archive and member name.
+
+    Returns:
+        (archive path, member name), or None for a chart that is not archived
+    """
+    path = Path(path)
+    if path.parent.suffix != DAY_ARCHIVE_SUFFIX:
+        return None
+    return path.parent, path.name
+
+
+class ChartReader:
+    """Read chart images whether they are loose files or packed in a day archive.
+
+    Recently used archives are kept open, so reading many charts of the same days
+    parses each central directory once.
+    """
+
+    def __init__(self, max_open: int = 8) -> None:
+        """Initialize the reader.
+
+        Args:
+            max_open: Number of day archives kept open
+        """
+        self.max_open = max_open
+        self._archives: OrderedDict[Path, zipfile.ZipFile] = OrderedDict()
+
+    def read(self, path: Union[str, Path]) -> bytes:
+        """Read a chart by its index path.
+
+        Raises:
+            FileNotFoundError: If there is no such chart
+        """
+        member = archive_member(path)
+        if member is None:
+            return Path(path).read_bytes()
+        archive_path, name = member
+        try:
+            return self._open(archive_path).read(name)
+        except KeyError:
+            msg = f"No chart {name} in {archive_path}"
+            raise FileNotFoundError(msg) from None
+
+    def _open(self, archive_path: Path) -> zipfile.ZipFile:
+        archive = self._archives.get(archive_path)
+        if archive is not None:
+            self._archives.move_to_end(archive_path)
+            return archive
+        archive = zipfile.ZipFile(archive_path)
+        self._archives[archive_path] = archive
+        while len(self._archives) > self.max_open:
+            self._archives.popitem(last=False)[1].close()
+        return archive
+
+    def close(self) -> None:
+        """Close the open archives."""
+        while self._archives:
+            self._archives.popitem()[1].close()
+
+    def __enter__(self) -> "ChartReader":
+        """Return the reader for use as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Close the reader on leaving the context."""
+        self.close()
+
+
+def chart_days(base_path: Path, before: date) -> list[tuple[date, Path]]:
+    """Find the date directories for days before a date.
+
+    Only directory names are read; no date directory is listed.
+
+    Args:
+        base_path: Chart base directory
+        before: First day not to return
+
+    Returns:
+        (day, date directory) pairs, oldest first
+    """
+    days: list[tuple[date, Path]] = []
+    if not base_path.is_dir():
+        return days
+    for year_dir in sorted(base_path.iterdir()):
+        if not (year_dir.is_dir() and year_dir.name.isdigit()) or int(year_dir.name) > before.year:
+            continue
+        for month_dir in sorted(year_dir.iterdir()):
+            if not month_dir.is_dir():
+                continue
+            for date_dir in sorted(month_dir.iterdir()):
+                try:
+                    day = date.fromisoformat(date_dir.name)
+                except ValueError:
+                    continue
+                if day < before and date_dir.is_dir():
+                    days.append((day, date_dir))
+    return sorted(days)
+
+
+class _Encoder:
+    """Encode each distinct file once, however many hard links it has."""
+
+    def __init__(self, policy: RetentionPolicy) -> None:
+        self.policy = policy
+        self._done: dict[tuple[int, int], tuple[bytes, Optional[Path]]] = {}
+
+    def encode(self, path: Path) -> tuple[bytes, int]:
+        """Get the stored bytes for a chart: (data, source size, or 0 if the file was seen before)."""
+        stat = path.stat()
+        key = (stat.st_dev, stat.st_ino)
+        done = self._done.get(key)
+        if done is not None:
+            return done[0], 0
+        source = path.read_bytes()
+        data = source if path.suffix == self.policy.suffix else encode_chart(source, self.policy)
+        self._done[key] = (data, None)
+        return data, stat.st_size
+
+    def written(self, path: Path, target: Path) -> None:
+        """Remember where a file's encoding was written."""
+        stat = path.stat()
+        key = (stat.st_dev, stat.st_ino)
+        self._done[key] = (self._done[key][0], target)
+
+    def link_target(self, path: Path) -> Optional[Path]:
+        """Earlier re-encoded file for the same source, if any."""
+        stat = path.stat()
+        done = self._done.get((stat.st_dev, stat.st_ino))
+        return done[1] if done is not None else None
+
+
+def _write(path: Path, data: bytes) -> None:
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(data)
+    temporary.replace(path)
+
+
+def reencode_day(charts: list[Path], policy: RetentionPolicy, report: CompactionReport) -> dict[Path, Path]:
+    """Re-encode a day's charts next to the originals.
+
+    The originals are left for the caller to remove once the index points at
+    the re-encoded files.
+
+    Args:
+        charts: Chart files of one day
+        policy: Target format
+        report: Report to add the outcome to
+
+    Returns:
+        New path by old path for every re-encoded chart
+    """
+    encoder = _Encoder(policy)
+    moves = {}
+    for path in charts:
+        if path.suffix == policy.suffix:
+            continue
+        target = path.with_suffix(policy.suffix)
+        linked_to = encoder.link_target(path)
+        if linked_to is not None:
+            try:
+                os.link(linked_to, target)
+            except OSError:
+                linked_to = None
+        if linked_to is None:
+            data, size = encoder.encode(path)
+            _write(target, data)
+            encoder.written(path, target)
+            report.bytes_before += size
+            report.bytes_after += len(data)
+        moves[path] = target
+    report.charts_reencoded += len(moves)
+    return moves
+
+
+def archive_day(
+    date_dir: Path, charts: list[Path], policy: RetentionPolicy, report: CompactionReport
+) -> dict[Path, Path]:
+    """Pack a day's charts into its day archive.
+
+    Charts already in the archive (from an earlier run) are kept. The archive is
+    written to a temporary file and renamed into place. The charts and the date
+    directory are left for the caller to remove once the index points into the
+    archive.
+
+    Args:
+        date_dir: The day's date directory
+        charts: Chart files of the day
+        policy: Target format
+        report: Report to add the outcome to
+
+    Returns:
+        New index path by old path for every archived chart
+    """
+    archive_path = date_dir.with_name(date_dir.name + DAY_ARCHIVE_SUFFIX)
+    temporary = archive_path.with_name(f".{archive_path.name}.tmp")
+    encoder = _Encoder(policy)
+    moves = {}
+    before = archive_path.stat().st_size if archive_path.exists() else 0
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_STORED) as out:
+        names = set()
+        if archive_path.exists():
+            with zipfile.ZipFile(archive_path) as existing:
+                for info in existing.infolist():
+                    out.writestr(info, existing.read(info))
+                    names.add(info.filename)
+        for path in charts:
+            data, size = encoder.encode(path)
+            name = path.with_suffix(policy.suffix).name
+            if name not in names:
+                out.writestr(zipfile.ZipInfo(name, _zip_time(path)), data)
+                names.add(name)
+            report.bytes_before += size
+            moves[path] = archive_path / name
+    temporary.replace(archive_path)
+    report.bytes_before += before
+    report.bytes_after += archive_path.stat().st_size
+    report.charts_archived += len(moves)
+    return moves
+
+
+def _zip_time(path: Path) -> tuple[int, int, int, int, int, int]:
+    parsed = parse_chart_filename(path.name)
+    timestamp = parsed[0] if parsed else "1980-01-01_00-00-00"
+    day, time = timestamp.split("_")
+    year, month, mday = (int(part) for part in day.split("-"))
+    hour, minute, second = (int(part) for part in time.split("-"))
+    return year, month, mday, hour, minute, second
+
+
+def compact(
+    index: ChartIndex, policy: RetentionPolicy, today: Optional[date] = None, dry_run: bool = False
+) -> CompactionReport:
+    """Move older days of charts down the retention tiers.
+
+    Each day is finished, and the index updated, before the next one starts. A
+    day's original files are removed only after the index points at their
+    replacements, so an interrupted run never leaves the index pointing at a
+    removed file; at worst an original is left behind and compacted again.
+
+    Args:
+        index: Index of the chart tree to compact
+        policy: Retention tiers
+        today: Reference date for the tier ages. Defaults to today.
+        dry_run: Only count what would be done
+
+    Returns:
+        What was done
+    """
+    # Date directories are named by local date
+    today = today if today is not None else datetime.now(timezone.utc).astimezone().date()
+    reencode_before = today - timedelta(days=policy.keep_days)
+    archive_before = today - timedelta(days=policy.archive_days) if policy.archive_days is not None else None
+    report = CompactionReport()
+
+    for day, date_dir in chart_days(index.base_path, reencode_before):
+        charts = sorted(p for p in date_dir.iterdir() if parse_chart_filename(p.name))
+        if not charts:
+            continue
+        archive = archive_before is not None and day < archive_before
+        if dry_run:
+            report.bytes_before += sum(p.stat().st_size for p in charts)
+            if archive:
+                report.days_archived += 1
+                report.charts_archived += len(charts)
+            elif any(p.suffix != policy.suffix for p in charts):
+                report.days_reencoded += 1
+                report.charts_reencoded += sum(p.suffix != policy.suffix for p in charts)
+            continue
+
+        if archive:
+            moves = archive_day(date_dir, charts, policy, report)
+            report.days_archived += 1
+        else:
+            moves = reencode_day(charts, policy, report)
+            report.days_reencoded += bool(moves)
+        index.move(moves)
+        for path in moves:
+            path.unlink()
+        if archive:
+            # Gone unless something other than charts is in it
+            with contextlib.suppress(OSError):
+                date_dir.rmdir()
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line interface for compacting the chart tree."""
+    parser = argparse.ArgumentParser(description="Re-encode and archive older charts.")
+    parser.add_argument("--base", help="Chart base directory (default: ~/mnt/pi-share/Trading/charts)")
+    parser.add_argument("--db", help="Index database file (default: under ~/.cache/cyclebot)")
+    parser.add_argument("--keep-days", type=int, default=7, help="Days kept as captured PNGs")
+    parser.add_argument("--archive-days", type=int, default=30, help="Days after which a day is packed into a zip")
+    parser.add_argument("--no-archive", action="store_true", help="Re-encode only, never pack days")
+    parser.add_argument("--format", choices=FORMATS, default="webp", help="Format for re-encoded charts")
+    parser.add_argument("--quality", type=int, help="Lossy encoder quality (default: lossless WebP)")
+    parser.add_argument("--max-width", type=int, help="Downscale re-encoded charts to this width")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be done")
+    args = parser.parse_args(argv)
+
+    policy = RetentionPolicy(
+        keep_days=args.keep_days,
+        archive_days=None if args.no_archive else args.archive_days,
+        format=args.format,
+        quality=args.quality,
+        max_width=args.max_width,
+    )
+    with ChartIndex(args.base, args.db) as index:
+        report = compact(index, policy, dry_run=args.dry_run)
+    print(("Would have " if args.dry_run else "Compacted: ") + report.summary())
+
+
+if __name__ == "__main__":
+    main()
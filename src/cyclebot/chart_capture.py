@@ -5,91 +5,600 @@ This script replicates the functionality of hello.py but uses Playwright directl
 instead of going through the Claude Code SDK and MCP server.
 """
 
+import argparse
 import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
 
-from playwright.async_api import Page, async_playwright
+from playwright.async_api import BrowserContext, Page, Playwright, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-from cyclebot.chart import get_chart_directory, get_chart_filename, get_chart_timestamp
+from cyclebot.chart import get_chart_directory_async, get_chart_filename, get_chart_timestamp
+from cyclebot.chart_changes import ChangeDetector, ChartChange
+from cyclebot.chart_data import NUMPY_AVAILABLE, SeriesCollector, save_series
+from cyclebot.chart_index import ChartIndex
+from cyclebot.images import parse_crop
 
+# Profile directory (same as used by hello.py)
+PROFILE_DIR = Path.home() / ".config" / "cyclebot" / "chrome-profile-tradingview"
 
-async def capture_chart(page: Page, url: str, output_path: str, wait_time: int = 3000) -> None:
+# Chart definitions: (URL, timeframe_suffix)
+CHARTS: list[tuple[str, str]] = [
+    ("https://www.tradingview.com/chart/obJz7jBz/", "1h"),
+    ("https://www.tradingview.com/chart/gVH3aqxp/", "30m"),
+    ("https://www.tradingview.com/chart/KXmakFlc/", "15m"),
+    ("https://www.tradingview.com/chart/hCHhBALH/", "5m"),
+]
+
+# Fingerprint of every chart canvas, taken after the next animation frame.
+# Each canvas is downscaled into a small probe so comparing two frames costs a few
+# milliseconds instead of a full screenshot. Returns null when nothing is drawn yet
+# or the canvas cannot be read back (tainted), in which case we fall back to screenshots.
+_CANVAS_FINGERPRINT_JS = """
+(selector) => new Promise((resolve) => requestAnimationFrame(() => requestAnimationFrame(() => {
+    const canvases = Array.from(document.querySelectorAll(selector)).filter((c) => c.width > 0 && c.height > 0);
+    if (!canvases.length) { resolve(null); return; }
+    const probe = document.createElement("canvas");
+    probe.width = 96;
+    probe.height = 54;
+    const ctx = probe.getContext("2d", { willReadFrequently: true });
+    let hash = 0;
+    try {
+        for (const canvas of canvases) {
+            ctx.clearRect(0, 0, probe.width, probe.height);
+            ctx.drawImage(canvas, 0, 0, probe.width, probe.height);
+            const data = ctx.getImageData(0, 0, probe.width, probe.height).data;
+            for (let i = 0; i < data.length; i++) hash = (hash * 31 + data[i]) | 0;
+        }
+    } catch (e) {
+        resolve(null);
+        return;
+    }
+    resolve(canvases.length + ":" + hash);
+})))
+"""
+
+
+@dataclass
+class ReadinessResult:
+    """Outcome of waiting for a chart to finish rendering.
+
+    ``signals`` maps each readiness signal (``canvas``, ``network_idle``,
+    ``stable``) to the elapsed milliseconds at which it was satisfied; signals
+    that never fired are absent.
+    """
+
+    ready: bool
+    elapsed_ms: float
+    signals: dict[str, float] = field(default_factory=dict)
+    fell_back: bool = False
+
+
+async def _frame_fingerprint(page: Page, selector: str) -> Optional[str]:
+    """Return a cheap fingerprint of the rendered chart, one frame from now."""
+    try:
+        fingerprint = await page.evaluate(_CANVAS_FINGERPRINT_JS, selector)
+    except Exception:
+        fingerprint = None
+    if fingerprint is not None:
+        return str(fingerprint)
+    # Canvas not readable; compare low-quality screenshots instead
+    shot = await page.screenshot(type="jpeg", quality=30, full_page=False)
+    return hashlib.sha1(shot, usedforsecurity=False).hexdigest()
+
+
+async def wait_for_chart_ready(
+    page: Page,
+    timeout: int = 10000,
+    fallback_wait: int = 3000,
+    canvas_selector: str = "canvas",
+    stable_frames: int = 2,
+    poll_interval: int = 100,
+) -> ReadinessResult:
+    """Wait until a chart has rendered, based on DOM, network and pixel signals.
+
+    The chart is considered ready once a chart canvas is visible, the network
+    has gone idle, and the canvas pixels are unchanged across ``stable_frames``
+    consecutive samples. Network idle is best effort: live data feeds can keep
+    the page busy, so a missed idle does not block readiness. If the canvas
+    does not appear or never settles within ``timeout``, the old fixed
+    ``fallback_wait`` is applied so the capture still gets a chance to finish.
+
+    Args:
+        page: Page that has started navigating to the chart
+        timeout: Maximum time to wait for readiness signals (milliseconds)
+        fallback_wait: Fixed wait applied when readiness times out (milliseconds)
+        canvas_selector: CSS selector for the chart canvases
+        stable_frames: Number of consecutive identical fingerprints required
+        poll_interval: Delay between stability samples (milliseconds)
+
+    Returns:
+        ReadinessResult describing which signals fired and how long it took
+    """
+    start = time.perf_counter()
+    deadline = start + timeout / 1000
+    result = ReadinessResult(ready=False, elapsed_ms=0.0)
+
+    def elapsed_ms() -> float:
+        return (time.perf_counter() - start) * 1000
+
+    def remaining_ms() -> float:
+        # Playwright treats a timeout of 0 as "wait forever", so a spent budget still times out
+        return max(1.0, (deadline - time.perf_counter()) * 1000)
+
+    try:
+        await page.wait_for_selector(canvas_selector, state="visible", timeout=remaining_ms())
+        result.signals["canvas"] = elapsed_ms()
+
+        try:
+            await page.wait_for_load_state("networkidle", timeout=remaining_ms())
+            result.signals["network_idle"] = elapsed_ms()
+        except PlaywrightTimeoutError:
+            pass
+
+        previous = await _frame_fingerprint(page, canvas_selector)
+        matches = 1
+        while matches < stable_frames and time.perf_counter() < deadline:
+            await page.wait_for_timeout(poll_interval)
+            current = await _frame_fingerprint(page, canvas_selector)
+            matches = matches + 1 if current == previous else 1
+            previous = current
+        if matches >= stable_frames:
+            result.signals["stable"] = elapsed_ms()
+            result.ready = True
+    except PlaywrightTimeoutError:
+        pass
+
+    if not result.ready:
+        await page.wait_for_timeout(fallback_wait)
+        result.fell_back = True
+
+    result.elapsed_ms = elapsed_ms()
+    return result
+
+
+@dataclass
+class ChartTiming:
+    """Per-chart timing breakdown for a single capture."""
+
+    timeframe: str
+    url: str
+    output_path: str
+    navigate_ms: float = 0.0
+    load_ms: float = 0.0
+    screenshot_ms: float = 0.0
+    total_ms: float = 0.0
+    ready: Optional[bool] = None
+    error: Optional[str] = None
+    same_as: Optional[str] = None
+    series_path: Optional[str] = None
+    symbol: Optional[str] = None
+    bars: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the capture completed without error."""
+        return self.error is None
+
+    @property
+    def unchanged(self) -> bool:
+        """Whether the chart is the same as the previous capture of its timeframe."""
+        return self.same_as is not None
+
+
+async def launch_browser(playwright: Playwright, headless: bool = False) -> BrowserContext:
+    """Launch Chrome with the persistent TradingView profile.
+
+    Args:
+        playwright: Running Playwright instance
+        headless: Run without a visible window
+
+    Returns:
+        Persistent browser context
+    """
+    # Note: --password-store=basic is critical to avoid cookie encryption issues
+    return await playwright.chromium.launch_persistent_context(
+        user_data_dir=str(PROFILE_DIR),
+        headless=headless,
+        channel="chrome",  # Use Chrome instead of Chromium
+        viewport={"width": 1920, "height": 1080},  # Full HD resolution
+        args=[
+            "--password-store=basic",  # Avoid keyring encryption issues on Linux
+            "--no-sandbox",  # May be needed depending on environment
+            "--window-size=1920,1080",  # Set window size to match viewport
+            # Keep background tabs rendering at full speed so parallel captures don't stall
+            "--disable-background-timer-throttling",
+            "--disable-backgrounding-occluded-windows",
+            "--disable-renderer-backgrounding",
+        ],
+    )
+
+
+async def capture_chart(
+    page: Page,
+    url: str,
+    output_path: str,
+    wait_time: int = 3000,
+    timeframe: str = "",
+    ready_timeout: Optional[int] = 10000,
+    series: bool = False,
+) -> ChartTiming:
     """Navigate to a TradingView chart and capture a screenshot.
 
     Args:
         page: Playwright page object
         url: TradingView chart URL
         output_path: Path to save the screenshot
-        wait_time: Time to wait for chart to load (milliseconds)
+        wait_time: Fixed wait for the chart to load (milliseconds). Used on its own when
+            ``ready_timeout`` is None, otherwise only as the fallback when readiness times out.
+        timeframe: Timeframe label used in log output and the timing record
+        ready_timeout: Readiness detection timeout (milliseconds), or None for a fixed wait
+        series: Also save the chart's OHLCV series next to the screenshot (needs numpy)
+
+    Returns:
+        Timing breakdown for the capture
     """
-    print(f"Navigating to {url}...")
-    await page.goto(url)
+    label = f"[{timeframe}] " if timeframe else ""
+    timing = ChartTiming(timeframe=timeframe, url=url, output_path=output_path)
+    start = time.perf_counter()
+
+    # The series arrives over the page's websocket while the chart loads, so listen from the start
+    collector = SeriesCollector() if series and NUMPY_AVAILABLE else None
+    if collector is not None:
+        collector.attach(page)
+    try:
+        await _load_and_screenshot(page, url, output_path, wait_time, ready_timeout, timing, label)
+    finally:
+        if collector is not None:
+            collector.detach(page)
+    if collector is not None:
+        save_chart_series(collector, timing, label)
+    timing.total_ms = (time.perf_counter() - start) * 1000
+    return timing
+
+
+async def _load_and_screenshot(
+    page: Page,
+    url: str,
+    output_path: str,
+    wait_time: int,
+    ready_timeout: Optional[int],
+    timing: ChartTiming,
+    label: str,
+) -> None:
+    start = time.perf_counter()
+
+    print(f"{label}Navigating to {url}...")
+    if ready_timeout is None:
+        await page.goto(url)
+    else:
+        # Readiness detection covers the rest of the load, so start polling early
+        await page.goto(url, wait_until="domcontentloaded")
+    loaded = time.perf_counter()
+    timing.navigate_ms = (loaded - start) * 1000
 
     # Wait for chart to fully load
-    print(f"Waiting {wait_time}ms for chart to load...")
-    await page.wait_for_timeout(wait_time)
+    if ready_timeout is None:
+        print(f"{label}Waiting {wait_time}ms for chart to load...")
+        await page.wait_for_timeout(wait_time)
+    else:
+        readiness = await wait_for_chart_ready(page, timeout=ready_timeout, fallback_wait=wait_time)
+        timing.ready = readiness.ready
+        if readiness.ready:
+            print(f"{label}Chart ready after {readiness.elapsed_ms:.0f}ms")
+        else:
+            print(f"{label}Chart not ready after {ready_timeout}ms, fell back to {wait_time}ms wait")
+    ready = time.perf_counter()
+    timing.load_ms = (ready - loaded) * 1000
 
     # Take screenshot with high quality settings
-    print(f"Capturing screenshot to {output_path}...")
+    print(f"{label}Capturing screenshot to {output_path}...")
     await page.screenshot(
         path=output_path,
         type="png",  # PNG format (lossless)
         full_page=False,  # Capture viewport only
     )
-    print(f"✓ Saved {output_path}\n")
+    timing.screenshot_ms = (time.perf_counter() - ready) * 1000
+    print(f"{label}✓ Saved {output_path}\n")
+
+
+def save_chart_series(collector: SeriesCollector, timing: ChartTiming, label: str = "") -> None:
+    """Write the main series a collector saw next to the screenshot and record it on the timing.
+
+    A missing or unwritable series is reported but does not fail the capture.
+
+    Args:
+        collector: Collector that listened while the chart loaded
+        timing: Timing record of the capture
+        label: Log prefix
+    """
+    chart_series = collector.main_series()
+    if chart_series is None:
+        print(f"{label}No OHLCV data seen on the page websocket")
+        return
+    series_path = Path(timing.output_path).with_suffix(".npz")
+    try:
+        timing.bars = save_series(chart_series, series_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"{label}✗ Could not save OHLCV series: {e}")
+        return
+    timing.series_path = str(series_path)
+    timing.symbol = chart_series.symbol
+    print(f"{label}✓ Saved {timing.bars} bars of {chart_series.symbol or 'unknown symbol'} to {series_path}")
+
+
+async def capture_charts_sequential(
+    page: Page,
+    charts: list[tuple[str, str]],
+    date_dir: Path,
+    timestamp: str,
+    wait_time: int = 3000,
+    ready_timeout: Optional[int] = 10000,
+    series: bool = False,
+) -> list[ChartTiming]:
+    """Capture charts one after another on a single page.
+
+    Args:
+        page: Playwright page to reuse for every chart
+        charts: List of (URL, timeframe) pairs
+        date_dir: Directory to write screenshots into
+        timestamp: Timestamp shared by all filenames in this cycle
+        wait_time: Fixed or fallback chart load wait (milliseconds)
+        ready_timeout: Readiness detection timeout (milliseconds), or None for a fixed wait
+        series: Also save each chart's OHLCV series
+
+    Returns:
+        Timing record for each chart, in input order
+    """
+    timings = []
+    for url, timeframe in charts:
+        output_path = date_dir / get_chart_filename(timeframe, timestamp)
+        try:
+            timings.append(
+                await capture_chart(page, url, str(output_path), wait_time, timeframe, ready_timeout, series)
+            )
+        except Exception as e:
+            print(f"[{timeframe}] ✗ Capture failed: {e}\n")
+            timings.append(ChartTiming(timeframe=timeframe, url=url, output_path=str(output_path), error=str(e)))
+    return timings
+
+
+async def capture_charts_parallel(
+    context: BrowserContext,
+    charts: list[tuple[str, str]],
+    date_dir: Path,
+    timestamp: str,
+    concurrency: int = 4,
+    wait_time: int = 3000,
+    ready_timeout: Optional[int] = 10000,
+    series: bool = False,
+) -> list[ChartTiming]:
+    """Capture charts concurrently using a pool of pages (tabs) in one context.
+
+    At most ``concurrency`` pages are open at once; each chart borrows a page
+    from the pool and returns it when its screenshot is written.
+
+    Args:
+        context: Browser context to open pages in
+        charts: List of (URL, timeframe) pairs
+        date_dir: Directory to write screenshots into
+        timestamp: Timestamp shared by all filenames in this cycle
+        concurrency: Maximum number of charts loading at the same time
+        wait_time: Fixed or fallback chart load wait (milliseconds)
+        ready_timeout: Readiness detection timeout (milliseconds), or None for a fixed wait
+        series: Also save each chart's OHLCV series
+
+    Returns:
+        Timing record for each chart, in input order
+    """
+    if concurrency < 1:
+        msg = f"concurrency must be at least 1, got {concurrency}"
+        raise ValueError(msg)
+
+    pool: asyncio.Queue[Page] = asyncio.Queue()
+    existing = list(context.pages)
+    opened: list[Page] = []
+    for i in range(min(concurrency, len(charts))):
+        if i < len(existing):
+            pool.put_nowait(existing[i])
+        else:
+            page = await context.new_page()
+            opened.append(page)
+            pool.put_nowait(page)
+
+    async def run(url: str, timeframe: str) -> ChartTiming:
+        output_path = date_dir / get_chart_filename(timeframe, timestamp)
+        page = await pool.get()
+        try:
+            return await capture_chart(page, url, str(output_path), wait_time, timeframe, ready_timeout, series)
+        except Exception as e:
+            print(f"[{timeframe}] ✗ Capture failed: {e}\n")
+            return ChartTiming(timeframe=timeframe, url=url, output_path=str(output_path), error=str(e))
+        finally:
+            pool.put_nowait(page)
+
+    try:
+        return list(await asyncio.gather(*(run(url, timeframe) for url, timeframe in charts)))
+    finally:
+        # Close the extra tabs so the profile reopens with a single page next time
+        for page in opened:
+            await page.close()
+
+
+def detect_changes(index: ChartIndex, timings: list[ChartTiming], detector: ChangeDetector) -> list[ChartChange]:
+    """Compare each new chart with the latest indexed chart of its timeframe.
+
+    Must run before index_captures(), while the index still points at the previous
+    captures. Unchanged charts get ``same_as`` set on their timing record.
+
+    Args:
+        index: Chart index holding the previous captures
+        timings: Timing records from a capture cycle
+        detector: Change detector to compare with
+
+    Returns:
+        Comparison outcome for each successful capture
+    """
+    changes = []
+    for timing in timings:
+        if not timing.ok:
+            continue
+        previous = index.latest([timing.timeframe]).get(timing.timeframe)
+        original = index.same_as(previous) if previous is not None else None
+        change = detector.check(timing.output_path, previous, original, timing.timeframe)
+        if change.same_as is not None:
+            timing.same_as = str(change.same_as)
+        changes.append(change)
+    return changes
+
+
+def index_captures(index: ChartIndex, timings: list[ChartTiming]) -> int:
+    """Record successfully captured charts in the chart index.
+
+    Args:
+        index: Chart index to write to
+        timings: Timing records from a capture cycle
+
+    Returns:
+        Number of charts indexed
+    """
+    same_as = {Path(t.output_path): Path(t.same_as) for t in timings if t.ok and t.same_as}
+    for t in timings:
+        if t.ok and t.series_path:
+            index.add_series(t.series_path, t.symbol, t.bars)
+    indexed: int = index.add_many([Path(t.output_path) for t in timings if t.ok], same_as)
+    return indexed
+
+
+def format_timing_report(timings: list[ChartTiming], cycle_ms: float) -> str:
+    """Format per-chart timings as a plain-text table.
+
+    Args:
+        timings: Timing records from a capture cycle
+        cycle_ms: Wall-clock duration of the whole cycle (milliseconds)
+
+    Returns:
+        Multi-line report string
+    """
+    lines = [
+        f"{'timeframe':<10}{'navigate':>10}{'load':>10}{'shot':>10}{'total':>10}  status",
+    ]
+    for t in timings:
+        if not t.ok:
+            status = f"error: {t.error}"
+        elif t.ready is False:
+            status = "ok (fallback wait)"
+        else:
+            status = "ok"
+        if t.unchanged:
+            status += " (unchanged)"
+        if t.series_path:
+            status += f" ({t.bars} bars)"
+        lines.append(
+            f"{t.timeframe:<10}{t.navigate_ms:>8.0f}ms{t.load_ms:>8.0f}ms"
+            f"{t.screenshot_ms:>8.0f}ms{t.total_ms:>8.0f}ms  {status}"
+        )
+    serial_ms = sum(t.total_ms for t in timings)
+    lines.append(f"cycle: {cycle_ms:.0f}ms (sum of charts: {serial_ms:.0f}ms)")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Capture TradingView charts with Playwright.")
+    parser.add_argument(
+        "--sequential", action="store_true", help="Capture charts one at a time on a single page (old behaviour)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=len(CHARTS), help="Maximum pages capturing at once (default: all charts)"
+    )
+    parser.add_argument(
+        "--wait-time", type=int, default=3000, help="Fixed chart load wait, or readiness fallback, in milliseconds"
+    )
+    parser.add_argument("--ready-timeout", type=int, default=10000, help="Readiness detection timeout in milliseconds")
+    parser.add_argument(
+        "--fixed-wait", action="store_true", help="Skip readiness detection and always wait --wait-time"
+    )
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a visible window")
+    add_change_arguments(parser)
+    add_series_argument(parser)
+    return parser.parse_args(argv)
 
 
-async def main() -> None:
+def add_series_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --series option shared by the capture commands."""
+    parser.add_argument(
+        "--series",
+        action="store_true",
+        help='Also save the OHLCV series behind each chart as .npz (needs numpy: pip install "cyclebot[data]")',
+    )
+
+
+def add_change_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the change detection options shared by the capture commands."""
+    parser.add_argument(
+        "--ignore-region",
+        type=parse_crop,
+        action="append",
+        default=[],
+        metavar="LEFT,TOP,RIGHT,BOTTOM",
+        help="Chart area to leave out of change detection, e.g. the bar close countdown (repeatable)",
+    )
+    parser.add_argument(
+        "--keep-duplicates", action="store_true", help="Keep unchanged charts as copies instead of hard links"
+    )
+
+
+async def main(argv: Optional[list[str]] = None) -> None:
     """Capture multiple TradingView charts using a persistent Chrome profile."""
-    # Profile directory (same as used by hello.py)
-    profile_dir = Path.home() / ".config" / "cyclebot" / "chrome-profile-tradingview"
+    args = parse_args(argv)
 
     # Get chart directory and timestamp using common module
-    date_dir = get_chart_directory()
+    date_dir = await get_chart_directory_async()
     timestamp = get_chart_timestamp()
 
-    # Chart definitions: (URL, timeframe_suffix)
-    charts = [
-        ("https://www.tradingview.com/chart/obJz7jBz/", "1h"),
-        ("https://www.tradingview.com/chart/gVH3aqxp/", "30m"),
-        ("https://www.tradingview.com/chart/KXmakFlc/", "15m"),
-        ("https://www.tradingview.com/chart/hCHhBALH/", "5m"),
-    ]
-
     print("=== TradingView Chart Capture ===\n")
-    print(f"Using Chrome profile: {profile_dir}")
+    print(f"Using Chrome profile: {PROFILE_DIR}")
     print(f"Output directory: {date_dir}")
-    print(f"Timestamp: {timestamp}\n")
+    print(f"Timestamp: {timestamp}")
+    print(f"Mode: {'sequential' if args.sequential else f'parallel (concurrency={args.concurrency})'}\n")
 
-    async with async_playwright() as p:
-        # Launch Chrome with persistent profile
-        # Note: --password-store=basic is critical to avoid cookie encryption issues
-        browser = await p.chromium.launch_persistent_context(
-            user_data_dir=str(profile_dir),
-            headless=False,  # Set to True for headless mode
-            channel="chrome",  # Use Chrome instead of Chromium
-            viewport={"width": 1920, "height": 1080},  # Full HD resolution
-            args=[
-                "--password-store=basic",  # Avoid keyring encryption issues on Linux
-                "--no-sandbox",  # May be needed depending on environment
-                "--window-size=1920,1080",  # Set window size to match viewport
-            ],
-        )
+    ready_timeout = None if args.fixed_wait else args.ready_timeout
+    if args.series and not NUMPY_AVAILABLE:
+        print('numpy is not installed; capturing screenshots only (pip install "cyclebot[data]")\n')
 
-        # Get the first page (or create new one)
-        page = browser.pages[0] if browser.pages else await browser.new_page()
+    async with async_playwright() as p:
+        browser = await launch_browser(p, headless=args.headless)
 
-        # Capture all charts using the same browser session
-        for url, timeframe in charts:
-            # Create filename using common module
-            filename = get_chart_filename(timeframe, timestamp)
-            output_path = date_dir / filename
-            await capture_chart(page, url, str(output_path))
+        start = time.perf_counter()
+        if args.sequential:
+            # Get the first page (or create new one)
+            page = browser.pages[0] if browser.pages else await browser.new_page()
+            timings = await capture_charts_sequential(
+                page, CHARTS, date_dir, timestamp, args.wait_time, ready_timeout, args.series
+            )
+        else:
+            timings = await capture_charts_parallel(
+                browser, CHARTS, date_dir, timestamp, args.concurrency, args.wait_time, ready_timeout, args.series
+            )
+        cycle_ms = (time.perf_counter() - start) * 1000
 
         # Close browser
         await browser.close()
 
-    print("All charts captured successfully!")
+    with ChartIndex() as index:
+        detect_changes(index, timings, ChangeDetector(ignore=args.ignore_region, link=not args.keep_duplicates))
+        index_captures(index, timings)
+
+    print(format_timing_report(timings, cycle_ms))
+    failed = [t for t in timings if not t.ok]
+    if failed:
+        print(f"\n{len(failed)} of {len(timings)} charts failed.")
+    else:
+        print("\nAll charts captured successfully!")
 
 
 if __name__ == "__main__":
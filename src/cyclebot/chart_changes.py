@@ -0,0 +1,249 @@
+"""Detect charts that have not changed since the previous capture.
+
+Outside market hours, and on the higher timeframes between candle closes, a new
+capture is often the same picture as the last one. Every capture is compared with
+the previous chart of its timeframe in two steps, on a small grayscale thumbnail:
+
+1. A 64-bit difference hash (dHash). A hash distance above ``max_distance`` means
+   the chart visibly moved and no pixel comparison is needed.
+2. A pixel diff, which counts thumbnail pixels whose brightness changed by more
+   than ``pixel_threshold``. A new candle or a moved price line changes far more
+   than ``max_changed_fraction`` of the thumbnail, while render noise does not.
+
+TradingView keeps a few parts of the chart ticking even when prices stand still,
+such as the countdown to the bar close on the price axis. Pass those areas as
+``ignore`` regions, in source pixels.
+
+An unchanged capture is replaced by a hard link to the chart it duplicates, so it
+costs no extra space on the share, and is recorded as such in the chart index. The
+analysis can then skip the vision call for it. Comparing images needs Pillow
+(pip install "cyclebot[images]"). Without it only byte-identical captures count as
+unchanged.
+
+Example:
+    >>> detector = ChangeDetector(ignore=[(1840, 0, 1920, 1080)])
+    >>> change = detector.check(new_path, previous_path, timeframe="1h")
+    >>> change.unchanged
+    True
+"""
+
+import contextlib
+import hashlib
+import importlib.util
+import logging
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Width of the grayscale thumbnail that charts are compared on
+THUMBNAIL_WIDTH = 640
+
+Box = tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class ChartChange:
+    """Outcome of comparing a capture with the previous chart of its timeframe."""
+
+    path: Path
+    previous: Optional[Path] = None
+    same_as: Optional[Path] = None
+    distance: Optional[int] = None
+    changed_fraction: Optional[float] = None
+    linked: bool = False
+
+    @property
+    def unchanged(self) -> bool:
+        """Whether the capture duplicates an earlier chart."""
+        return self.same_as is not None
+
+
+@dataclass(frozen=True)
+class _Fingerprint:
+    digest: str
+    thumbnail: Optional["Image.Image"] = None
+    dhash: Optional[int] = None
+
+
+def dhash(image: "Image.Image") -> int:
+    """Compute the 64-bit difference hash of an image.
+
+    Each bit records whether a pixel of a 9x8 grayscale version of the image is
+    brighter than its right-hand neighbour.
+
+    Args:
+        image: Image to hash
+
+    Returns:
+        Hash as an integer
+    """
+    from PIL import Image
+
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.BOX).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+class ChangeDetector:
+    """Compare captures with the previous chart of their timeframe."""
+
+    def __init__(
+        self,
+        max_distance: int = 6,
+        pixel_threshold: int = 24,
+        max_changed_fraction: float = 0.0005,
+        ignore: Sequence[Box] = (),
+        link: bool = True,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            max_distance: Largest dHash distance still compared pixel by pixel
+            pixel_threshold: Brightness difference (0-255) for a thumbnail pixel to count as changed
+            max_changed_fraction: Largest fraction of changed thumbnail pixels for a chart to count as unchanged
+            ignore: Regions to leave out of the comparison, as (left, top, right, bottom) in source pixels
+            link: Replace unchanged captures with a hard link to the chart they duplicate
+        """
+        self.max_distance = max_distance
+        self.pixel_threshold = pixel_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.ignore = list(ignore)
+        self.link = link
+        # Fingerprint of the last capture per timeframe, so a long-running caller never rereads it from the share
+        self._last: dict[str, tuple[Path, _Fingerprint]] = {}
+
+    def _fingerprint(self, path: Path) -> _Fingerprint:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if not PILLOW_AVAILABLE:
+            return _Fingerprint(digest)
+
+        import io
+
+        from PIL import Image, ImageDraw
+
+        with Image.open(io.BytesIO(data)) as source:
+            image = source.convert("L")
+        if self.ignore:
+            draw = ImageDraw.Draw(image)
+            for box in self.ignore:
+                draw.rectangle(box, fill=0)
+        width = min(THUMBNAIL_WIDTH, image.width)
+        height = max(1, round(image.height * width / image.width))
+        thumbnail = image.resize((width, height), Image.Resampling.BOX)
+        return _Fingerprint(digest, thumbnail, dhash(thumbnail))
+
+    def _cached(self, path: Path, timeframe: Optional[str]) -> _Fingerprint:
+        if timeframe is not None:
+            cached = self._last.get(timeframe)
+            if cached is not None and cached[0] == path:
+                return cached[1]
+        return self._fingerprint(path)
+
+    def compare(self, new: _Fingerprint, previous: _Fingerprint) -> tuple[bool, Optional[int], Optional[float]]:
+        """Decide whether two fingerprints show the same chart.
+
+        Returns:
+            (unchanged, dHash distance, fraction of changed thumbnail pixels)
+        """
+        if new.digest == previous.digest:
+            return True, 0, 0.0
+        if new.thumbnail is None or previous.thumbnail is None or new.dhash is None or previous.dhash is None:
+            return False, None, None
+        if new.thumbnail.size != previous.thumbnail.size:
+            return False, None, None
+
+        distance = bin(new.dhash ^ previous.dhash).count("1")
+        if distance > self.max_distance:
+            return False, distance, None
+
+        from PIL import ImageChops
+
+        diff = ImageChops.difference(new.thumbnail, previous.thumbnail)
+        changed = sum(diff.histogram()[self.pixel_threshold + 1 :])
+        fraction = changed / (diff.width * diff.height)
+        return fraction <= self.max_changed_fraction, distance, fraction
+
+    def check(
+        self,
+        path: Union[str, Path],
+        previous: Optional[Union[str, Path]],
+        original: Optional[Union[str, Path]] = None,
+        timeframe: Optional[str] = None,
+    ) -> ChartChange:
+        """Compare a capture with the previous chart and deduplicate it if unchanged.
+
+        Args:
+            path: The new capture
+            previous: The previous chart of the same timeframe, or None for the first capture
+            original: The chart ``previous`` itself duplicates, if any, so links never chain
+            timeframe: Timeframe of the capture; remembers its fingerprint for the next check
+
+        Returns:
+            The comparison outcome
+        """
+        path = Path(path)
+        try:
+            fingerprint = self._fingerprint(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read %s for change detection: %s", path, e)
+            return ChartChange(path, Path(previous) if previous else None)
+        if previous is None:
+            if timeframe is not None:
+                self._last[timeframe] = (path, fingerprint)
+            return ChartChange(path)
+
+        previous = Path(previous)
+        try:
+            # Look the previous chart up before remembering this one, or the cache never matches
+            previous_fingerprint = self._cached(previous, timeframe)
+            unchanged, distance, fraction = self.compare(fingerprint, previous_fingerprint)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read %s for change detection: %s", previous, e)
+            return ChartChange(path, previous)
+        finally:
+            if timeframe is not None:
+                self._last[timeframe] = (path, fingerprint)
+        if not unchanged:
+            return ChartChange(path, previous, distance=distance, changed_fraction=fraction)
+
+        same_as = Path(original) if original is not None else previous
+        linked = self.link and link_duplicate(path, same_as)
+        return ChartChange(path, previous, same_as, distance, fraction, linked)
+
+
+def link_duplicate(path: Path, original: Path) -> bool:
+    """Replace a file with a hard link to the file it duplicates.
+
+    The link is made next to ``path`` and renamed over it, so ``path`` always
+    exists. Filesystems without hard links keep the copy.
+
+    Args:
+        path: Duplicate file to replace
+        original: File to link to
+
+    Returns:
+        Whether the file was replaced
+    """
+    temporary = path.with_name(f".{path.name}.link")
+    try:
+        os.link(original, temporary)
+        temporary.replace(path)
+    except OSError as e:
+        with contextlib.suppress(OSError):
+            temporary.unlink()
+        logger.debug("Keeping %s as a copy of %s: %s", path, original, e)
+        return False
+    return True
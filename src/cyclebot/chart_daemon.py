@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Long-running chart capture daemon.
+
+Keeps one persistent Chrome context warm and captures each timeframe on its own
+wall-clock schedule (5m charts every 5 minutes, 1h charts every hour, ...), so the
+cost of launching the browser and loading the profile is paid once rather than on
+every capture. If the browser crashes or is closed, it is relaunched on the next
+due cycle.
+
+Run with: python -m cyclebot.chart_daemon
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from playwright.async_api import BrowserContext, Playwright, async_playwright
+
+from cyclebot.chart import get_chart_directory_async, get_chart_timestamp
+from cyclebot.chart_capture import (
+    CHARTS,
+    ChartTiming,
+    add_change_arguments,
+    add_series_argument,
+    capture_charts_parallel,
+    detect_changes,
+    index_captures,
+    launch_browser,
+)
+from cyclebot.chart_changes import ChangeDetector
+from cyclebot.chart_index import ChartIndex
+
+# Capture interval per timeframe (seconds)
+SCHEDULES: dict[str, int] = {"1h": 3600, "30m": 1800, "15m": 900, "5m": 300}
+
+
+def next_run_time(now: float, interval: int, offset: float = 0.0) -> float:
+    """Get the next wall-clock boundary for an interval, like a cron schedule.
+
+    Args:
+        now: Current time (seconds since the epoch)
+        interval: Schedule interval in seconds
+        offset: Seconds after the boundary to run, e.g. to let the candle close
+
+    Returns:
+        Epoch time of the next run strictly after ``now``
+    """
+    boundary = (now - offset) // interval * interval + offset
+    return boundary + interval
+
+
+@dataclass
+class CaptureStats:
+    """Running counters and latency percentiles for the daemon."""
+
+    captures: int = 0
+    unchanged: int = 0
+    failures: int = 0
+    cycles: int = 0
+    browser_restarts: int = 0
+    started_at: float = field(default_factory=time.time)
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record(self, timing: ChartTiming) -> None:
+        """Record the outcome of one chart capture."""
+        if timing.ok:
+            self.captures += 1
+            self.unchanged += timing.unchanged
+            self.latencies_ms.append(timing.total_ms)
+        else:
+            self.failures += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get a latency percentile (nearest rank) over recent successful captures."""
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> dict[str, Optional[float]]:
+        """Get a JSON-serialisable snapshot of the stats."""
+        return {
+            "captures": self.captures,
+            "unchanged": self.unchanged,
+            "failures": self.failures,
+            "cycles": self.cycles,
+            "browser_restarts": self.browser_restarts,
+            "uptime_s": round(time.time() - self.started_at),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+        }
+
+
+class CaptureDaemon:
+    """Capture charts on a per-timeframe schedule using a warm browser context."""
+
+    def __init__(
+        self,
+        charts: Optional[list[tuple[str, str]]] = None,
+        schedules: Optional[dict[str, int]] = None,
+        offset: float = 5.0,
+        concurrency: int = 4,
+        wait_time: int = 3000,
+        ready_timeout: Optional[int] = 10000,
+        headless: bool = False,
+        stats_file: Optional[Path] = None,
+        detector: Optional[ChangeDetector] = None,
+        series: bool = False,
+    ) -> None:
+        """Initialize the daemon.
+
+        Args:
+            charts: List of (URL, timeframe) pairs. Defaults to chart_capture.CHARTS.
+            schedules: Capture interval in seconds per timeframe. Defaults to SCHEDULES.
+            offset: Seconds after each schedule boundary to capture
+            concurrency: Maximum pages capturing at once
+            wait_time: Fixed or fallback chart load wait (milliseconds)
+            ready_timeout: Readiness detection timeout (milliseconds), or None for a fixed wait
+            headless: Run Chrome without a visible window
+            stats_file: Optional path to write a JSON stats snapshot after every cycle
+            detector: Change detector for unchanged charts. Defaults to ChangeDetector().
+            series: Also save each chart's OHLCV series next to the screenshot
+        """
+        self.charts = charts if charts is not None else CHARTS
+        self.schedules = schedules if schedules is not None else SCHEDULES
+        self.offset = offset
+        self.concurrency = concurrency
+        self.wait_time = wait_time
+        self.ready_timeout = ready_timeout
+        self.headless = headless
+        self.stats_file = stats_file
+        self.detector = detector if detector is not None else ChangeDetector()
+        self.series = series
+        self.stats = CaptureStats()
+        self._context: Optional[BrowserContext] = None
+        self._stop = asyncio.Event()
+
+        missing = {tf for _, tf in self.charts} - set(self.schedules)
+        if missing:
+            msg = f"No schedule for timeframes: {sorted(missing)}"
+            raise ValueError(msg)
+
+        self.index = ChartIndex()
+
+    def stop(self) -> None:
+        """Ask the daemon to exit after the current cycle."""
+        self._stop.set()
+
+    async def _ensure_browser(self, playwright: Playwright) -> BrowserContext:
+        """Return the warm browser context, relaunching it if it has gone away."""
+        if self._context is not None:
+            return self._context
+
+        if self.stats.cycles > 0:
+            self.stats.browser_restarts += 1
+            print("Browser is gone, relaunching...")
+        context = await launch_browser(playwright, headless=self.headless)
+        context.on("close", lambda _: self._forget_browser(context))
+        self._context = context
+        return context
+
+    def _forget_browser(self, context: BrowserContext) -> None:
+        """Drop a context that has closed or crashed so the next cycle relaunches it."""
+        if self._context is context:
+            self._context = None
+
+    async def _discard_browser(self) -> None:
+        """Close the current context, ignoring errors from an already-dead browser."""
+        context, self._context = self._context, None
+        if context is not None:
+            with contextlib.suppress(Exception):
+                await context.close()
+
+    async def run_cycle(self, playwright: Playwright, timeframes: list[str]) -> list[ChartTiming]:
+        """Capture all charts for the given timeframes once.
+
+        Args:
+            playwright: Running Playwright instance
+            timeframes: Timeframes that are due
+
+        Returns:
+            Timing record for each captured chart
+        """
+        charts = [(url, tf) for url, tf in self.charts if tf in timeframes]
+        timestamp = get_chart_timestamp()
+
+        try:
+            date_dir = await get_chart_directory_async()
+            context = await self._ensure_browser(playwright)
+            timings: list[ChartTiming] = await capture_charts_parallel(
+                context, charts, date_dir, timestamp, self.concurrency, self.wait_time, self.ready_timeout, self.series
+            )
+        except Exception as e:
+            print(f"✗ Capture cycle failed: {e}")
+            timings = [ChartTiming(timeframe=tf, url=url, output_path="", error=str(e)) for url, tf in charts]
+
+        # Every chart failing usually means the browser itself is broken
+        if timings and not any(t.ok for t in timings):
+            await self._discard_browser()
+
+        # Image comparison and SQLite writes block, so they run off the event loop; a failure
+        # there (a locked index, a chart being rewritten) must not stop the daemon
+        try:
+            await asyncio.to_thread(detect_changes, self.index, timings, self.detector)
+        except Exception as e:
+            print(f"✗ Change detection failed: {e}")
+        self.stats.cycles += 1
+        for timing in timings:
+            self.stats.record(timing)
+        try:
+            await asyncio.to_thread(index_captures, self.index, timings)
+        except Exception as e:
+            print(f"✗ Indexing captures failed: {e}")
+        return timings
+
+    def report_stats(self) -> None:
+        """Log the stats snapshot and write it to the stats file if configured."""
+        summary = self.stats.summary()
+        print(f"Stats: {json.dumps(summary)}")
+        if self.stats_file is not None:
+            self.stats_file.write_text(json.dumps(summary, indent=2))
+
+    async def run(self) -> None:
+        """Run capture cycles until stop() is called."""
+        now = time.time()
+        next_runs = {tf: next_run_time(now, interval, self.offset) for tf, interval in self.schedules.items()}
+
+        async with async_playwright() as playwright:
+            # Warm the browser up front so the first scheduled capture doesn't pay for it
+            await self._ensure_browser(playwright)
+            try:
+                while not self._stop.is_set():
+                    wake_at = min(next_runs.values())
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, wake_at - time.time()))
+                    if self._stop.is_set():
+                        break
+
+                    now = time.time()
+                    due = [tf for tf, at in next_runs.items() if at <= now]
+                    for tf in due:
+                        next_runs[tf] = next_run_time(now, self.schedules[tf], self.offset)
+
+                    print(f"=== Capturing {', '.join(due)} ===")
+                    await self.run_cycle(playwright, due)
+                    self.report_stats()
+            finally:
+                await self._discard_browser()
+                self.index.close()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Capture TradingView charts on a schedule with a warm browser.")
+    parser.add_argument("--offset", type=float, default=5.0, help="Seconds after each boundary to capture")
+    parser.add_argument("--concurrency", type=int, default=len(CHARTS), help="Maximum pages capturing at once")
+    parser.add_argument(
+        "--wait-time", type=int, default=3000, help="Fixed chart load wait, or readiness fallback, in milliseconds"
+    )
+    parser.add_argument("--ready-timeout", type=int, default=10000, help="Readiness detection timeout in milliseconds")
+    parser.add_argument(
+        "--fixed-wait", action="store_true", help="Skip readiness detection and always wait --wait-time"
+    )
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a visible window")
+    parser.add_argument("--stats-file", type=Path, help="Write a JSON stats snapshot here after every cycle")
+    add_change_arguments(parser)
+    add_series_argument(parser)
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> None:
+    """Run the capture daemon until interrupted."""
+    args = parse_args(argv)
+    daemon = CaptureDaemon(
+        offset=args.offset,
+        concurrency=args.concurrency,
+        wait_time=args.wait_time,
+        ready_timeout=None if args.fixed_wait else args.ready_timeout,
+        headless=args.headless,
+        stats_file=args.stats_file,
+        detector=ChangeDetector(ignore=args.ignore_region, link=not args.keep_duplicates),
+        series=args.series,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, daemon.stop)
+
+    print("=== TradingView Chart Capture Daemon ===\n")
+    for tf, interval in daemon.schedules.items():
+        print(f"  {tf}: every {interval // 60} minutes")
+    print()
+
+    await daemon.run()
+    print("Daemon stopped.")
+    daemon.report_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
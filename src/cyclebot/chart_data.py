@@ -0,0 +1,249 @@
+"""OHLCV series captured from TradingView pages alongside the screenshots.
+
+TradingView streams chart data to the page over a websocket
+(``wss://data.tradingview.com/socket.io/websocket``). Every websocket message
+packs one or more frames as ``~m~<length>~m~<payload>``, where the payload is a
+JSON message or a ``~h~<n>`` heartbeat. ``timescale_update`` (history) and ``du``
+(live updates) messages carry the bars of each series on the page:
+
+    {"m": "timescale_update", "p": ["cs_x", {"sds_1": {"s": [{"i": 0, "v": [time, open, high, low, close, volume]}]}}]}
+
+The page's own ``create_series``/``modify_series`` messages give each series its
+resolution, and ``symbol_resolved`` names its symbol.
+
+SeriesCollector listens to a page's websockets while a chart loads. The main
+series is then written next to the screenshot as an uncompressed ``.npz``: one
+NumPy array per column plus the symbol and resolution, so analysis can load only
+the columns it needs and works on a few kilobytes of numbers instead of a
+megabyte-sized image. Saving and loading need NumPy (pip install "cyclebot[data]").
+
+Example:
+    >>> collector = SeriesCollector()
+    >>> collector.attach(page)
+    >>> await page.goto(url)
+    >>> series = collector.main_series()
+    >>> save_series(series, "2025-11-19_15-30-45-1h.npz")
+"""
+
+import importlib.util
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+    from playwright.async_api import Page, WebSocket
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Column order of a bar in TradingView messages and of the arrays in a series file
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+# The chart's main price series; other series on the page are compare symbols
+MAIN_SERIES_ID = "sds_1"
+
+_FRAME_MARKER = "~m~"
+_HEARTBEAT = "~h~"
+
+
+def parse_frames(payload: Union[str, bytes]) -> list[Any]:
+    """Split a TradingView websocket message into its decoded JSON messages.
+
+    Heartbeats and payloads that are not JSON are skipped.
+
+    Args:
+        payload: Raw websocket message
+
+    Returns:
+        Decoded messages in order
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8", errors="replace")
+    messages = []
+    pos = 0
+    while payload.startswith(_FRAME_MARKER, pos):
+        length_end = payload.find(_FRAME_MARKER, pos + len(_FRAME_MARKER))
+        if length_end < 0:
+            break
+        try:
+            length = int(payload[pos + len(_FRAME_MARKER) : length_end])
+        except ValueError:
+            break
+        start = length_end + len(_FRAME_MARKER)
+        body = payload[start : start + length]
+        pos = start + length
+        if body.startswith(_HEARTBEAT):
+            continue
+        try:
+            messages.append(json.loads(body))
+        except ValueError:
+            continue
+    return messages
+
+
+@dataclass
+class Series:
+    """Bars of one series on a chart page, by bar time."""
+
+    series_id: str
+    symbol: Optional[str] = None
+    resolution: Optional[str] = None
+    bars: dict[float, list[Optional[float]]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        """Number of bars."""
+        return len(self.bars)
+
+    def rows(self) -> list[list[float]]:
+        """Bars oldest first as [time, open, high, low, close, volume]; missing or null values are NaN."""
+        return [self._row(self.bars[bar_time]) for bar_time in sorted(self.bars)]
+
+    @staticmethod
+    def _row(values: list[Optional[float]]) -> list[float]:
+        row = [float("nan") if value is None else float(value) for value in values[: len(COLUMNS)]]
+        return row + [float("nan")] * (len(COLUMNS) - len(row))
+
+
+class SeriesCollector:
+    """Collect the series a TradingView page streams over its websockets."""
+
+    def __init__(self) -> None:
+        """Initialize an empty collector."""
+        self.series: dict[str, Series] = {}
+        self._symbols: dict[str, str] = {}
+        self._series_symbols: dict[str, str] = {}
+
+    def _get(self, series_id: str) -> Series:
+        series = self.series.get(series_id)
+        if series is None:
+            series = self.series[series_id] = Series(series_id)
+        return series
+
+    def feed(self, payload: Union[str, bytes]) -> None:
+        """Handle a message the server sent to the page."""
+        for message in parse_frames(payload):
+            if not isinstance(message, dict) or not isinstance(message.get("p"), list):
+                continue
+            method, params = message.get("m"), message["p"]
+            if method in ("timescale_update", "du") and len(params) > 1 and isinstance(params[1], dict):
+                for series_id, data in params[1].items():
+                    bars = data.get("s") if isinstance(data, dict) else None
+                    if isinstance(bars, list):
+                        self._add_bars(series_id, bars)
+            elif method == "symbol_resolved" and len(params) > 2 and isinstance(params[2], dict):
+                info = params[2]
+                name = info.get("pro_name") or info.get("full_name") or info.get("name")
+                if name:
+                    self._symbols[str(params[1])] = str(name)
+
+    def feed_sent(self, payload: Union[str, bytes]) -> None:
+        """Handle a message the page sent to the server."""
+        for message in parse_frames(payload):
+            if not isinstance(message, dict) or not isinstance(message.get("p"), list):
+                continue
+            params = message["p"]
+            # [chart session, series id, series key, symbol id, resolution, ...]
+            if message.get("m") in ("create_series", "modify_series") and len(params) > 4:
+                series = self._get(str(params[1]))
+                series.resolution = str(params[4])
+                self._series_symbols[series.series_id] = str(params[3])
+
+    def _add_bars(self, series_id: str, bars: list[Any]) -> None:
+        series = self._get(series_id)
+        for bar in bars:
+            values = bar.get("v") if isinstance(bar, dict) else None
+            if isinstance(values, list) and len(values) >= 5 and isinstance(values[0], (int, float)):
+                series.bars[float(values[0])] = values
+
+    def main_series(self) -> Optional[Series]:
+        """The chart's main price series with its symbol filled in, or None if no bars arrived."""
+        series = self.series.get(MAIN_SERIES_ID)
+        if series is None or not series.bars:
+            candidates = [s for s in self.series.values() if s.bars]
+            if not candidates:
+                return None
+            series = max(candidates, key=len)
+        symbol_id = self._series_symbols.get(series.series_id)
+        if symbol_id is not None and symbol_id in self._symbols:
+            series.symbol = self._symbols[symbol_id]
+        return series
+
+    def attach(self, page: "Page") -> None:
+        """Start listening to the websockets a page opens. Attach before navigating."""
+        page.on("websocket", self._on_websocket)
+
+    def detach(self, page: "Page") -> None:
+        """Stop listening for new websockets on a page."""
+        page.remove_listener("websocket", self._on_websocket)
+
+    def _on_websocket(self, websocket: "WebSocket") -> None:
+        if "socket.io/websocket" in websocket.url:
+            websocket.on("framereceived", self.feed)
+            websocket.on("framesent", self.feed_sent)
+
+
+@dataclass(frozen=True)
+class OHLCV:
+    """A saved series: one array per column, oldest bar first."""
+
+    symbol: Optional[str]
+    resolution: Optional[str]
+    time: "np.ndarray"
+    open: "np.ndarray"
+    high: "np.ndarray"
+    low: "np.ndarray"
+    close: "np.ndarray"
+    volume: "np.ndarray"
+
+    def __len__(self) -> int:
+        """Number of bars."""
+        return len(self.time)
+
+
+def save_series(series: Series, path: Union[str, Path]) -> int:
+    """Write a series as an uncompressed .npz with one array per column.
+
+    Args:
+        series: Collected series
+        path: Output file, normally the screenshot path with a .npz suffix
+
+    Returns:
+        Number of bars written
+    """
+    import numpy as np
+
+    table = np.asarray(series.rows(), dtype=np.float64).reshape(-1, len(COLUMNS))
+    columns = {name: table[:, i] for i, name in enumerate(COLUMNS)}
+    columns["time"] = columns["time"].astype(np.int64)
+    with Path(path).open("wb") as out:
+        np.savez(out, **columns, symbol=np.str_(series.symbol or ""), resolution=np.str_(series.resolution or ""))
+    return len(table)
+
+
+def load_series(path: Union[str, Path]) -> OHLCV:
+    """Read a series written by save_series().
+
+    Args:
+        path: Series file
+
+    Returns:
+        The series columns and metadata
+    """
+    import numpy as np
+
+    with np.load(path) as data:
+        symbol, resolution = str(data["symbol"]), str(data["resolution"])
+        return OHLCV(
+            symbol=symbol or None,
+            resolution=resolution or None,
+            time=data["time"],
+            open=data["open"],
+            high=data["high"],
+            low=data["low"],
+            close=data["close"],
+            volume=data["volume"],
+        )
@@ -0,0 +1,498 @@
+"""Persistent SQLite index of captured chart files.
+
+Listing the chart tree on the network share gets slower with every capture, so
+capture writes each new chart into a small local SQLite database and lookups read
+from it instead of globbing. The index keeps a ``latest`` table with one row per
+timeframe for constant-time "most recent chart" lookups, and an ordered ``charts``
+table for range queries across days, months and years. A capture that shows the
+same chart as an earlier one (see chart_changes) records that chart in ``same_as``.
+Charts packed into a day archive by chart_archive are indexed under the archive,
+as ``2025/Nov/2025-11-19.zip/2025-11-19_15-30-45-1h.webp``. OHLCV series saved next
+to the screenshots (see chart_data) go into a ``series`` table of their own.
+
+The index can always be rebuilt from the ``{YEAR}/{Mon}/{YYYY-MM-DD}`` tree:
+
+    python -m cyclebot.chart_index rebuild
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import zipfile
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Union
+
+from cyclebot.chart import TIMEFRAMES, resolve_base_path
+
+# Chart filenames look like "2025-11-19_15-30-45-1h.png"; older charts may have been re-encoded
+_NAME_PATTERN = r"^(?P<timestamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})-(?P<timeframe>[0-9A-Za-z]+)"
+CHART_FILENAME_RE = re.compile(_NAME_PATTERN + r"\.(?:png|webp|avif)$")
+SERIES_FILENAME_RE = re.compile(_NAME_PATTERN + r"\.npz$")
+
+# A whole day of charts packed by chart_archive, stored next to the month's date directories
+DAY_ARCHIVE_SUFFIX = ".zip"
+
+# Sorts after every character used in a chart timestamp, so "prefix~" is an inclusive upper bound
+_PREFIX_END = "~"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS charts (
+    path TEXT PRIMARY KEY,
+    timeframe TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    same_as TEXT
+);
+CREATE INDEX IF NOT EXISTS charts_timeframe_captured_at ON charts (timeframe, captured_at);
+CREATE INDEX IF NOT EXISTS charts_captured_at ON charts (captured_at);
+CREATE TABLE IF NOT EXISTS latest (
+    timeframe TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    captured_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    path TEXT PRIMARY KEY,
+    timeframe TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    symbol TEXT,
+    bars INTEGER
+);
+CREATE INDEX IF NOT EXISTS series_timeframe_captured_at ON series (timeframe, captured_at);
+"""
+
+
+@dataclass(frozen=True)
+class ChartRecord:
+    """A single indexed chart file."""
+
+    path: Path
+    timeframe: str
+    captured_at: str
+    same_as: Optional[Path] = None
+
+    @property
+    def date(self) -> str:
+        """Capture date as YYYY-MM-DD."""
+        return self.captured_at[:10]
+
+
+def parse_chart_filename(name: str) -> Optional[tuple[str, str]]:
+    """Split a chart filename into its timestamp and timeframe.
+
+    Args:
+        name: Filename such as "2025-11-19_15-30-45-1h.png"
+
+    Returns:
+        (timestamp, timeframe) tuple, or None if the name is not a chart file
+    """
+    match = CHART_FILENAME_RE.match(name)
+    if match is None:
+        return None
+    return match.group("timestamp"), match.group("timeframe")
+
+
+def parse_series_filename(name: str) -> Optional[tuple[str, str]]:
+    """Split a series filename such as "2025-11-19_15-30-45-1h.npz" into its timestamp and timeframe.
+
+    Returns:
+        (timestamp, timeframe) tuple, or None if the name is not a series file
+    """
+    match = SERIES_FILENAME_RE.match(name)
+    if match is None:
+        return None
+    return match.group("timestamp"), match.group("timeframe")
+
+
+def default_index_path(base_path: Optional[Union[str, Path]] = None) -> Path:
+    """Get the default index location for a chart base directory.
+
+    The index lives on local disk, not on the share, because SQLite locking over
+    SMB/NFS is unreliable. Each base directory gets its own database file.
+
+    Args:
+        base_path: Chart base directory. Defaults to the network share.
+
+    Returns:
+        Path to the SQLite database file
+    """
+    # absolute() rather than resolve(): resolving symlinks would stat every component on the share
+    base = resolve_base_path(base_path).expanduser().absolute()
+    digest = hashlib.sha1(str(base).encode(), usedforsecurity=False).hexdigest()[:12]
+    return Path.home() / ".cache" / "cyclebot" / f"chart-index-{digest}.sqlite3"
+
+
+def _as_bound(value: Union[str, datetime]) -> str:
+    """Convert a range bound to the chart timestamp format (local wall-clock time)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone()
+        return value.strftime("%Y-%m-%d_%H-%M-%S")
+    return value
+
+
+class ChartIndex:
+    """SQLite-backed index of chart files under a base directory."""
+
+    def __init__(
+        self, base_path: Optional[Union[str, Path]] = None, db_path: Optional[Union[str, Path]] = None
+    ) -> None:
+        """Open (and create if needed) the index for a chart base directory.
+
+        Args:
+            base_path: Chart base directory. Defaults to the network share.
+            db_path: SQLite database file, or ":memory:". Defaults to default_index_path(base_path).
+        """
+        self.base_path = resolve_base_path(base_path)
+        if db_path is None:
+            db_path = default_index_path(self.base_path)
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        # Not tied to the opening thread: the capture daemon indexes from worker threads, one call at a time
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(charts)")}
+        if "same_as" not in columns:
+            # Index created before change detection existed
+            with self._conn:
+                self._conn.execute("ALTER TABLE charts ADD COLUMN same_as TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS charts_same_as ON charts (same_as) WHERE same_as IS NOT NULL")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "ChartIndex":
+        """Return the index for use as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Close the index on leaving the context."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of indexed charts."""
+        row = self._conn.execute("SELECT COUNT(*) FROM charts").fetchone()
+        return int(row[0])
+
+    def _relative(self, path: Path) -> str:
+        """Store paths relative to the base directory so the share can be remounted elsewhere."""
+        try:
+            return path.relative_to(self.base_path).as_posix()
+        except ValueError:
+            return str(path)
+
+    def _record(self, path: str, timeframe: str, captured_at: str, same_as: Optional[str] = None) -> ChartRecord:
+        return ChartRecord(
+            path=self.base_path / path,
+            timeframe=timeframe,
+            captured_at=captured_at,
+            same_as=self.base_path / same_as if same_as else None,
+        )
+
+    def _insert(self, rel_path: str, timeframe: str, captured_at: str, same_as: Optional[str] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO charts (path, timeframe, captured_at, same_as) VALUES (?, ?, ?, ?)",
+            (rel_path, timeframe, captured_at, same_as),
+        )
+        self._conn.execute(
+            """
+            INSERT INTO latest (timeframe, path, captured_at) VALUES (?, ?, ?)
+            ON CONFLICT (timeframe) DO UPDATE SET path = excluded.path, captured_at = excluded.captured_at
+            WHERE excluded.captured_at >= latest.captured_at
+            """,
+            (timeframe, rel_path, captured_at),
+        )
+
+    def add(self, path: Union[str, Path], same_as: Optional[Union[str, Path]] = None) -> Optional[ChartRecord]:
+        """Index a single chart file.
+
+        Args:
+            path: Chart file path. The filename must follow get_chart_filename().
+            same_as: Earlier chart this capture duplicates, if it is unchanged
+
+        Returns:
+            The indexed record, or None if the filename is not a chart
+        """
+        path = Path(path)
+        parsed = parse_chart_filename(path.name)
+        if parsed is None:
+            return None
+        captured_at, timeframe = parsed
+        rel_path = self._relative(path)
+        rel_same_as = self._relative(Path(same_as)) if same_as is not None else None
+        with self._conn:
+            self._insert(rel_path, timeframe, captured_at, rel_same_as)
+        return self._record(rel_path, timeframe, captured_at, rel_same_as)
+
+    def add_many(self, paths: list[Path], same_as: Optional[Mapping[Path, Path]] = None) -> int:
+        """Index several chart files in one transaction.
+
+        Args:
+            paths: Chart file paths
+            same_as: Earlier chart each unchanged capture duplicates, by capture path
+
+        Returns:
+            Number of files indexed
+        """
+        with self._conn:
+            return self._insert_many(paths, same_as)
+
+    def _insert_many(self, paths: list[Path], same_as: Optional[Mapping[Path, Path]] = None) -> int:
+        count = 0
+        for path in paths:
+            parsed = parse_chart_filename(path.name)
+            if parsed is None:
+                continue
+            captured_at, timeframe = parsed
+            original = same_as.get(path) if same_as else None
+            rel_same_as = self._relative(original) if original is not None else None
+            self._insert(self._relative(path), timeframe, captured_at, rel_same_as)
+            count += 1
+        return count
+
+    def add_series(
+        self, path: Union[str, Path], symbol: Optional[str] = None, bars: Optional[int] = None
+    ) -> Optional[ChartRecord]:
+        """Index an OHLCV series file saved next to a chart.
+
+        Args:
+            path: Series file path. The filename must follow get_series_filename().
+            symbol: Symbol of the series, e.g. "BINANCE:BTCUSDT"
+            bars: Number of bars in the file
+
+        Returns:
+            The indexed record, or None if the filename is not a series file
+        """
+        path = Path(path)
+        parsed = parse_series_filename(path.name)
+        if parsed is None:
+            return None
+        captured_at, timeframe = parsed
+        rel_path = self._relative(path)
+        with self._conn:
+            self._insert_series(rel_path, timeframe, captured_at, symbol, bars)
+        return self._record(rel_path, timeframe, captured_at)
+
+    def _insert_series(
+        self, rel_path: str, timeframe: str, captured_at: str, symbol: Optional[str], bars: Optional[int]
+    ) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO series (path, timeframe, captured_at, symbol, bars) VALUES (?, ?, ?, ?, ?)",
+            (rel_path, timeframe, captured_at, symbol, bars),
+        )
+
+    def latest_series(self, timeframes: Optional[list[str]] = None, date: Optional[str] = None) -> dict[str, Path]:
+        """Get the most recent series file for each timeframe.
+
+        Args:
+            timeframes: Timeframes to look up. Defaults to all timeframes.
+            date: Only consider series captured on this date (YYYY-MM-DD)
+
+        Returns:
+            Dictionary mapping timeframe to Path of the most recent series file
+        """
+        start, end = (date, date + _PREFIX_END) if date is not None else ("", _PREFIX_END)
+        result = {}
+        for timeframe in timeframes if timeframes is not None else TIMEFRAMES:
+            row = self._conn.execute(
+                """
+                SELECT path FROM series
+                WHERE timeframe = ? AND captured_at >= ? AND captured_at <= ?
+                ORDER BY captured_at DESC LIMIT 1
+                """,
+                (timeframe, start, end),
+            ).fetchone()
+            if row is not None:
+                result[timeframe] = self.base_path / row[0]
+        return result
+
+    def move(self, moves: Mapping[Path, Path]) -> int:
+        """Point indexed charts at the files they were moved or re-encoded to.
+
+        Args:
+            moves: New path by old path
+
+        Returns:
+            Number of indexed charts updated
+        """
+        count = 0
+        with self._conn:
+            for old, new in moves.items():
+                rel_old, rel_new = self._relative(old), self._relative(new)
+                cursor = self._conn.execute("UPDATE charts SET path = ? WHERE path = ?", (rel_new, rel_old))
+                count += cursor.rowcount
+                self._conn.execute("UPDATE charts SET same_as = ? WHERE same_as = ?", (rel_new, rel_old))
+                self._conn.execute("UPDATE latest SET path = ? WHERE path = ?", (rel_new, rel_old))
+        return count
+
+    def same_as(self, path: Union[str, Path]) -> Optional[Path]:
+        """Get the earlier chart an unchanged capture duplicates.
+
+        Args:
+            path: Chart file path
+
+        Returns:
+            The duplicated chart, or None if the capture changed or is not indexed
+        """
+        row = self._conn.execute("SELECT same_as FROM charts WHERE path = ?", (self._relative(Path(path)),)).fetchone()
+        original: Optional[str] = row[0] if row is not None else None
+        return self.base_path / original if original else None
+
+    def latest(self, timeframes: Optional[list[str]] = None, date: Optional[str] = None) -> dict[str, Path]:
+        """Get the most recent chart for each timeframe.
+
+        Args:
+            timeframes: Timeframes to look up. Defaults to all timeframes.
+            date: Only consider charts captured on this date (YYYY-MM-DD)
+
+        Returns:
+            Dictionary mapping timeframe to Path of the most recent chart file
+        """
+        if timeframes is None:
+            timeframes = TIMEFRAMES
+
+        result = {}
+        for timeframe in timeframes:
+            row = self._conn.execute(
+                "SELECT path, captured_at FROM latest WHERE timeframe = ?", (timeframe,)
+            ).fetchone()
+            if row is None:
+                continue
+            path, captured_at = row
+            if date is not None and captured_at[:10] > date:
+                # Newer charts exist; fall back to an index range scan within the requested day
+                row = self._conn.execute(
+                    """
+                    SELECT path, captured_at FROM charts
+                    WHERE timeframe = ? AND captured_at >= ? AND captured_at <= ?
+                    ORDER BY captured_at DESC LIMIT 1
+                    """,
+                    (timeframe, date, date + _PREFIX_END),
+                ).fetchone()
+                if row is None:
+                    continue
+                path, captured_at = row
+            elif date is not None and captured_at[:10] < date:
+                continue
+            result[timeframe] = self.base_path / path
+        return result
+
+    def range(
+        self,
+        start: Union[str, datetime],
+        end: Union[str, datetime],
+        timeframes: Optional[list[str]] = None,
+    ) -> list[ChartRecord]:
+        """Get charts captured between two points in time, oldest first.
+
+        Bounds are inclusive and may be datetimes or prefixes of the chart timestamp
+        format, so "2025" selects a whole year and "2025-11" a whole month.
+
+        Args:
+            start: Start of the range
+            end: End of the range
+            timeframes: Restrict to these timeframes. Defaults to all.
+
+        Returns:
+            Matching chart records ordered by capture time
+        """
+        params: list[str] = [_as_bound(start), _as_bound(end) + _PREFIX_END]
+        sql = "SELECT path, timeframe, captured_at, same_as FROM charts WHERE captured_at >= ? AND captured_at <= ?"
+        if timeframes:
+            sql += f" AND timeframe IN ({', '.join('?' for _ in timeframes)})"
+            params.extend(timeframes)
+        sql += " ORDER BY captured_at, timeframe"
+        return [self._record(*row) for row in self._conn.execute(sql, params)]
+
+    def rebuild(self) -> int:
+        """Rebuild the index by rescanning the {YEAR}/{Mon}/{YYYY-MM-DD} tree.
+
+        Only the three known directory levels are listed, so unrelated files
+        elsewhere under the base directory are never walked. Day archives are
+        read from their central directory without unpacking. Series files are
+        indexed too. Recorded duplicates, and the symbol and bar count of
+        series, are kept for files that are still there. The old rows are replaced
+        in one transaction, so lookups never see a partial index and a failed
+        rebuild leaves the previous one in place.
+
+        Returns:
+            Number of charts indexed
+        """
+        paths: list[Path] = []
+        series: list[tuple[Path, str, str]] = []
+        if self.base_path.is_dir():
+            for year_dir in sorted(self.base_path.iterdir()):
+                if not (year_dir.is_dir() and year_dir.name.isdigit()):
+                    continue
+                for month_dir in sorted(year_dir.iterdir()):
+                    if not month_dir.is_dir():
+                        continue
+                    for date_dir in sorted(month_dir.iterdir()):
+                        if date_dir.is_dir():
+                            for p in date_dir.iterdir():
+                                if parse_chart_filename(p.name):
+                                    paths.append(p)
+                                elif parsed := parse_series_filename(p.name):
+                                    series.append((p, *parsed))
+                        elif date_dir.suffix == DAY_ARCHIVE_SUFFIX:
+                            with zipfile.ZipFile(date_dir) as archive:
+                                names = archive.namelist()
+                            paths.extend(date_dir / name for name in names if parse_chart_filename(name))
+
+        same_as = {
+            self.base_path / path: self.base_path / original
+            for path, original in self._conn.execute("SELECT path, same_as FROM charts WHERE same_as IS NOT NULL")
+        }
+        known_series = {
+            self.base_path / path: (symbol, bars)
+            for path, symbol, bars in self._conn.execute("SELECT path, symbol, bars FROM series")
+        }
+        with self._conn:
+            self._conn.execute("DELETE FROM charts")
+            self._conn.execute("DELETE FROM latest")
+            self._conn.execute("DELETE FROM series")
+            for path, captured_at, timeframe in series:
+                symbol, bars = known_series.get(path, (None, None))
+                self._insert_series(self._relative(path), timeframe, captured_at, symbol, bars)
+            return self._insert_many(paths, same_as)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line interface for rebuilding and querying the index."""
+    parser = argparse.ArgumentParser(description="Manage the chart index.")
+    parser.add_argument("--base", help="Chart base directory (default: ~/mnt/pi-share/Trading/charts)")
+    parser.add_argument("--db", help="Index database file (default: under ~/.cache/cyclebot)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Rescan the chart tree and rebuild the index")
+    commands.add_parser("latest", help="Show the latest chart per timeframe")
+    range_parser = commands.add_parser("range", help="List charts between two timestamps or prefixes")
+    range_parser.add_argument("start", help="Start, e.g. 2025-11 or 2025-11-19_09-00-00")
+    range_parser.add_argument("end", help="End (inclusive), e.g. 2025-12")
+    range_parser.add_argument("--timeframe", action="append", help="Restrict to a timeframe (repeatable)")
+    args = parser.parse_args(argv)
+
+    with ChartIndex(args.base, args.db) as index:
+        if args.command == "rebuild":
+            count = index.rebuild()
+            print(f"Indexed {count} charts from {index.base_path} into {index.db_path}")
+        elif args.command == "latest":
+            for timeframe, path in index.latest().items():
+                print(f"{timeframe}: {path}")
+        else:
+            for record in index.range(args.start, args.end, args.timeframe):
+                print(f"{record.captured_at} {record.timeframe:>4} {record.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Send one prompt to several models at once.
+
+Free vision models are often slow or rate-limited. ModelFanOut sends the same
+messages to several models concurrently through one OpenRouterClient and either
+returns the first successful answer (cancelling the rest) or collects every answer
+that arrives before a deadline. Each run records per-model latency and failures,
+so over time the fastest model that is reliable enough can be picked.
+
+Example:
+    >>> fan_out = ModelFanOut(client, ["model-a", "model-b"])
+    >>> result = await fan_out.first([vision_message(prompt, image_urls)])
+    >>> print(result.winner.model, result.winner.latency_ms)
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from cyclebot.openrouter import Message, OpenRouterClient, OpenRouterError
+
+
+@dataclass
+class ModelResult:
+    """Outcome of one model's request within a fan-out."""
+
+    model: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the model answered."""
+        return self.text is not None
+
+
+@dataclass
+class FanOutResult:
+    """All per-model outcomes of a fan-out, in completion order."""
+
+    results: list[ModelResult] = field(default_factory=list)
+
+    @property
+    def winner(self) -> Optional[ModelResult]:
+        """The first successful answer, if any."""
+        return next((result for result in self.results if result.ok), None)
+
+    @property
+    def answers(self) -> dict[str, str]:
+        """Successful answers by model."""
+        return {result.model: result.text for result in self.results if result.text is not None}
+
+
+@dataclass
+class ModelLatency:
+    """Latency history for one model."""
+
+    successes: int = 0
+    failures: int = 0
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    @property
+    def success_rate(self) -> float:
+        """Fraction of finished requests that succeeded (cancelled ones are not counted)."""
+        finished = self.successes + self.failures
+        return self.successes / finished if finished else 0.0
+
+    @property
+    def median_ms(self) -> Optional[float]:
+        """Median latency of recent successful requests."""
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return ordered[len(ordered) // 2]
+
+
+class ModelFanOut:
+    """Fan a prompt out to several models and track how each one performs."""
+
+    def __init__(self, client: OpenRouterClient, models: Sequence[str]) -> None:
+        """Initialize the fan-out.
+
+        Args:
+            client: Client used for every request (its concurrency limit applies)
+            models: Models to query
+        """
+        if not models:
+            msg = "At least one model is required"
+            raise ValueError(msg)
+        self.client = client
+        self.models = list(models)
+        self.latency: dict[str, ModelLatency] = {model: ModelLatency() for model in self.models}
+
+    async def _ask(
+        self, model: str, messages: Sequence[Message], timeout: Optional[float], params: dict[str, Any]
+    ) -> ModelResult:
+        started = time.perf_counter()
+        try:
+            text = await self.client.acomplete(model, messages, timeout=timeout, **params)
+        except Exception as e:
+            # Any failure is this model's alone; the other models' answers still count
+            error = str(e) if isinstance(e, OpenRouterError) else f"{type(e).__name__}: {e}"
+            return ModelResult(model, error=error, latency_ms=(time.perf_counter() - started) * 1000)
+        return ModelResult(model, text=text, latency_ms=(time.perf_counter() - started) * 1000)
+
+    def _record(self, result: ModelResult) -> None:
+        stats = self.latency.setdefault(result.model, ModelLatency())
+        if result.ok:
+            stats.successes += 1
+            stats.latencies_ms.append(result.latency_ms)
+        elif not result.cancelled:
+            stats.failures += 1
+
+    async def _run(
+        self,
+        messages: Sequence[Message],
+        deadline: Optional[float],
+        stop_on_success: bool,
+        timeout: Optional[float],
+        params: dict[str, Any],
+    ) -> FanOutResult:
+        started = time.perf_counter()
+        tasks = {asyncio.create_task(self._ask(model, messages, timeout, params)): model for model in self.models}
+        outcome = FanOutResult()
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = None if deadline is None else deadline - (time.perf_counter() - started)
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    outcome.results.append(task.result())
+                if stop_on_success and outcome.winner is not None:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        won = stop_on_success and outcome.winner is not None
+        reason = "cancelled after another model answered" if won else "deadline exceeded"
+        for task in pending:
+            outcome.results.append(ModelResult(tasks[task], error=reason, latency_ms=elapsed_ms, cancelled=True))
+        for result in outcome.results:
+            self._record(result)
+        return outcome
+
+    async def first(
+        self,
+        messages: Sequence[Message],
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> FanOutResult:
+        """Return as soon as one model answers, cancelling the others.
+
+        Models that fail are skipped; the fan-out only ends without a winner when
+        every model failed or the deadline passed.
+
+        Args:
+            messages: Chat messages sent to every model
+            deadline: Overall time limit in seconds, or None to wait for the last model
+            timeout: Per-request timeout in seconds
+            **params: Extra request fields
+
+        Returns:
+            Outcomes in completion order; .winner is the first successful answer
+        """
+        return await self._run(messages, deadline, True, timeout, params)
+
+    async def collect(
+        self,
+        messages: Sequence[Message],
+        deadline: float,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> FanOutResult:
+        """Collect every answer that arrives within a deadline.
+
+        Args:
+            messages: Chat messages sent to every model
+            deadline: Time limit in seconds; slower models are cancelled
+            timeout: Per-request timeout in seconds
+            **params: Extra request fields
+
+        Returns:
+            Outcomes in completion order, with cancelled models last
+        """
+        return await self._run(messages, deadline, False, timeout, params)
+
+    def fastest(self, min_success_rate: float = 0.8) -> Optional[str]:
+        """Get the model with the lowest median latency that is reliable enough.
+
+        Args:
+            min_success_rate: Minimum fraction of successful requests
+
+        Returns:
+            Model name, or None if no model has succeeded often enough yet
+        """
+        candidates = [
+            (stats.median_ms, model)
+            for model, stats in self.latency.items()
+            if stats.median_ms is not None and stats.success_rate >= min_success_rate
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def latency_report(self) -> str:
+        """Multi-line summary of per-model latency and success rate."""
+        lines = []
+        for model, stats in self.latency.items():
+            median = f"{stats.median_ms:.0f}ms" if stats.median_ms is not None else "n/a"
+            lines.append(
+                f"{model}: median {median}, {stats.successes} ok, {stats.failures} failed "
+                f"({stats.success_rate:.0%} success)"
+            )
+        return "\n".join(lines)
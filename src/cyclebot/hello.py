@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 import anyio
 from claude_code_sdk import (
     AssistantMessage,
@@ -69,6 +71,15 @@ async def prompt(content: str, options: ClaudeCodeOptions = None) -> tuple[int,
     return turn_count, session_id
 
 
+async def continue_prompt(session_id: str, content: str, options: ClaudeCodeOptions = None) -> tuple[int, str | None]:
+    """Send a follow-up prompt to the session returned by prompt(), keeping its context.
+
+    The options should match the ones the session was started with.  Return the turn count and session_id.
+    """
+    options = replace(options or ClaudeCodeOptions(), resume=session_id)
+    return await prompt(content, options=options)
+
+
 def create_playwright_options() -> ClaudeCodeOptions:
     """Create ClaudeCodeOptions for Playwright browser automation.
 
@@ -124,6 +135,9 @@ async def main() -> None:
     print(f"Total turns taken: {turns}\n")
     print(f"Session ID: {session_id}\n")
 
+    # Follow up in the same conversation without resending the earlier context
+    # turns, session_id = await continue_prompt(session_id, "Which of the charts shows the strongest trend?", options)
+
 
     # Example 2: Use a different profile for another site
     # print("=== Using Different Profile ===")
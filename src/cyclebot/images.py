@@ -0,0 +1,271 @@
+"""Image preprocessing and encode cache for vision prompts.
+
+Full-resolution lossless chart PNGs make vision requests large and slow, and the
+same charts are re-encoded every time they are re-analysed. ImagePipeline
+optionally crops each image to the chart area, downscales it and re-encodes it as
+WebP/JPEG, then caches the resulting data URL under a hash of the image content
+and the pipeline settings. The cache keeps recent entries in memory (LRU) and can
+spill to a directory on local disk so repeated runs skip the encode as well.
+
+Re-encoding needs Pillow (pip install "cyclebot[images]"). Without it images are
+sent unchanged, but the cache still applies.
+"""
+
+import base64
+import hashlib
+import importlib.util
+import io
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+MIME_TYPES = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg", "webp": "image/webp", "avif": "image/avif"}
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "cyclebot" / "images"
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """How to preprocess an image before it is sent to a vision model.
+
+    Attributes:
+        max_width: Downscale wider images to this width, keeping the aspect ratio. None keeps the size.
+        crop: (left, top, right, bottom) box in source pixels to keep, applied before scaling
+        format: Output format: "webp", "jpeg" or "png". None sends the original bytes untouched.
+        quality: Encoder quality for lossy formats (1-100)
+    """
+
+    max_width: Optional[int] = 1280
+    crop: Optional[tuple[int, int, int, int]] = None
+    format: Optional[str] = "webp"
+    quality: int = 85
+
+    def fingerprint(self) -> str:
+        """Stable string identifying these settings, for cache keys."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+# Send files exactly as they are on disk (the old behaviour)
+ORIGINAL = ImageOptions(max_width=None, crop=None, format=None)
+
+
+def mime_type_for(path: Path) -> str:
+    """Get the MIME type for an image file from its extension (defaults to PNG)."""
+    return MIME_TYPES.get(path.suffix.lower().lstrip("."), "image/png")
+
+
+def to_data_url(data: bytes, mime_type: str) -> str:
+    """Encode image bytes as a base64 data URL."""
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def preprocess_image(data: bytes, options: ImageOptions) -> tuple[bytes, Optional[str]]:
+    """Crop, downscale and re-encode image bytes.
+
+    Args:
+        data: Source image bytes
+        options: Preprocessing settings
+
+    Returns:
+        (bytes, mime_type) of the processed image. mime_type is None when the
+        input was returned unchanged and the caller should keep its own type.
+    """
+    if options.format is None and options.crop is None and options.max_width is None:
+        return data, None
+    if not PILLOW_AVAILABLE:
+        logger.warning("Pillow is not installed; sending images without preprocessing")
+        return data, None
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = source.crop(options.crop) if options.crop else source.copy()
+
+    if options.max_width and image.width > options.max_width:
+        height = round(image.height * options.max_width / image.width)
+        image = image.resize((options.max_width, height), Image.Resampling.LANCZOS)
+
+    fmt = (options.format or "png").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    out = io.BytesIO()
+    if fmt == "png":
+        image.save(out, format="PNG", optimize=True)
+    else:
+        image.save(out, format=fmt.upper(), quality=options.quality)
+    return out.getvalue(), MIME_TYPES[fmt]
+
+
+class ImageEncodeCache:
+    """LRU cache of encoded data URLs with an optional on-disk tier.
+
+    Keys are content hashes, so a changed image never hits a stale entry and
+    the disk tier needs no invalidation beyond size-based eviction.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[Union[str, Path]] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries kept in memory
+            max_bytes: Maximum total size of the in-memory entries
+            disk_dir: Directory for the disk tier, or None for memory only
+            disk_max_bytes: Maximum total size of the disk tier
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of entries in memory."""
+        return len(self._entries)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.disk_dir / f"{key}.txt" if self.disk_dir is not None else None
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a data URL, checking memory then disk.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached data URL, or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        path = self._disk_path(key)
+        if path is not None and path.is_file():
+            value = path.read_text()
+            path.touch()  # Refresh mtime so disk eviction is LRU too
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        """Store a data URL in memory and, if configured, on disk.
+
+        Args:
+            key: Cache key
+            value: Data URL
+        """
+        self._remember(key, value)
+        path = self._disk_path(key)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(value)
+            tmp.replace(path)
+            self._evict_disk()
+
+    def _remember(self, key: str, value: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used disk entries until the tier fits its budget."""
+        assert self.disk_dir is not None
+        files = [(p.stat(), p) for p in self.disk_dir.glob("*.txt")]
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+
+class ImagePipeline:
+    """Preprocess images and cache their encoded data URLs."""
+
+    def __init__(self, options: Optional[ImageOptions] = None, cache: Optional[ImageEncodeCache] = None) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            options: Preprocessing settings. Defaults to ImageOptions().
+            cache: Encode cache. Defaults to a memory-only cache.
+        """
+        self.options = options if options is not None else ImageOptions()
+        self.cache = cache if cache is not None else ImageEncodeCache()
+        self._fingerprint = self.options.fingerprint()
+
+    def cache_key(self, data: bytes) -> str:
+        """Cache key for image content under this pipeline's settings."""
+        digest = hashlib.sha256(data)
+        digest.update(self._fingerprint.encode())
+        return digest.hexdigest()
+
+    def encode(self, image_path: Path) -> str:
+        """Get the (possibly cached) data URL for an image file.
+
+        Args:
+            image_path: Path to image file
+
+        Returns:
+            Base64 data URL of the preprocessed image
+        """
+        data = image_path.read_bytes()
+        key = self.cache_key(data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        processed, mime_type = preprocess_image(data, self.options)
+        data_url = to_data_url(processed, mime_type or mime_type_for(image_path))
+        self.cache.put(key, data_url)
+        return data_url
+
+
+def parse_crop(value: Optional[str]) -> Optional[tuple[int, int, int, int]]:
+    """Parse a "left,top,right,bottom" crop box from configuration.
+
+    Args:
+        value: Comma separated pixel coordinates, or None/empty for no crop
+
+    Returns:
+        Crop box tuple, or None
+    """
+    if not value:
+        return None
+    parts = [int(part) for part in value.split(",")]
+    if len(parts) != 4:
+        msg = f"Crop box needs 4 values (left,top,right,bottom), got {value!r}"
+        raise ValueError(msg)
+    return parts[0], parts[1], parts[2], parts[3]
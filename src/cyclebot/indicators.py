@@ -0,0 +1,651 @@
+"""Technical indicators over captured OHLCV series.
+
+Computes the numbers the chart analysis used to ask a vision model to eyeball:
+trend (SMA/EMA), momentum (RSI), volatility (ATR), swing highs and lows, and
+support/resistance levels where swings from several timeframes cluster.
+
+Every indicator is a NumPy array operation over the whole series. Moving
+averages use cumulative sums, and the recursive EMA/RSI/ATR smoothing is solved
+in closed form over blocks of bars instead of a Python loop. The kernels work
+along the last axis, so equal-length series can be stacked and computed in one
+call. analyze() runs everything for the 1h/30m/15m/5m series of a capture and
+clusters the swings of all timeframes together.
+
+Between captures, IncrementalIndicators keeps the latest values current in
+constant time per bar, and can replace the still-forming last bar as live
+updates arrive.
+
+Needs NumPy (pip install "cyclebot[data]").
+
+Example:
+    >>> series = {tf: load_series(path) for tf, path in index.latest_series().items()}
+    >>> summary = analyze(series)
+    >>> print(summary.format())
+"""
+
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+import numpy as np
+
+from cyclebot.chart_data import COLUMNS, OHLCV
+
+# Largest growth of the block weights in the closed-form EMA, far from float overflow. Rounding
+# grows with the block length rather than with the weights, so long blocks stay accurate.
+_MAX_BLOCK_GROWTH = math.log(1e100)
+
+RSI_OVERBOUGHT = 70.0
+RSI_OVERSOLD = 30.0
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    """Indicator periods and level clustering settings."""
+
+    sma: int = 50
+    ema_fast: int = 20
+    ema_slow: int = 50
+    rsi: int = 14
+    atr: int = 14
+    swing_width: int = 5
+    lookback: int = 300
+    cluster_atr: float = 0.5
+    max_levels: int = 6
+    pattern_bars: int = 12
+    breakout_bars: int = 20
+
+    @property
+    def warmup(self) -> int:
+        """Bars needed before every indicator has a value."""
+        return max(self.sma, self.ema_fast, self.ema_slow, self.rsi + 1, self.atr)
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average along the last axis; NaN until ``period`` values are seen."""
+    x = np.asarray(values, dtype=np.float64)
+    out: np.ndarray = np.full(x.shape, np.nan)
+    if x.shape[-1] < period:
+        return out
+    totals = np.cumsum(x, axis=-1)
+    out[..., period - 1] = totals[..., period - 1]
+    out[..., period:] = totals[..., period:] - totals[..., :-period]
+    out[..., period - 1 :] /= period
+    return out
+
+
+def _smooth_from(values: np.ndarray, alpha: float, start: np.ndarray) -> np.ndarray:
+    """Solve y[t] = (1 - alpha) * y[t-1] + alpha * x[t] for every t, given y[-1] = start.
+
+    Within a block, y[t] = d^(t+1) * (start + alpha * sum(x[j] / d^(j+1) for j <= t))
+    with d = 1 - alpha, which is a cumulative sum. Blocks end before d^-(t+1) could
+    overflow, and each block starts from the last value of the previous one.
+    """
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values
+    out: np.ndarray = np.empty_like(values)
+    block = max(1, int(_MAX_BLOCK_GROWTH / -math.log(decay)))
+    previous = start
+    for begin in range(0, values.shape[-1], block):
+        chunk = values[..., begin : begin + block]
+        powers = decay ** np.arange(1, chunk.shape[-1] + 1)
+        smoothed = powers * (previous[..., None] + alpha * np.cumsum(chunk / powers, axis=-1))
+        out[..., begin : begin + block] = smoothed
+        previous = smoothed[..., -1]
+    return out
+
+
+def _smooth(values: np.ndarray, alpha: float, period: int) -> np.ndarray:
+    """Exponential smoothing seeded with the mean of the first ``period`` values, like TradingView."""
+    x = np.asarray(values, dtype=np.float64)
+    out: np.ndarray = np.full(x.shape, np.nan)
+    if x.shape[-1] < period:
+        return out
+    seed = x[..., :period].mean(axis=-1)
+    out[..., period - 1] = seed
+    out[..., period:] = _smooth_from(x[..., period:], alpha, np.asarray(seed))
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average along the last axis; NaN until ``period`` values are seen."""
+    return _smooth(values, 2.0 / (period + 1), period)
+
+
+def _wilder_averages(close: np.ndarray, period: int) -> tuple[np.ndarray, np.ndarray]:
+    """Wilder-smoothed average gain and loss, aligned with ``close`` (NaN for the first ``period`` bars)."""
+    delta = np.diff(np.asarray(close, dtype=np.float64), axis=-1)
+    pad = np.full((*delta.shape[:-1], 1), np.nan)
+    gains = _smooth(np.clip(delta, 0.0, None), 1.0 / period, period)
+    losses = _smooth(np.clip(-delta, 0.0, None), 1.0 / period, period)
+    return np.concatenate([pad, gains], axis=-1), np.concatenate([pad, losses], axis=-1)
+
+
+def _rsi_from(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    flat = np.where(avg_gain == 0.0, 50.0, 100.0)
+    out: np.ndarray = np.where(avg_loss == 0.0, flat, ratio)
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative strength index (Wilder) along the last axis; NaN for the first ``period`` bars."""
+    return _rsi_from(*_wilder_averages(close, period))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range of each bar; the first bar uses its high-low range."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    out: np.ndarray = high - low
+    previous = close[..., :-1]
+    out[..., 1:] = np.maximum(out[..., 1:], np.abs(high[..., 1:] - previous))
+    out[..., 1:] = np.maximum(out[..., 1:], np.abs(low[..., 1:] - previous))
+    return out
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average true range (Wilder) along the last axis; NaN until ``period`` bars are seen."""
+    return _smooth(true_range(high, low, close), 1.0 / period, period)
+
+
+def swing_points(high: np.ndarray, low: np.ndarray, width: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """Find swing highs and lows.
+
+    A swing high is a bar whose high is above the highs of the ``width`` bars after
+    it and not below those of the ``width`` bars before it (so the latest of equal
+    tops counts); swing lows mirror this. The last ``width`` bars cannot be
+    confirmed yet.
+
+    Args:
+        high: Bar highs
+        low: Bar lows
+        width: Bars on each side a swing must stand out from
+
+    Returns:
+        (swing high indices, swing low indices)
+    """
+    high, low = np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64)
+    if high.shape[-1] < 2 * width + 1:
+        empty: np.ndarray = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    def pivots(values: np.ndarray) -> np.ndarray:
+        # Running maxima over the bars before and after each candidate, one shift at a time
+        # (much faster than reducing a sliding window view along its short axis)
+        count = len(values) - 2 * width
+        center = values[width : width + count]
+        before, after = values[:count].copy(), values[2 * width :].copy()
+        for shift in range(1, width):
+            np.maximum(before, values[shift : shift + count], out=before)
+            np.maximum(after, values[width + shift : width + shift + count], out=after)
+        found: np.ndarray = np.flatnonzero((center >= before) & (center > after)) + width
+        return found
+
+    return pivots(high), pivots(-low)
+
+
+@dataclass(frozen=True)
+class Level:
+    """A support or resistance level where swings cluster."""
+
+    price: float
+    low: float
+    high: float
+    touches: int
+    strength: float
+    timeframes: tuple[str, ...]
+    kind: str
+
+
+def cluster_levels(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    sources: np.ndarray,
+    names: tuple[str, ...],
+    tolerance: float,
+    reference: float,
+    max_levels: int = 6,
+) -> list[Level]:
+    """Group nearby swing prices into levels.
+
+    Sorted prices are split wherever the gap to the next price exceeds
+    ``tolerance``; each group becomes one level at its weighted mean price.
+
+    Args:
+        prices: Swing prices from every timeframe
+        weights: Weight of each swing
+        sources: Index into ``names`` of the timeframe each swing came from
+        names: Timeframe names
+        tolerance: Largest price gap inside a level
+        reference: Current price; levels above it are resistance, below support
+        max_levels: Keep this many of the strongest levels
+
+    Returns:
+        Levels ordered by price, highest first
+    """
+    if len(prices) == 0:
+        return []
+    order = np.argsort(prices, kind="stable")
+    prices, weights, sources = prices[order], weights[order], sources[order]
+    starts = np.flatnonzero(np.concatenate([[True], np.diff(prices) > tolerance]))
+    labels = np.cumsum(np.isin(np.arange(len(prices)), starts)) - 1
+    strength = np.bincount(labels, weights)
+    mean = np.bincount(labels, weights * prices) / strength
+    touches = np.bincount(labels)
+    lows = prices[starts]
+    highs = prices[np.concatenate([starts[1:], [len(prices)]]) - 1]
+    masks = np.bitwise_or.reduceat(np.left_shift(1, sources.astype(np.int64)), starts)
+
+    strongest = np.argsort(-strength, kind="stable")[:max_levels]
+    levels = [
+        Level(
+            price=float(mean[i]),
+            low=float(lows[i]),
+            high=float(highs[i]),
+            touches=int(touches[i]),
+            strength=float(strength[i]),
+            timeframes=tuple(name for bit, name in enumerate(names) if masks[i] >> bit & 1),
+            kind="resistance" if mean[i] > reference else "support",
+        )
+        for i in strongest
+    ]
+    return sorted(levels, key=lambda level: -level.price)
+
+
+@dataclass(frozen=True)
+class Indicators:
+    """Indicator arrays for one series, aligned with its bars."""
+
+    sma: np.ndarray
+    ema_fast: np.ndarray
+    ema_slow: np.ndarray
+    rsi: np.ndarray
+    atr: np.ndarray
+    swing_highs: np.ndarray
+    swing_lows: np.ndarray
+
+
+def compute(series: OHLCV, config: Optional[IndicatorConfig] = None) -> Indicators:
+    """Compute every indicator over a whole series."""
+    config = config if config is not None else IndicatorConfig()
+    highs, lows = swing_points(series.high, series.low, config.swing_width)
+    return Indicators(
+        sma=sma(series.close, config.sma),
+        ema_fast=ema(series.close, config.ema_fast),
+        ema_slow=ema(series.close, config.ema_slow),
+        rsi=rsi(series.close, config.rsi),
+        atr=atr(series.high, series.low, series.close, config.atr),
+        swing_highs=highs,
+        swing_lows=lows,
+    )
+
+
+def _trend(close: float, ema_fast: float, ema_slow: float) -> str:
+    if math.isnan(ema_slow) or math.isnan(ema_fast):
+        return "unknown"
+    if close > ema_slow and ema_fast > ema_slow:
+        return "up"
+    if close < ema_slow and ema_fast < ema_slow:
+        return "down"
+    return "sideways"
+
+
+@dataclass(frozen=True)
+class TimeframeSummary:
+    """Latest indicator values of one timeframe."""
+
+    timeframe: str
+    bars: int
+    close: float
+    sma: float
+    ema_fast: float
+    ema_slow: float
+    rsi: float
+    atr: float
+    swing_high: Optional[float]
+    swing_low: Optional[float]
+
+    @property
+    def trend(self) -> str:
+        """Trend direction: "up", "down", "sideways", or "unknown" before the slow EMA has a value."""
+        return _trend(self.close, self.ema_fast, self.ema_slow)
+
+
+def summarize(timeframe: str, series: OHLCV, indicators: Indicators) -> TimeframeSummary:
+    """Reduce a series and its indicators to the latest values."""
+    return TimeframeSummary(
+        timeframe=timeframe,
+        bars=len(series),
+        close=float(series.close[-1]),
+        sma=float(indicators.sma[-1]),
+        ema_fast=float(indicators.ema_fast[-1]),
+        ema_slow=float(indicators.ema_slow[-1]),
+        rsi=float(indicators.rsi[-1]),
+        atr=float(indicators.atr[-1]),
+        swing_high=float(series.high[indicators.swing_highs[-1]]) if len(indicators.swing_highs) else None,
+        swing_low=float(series.low[indicators.swing_lows[-1]]) if len(indicators.swing_lows) else None,
+    )
+
+
+def pattern_flags(series: OHLCV, indicators: Indicators, config: Optional[IndicatorConfig] = None) -> tuple[str, ...]:
+    """Flag recent patterns worth mentioning in an analysis.
+
+    Flags are ema_cross_up/ema_cross_down (the fast EMA crossed the slow one within
+    the last ``pattern_bars`` bars), rsi_overbought/rsi_oversold, higher_highs or
+    lower_highs and higher_lows or lower_lows (the last two swings),
+    breakout_up/breakout_down (the close is beyond the previous ``breakout_bars``
+    bars' range) and volatility_expansion/volatility_contraction (ATR against its
+    ``sma``-bar average).
+
+    Args:
+        series: The series
+        indicators: Its indicators from compute()
+        config: Indicator settings
+
+    Returns:
+        Flags in the order above
+    """
+    config = config if config is not None else IndicatorConfig()
+    flags = []
+    spread = (indicators.ema_fast - indicators.ema_slow)[-config.pattern_bars - 1 :]
+    crossings = np.flatnonzero(np.diff(np.sign(spread[~np.isnan(spread)])))
+    if len(crossings):
+        flags.append("ema_cross_up" if spread[-1] > 0 else "ema_cross_down")
+
+    if indicators.rsi[-1] > RSI_OVERBOUGHT:
+        flags.append("rsi_overbought")
+    elif indicators.rsi[-1] < RSI_OVERSOLD:
+        flags.append("rsi_oversold")
+
+    if len(indicators.swing_highs) >= 2:
+        last, previous = series.high[indicators.swing_highs[-2:]][::-1]
+        flags.append("higher_highs" if last > previous else "lower_highs")
+    if len(indicators.swing_lows) >= 2:
+        last, previous = series.low[indicators.swing_lows[-2:]][::-1]
+        flags.append("higher_lows" if last > previous else "lower_lows")
+
+    if len(series) > config.breakout_bars:
+        window = slice(-config.breakout_bars - 1, -1)
+        if series.close[-1] > series.high[window].max():
+            flags.append("breakout_up")
+        elif series.close[-1] < series.low[window].min():
+            flags.append("breakout_down")
+
+    recent_atr = indicators.atr[-config.sma :]
+    if not np.isnan(recent_atr).any():
+        ratio = recent_atr[-1] / recent_atr.mean()
+        if ratio > 1.5:
+            flags.append("volatility_expansion")
+        elif ratio < 2 / 3:
+            flags.append("volatility_contraction")
+    return tuple(flags)
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None or math.isnan(value) else round(value, digits)
+
+
+@dataclass(frozen=True)
+class MarketSummary:
+    """Indicator summary across timeframes, with support and resistance levels and pattern flags."""
+
+    timeframes: dict[str, TimeframeSummary]
+    levels: list[Level] = field(default_factory=list)
+    flags: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    symbol: Optional[str] = None
+
+    @property
+    def alignment(self) -> str:
+        """Trend across timeframes: "up" or "down" when all agree, otherwise "mixed"."""
+        trends = {summary.trend for summary in self.timeframes.values()}
+        return trends.pop() if len(trends) == 1 and trends <= {"up", "down"} else "mixed"
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-serialisable form, rounded for display."""
+        return {
+            "symbol": self.symbol,
+            "alignment": self.alignment,
+            "timeframes": {
+                tf: {
+                    "trend": s.trend,
+                    "bars": s.bars,
+                    "close": _round(s.close),
+                    "sma": _round(s.sma),
+                    "ema_fast": _round(s.ema_fast),
+                    "ema_slow": _round(s.ema_slow),
+                    "rsi": _round(s.rsi, 1),
+                    "atr": _round(s.atr),
+                    "swing_high": _round(s.swing_high),
+                    "swing_low": _round(s.swing_low),
+                    "flags": list(self.flags.get(tf, ())),
+                }
+                for tf, s in self.timeframes.items()
+            },
+            "levels": [
+                {
+                    "kind": level.kind,
+                    "price": _round(level.price),
+                    "range": [_round(level.low), _round(level.high)],
+                    "touches": level.touches,
+                    "timeframes": list(level.timeframes),
+                }
+                for level in self.levels
+            ],
+        }
+
+    def format(self) -> str:
+        """Plain-text summary, one line per timeframe and level."""
+        lines = [f"{self.symbol or 'Symbol'} trend alignment: {self.alignment}"]
+        for tf, s in self.timeframes.items():
+            lines.append(
+                f"{tf}: {s.trend}, close {s.close:.2f}, EMA fast/slow {s.ema_fast:.2f}/{s.ema_slow:.2f}, "
+                f"SMA {s.sma:.2f}, RSI {s.rsi:.1f}, ATR {s.atr:.2f}"
+                + (f", {' '.join(self.flags[tf])}" if self.flags.get(tf) else "")
+            )
+        for level in self.levels:
+            lines.append(
+                f"{level.kind} {level.price:.2f} ({level.low:.2f}-{level.high:.2f}), "
+                f"{level.touches} touches on {'/'.join(level.timeframes)}"
+            )
+        return "\n".join(lines)
+
+
+def analyze(series: Mapping[str, OHLCV], config: Optional[IndicatorConfig] = None) -> MarketSummary:
+    """Compute indicators and pattern flags for every timeframe and cluster their swings into levels.
+
+    Swings from the last ``lookback`` bars of each timeframe are clustered together;
+    timeframes earlier in ``series`` (longest first, like chart.TIMEFRAMES) weigh more.
+    The clustering tolerance is ``cluster_atr`` times the ATR of the first timeframe.
+
+    Args:
+        series: OHLCV series by timeframe, longest timeframe first
+        config: Indicator settings
+
+    Returns:
+        The summary
+    """
+    config = config if config is not None else IndicatorConfig()
+    names = tuple(tf for tf, s in series.items() if len(s))
+    summaries: dict[str, TimeframeSummary] = {}
+    flags: dict[str, tuple[str, ...]] = {}
+    prices, weights, sources = [], [], []
+    for position, tf in enumerate(names):
+        data = series[tf]
+        indicators = compute(data, config)
+        summaries[tf] = summarize(tf, data, indicators)
+        flags[tf] = pattern_flags(data, indicators, config)
+        recent = len(data) - config.lookback
+        highs = indicators.swing_highs[indicators.swing_highs >= recent]
+        lows = indicators.swing_lows[indicators.swing_lows >= recent]
+        swing_prices = np.concatenate([data.high[highs], data.low[lows]])
+        prices.append(swing_prices)
+        weights.append(np.full(len(swing_prices), float(len(names) - position)))
+        sources.append(np.full(len(swing_prices), position))
+
+    if not names:
+        return MarketSummary({})
+    reference = summaries[names[-1]].close
+    scale = summaries[names[0]].atr
+    if math.isnan(scale):
+        scale = float(np.mean(np.asarray(series[names[0]].high) - np.asarray(series[names[0]].low)))
+    levels = cluster_levels(
+        np.concatenate(prices),
+        np.concatenate(weights),
+        np.concatenate(sources),
+        names,
+        config.cluster_atr * scale,
+        reference,
+        config.max_levels,
+    )
+    return MarketSummary(summaries, levels, flags, series[names[0]].symbol)
+
+
+@dataclass(frozen=True)
+class _State:
+    time: float
+    bars: int
+    closes: tuple[float, ...]
+    close: float
+    ema_fast: float
+    ema_slow: float
+    avg_gain: float
+    avg_loss: float
+    atr: float
+    highs: tuple[float, ...]
+    lows: tuple[float, ...]
+    swing_high: Optional[float]
+    swing_low: Optional[float]
+
+
+class IncrementalIndicators:
+    """Latest indicator values of one timeframe, updated one bar at a time.
+
+    Start from a batch computation with from_series(), then feed each new bar to
+    update(). A bar with the same time as the last one replaces it, which is how
+    the forming bar changes until it closes. Each update costs the same whatever
+    the length of the series.
+    """
+
+    def __init__(
+        self, timeframe: str, config: IndicatorConfig, state: _State, previous: Optional[_State] = None
+    ) -> None:
+        """Use from_series() instead."""
+        self.timeframe = timeframe
+        self.config = config
+        self._state = state
+        self._previous = previous
+
+    @classmethod
+    def from_series(
+        cls, timeframe: str, series: OHLCV, config: Optional[IndicatorConfig] = None
+    ) -> "IncrementalIndicators":
+        """Start from the batch indicators of a series.
+
+        The state before the last bar is kept too, so the last bar of the series can
+        still be replaced while it is forming.
+
+        Raises:
+            ValueError: If the series is not longer than the longest indicator period
+        """
+        config = config if config is not None else IndicatorConfig()
+        if len(series) <= config.warmup:
+            msg = f"Need at least {config.warmup + 1} bars to start incremental indicators, got {len(series)}"
+            raise ValueError(msg)
+        head = replace(series, **{column: getattr(series, column)[:-1] for column in COLUMNS})
+        return cls(timeframe, config, cls._batch_state(series, config), cls._batch_state(head, config))
+
+    @staticmethod
+    def _batch_state(series: OHLCV, config: IndicatorConfig) -> _State:
+        indicators = compute(series, config)
+        avg_gain, avg_loss = _wilder_averages(series.close, config.rsi)
+        window = 2 * config.swing_width + 1
+        latest = summarize("", series, indicators)
+        return _State(
+            time=float(series.time[-1]),
+            bars=len(series),
+            closes=tuple(float(c) for c in series.close[-config.sma :]),
+            close=latest.close,
+            ema_fast=latest.ema_fast,
+            ema_slow=latest.ema_slow,
+            avg_gain=float(avg_gain[-1]),
+            avg_loss=float(avg_loss[-1]),
+            atr=latest.atr,
+            highs=tuple(float(h) for h in series.high[-window:]),
+            lows=tuple(float(v) for v in series.low[-window:]),
+            swing_high=latest.swing_high,
+            swing_low=latest.swing_low,
+        )
+
+    def update(self, time: float, high: float, low: float, close: float) -> TimeframeSummary:
+        """Add a bar, or replace the last bar if it has the same time.
+
+        Args:
+            time: Bar open time
+            high: Bar high
+            low: Bar low
+            close: Bar close
+
+        Returns:
+            The latest values after this bar
+        """
+        if time == self._state.time and self._previous is not None:
+            base = self._previous
+        else:
+            base = self._state
+            self._previous = self._state
+        self._state = self._apply(base, time, high, low, close)
+        return self.summary()
+
+    def _apply(self, state: _State, time: float, high: float, low: float, close: float) -> _State:
+        config = self.config
+        delta = close - state.close
+        true_range = max(high - low, abs(high - state.close), abs(low - state.close))
+        fast, slow = 2.0 / (config.ema_fast + 1), 2.0 / (config.ema_slow + 1)
+        window = 2 * config.swing_width + 1
+        highs = (*state.highs, high)[-window:]
+        lows = (*state.lows, low)[-window:]
+
+        # The middle of the window has enough bars after it now to be confirmed as a swing
+        swing_high, swing_low = state.swing_high, state.swing_low
+        if len(highs) == window:
+            width = config.swing_width
+            if highs[width] >= max(highs[:width]) and highs[width] > max(highs[width + 1 :]):
+                swing_high = highs[width]
+            if lows[width] <= min(lows[:width]) and lows[width] < min(lows[width + 1 :]):
+                swing_low = lows[width]
+
+        return replace(
+            state,
+            time=time,
+            bars=state.bars + 1,
+            closes=(*state.closes, close)[-config.sma :],
+            close=close,
+            ema_fast=state.ema_fast + fast * (close - state.ema_fast),
+            ema_slow=state.ema_slow + slow * (close - state.ema_slow),
+            avg_gain=state.avg_gain + (max(delta, 0.0) - state.avg_gain) / config.rsi,
+            avg_loss=state.avg_loss + (max(-delta, 0.0) - state.avg_loss) / config.rsi,
+            atr=state.atr + (true_range - state.atr) / config.atr,
+            highs=highs,
+            lows=lows,
+            swing_high=swing_high,
+            swing_low=swing_low,
+        )
+
+    def summary(self) -> TimeframeSummary:
+        """The latest values."""
+        state = self._state
+        return TimeframeSummary(
+            timeframe=self.timeframe,
+            bars=state.bars,
+            close=state.close,
+            sma=sum(state.closes) / len(state.closes),
+            ema_fast=state.ema_fast,
+            ema_slow=state.ema_slow,
+            rsi=float(_rsi_from(np.float64(state.avg_gain), np.float64(state.avg_loss))),
+            atr=state.atr,
+            swing_high=state.swing_high,
+            swing_low=state.swing_low,
+        )
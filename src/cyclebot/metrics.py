@@ -0,0 +1,347 @@
+"""Metrics and tracing for the agent pipeline.
+
+A small in-process registry of counters, gauges and histograms with labels,
+rendered in the Prometheus text exposition format for the web server's
+``/metrics`` endpoint. AgentMetrics defines the pipeline's metrics, and a
+QueryTrace follows one agent query, timing:
+
+- the time to the first message and each model turn (from the previous message
+  to the next assistant message, so tool execution is not counted)
+- each tool call, from the assistant's tool use to its result, per tool name
+- the duration, API duration, turns and ``total_cost_usd`` of the ResultMessage
+
+When the OpenTelemetry API is installed (pip install "cyclebot[tracing]"), each
+query is also recorded as a span with a child span per tool call; without a
+configured SDK these spans are no-ops.
+
+Example:
+    >>> metrics = AgentMetrics()
+    >>> trace = metrics.query("prompt")
+    >>> async for message in client.receive_response():
+    ...     trace.observe(message)
+    >>> trace.finish("completed")
+    >>> print(metrics.registry.render())
+"""
+
+import importlib.util
+import math
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Optional
+
+from claude_code_sdk import AssistantMessage, ResultMessage, ToolResultBlock, ToolUseBlock, UserMessage
+
+OTEL_AVAILABLE = importlib.util.find_spec("opentelemetry") is not None
+
+# Content type of the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds (the +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+COST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TURN_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = tuple(1024 * 4**n for n in range(9))  # 1 KiB .. 64 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        """Create the metric.
+
+        Args:
+            name: Metric name, e.g. "cyclebot_queries_total"
+            help_text: One-line description for the HELP comment
+            labels: Label names; every observation gives a value for each, in order
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+
+    def _key(self, values: Sequence[str]) -> tuple[str, ...]:
+        if len(values) != len(self.labels):
+            msg = f"{self.name} takes labels {self.labels}, got {tuple(values)}"
+            raise ValueError(msg)
+        return tuple(str(value) for value in values)
+
+    def samples(self) -> Iterable[str]:
+        """Sample lines in the text format."""
+        return ()
+
+    def render(self) -> str:
+        """HELP and TYPE comments followed by the samples."""
+        lines = [f"# HELP {self.name} {_escape(self.help_text)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        """Create the counter."""
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add to the counter for the given label values."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value for the given label values."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        """Sample lines in the text format."""
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """A value read from a callback when the metrics are rendered."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Create the gauge."""
+        super().__init__(name, help_text)
+        self.read = read
+
+    def samples(self) -> Iterable[str]:
+        """Sample lines in the text format."""
+        yield f"{self.name} {_format_value(self.read())}"
+
+
+class Histogram(Metric):
+    """Counts of observations in cumulative buckets, with their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()) -> None:
+        """Create the histogram.
+
+        Args:
+            name: Metric name
+            help_text: One-line description
+            labels: Label names
+            buckets: Increasing bucket upper bounds (LATENCY_BUCKETS by default)
+        """
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets or LATENCY_BUCKETS)
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record an observation for the given label values."""
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def count(self, *labels: str) -> int:
+        """Number of observations for the given label values."""
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self) -> Iterable[str]:
+        """Sample lines in the text format."""
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total[0])}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Metrics rendered together."""
+
+    def __init__(self) -> None:
+        """Start empty."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        """Add a metric; returns it.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered
+        """
+        if metric.name in self._metrics:
+            msg = f"Metric {metric.name} is already registered"
+            raise ValueError(msg)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class AgentMetrics:
+    """The agent pipeline's metrics."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        """Register the metrics.
+
+        Args:
+            registry: Registry to add them to (a new one by default)
+        """
+        self.registry = registry or MetricsRegistry()
+        add = self.registry.register
+        self.queries: Counter = add(
+            Counter("cyclebot_queries_total", "Agent queries by method and outcome", ("method", "status"))
+        )
+        self.shed: Counter = add(Counter("cyclebot_shed_total", "Requests shed by admission control", ("reason",)))
+        self.queue_wait: Histogram = add(
+            Histogram("cyclebot_queue_wait_seconds", "Time queries waited for admission", ("method",))
+        )
+        self.first_message: Histogram = add(
+            Histogram("cyclebot_first_message_seconds", "Time from sending a query to its first message", ("method",))
+        )
+        self.turn: Histogram = add(
+            Histogram("cyclebot_turn_seconds", "Time from the previous message to each assistant message")
+        )
+        self.tool_call: Histogram = add(
+            Histogram("cyclebot_tool_call_seconds", "Time from a tool use to its result", ("tool",))
+        )
+        self.duration: Histogram = add(
+            Histogram("cyclebot_query_duration_seconds", "Query duration reported by the CLI (duration_ms)")
+        )
+        self.api_duration: Histogram = add(
+            Histogram("cyclebot_query_api_duration_seconds", "Time spent in API calls (duration_api_ms)")
+        )
+        self.turns: Histogram = add(
+            Histogram("cyclebot_query_turns", "Turns per query (num_turns)", buckets=TURN_BUCKETS)
+        )
+        self.cost: Histogram = add(
+            Histogram("cyclebot_query_cost_usd", "Cost per query (total_cost_usd)", buckets=COST_BUCKETS)
+        )
+        self.cost_total: Counter = add(Counter("cyclebot_cost_usd_total", "Total cost of all queries"))
+        self.sent_bytes: Counter = add(Counter("cyclebot_sent_bytes_total", "Bytes sent to WebSocket clients"))
+        self.connection_bytes: Histogram = add(
+            Histogram("cyclebot_connection_sent_bytes", "Bytes sent per WebSocket connection", buckets=BYTES_BUCKETS)
+        )
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Add a gauge read when the metrics are rendered."""
+        self.registry.register(Gauge(name, help_text, read))
+
+    def query(self, method: str, **attributes: Any) -> "QueryTrace":
+        """Start following a query that is about to be sent."""
+        return QueryTrace(self, method, attributes)
+
+
+class QueryTrace:
+    """Timings of one agent query, recorded as metrics and (with OpenTelemetry) a span."""
+
+    def __init__(self, metrics: AgentMetrics, method: str, attributes: Optional[dict[str, Any]] = None) -> None:
+        """Start the clock.
+
+        Args:
+            metrics: Where to record
+            method: Request method, used as a label
+            attributes: Extra span attributes (e.g. the stream id)
+        """
+        self.metrics = metrics
+        self.method = method
+        self.started = time.perf_counter()
+        self.first_message_at: Optional[float] = None
+        self._last = self.started
+        self._tools: dict[str, tuple[str, float, Any]] = {}
+        self._span: Any = None
+        if OTEL_AVAILABLE:
+            from opentelemetry import trace
+
+            self._span = trace.get_tracer(__name__).start_span(
+                f"cyclebot.{method}", attributes={"cyclebot.method": method, **(attributes or {})}
+            )
+
+    def observe(self, message: Any) -> None:
+        """Record the timings a streamed message completes."""
+        now = time.perf_counter()
+        if self.first_message_at is None:
+            self.first_message_at = now
+            self.metrics.first_message.observe(now - self.started, self.method)
+        if isinstance(message, AssistantMessage):
+            self.metrics.turn.observe(now - self._last)
+            if self._span is not None:
+                self._span.add_event("turn", {"seconds": now - self._last})
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self._tools[block.id] = (block.name, now, self._start_tool_span(block.name))
+        elif isinstance(message, UserMessage) and not isinstance(message.content, str):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self._tools:
+                    name, started, span = self._tools.pop(block.tool_use_id)
+                    self.metrics.tool_call.observe(now - started, name)
+                    if span is not None:
+                        span.set_attribute("cyclebot.tool.error", bool(block.is_error))
+                        span.end()
+        elif isinstance(message, ResultMessage):
+            self.metrics.duration.observe(message.duration_ms / 1000)
+            self.metrics.api_duration.observe(message.duration_api_ms / 1000)
+            self.metrics.turns.observe(message.num_turns)
+            if message.total_cost_usd is not None:
+                self.metrics.cost.observe(message.total_cost_usd)
+                self.metrics.cost_total.inc(amount=message.total_cost_usd)
+            if self._span is not None:
+                self._span.set_attributes(
+                    {
+                        "cyclebot.num_turns": message.num_turns,
+                        "cyclebot.duration_api_ms": message.duration_api_ms,
+                        "cyclebot.total_cost_usd": message.total_cost_usd or 0.0,
+                    }
+                )
+        self._last = now
+
+    def _start_tool_span(self, name: str) -> Any:
+        if self._span is None:
+            return None
+        from opentelemetry import trace
+
+        context = trace.set_span_in_context(self._span)
+        return trace.get_tracer(__name__).start_span(
+            f"tool {name}", context=context, attributes={"cyclebot.tool": name}
+        )
+
+    def finish(self, status: str) -> None:
+        """Count the query under its outcome and end its spans."""
+        self.metrics.queries.inc(self.method, status)
+        for _, _, span in self._tools.values():
+            if span is not None:
+                span.end()
+        self._tools.clear()
+        if self._span is not None:
+            self._span.set_attribute("cyclebot.status", status)
+            self._span.end()
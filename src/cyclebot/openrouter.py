@@ -0,0 +1,846 @@
+"""Pooled, retrying OpenRouter client with sync and async APIs.
+
+A single OpenRouterClient keeps its HTTP connections alive between calls (and
+uses HTTP/2 when the optional ``h2`` package is installed), limits how many
+requests are in flight at once, and retries rate-limited or failed requests with
+exponential backoff and jitter, honouring the server's Retry-After header.
+Completions can also be streamed token by token over server-sent events, and
+answers can be served from a response cache (see cyclebot.response_cache).
+
+Example:
+    >>> client = OpenRouterClient(api_key)
+    >>> client.complete("anthropic/claude-3.5-sonnet", [text_message("Tell me a joke.")])
+    >>> stats = StreamStats()
+    >>> for token in client.stream("anthropic/claude-3.5-sonnet", [text_message("Hi")], stats=stats):
+    ...     print(token, end="")
+    >>> print(stats.summary())
+"""
+
+import asyncio
+import importlib.util
+import json
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from types import TracebackType
+from typing import Any, Optional
+
+import httpx
+
+from cyclebot.response_cache import ResponseCache, response_cache_key
+
+OPENROUTER_API_URL = "https://openrouter.ai/api/v1"
+
+# Status codes worth retrying: timeouts, rate limits and transient upstream errors
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+Message = dict[str, Any]
+
+
+class OpenRouterError(Exception):
+    """An OpenRouter request failed after all retries."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, body: Optional[str] = None) -> None:
+        """Initialize the error.
+
+        Args:
+            message: Human readable description
+            status_code: HTTP status code, if the server responded
+            body: Response body, if any
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def text_message(prompt: str, role: str = "user") -> Message:
+    """Build a plain text chat message."""
+    return {"role": role, "content": prompt}
+
+
+def vision_message(prompt: str, image_urls: Sequence[str], role: str = "user") -> Message:
+    """Build a chat message with text followed by images.
+
+    Args:
+        prompt: Text prompt
+        image_urls: Image URLs or base64 data URLs
+        role: Message role
+
+    Returns:
+        Chat message with a multi-part content array
+    """
+    content: list[dict[str, Any]] = [{"type": "text", "text": prompt}]
+    content.extend({"type": "image_url", "image_url": {"url": url}} for url in image_urls)
+    return {"role": role, "content": content}
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Parse a Retry-After header into a delay in seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+        now: Current time, for HTTP dates. Defaults to now.
+
+    Returns:
+        Delay in seconds (never negative), or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay for the first retry (seconds)
+        cap: Maximum delay (seconds)
+
+    Returns:
+        Random delay between 0 and min(cap, base * 2**attempt)
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))  # noqa: S311
+
+
+def extract_content(result: dict[str, Any]) -> str:
+    """Get the assistant text from a chat completion response.
+
+    Args:
+        result: Parsed chat completion JSON
+
+    Returns:
+        Content of the first choice's message
+
+    Raises:
+        OpenRouterError: If the response carries an error or no message instead of choices
+    """
+    if "error" in result and not result.get("choices"):
+        error = result["error"]
+        message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        code = error.get("code") if isinstance(error, dict) else None
+        msg = f"OpenRouter error: {message}"
+        raise OpenRouterError(msg, status_code=code if isinstance(code, int) else None)
+    try:
+        return str(result["choices"][0]["message"]["content"])
+    except (KeyError, IndexError, TypeError) as e:
+        msg = "OpenRouter response has no message content"
+        raise OpenRouterError(msg, body=json.dumps(result)) from e
+
+
+@dataclass
+class StreamStats:
+    """Timing and size of a streamed completion.
+
+    Pass an instance to stream()/astream(); it is filled in as tokens arrive.
+    """
+
+    started_at: float = 0.0
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    completion_tokens: Optional[int] = None
+    parts: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        return "".join(self.parts)
+
+    @property
+    def tokens(self) -> int:
+        """Completion tokens as reported by the API, or the number of content chunks."""
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Time to first token in milliseconds."""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first token."""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        if elapsed <= 0:
+            return None
+        return self.tokens / elapsed
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        ttft = f"{self.ttft_ms:.0f}ms" if self.ttft_ms is not None else "n/a"
+        rate = f"{self.tokens_per_second:.1f} tok/s" if self.tokens_per_second is not None else "n/a"
+        return f"time to first token {ttft}, {self.tokens} tokens at {rate}"
+
+
+@dataclass
+class CompletionStats:
+    """Latency, request size and cost of a completion.
+
+    Pass an instance to complete()/acomplete(); it is filled in when the answer
+    arrives. Passing one also asks OpenRouter to report the cost of the request.
+    """
+
+    latency_ms: float = 0.0
+    request_bytes: int = 0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cost: Optional[float] = None
+    cached: bool = False
+
+    def record(self, result: dict[str, Any]) -> None:
+        """Take token counts and cost from a chat completion response."""
+        usage = result.get("usage") or {}
+        if usage.get("prompt_tokens") is not None:
+            self.prompt_tokens = int(usage["prompt_tokens"])
+        if usage.get("completion_tokens") is not None:
+            self.completion_tokens = int(usage["completion_tokens"])
+        if usage.get("cost") is not None:
+            self.cost = float(usage["cost"])
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        if self.cached:
+            return f"cached, {self.latency_ms:.0f}ms"
+        tokens = f"{self.prompt_tokens if self.prompt_tokens is not None else '?'} prompt + "
+        tokens += f"{self.completion_tokens if self.completion_tokens is not None else '?'} completion tokens"
+        cost = f"${self.cost:.6f}" if self.cost is not None else "cost n/a"
+        return f"{self.latency_ms:.0f}ms, {self.request_bytes / 1024:.1f} KB request, {tokens}, {cost}"
+
+
+class SSEDecoder:
+    """Incremental decoder for server-sent event lines.
+
+    Feed lines without their trailing newline; a complete event's data is
+    returned when the blank line ending it arrives. Comment lines (OpenRouter
+    sends ": OPENROUTER PROCESSING" keep-alives) are ignored.
+    """
+
+    def __init__(self) -> None:
+        """Start with no buffered data."""
+        self._data: list[str] = []
+
+    def feed(self, line: str) -> Optional[str]:
+        """Process one line and return event data if an event completed."""
+        if not line:
+            return self.flush()
+        if line.startswith(":"):
+            return None
+        name, _, value = line.partition(":")
+        if name == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Return any buffered event data (e.g. at end of stream)."""
+        if not self._data:
+            return None
+        data = "\n".join(self._data)
+        self._data = []
+        return data
+
+
+# Marks the end of an OpenRouter stream
+_STREAM_DONE = "[DONE]"
+
+
+def _stream_token(data: str, stats: StreamStats) -> Optional[str]:
+    """Turn one SSE data payload into a content token, updating stats.
+
+    Raises:
+        OpenRouterError: If the stream reports an error mid-way or sends a malformed chunk
+    """
+    try:
+        chunk = json.loads(data)
+    except ValueError as e:
+        msg = "OpenRouter sent a malformed stream chunk"
+        raise OpenRouterError(msg, body=data) from e
+    if not isinstance(chunk, dict):
+        msg = f"OpenRouter sent a stream chunk that is a JSON {type(chunk).__name__}, expected an object"
+        raise OpenRouterError(msg, body=data)
+    if "error" in chunk:
+        extract_content(chunk)  # raises OpenRouterError
+    usage = chunk.get("usage")
+    if usage and usage.get("completion_tokens") is not None:
+        stats.completion_tokens = int(usage["completion_tokens"])
+    choices = chunk.get("choices") or []
+    token = choices[0].get("delta", {}).get("content") if choices else None
+    if not token:
+        return None
+    if stats.first_token_at is None:
+        stats.first_token_at = time.perf_counter()
+    stats.chunks += 1
+    stats.parts.append(token)
+    return str(token)
+
+
+class OpenRouterClient:
+    """Reusable OpenRouter chat completions client."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = OPENROUTER_API_URL,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        max_concurrency: int = 4,
+        pool_size: int = 10,
+        http2: Optional[bool] = None,
+        cache: Optional[ResponseCache] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> None:
+        """Initialize the client. Connections are opened lazily on first use.
+
+        Args:
+            api_key: OpenRouter API key
+            base_url: API base URL (override to point at a local stub server)
+            timeout: Default request timeout in seconds
+            max_retries: Retries after the first attempt for retryable failures
+            backoff_base: First backoff delay in seconds, doubled on each retry
+            backoff_max: Maximum backoff delay in seconds, also the cap on Retry-After
+            max_concurrency: Maximum requests in flight at once (per API, sync or async)
+            pool_size: Maximum pooled keep-alive connections
+            http2: Use HTTP/2. Defaults to True when the h2 package is installed.
+            cache: Optional response cache for complete()/stream() and their async versions
+            cache_ttl: Seconds a cached response stays valid. None keeps it until evicted.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.requests_sent = 0
+        self.retries = 0
+
+        self._headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    # Connection management
+
+    @property
+    def client(self) -> httpx.Client:
+        """Pooled synchronous HTTP client."""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    base_url=self.base_url,
+                    headers=self._headers,
+                    timeout=self.timeout,
+                    limits=self._limits,
+                    http2=self.http2,
+                )
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Pooled asynchronous HTTP client (bound to the event loop that first uses it)."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=self.timeout,
+                limits=self._limits,
+                http2=self.http2,
+            )
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        return self._async_client
+
+    def close(self) -> None:
+        """Close the synchronous connection pool."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        """Close both connection pools."""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_slots = None
+
+    def __enter__(self) -> "OpenRouterClient":
+        """Use the client as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Close the synchronous connection pool."""
+        self.close()
+
+    async def __aenter__(self) -> "OpenRouterClient":
+        """Use the client as an async context manager."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Close both connection pools."""
+        await self.aclose()
+
+    # Response cache
+
+    def _cache_key(
+        self, model: str, messages: Sequence[Message], params: dict[str, Any], bypass_cache: bool
+    ) -> Optional[str]:
+        """Cache key for a request, or None when caching is off or bypassed."""
+        if self.cache is None or bypass_cache:
+            return None
+        key: str = response_cache_key(model, messages, params)
+        return key
+
+    def _cached(self, key: Optional[str]) -> Optional[str]:
+        if key is None or self.cache is None:
+            return None
+        cached: Optional[str] = self.cache.get(key)
+        return cached
+
+    def _store(self, key: Optional[str], text: str) -> None:
+        if key is not None and self.cache is not None:
+            self.cache.put(key, text, self.cache_ttl)
+
+    @staticmethod
+    def _replay(text: str, stats: StreamStats) -> str:
+        """Fill in stream stats for a response served from the cache."""
+        stats.started_at = stats.first_token_at = stats.finished_at = time.perf_counter()
+        stats.chunks = 1
+        stats.parts = [text]
+        return text
+
+    # Completion stats
+
+    def _stats_params(
+        self, stats: Optional[CompletionStats], model: str, messages: Sequence[Message], params: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Ask for usage accounting when stats are wanted, and measure the request body.
+
+        Done after the cache key is computed, so asking for stats does not change it.
+        """
+        if stats is None:
+            return params
+        params = {**params, "usage": {"include": True}}
+        stats.request_bytes = len(json.dumps(self._payload(model, messages, params)).encode())
+        return params
+
+    @staticmethod
+    def _record(stats: Optional[CompletionStats], started: float, result: dict[str, Any]) -> None:
+        if stats is not None:
+            stats.latency_ms = (time.perf_counter() - started) * 1000
+            stats.record(result)
+
+    @staticmethod
+    def _record_cached(stats: Optional[CompletionStats], started: float) -> None:
+        if stats is not None:
+            stats.cached = True
+            stats.latency_ms = (time.perf_counter() - started) * 1000
+
+    # Retry policy
+
+    def _payload(self, model: str, messages: Sequence[Message], params: dict[str, Any]) -> dict[str, Any]:
+        return {"model": model, "messages": list(messages), **params}
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Delay before the next attempt, preferring the server's Retry-After."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                # A far-off or bogus Retry-After must not park the caller for hours
+                return min(retry_after, self.backoff_max)
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max)
+
+    def _should_retry(self, attempt: int, response: Optional[httpx.Response]) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return response is None or response.status_code in RETRY_STATUS_CODES
+
+    def _next_delay(
+        self, attempt: int, response: Optional[httpx.Response], error: Optional[httpx.TransportError]
+    ) -> float:
+        """Decide whether a failed attempt is retried.
+
+        Returns:
+            Seconds to wait before the next attempt
+
+        Raises:
+            OpenRouterError: If the failure is not retryable or retries are exhausted
+        """
+        if error is not None and not self._should_retry(attempt, None):
+            msg = f"OpenRouter request failed: {error}"
+            raise OpenRouterError(msg) from error
+        if response is not None and not self._should_retry(attempt, response):
+            raise self._error(response)
+        self.retries += 1
+        return self._retry_delay(attempt, response)
+
+    @staticmethod
+    def _json(response: httpx.Response) -> dict[str, Any]:
+        """Parse a successful response body.
+
+        Raises:
+            OpenRouterError: If the body is not a JSON object
+        """
+        try:
+            result = response.json()
+        except ValueError as e:
+            msg = f"OpenRouter returned invalid JSON with HTTP {response.status_code}"
+            raise OpenRouterError(msg, status_code=response.status_code, body=response.text) from e
+        if not isinstance(result, dict):
+            msg = f"OpenRouter returned a JSON {type(result).__name__}, expected an object"
+            raise OpenRouterError(msg, status_code=response.status_code, body=response.text)
+        return result
+
+    @staticmethod
+    def _error(response: httpx.Response) -> OpenRouterError:
+        return OpenRouterError(
+            f"OpenRouter request failed with HTTP {response.status_code}",
+            status_code=response.status_code,
+            body=response.text,
+        )
+
+    # Synchronous API
+
+    def chat(
+        self, model: str, messages: Sequence[Message], timeout: Optional[float] = None, **params: Any
+    ) -> dict[str, Any]:
+        """Send a chat completion request and return the parsed response.
+
+        Args:
+            model: Model to use (e.g., "anthropic/claude-3.5-sonnet")
+            messages: Chat messages
+            timeout: Request timeout in seconds. Defaults to the client timeout.
+            **params: Extra request fields (temperature, max_tokens, ...)
+
+        Returns:
+            Chat completion JSON
+
+        Raises:
+            OpenRouterError: If the request still fails after all retries, or the body is not JSON
+        """
+        payload = self._payload(model, messages, params)
+        request_timeout = self.timeout if timeout is None else timeout
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            try:
+                with self._sync_slots:
+                    self.requests_sent += 1
+                    response = self.client.post("/chat/completions", json=payload, timeout=request_timeout)
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if response.status_code < 400:
+                    return self._json(response)
+
+            time.sleep(self._next_delay(attempt, response, error))
+            attempt += 1
+
+    def complete(
+        self,
+        model: str,
+        messages: Sequence[Message],
+        timeout: Optional[float] = None,
+        bypass_cache: bool = False,
+        stats: Optional[CompletionStats] = None,
+        **params: Any,
+    ) -> str:
+        """Send a chat completion request and return the assistant's text.
+
+        With a response cache configured, a cached answer is returned without a
+        request, and fresh answers are cached. bypass_cache skips both. stats, if
+        given, is filled in with the latency, request size, token usage and cost.
+        """
+        started = time.perf_counter()
+        key = self._cache_key(model, messages, params, bypass_cache)
+        cached = self._cached(key)
+        if cached is not None:
+            self._record_cached(stats, started)
+            return cached
+        params = self._stats_params(stats, model, messages, params)
+        result = self.chat(model, messages, timeout=timeout, **params)
+        text = extract_content(result)
+        self._record(stats, started, result)
+        self._store(key, text)
+        return text
+
+    def stream(
+        self,
+        model: str,
+        messages: Sequence[Message],
+        timeout: Optional[float] = None,
+        stats: Optional[StreamStats] = None,
+        bypass_cache: bool = False,
+        **params: Any,
+    ) -> Iterator[str]:
+        """Stream a chat completion, yielding content tokens as they arrive.
+
+        Failures before the first byte of the response are retried like chat();
+        once the stream has started, errors are raised to the caller. The request
+        holds one concurrency slot until the stream is exhausted or closed, but not
+        while it waits to retry. A cached
+        response is yielded as a single token, and a stream that runs to completion
+        is cached.
+
+        Args:
+            model: Model to use
+            messages: Chat messages
+            timeout: Connect/read timeout in seconds (per chunk, not for the whole stream)
+            stats: Optional StreamStats to fill in with timing and token counts
+            bypass_cache: Neither read from nor write to the response cache
+            **params: Extra request fields
+
+        Yields:
+            Content tokens
+
+        Raises:
+            OpenRouterError: If the request fails or the stream reports an error
+        """
+        stats = stats if stats is not None else StreamStats()
+        key = self._cache_key(model, messages, params, bypass_cache)
+        cached = self._cached(key)
+        if cached is not None:
+            yield self._replay(cached, stats)
+            return
+        payload = self._payload(model, messages, {**params, "stream": True})
+        request_timeout = self.timeout if timeout is None else timeout
+        stats.started_at = time.perf_counter()
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            self._sync_slots.acquire()
+            try:
+                self.requests_sent += 1
+                request = self.client.build_request("POST", "/chat/completions", json=payload, timeout=request_timeout)
+                response = self.client.send(request, stream=True)
+                if response.status_code < 400:
+                    # The slot stays taken until the stream is done
+                    break
+                response.read()
+                response.close()
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                self._sync_slots.release()
+                raise
+            # Back off without holding a slot, as chat() does
+            self._sync_slots.release()
+            time.sleep(self._next_delay(attempt, response, error))
+            attempt += 1
+
+        try:
+            decoder = SSEDecoder()
+            for line in response.iter_lines():
+                data = decoder.feed(line)
+                if data is None:
+                    continue
+                if data == _STREAM_DONE:
+                    # Only a complete, non-empty answer is worth replaying; a dropped stream is not
+                    if stats.text:
+                        self._store(key, stats.text)
+                    break
+                token = _stream_token(data, stats)
+                if token is not None:
+                    yield token
+        except httpx.TransportError as e:
+            msg = f"OpenRouter stream failed: {e}"
+            raise OpenRouterError(msg) from e
+        finally:
+            response.close()
+            self._sync_slots.release()
+            stats.finished_at = time.perf_counter()
+
+    # Asynchronous API
+
+    async def achat(
+        self, model: str, messages: Sequence[Message], timeout: Optional[float] = None, **params: Any
+    ) -> dict[str, Any]:
+        """Async version of chat(). Concurrent calls share the connection pool and concurrency limit."""
+        payload = self._payload(model, messages, params)
+        request_timeout = self.timeout if timeout is None else timeout
+        client = self.async_client
+        assert self._async_slots is not None
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            try:
+                async with self._async_slots:
+                    self.requests_sent += 1
+                    response = await client.post("/chat/completions", json=payload, timeout=request_timeout)
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if response.status_code < 400:
+                    return self._json(response)
+
+            await asyncio.sleep(self._next_delay(attempt, response, error))
+            attempt += 1
+
+    async def acomplete(
+        self,
+        model: str,
+        messages: Sequence[Message],
+        timeout: Optional[float] = None,
+        bypass_cache: bool = False,
+        stats: Optional[CompletionStats] = None,
+        **params: Any,
+    ) -> str:
+        """Async version of complete()."""
+        started = time.perf_counter()
+        key = self._cache_key(model, messages, params, bypass_cache)
+        cached = self._cached(key)
+        if cached is not None:
+            self._record_cached(stats, started)
+            return cached
+        params = self._stats_params(stats, model, messages, params)
+        result = await self.achat(model, messages, timeout=timeout, **params)
+        text = extract_content(result)
+        self._record(stats, started, result)
+        self._store(key, text)
+        return text
+
+    async def astream(
+        self,
+        model: str,
+        messages: Sequence[Message],
+        timeout: Optional[float] = None,
+        stats: Optional[StreamStats] = None,
+        bypass_cache: bool = False,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Async version of stream()."""
+        stats = stats if stats is not None else StreamStats()
+        key = self._cache_key(model, messages, params, bypass_cache)
+        cached = self._cached(key)
+        if cached is not None:
+            yield self._replay(cached, stats)
+            return
+        payload = self._payload(model, messages, {**params, "stream": True})
+        request_timeout = self.timeout if timeout is None else timeout
+        client = self.async_client
+        assert self._async_slots is not None
+        stats.started_at = time.perf_counter()
+        slots = self._async_slots
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            await slots.acquire()
+            try:
+                self.requests_sent += 1
+                request = client.build_request("POST", "/chat/completions", json=payload, timeout=request_timeout)
+                response = await client.send(request, stream=True)
+                if response.status_code < 400:
+                    # The slot stays taken until the stream is done
+                    break
+                await response.aread()
+                await response.aclose()
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                slots.release()
+                raise
+            # Back off without holding a slot, as achat() does
+            slots.release()
+            await asyncio.sleep(self._next_delay(attempt, response, error))
+            attempt += 1
+
+        try:
+            decoder = SSEDecoder()
+            async for line in response.aiter_lines():
+                data = decoder.feed(line)
+                if data is None:
+                    continue
+                if data == _STREAM_DONE:
+                    # Only a complete, non-empty answer is worth replaying; a dropped stream is not
+                    if stats.text:
+                        self._store(key, stats.text)
+                    break
+                token = _stream_token(data, stats)
+                if token is not None:
+                    yield token
+        except httpx.TransportError as e:
+            msg = f"OpenRouter stream failed: {e}"
+            raise OpenRouterError(msg) from e
+        finally:
+            await response.aclose()
+            slots.release()
+            stats.finished_at = time.perf_counter()
+
+    async def acomplete_many(
+        self, model: str, conversations: Sequence[Sequence[Message]], timeout: Optional[float] = None, **params: Any
+    ) -> list[str]:
+        """Run several prompts concurrently, bounded by max_concurrency.
+
+        Args:
+            model: Model to use for every prompt
+            conversations: One message list per prompt
+            timeout: Request timeout in seconds
+            **params: Extra request fields
+
+        Returns:
+            Assistant text for each prompt, in input order
+        """
+        return list(
+            await asyncio.gather(
+                *(self.acomplete(model, messages, timeout=timeout, **params) for messages in conversations)
+            )
+        )
+
+
+_clients: dict[str, OpenRouterClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> OpenRouterClient:
+    """Get a shared client for an API key, so repeated calls reuse its connections.
+
+    Args:
+        api_key: OpenRouter API key
+
+    Returns:
+        Process-wide OpenRouterClient for the key
+    """
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OpenRouterClient(api_key)
+        return _clients[api_key]
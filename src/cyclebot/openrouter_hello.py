@@ -3,20 +3,51 @@
 
 This script demonstrates two uses of OpenRouter.ai:
 1. Basic text prompt (tell me a joke)
-2. Vision analysis of trading chart images
+2. Analysis of trading charts, from indicator features computed on the captured
+   OHLCV series (text model) or from the chart images (vision model)
 
 Configuration is read from .env file.
 """
 
+import asyncio
 import base64
 import os
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Optional
 
-import requests
 from dotenv import load_dotenv
 
-from cyclebot.chart import get_chart_directory, get_latest_charts
+from cyclebot.chart import TIMEFRAMES, get_chart_directory, get_latest_charts
+from cyclebot.chart_analysis import (
+    VISION_PROMPT,
+    AnalysisRun,
+    comparison_report,
+    feature_prompt,
+    load_market_summary,
+    parse_mode,
+)
+from cyclebot.chart_index import ChartIndex
+from cyclebot.fanout import FanOutResult, ModelFanOut
+from cyclebot.images import DEFAULT_CACHE_DIR, ImageEncodeCache, ImageOptions, ImagePipeline, parse_crop
+from cyclebot.openrouter import (
+    CompletionStats,
+    OpenRouterClient,
+    OpenRouterError,
+    StreamStats,
+    get_client,
+    text_message,
+    vision_message,
+)
+from cyclebot.response_cache import (
+    DEFAULT_CACHE_PATH,
+    MemoryResponseCache,
+    SqliteResponseCache,
+    TieredResponseCache,
+)
+
+if TYPE_CHECKING:
+    from cyclebot.indicators import MarketSummary
 
 
 def load_config() -> dict[str, Optional[str]]:
@@ -31,7 +62,19 @@ def load_config() -> dict[str, Optional[str]]:
         "api_key": os.getenv("OPENROUTER_API_KEY"),
         "model": os.getenv("OPENROUTER_MODEL", "anthropic/claude-3.5-sonnet"),
         "vision_model": os.getenv("OPENROUTER_VISION_MODEL", "meta-llama/llama-3.2-90b-vision-instruct:free"),
+        "vision_models": os.getenv("OPENROUTER_VISION_MODELS"),
+        "fanout_mode": os.getenv("OPENROUTER_FANOUT_MODE", "first"),
+        "fanout_deadline": os.getenv("OPENROUTER_FANOUT_DEADLINE", "60"),
         "chart_base_dir": os.getenv("CHART_BASE_DIR"),
+        "image_format": os.getenv("OPENROUTER_IMAGE_FORMAT", "webp"),
+        "image_max_width": os.getenv("OPENROUTER_IMAGE_MAX_WIDTH", "1280"),
+        "image_quality": os.getenv("OPENROUTER_IMAGE_QUALITY", "85"),
+        "image_crop": os.getenv("OPENROUTER_IMAGE_CROP"),
+        "response_cache": os.getenv("OPENROUTER_RESPONSE_CACHE", "on"),
+        "response_cache_ttl": os.getenv("OPENROUTER_RESPONSE_CACHE_TTL", "86400"),
+        "skip_unchanged": os.getenv("OPENROUTER_SKIP_UNCHANGED", "on"),
+        "analysis_mode": os.getenv("OPENROUTER_ANALYSIS_MODE", "features"),
+        "analysis_model": os.getenv("OPENROUTER_ANALYSIS_MODEL"),
     }
 
     if not config["api_key"]:
@@ -41,34 +84,68 @@ def load_config() -> dict[str, Optional[str]]:
     return config
 
 
-def send_text_prompt(api_key: str, model: str, prompt: str) -> str:
+def create_image_pipeline(config: dict[str, Optional[str]]) -> ImagePipeline:
+    """Create the image pipeline for vision prompts from configuration.
+
+    Args:
+        config: Configuration from load_config()
+
+    Returns:
+        ImagePipeline with a disk-backed encode cache
+    """
+    image_format = config.get("image_format") or None
+    max_width = config.get("image_max_width")
+    options = ImageOptions(
+        max_width=int(max_width) if max_width else None,
+        crop=parse_crop(config.get("image_crop")),
+        format=None if image_format == "original" else image_format,
+        quality=int(config.get("image_quality") or 85),
+    )
+    return ImagePipeline(options, ImageEncodeCache(disk_dir=DEFAULT_CACHE_DIR))
+
+
+def configure_response_cache(config: dict[str, Optional[str]]) -> Optional[TieredResponseCache]:
+    """Put a response cache in front of the shared client for the configured API key.
+
+    Args:
+        config: Configuration from load_config()
+
+    Returns:
+        The cache (memory in front of ~/.cache/cyclebot/responses.sqlite3), or None if disabled
+    """
+    api_key = config["api_key"]
+    if not api_key:
+        return None
+    client = get_client(api_key)
+    if (config.get("response_cache") or "on").lower() in ("off", "0", "false", "no"):
+        client.cache = None
+        return None
+    ttl = config.get("response_cache_ttl")
+    cache = TieredResponseCache(MemoryResponseCache(), SqliteResponseCache(DEFAULT_CACHE_PATH))
+    client.cache = cache
+    client.cache_ttl = float(ttl) if ttl else None
+    return cache
+
+
+def send_text_prompt(
+    api_key: str, model: str, prompt: str, bypass_cache: bool = False, stats: Optional[CompletionStats] = None
+) -> str:
     """Send a text prompt to OpenRouter.
 
     Args:
         api_key: OpenRouter API key
         model: Model to use (e.g., "anthropic/claude-3.5-sonnet")
         prompt: Text prompt to send
+        bypass_cache: Always ask the model, even if a cached response exists
+        stats: Optional CompletionStats to fill in with latency, request size and cost
 
     Returns:
         Model's response text
     """
-    url = "https://openrouter.ai/api/v1/chat/completions"
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
-    data = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-    }
-
-    response = requests.post(url, headers=headers, json=data, timeout=30)
-    response.raise_for_status()
-
-    result: dict[str, Any] = response.json()
-    return str(result["choices"][0]["message"]["content"])
+    text: str = get_client(api_key).complete(
+        model, [text_message(prompt)], timeout=30, bypass_cache=bypass_cache, stats=stats
+    )
+    return text
 
 
 def encode_image_base64(image_path: Path) -> str:
@@ -92,7 +169,30 @@ def encode_image_base64(image_path: Path) -> str:
     return f"data:{mime_type};base64,{encoded}"
 
 
-def send_vision_prompt(api_key: str, model: str, prompt: str, images: list[Path]) -> str:
+def encode_images(images: list[Path], pipeline: Optional[ImagePipeline] = None) -> list[str]:
+    """Encode images as data URLs, through the pipeline if one is given.
+
+    Args:
+        images: List of image file paths
+        pipeline: Optional preprocessing pipeline with encode cache
+
+    Returns:
+        Data URLs in the same order as images
+    """
+    if pipeline is None:
+        return [encode_image_base64(image_path) for image_path in images]
+    return [pipeline.encode(image_path) for image_path in images]
+
+
+def send_vision_prompt(
+    api_key: str,
+    model: str,
+    prompt: str,
+    images: list[Path],
+    pipeline: Optional[ImagePipeline] = None,
+    bypass_cache: bool = False,
+    stats: Optional[CompletionStats] = None,
+) -> str:
     """Send a vision prompt with images to OpenRouter.
 
     Args:
@@ -100,34 +200,111 @@ def send_vision_prompt(api_key: str, model: str, prompt: str, images: list[Path]
         model: Vision-capable model to use
         prompt: Text prompt to send
         images: List of image file paths
+        pipeline: Optional image pipeline to shrink and cache the images. Without one
+            the files are sent as-is.
+        bypass_cache: Always ask the model, even if a cached response exists
+        stats: Optional CompletionStats to fill in with latency, request size and cost
 
     Returns:
         Model's response text
     """
-    url = "https://openrouter.ai/api/v1/chat/completions"
+    # Content array with text first, then images
+    image_urls = encode_images(images, pipeline)
+    text: str = get_client(api_key).complete(
+        model, [vision_message(prompt, image_urls)], timeout=60, bypass_cache=bypass_cache, stats=stats
+    )
+    return text
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
 
-    # Build content array with text first, then images
-    content: list[dict[str, Any]] = [{"type": "text", "text": prompt}]
+def send_vision_prompt_fanout(
+    api_key: str,
+    models: list[str],
+    prompt: str,
+    images: list[Path],
+    mode: str = "first",
+    deadline: Optional[float] = None,
+    pipeline: Optional[ImagePipeline] = None,
+) -> FanOutResult:
+    """Send a vision prompt to several models at once.
 
-    for image_path in images:
-        image_url = encode_image_base64(image_path)
-        content.append({"type": "image_url", "image_url": {"url": image_url}})
+    Args:
+        api_key: OpenRouter API key
+        models: Vision-capable models to query concurrently
+        prompt: Text prompt to send
+        images: List of image file paths
+        mode: "first" returns the first successful answer and cancels the rest;
+            "collect" gathers every answer that arrives within the deadline
+        deadline: Overall time limit in seconds (required for "collect")
+        pipeline: Optional image pipeline to shrink and cache the images
+
+    Returns:
+        Per-model outcomes with latencies
+    """
+    messages = [vision_message(prompt, encode_images(images, pipeline))]
+    shared = get_client(api_key)
+
+    async def run() -> FanOutResult:
+        # A client per event loop; it shares the response cache with the synchronous client
+        async with OpenRouterClient(
+            api_key, max_concurrency=max(4, len(models)), cache=shared.cache, cache_ttl=shared.cache_ttl
+        ) as client:
+            fan_out = ModelFanOut(client, models)
+            if mode == "collect":
+                return await fan_out.collect(messages, deadline if deadline is not None else 60.0, timeout=60)
+            return await fan_out.first(messages, deadline, timeout=60)
+
+    return asyncio.run(run())
+
+
+def stream_text_prompt(
+    api_key: str, model: str, prompt: str, stats: Optional[StreamStats] = None, bypass_cache: bool = False
+) -> Iterator[str]:
+    """Stream a text prompt's response from OpenRouter.
+
+    Args:
+        api_key: OpenRouter API key
+        model: Model to use
+        prompt: Text prompt to send
+        stats: Optional StreamStats to fill in with time to first token and token rate
+        bypass_cache: Always ask the model, even if a cached response exists
+
+    Returns:
+        Iterator over response tokens
+    """
+    tokens: Iterator[str] = get_client(api_key).stream(
+        model, [text_message(prompt)], timeout=30, stats=stats, bypass_cache=bypass_cache
+    )
+    return tokens
 
-    data = {
-        "model": model,
-        "messages": [{"role": "user", "content": content}],
-    }
 
-    response = requests.post(url, headers=headers, json=data, timeout=60)
-    response.raise_for_status()
+def stream_vision_prompt(
+    api_key: str,
+    model: str,
+    prompt: str,
+    images: list[Path],
+    stats: Optional[StreamStats] = None,
+    pipeline: Optional[ImagePipeline] = None,
+    bypass_cache: bool = False,
+) -> Iterator[str]:
+    """Stream a vision prompt's response from OpenRouter.
+
+    Args:
+        api_key: OpenRouter API key
+        model: Vision-capable model to use
+        prompt: Text prompt to send
+        images: List of image file paths
+        stats: Optional StreamStats to fill in with time to first token and token rate
+        pipeline: Optional image pipeline to shrink and cache the images
+        bypass_cache: Always ask the model, even if a cached response exists
 
-    result: dict[str, Any] = response.json()
-    return str(result["choices"][0]["message"]["content"])
+    Returns:
+        Iterator over response tokens
+    """
+    image_urls = encode_images(images, pipeline)
+    tokens: Iterator[str] = get_client(api_key).stream(
+        model, [vision_message(prompt, image_urls)], timeout=60, stats=stats, bypass_cache=bypass_cache
+    )
+    return tokens
 
 
 def example_basic_joke(config: dict[str, Optional[str]]) -> None:
@@ -147,56 +324,145 @@ def example_basic_joke(config: dict[str, Optional[str]]) -> None:
     print(f"Response:\n{response}\n")
 
 
+def analyze_features(api_key: str, model: str, summary: "MarketSummary", bypass_cache: bool = False) -> AnalysisRun:
+    """Analyze the indicator features of the captured series with a text model.
+
+    Args:
+        api_key: OpenRouter API key
+        model: Text model to use
+        summary: Feature summary from chart_analysis.load_market_summary()
+        bypass_cache: Always ask the model, even if a cached response exists
+
+    Returns:
+        The answer with its latency, request size and cost
+    """
+    stats = CompletionStats()
+    text = send_text_prompt(api_key, model, feature_prompt(summary), bypass_cache, stats=stats)
+    return AnalysisRun("features", model, text, stats)
+
+
+def analyze_chart_images(
+    api_key: str,
+    model: str,
+    images: list[Path],
+    pipeline: Optional[ImagePipeline] = None,
+    bypass_cache: bool = False,
+) -> AnalysisRun:
+    """Analyze the chart images with a vision model.
+
+    Args:
+        api_key: OpenRouter API key
+        model: Vision-capable model to use
+        images: Chart images, longest timeframe first
+        pipeline: Optional image pipeline to shrink and cache the images
+        bypass_cache: Always ask the model, even if a cached response exists
+
+    Returns:
+        The answer with its latency, request size and cost
+    """
+    stats = CompletionStats()
+    text = send_vision_prompt(api_key, model, VISION_PROMPT, images, pipeline, bypass_cache, stats=stats)
+    return AnalysisRun("vision", model, text, stats)
+
+
 def example_chart_analysis(config: dict[str, Optional[str]]) -> None:
-    """Example 2: Vision analysis of trading charts."""
-    print("=== Example 2: Chart Analysis with Vision ===\n")
-    print(f"Using model: {config['vision_model']}\n")
+    """Example 2: Analysis of trading charts, from indicator features or with vision."""
+    mode = parse_mode(config.get("analysis_mode"))
+    text_model = config.get("analysis_model") or config.get("model") or ""
+    vision_model = config.get("vision_model") or ""
+    print(f"=== Example 2: Chart Analysis ({mode} mode) ===\n")
+    if mode != "vision":
+        print(f"Using text model: {text_model}")
+    if mode != "features":
+        print(f"Using vision model: {vision_model}")
+    print()
 
     # Get chart directory
     chart_base_dir = config.get("chart_base_dir")
-    chart_dir = get_chart_directory(chart_base_dir if chart_base_dir else None)
+    chart_dir = get_chart_directory(chart_base_dir if chart_base_dir else None, create=False)
     print(f"Chart directory: {chart_dir}\n")
 
-    # Get latest charts for all timeframes
-    latest_charts = get_latest_charts(chart_dir)
+    # Get latest charts for all timeframes from the chart index, and the features of their series
+    with ChartIndex(chart_base_dir if chart_base_dir else None) as index:
+        latest_charts = get_latest_charts(chart_dir, index=index)
+        unchanged = {tf: original for tf, path in latest_charts.items() if (original := index.same_as(path))}
+        summary = load_market_summary(chart_dir, index, charts=latest_charts) if mode != "vision" else None
 
     if not latest_charts:
         print("No charts found! Please run chart_capture.py first.")
+        print("(Charts captured before the index existed: python -m cyclebot.chart_index rebuild)")
         return
 
     print(f"Found {len(latest_charts)} charts:")
     for timeframe, path in latest_charts.items():
-        print(f"  {timeframe}: {path.name}")
+        note = f" (unchanged since {unchanged[timeframe].name})" if timeframe in unchanged else ""
+        print(f"  {timeframe}: {path.name}{note}")
     print()
 
-    # Prepare images list in order: 1h, 30m, 15m, 5m
-    timeframes = ["1h", "30m", "15m", "5m"]
-    images = [latest_charts[tf] for tf in timeframes if tf in latest_charts]
-
-    if not images:
-        print("No charts available for analysis.")
+    # Nothing moved since the charts were last captured, so the previous analysis still stands
+    skip_unchanged = (config.get("skip_unchanged") or "on").lower() not in ("off", "0", "false", "no")
+    if skip_unchanged and len(unchanged) == len(latest_charts):
+        print("All charts are unchanged since their previous capture; skipping the analysis.")
+        print("(Set OPENROUTER_SKIP_UNCHANGED=off to analyze them anyway.)")
         return
 
-    # Create prompt for chart analysis
-    prompt = """Analyze these TradingView charts (in order: 1 hour, 30 minute, 15 minute, 5 minute timeframes).
+    # Images in order: 1h, 30m, 15m, 5m
+    images = [latest_charts[tf] for tf in TIMEFRAMES if tf in latest_charts]
+    api_key = config["api_key"]
+    if not api_key or (mode != "vision" and not text_model) or (mode != "features" and not vision_model):
+        print("Error: Missing API key or model configuration")
+        return
 
-Please provide:
-1. Overall trend across all timeframes
-2. Key support and resistance levels visible
-3. Any notable patterns or formations
-4. Short-term vs long-term trend alignment
-5. Your assessment of current market condition
+    if mode == "vision":
+        print(f"Analyzing {len(images)} chart images...\n")
+        pipeline = create_image_pipeline(config)
+
+        # With several vision models configured, race them instead of waiting on one
+        models = [m.strip() for m in (config.get("vision_models") or "").split(",") if m.strip()]
+        if len(models) > 1:
+            fanout_mode = config.get("fanout_mode") or "first"
+            deadline = float(config.get("fanout_deadline") or 60)
+            print(f"Fanning out to {len(models)} models ({fanout_mode} mode)...\n")
+            result = send_vision_prompt_fanout(api_key, models, VISION_PROMPT, images, fanout_mode, deadline, pipeline)
+            for outcome in result.results:
+                status = "ok" if outcome.ok else outcome.error
+                print(f"  {outcome.model}: {outcome.latency_ms:.0f}ms ({status})")
+            print()
+            for model, text in result.answers.items():
+                print(f"Analysis from {model}:\n{text}\n")
+                if fanout_mode != "collect":
+                    break
+            return
+
+        # Stream the analysis so the first words show up as soon as the model produces them
+        stats = StreamStats()
+        print("Analysis:")
+        for token in stream_vision_prompt(api_key, vision_model, VISION_PROMPT, images, stats=stats, pipeline=pipeline):
+            print(token, end="", flush=True)
+        print(f"\n\n({stats.summary()})\n")
+        return
 
-Be concise but specific."""
+    if summary is None:
+        print('No OHLCV series from the capture of these charts; capture with --series (pip install -e ".[data]").')
+        print("(Set OPENROUTER_ANALYSIS_MODE=vision to analyze the chart images instead.)")
+        return
+    print(f"Features:\n{summary.format()}\n")
 
-    print(f"Analyzing {len(images)} chart images...\n")
-    api_key = config["api_key"]
-    vision_model = config["vision_model"]
-    if not api_key or not vision_model:
-        print("Error: Missing API key or vision model configuration")
+    if mode == "features":
+        run = analyze_features(api_key, text_model, summary)
+        print(f"Analysis from {run.model}:\n{run.text}\n\n({run.stats.summary()})\n")
         return
-    response = send_vision_prompt(api_key, vision_model, prompt, images)
-    print(f"Analysis:\n{response}\n")
+
+    # Compare: ask both models fresh so the numbers measure the requests, not the response cache
+    print(f"Analyzing the features and the {len(images)} chart images...\n")
+    runs = [
+        analyze_features(api_key, text_model, summary, bypass_cache=True),
+        analyze_chart_images(api_key, vision_model, images, create_image_pipeline(config), bypass_cache=True),
+    ]
+    for run in runs:
+        print(f"Analysis from {run.model} ({run.mode}):\n{run.text}\n")
+    print(comparison_report(runs))
+    print()
 
 
 def main() -> None:
@@ -204,20 +470,24 @@ def main() -> None:
     try:
         # Load configuration
         config = load_config()
+        cache = configure_response_cache(config)
 
         # Example 1: Basic joke prompt
         example_basic_joke(config)
 
         print("\n" + "=" * 70 + "\n")
 
-        # Example 2: Chart analysis with vision
+        # Example 2: Chart analysis from features or with vision
         example_chart_analysis(config)
 
+        if cache is not None:
+            print(f"Response cache: {cache.stats.hits} hits, {cache.stats.misses} misses")
+
     except ValueError as e:
         print(f"Configuration error: {e}")
         print("\nPlease create a .env file based on .env.example")
         print("Get your API key from: https://openrouter.ai/keys")
-    except requests.exceptions.RequestException as e:
+    except OpenRouterError as e:
         print(f"API request error: {e}")
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,279 @@
+"""Bounded outbound message queue for a WebSocket connection.
+
+Agent queries produce messages faster than a slow browser tab reads them, and
+tool results can be very large. OutboundQueue decouples the two: producers put
+JSON-RPC messages on a bounded queue and a single writer task sends them. While
+the queue is backed up, runs of small notifications are coalesced into one
+JSON-RPC batch array per frame, and oversized tool results are truncated or
+dropped according to the configured policy. Responses are always sent whole and
+in order. Messages are encoded with serialization.dumps and sent as bytes frames.
+
+Example:
+    >>> outbound = OutboundQueue(websocket.send_bytes)
+    >>> outbound.start()
+    >>> await outbound.notify({"jsonrpc": "2.0", "method": "message", "params": {...}})
+    >>> await outbound.close()
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from collections import deque
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from cyclebot.serialization import dumps
+
+# What to do with oversized tool results while the queue is under pressure
+OVERSIZE_POLICIES = ("keep", "truncate", "drop")
+
+
+class OutboundClosed(Exception):
+    """The queue was closed or its connection failed; nothing more can be sent."""
+
+
+@dataclass
+class OutboundStats:
+    """Counters and latency samples for one outbound queue."""
+
+    messages: int = 0
+    frames: int = 0
+    batches: int = 0
+    truncated: int = 0
+    dropped: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    queue_wait_ms: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    send_ms: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    @staticmethod
+    def _percentile(samples: deque[float], pct: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serialisable view of the stats."""
+        return {
+            "messages": self.messages,
+            "frames": self.frames,
+            "batches": self.batches,
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "queue_wait_p50_ms": self._percentile(self.queue_wait_ms, 50),
+            "queue_wait_p95_ms": self._percentile(self.queue_wait_ms, 95),
+            "send_p50_ms": self._percentile(self.send_ms, 50),
+            "send_p95_ms": self._percentile(self.send_ms, 95),
+        }
+
+
+@dataclass
+class _Outgoing:
+    data: bytes
+    batchable: bool
+    queued_at: float
+
+
+def shrink_tool_results(message: dict[str, Any], limit: int, policy: str) -> tuple[dict[str, Any], bool]:
+    """Truncate or drop oversized tool results in a message notification.
+
+    Args:
+        message: JSON-RPC notification as built by web.handle_prompt
+        limit: Maximum serialized size of a single tool result, in characters
+        policy: "truncate" keeps the first ``limit`` characters, "drop" replaces the
+            content with a placeholder, "keep" leaves it alone
+
+    Returns:
+        (message, changed). The input is not modified; a copy is returned if changed.
+    """
+    params = message.get("params")
+    if policy == "keep" or not isinstance(params, dict) or params.get("type") != "user":
+        return message, False
+
+    blocks = params.get("data", {}).get("content", [])
+    new_blocks = []
+    changed = False
+    for block in blocks:
+        if isinstance(block, dict) and block.get("type") == "tool_result":
+            content = block.get("content")
+            text = content if isinstance(content, str) else json.dumps(content)
+            if len(text) > limit:
+                omitted = len(text) - (limit if policy == "truncate" else 0)
+                if policy == "truncate":
+                    summary = f"{text[:limit]}\n… [{omitted} characters truncated]"
+                else:
+                    summary = f"[tool result omitted: {omitted} characters]"
+                block = {**block, "content": summary, "truncated": True}
+                changed = True
+        new_blocks.append(block)
+
+    if not changed:
+        return message, False
+    data = {**params["data"], "content": new_blocks}
+    return {**message, "params": {**params, "data": data}}, True
+
+
+class OutboundQueue:
+    """Bounded send queue with a dedicated writer task."""
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Awaitable[None]],
+        max_size: int = 256,
+        batch_max: int = 32,
+        batch_bytes: int = 64 * 1024,
+        small_bytes: int = 4096,
+        oversize_bytes: int = 64 * 1024,
+        oversize_policy: str = "truncate",
+        pressure_ratio: float = 0.5,
+    ) -> None:
+        """Initialize the queue. Call start() before putting messages.
+
+        Args:
+            send: Coroutine function sending one frame (e.g. WebSocket.send_bytes)
+            max_size: Maximum queued messages; producers wait when it is full
+            batch_max: Maximum notifications coalesced into one frame
+            batch_bytes: Maximum size of a coalesced frame
+            small_bytes: Notifications up to this size may be coalesced
+            oversize_bytes: Tool results larger than this are shrunk under pressure
+            oversize_policy: "truncate", "drop" or "keep"
+            pressure_ratio: Queue fill level (0-1) from which the oversize policy applies
+        """
+        if oversize_policy not in OVERSIZE_POLICIES:
+            msg = f"Unknown oversize policy {oversize_policy!r}, expected one of {OVERSIZE_POLICIES}"
+            raise ValueError(msg)
+        self._send = send
+        self.max_size = max_size
+        self.batch_max = batch_max
+        self.batch_bytes = batch_bytes
+        self.small_bytes = small_bytes
+        self.oversize_bytes = oversize_bytes
+        self.oversize_policy = oversize_policy
+        self.pressure_threshold = max(1, int(max_size * pressure_ratio))
+        self.stats = OutboundStats()
+        self._items: deque[_Outgoing] = deque()
+        self._changed = asyncio.Condition()
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._writer: Optional[asyncio.Task[None]] = None
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting to be sent."""
+        return len(self._items)
+
+    @property
+    def under_pressure(self) -> bool:
+        """Whether the queue is filled beyond the pressure threshold."""
+        return len(self._items) >= self.pressure_threshold
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def notify(self, message: dict[str, Any]) -> None:
+        """Queue a notification; it may be shrunk or coalesced with others."""
+        if self.under_pressure:
+            message, changed = shrink_tool_results(message, self.oversize_bytes, self.oversize_policy)
+            if changed:
+                if self.oversize_policy == "drop":
+                    self.stats.dropped += 1
+                else:
+                    self.stats.truncated += 1
+        data = dumps(message)
+        await self._put(_Outgoing(data, len(data) <= self.small_bytes, time.perf_counter()))
+
+    async def send(self, message: dict[str, Any]) -> None:
+        """Queue a message that must be delivered whole and on its own (e.g. a response)."""
+        await self._put(_Outgoing(dumps(message), False, time.perf_counter()))
+
+    async def _put(self, item: _Outgoing) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._closed or len(self._items) < self.max_size)
+            if self._closed:
+                msg = "Outbound queue is closed"
+                raise OutboundClosed(msg) from self._error
+            self._items.append(item)
+            self.stats.depth = len(self._items)
+            self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+            self._changed.notify_all()
+
+    @property
+    def _closed(self) -> bool:
+        return self._closing or self._error is not None
+
+    def _take_frame(self) -> tuple[bytes, list[_Outgoing]]:
+        """Pop the next frame: one message, or a run of small notifications as a batch array."""
+        first = self._items.popleft()
+        taken = [first]
+        if first.batchable:
+            size = len(first.data)
+            while (
+                self._items
+                and self._items[0].batchable
+                and len(taken) < self.batch_max
+                and size + len(self._items[0].data) <= self.batch_bytes
+            ):
+                item = self._items.popleft()
+                size += len(item.data) + 1
+                taken.append(item)
+        if len(taken) == 1:
+            return first.data, taken
+        return b"[" + b",".join(item.data for item in taken) + b"]", taken
+
+    async def _write_loop(self) -> None:
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: bool(self._items) or self._closing)
+                if not self._items:
+                    return
+                frame, taken = self._take_frame()
+                self.stats.depth = len(self._items)
+                self._changed.notify_all()
+
+            started = time.perf_counter()
+            try:
+                await self._send(frame)
+            except Exception as e:
+                async with self._changed:
+                    self._error = e
+                    self._items.clear()
+                    self._changed.notify_all()
+                return
+            sent = time.perf_counter()
+            self.stats.send_ms.append((sent - started) * 1000)
+            self.stats.queue_wait_ms.extend((started - item.queued_at) * 1000 for item in taken)
+            self.stats.frames += 1
+            self.stats.messages += len(taken)
+            if len(taken) > 1:
+                self.stats.batches += 1
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop accepting messages, flush what is queued and stop the writer.
+
+        Args:
+            timeout: Seconds to wait for the flush before abandoning the rest
+        """
+        async with self._changed:
+            self._closing = True
+            self._changed.notify_all()
+        if self._writer is not None:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._writer, timeout)
+
+    async def abort(self) -> None:
+        """Stop immediately, discarding queued messages (e.g. after a disconnect)."""
+        async with self._changed:
+            self._closing = True
+            self._items.clear()
+            self._changed.notify_all()
+        if self._writer is not None:
+            self._writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._writer
@@ -0,0 +1,263 @@
+"""Response cache for OpenRouter completions.
+
+Re-running an analysis with the same prompt and the same charts should not pay
+for a second completion. Responses are cached under a key built from the model,
+the request parameters and the normalized messages, with embedded images reduced
+to content hashes so keys stay small. Caches can live in memory (LRU), in a local
+SQLite file, or both (TieredResponseCache), and every entry can carry a TTL.
+
+Example:
+    >>> cache = TieredResponseCache(MemoryResponseCache(), SqliteResponseCache(DEFAULT_CACHE_PATH))
+    >>> client = OpenRouterClient(api_key, cache=cache, cache_ttl=3600)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Protocol, Union
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "cyclebot" / "responses.sqlite3"
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that hit (0.0 when there were none)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache(Protocol):
+    """Interface for response caches used by OpenRouterClient."""
+
+    stats: CacheStats
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        ...
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a response, optionally expiring after ttl seconds."""
+        ...
+
+
+class ExpiringResponseCache(ResponseCache, Protocol):
+    """Response cache that also reports when its entries expire, as TieredResponseCache needs."""
+
+    def get_entry(self, key: str) -> Optional[tuple[str, Optional[float]]]:
+        """Return the cached response and its expiry time (epoch seconds, None for never), or None."""
+        ...
+
+
+def _normalize_content(content: Any) -> Any:
+    """Normalize message content for hashing, replacing image data with its digest."""
+    if isinstance(content, str):
+        return content.strip()
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                url = part.get("image_url", {}).get("url", "")
+                if url.startswith("data:"):
+                    url = "sha256:" + hashlib.sha256(url.encode()).hexdigest()
+                parts.append({"type": "image_url", "image_url": {"url": url}})
+            elif isinstance(part, dict) and part.get("type") == "text":
+                parts.append({"type": "text", "text": str(part.get("text", "")).strip()})
+            else:
+                parts.append(part)
+        return parts
+    return content
+
+
+def response_cache_key(model: str, messages: Sequence[dict[str, Any]], params: Optional[dict[str, Any]] = None) -> str:
+    """Build a cache key for a chat completion request.
+
+    Args:
+        model: Model name
+        messages: Chat messages; image data URLs are replaced by content hashes
+        params: Extra request fields that affect the answer (temperature, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    normalized = {
+        "model": model,
+        "messages": [{**message, "content": _normalize_content(message.get("content"))} for message in messages],
+        "params": {k: v for k, v in (params or {}).items() if k != "stream"},
+    }
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class MemoryResponseCache:
+    """In-memory LRU response cache with per-entry TTLs."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses
+        """
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[Optional[float], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of cached entries (including not yet purged expired ones)."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[tuple[str, Optional[float]]]:
+        """Return the cached response and its expiry time (None for never), or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value, expires_at
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a response, optionally expiring after ttl seconds."""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self.stats.writes += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SqliteResponseCache:
+    """Response cache persisted in a local SQLite database."""
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_CACHE_PATH) -> None:
+        """Open (and create if needed) the cache database.
+
+        Args:
+            db_path: SQLite database file, or ":memory:"
+        """
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[tuple[str, Optional[float]]]:
+        """Return the cached response and its expiry time (None for never), or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return str(row[0]), row[1]
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a response, optionally expiring after ttl seconds."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now + ttl if ttl is not None else None),
+            )
+        self.stats.writes += 1
+
+    def purge_expired(self) -> int:
+        """Delete expired entries.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+
+class TieredResponseCache:
+    """Memory cache in front of a persistent cache.
+
+    Hits in the persistent tier are copied into memory for what is left of
+    their TTL.
+    """
+
+    def __init__(self, memory: MemoryResponseCache, persistent: ExpiringResponseCache) -> None:
+        """Initialize the tiers.
+
+        Args:
+            memory: Fast first tier
+            persistent: Slower second tier, e.g. SqliteResponseCache
+        """
+        self.memory = memory
+        self.persistent = persistent
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        value = self.memory.get(key)
+        if value is None:
+            entry = self.persistent.get_entry(key)
+            if entry is not None:
+                value, expires_at = entry
+                ttl = expires_at - time.time() if expires_at is not None else None
+                if ttl is None or ttl > 0:
+                    self.memory.put(key, value, ttl)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a response in both tiers."""
+        self.memory.put(key, value, ttl)
+        self.persistent.put(key, value, ttl)
+        self.stats.writes += 1
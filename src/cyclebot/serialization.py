@@ -0,0 +1,193 @@
+"""Fast serialization of agent messages for the web server.
+
+Streaming notifications is the web server's hot loop: every SDK message becomes
+a JSON-RPC notification. MessageSerializer picks the conversion for a message,
+and for each of its content blocks, with one dict lookup on the exact type
+instead of an isinstance chain. dumps() encodes straight to bytes with orjson
+when it is installed (pip install "cyclebot[fast]") and falls back to a
+preconfigured stdlib encoder otherwise.
+
+New message types are supported by registering a handler:
+
+    @MessageSerializer.register(MyMessage)
+    def _my_message(serializer, message):
+        return {"type": "mine", "data": {...}}
+"""
+
+import importlib.util
+import json
+from typing import Any, Callable, ClassVar, Optional, Union
+
+from claude_code_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+Handler = Callable[["MessageSerializer", Any], dict[str, Any]]
+BlockHandler = Callable[[Any], dict[str, Any]]
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values JSON cannot represent natively (paths, sets, ...)."""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        """Encode a value as compact UTF-8 JSON."""
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON produced by dumps()."""
+        return orjson.loads(data)
+
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps(value: Any) -> bytes:
+        """Encode a value as compact UTF-8 JSON."""
+        return _encoder.encode(value).encode()
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON produced by dumps()."""
+        return json.loads(data)
+
+
+def notification(params: dict[str, Any], method: str = "message") -> dict[str, Any]:
+    """Wrap notification params in a JSON-RPC 2.0 envelope."""
+    return {"jsonrpc": "2.0", "method": method, "params": params}
+
+
+def _text_block(block: TextBlock) -> dict[str, Any]:
+    return {"type": "text", "text": block.text}
+
+
+def _tool_use_block(block: ToolUseBlock) -> dict[str, Any]:
+    return {"type": "tool_use", "name": block.name, "input": block.input}
+
+
+def _tool_result_block(block: ToolResultBlock) -> dict[str, Any]:
+    return {"type": "tool_result", "content": block.content, "is_error": block.is_error}
+
+
+# Blocks shown for each message kind; anything else (e.g. thinking) is skipped
+ASSISTANT_BLOCKS: dict[type, BlockHandler] = {TextBlock: _text_block, ToolUseBlock: _tool_use_block}
+USER_BLOCKS: dict[type, BlockHandler] = {TextBlock: _text_block, ToolResultBlock: _tool_result_block}
+
+
+def _resolve_block(block_type: type, handlers: dict[type, BlockHandler]) -> Optional[BlockHandler]:
+    """Find the handler for a subclass of a handled block type and cache it, as for messages."""
+    for base in block_type.__mro__[1:]:
+        handler = handlers.get(base)
+        if handler is not None:
+            handlers[block_type] = handler
+            return handler
+    return None
+
+
+def _blocks(content: Any, handlers: dict[type, BlockHandler]) -> list[dict[str, Any]]:
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    result = []
+    for block in content:
+        handler = handlers.get(type(block)) or _resolve_block(type(block), handlers)
+        if handler is not None:
+            result.append(handler(block))
+    return result
+
+
+class MessageSerializer:
+    """Convert SDK messages of one prompt into notification params.
+
+    An instance tracks the turn count of its prompt, so use one per prompt.
+    """
+
+    handlers: ClassVar[dict[type, Handler]] = {}
+
+    def __init__(self) -> None:
+        """Start at turn zero."""
+        self.turn_count = 0
+
+    @classmethod
+    def register(cls, message_type: type) -> Callable[[Handler], Handler]:
+        """Register the handler for a message type (decorator)."""
+
+        def decorator(handler: Handler) -> Handler:
+            cls.handlers[message_type] = handler
+            return handler
+
+        return decorator
+
+    @classmethod
+    def _resolve(cls, message_type: type) -> Optional[Handler]:
+        """Find a handler for a subclass of a registered type and cache it."""
+        for base in message_type.__mro__[1:]:
+            handler = cls.handlers.get(base)
+            if handler is not None:
+                cls.handlers[message_type] = handler
+                return handler
+        return None
+
+    def serialize(self, message: Any) -> dict[str, Any]:
+        """Convert a message into {"type": ..., "data": ...} notification params."""
+        handler = self.handlers.get(type(message)) or self._resolve(type(message))
+        if handler is None:
+            return {"type": "unknown", "data": {}}
+        return handler(self, message)
+
+
+@MessageSerializer.register(AssistantMessage)
+def _assistant(serializer: MessageSerializer, message: AssistantMessage) -> dict[str, Any]:
+    serializer.turn_count += 1
+    return {
+        "type": "assistant",
+        "data": {"turn": serializer.turn_count, "content": _blocks(message.content, ASSISTANT_BLOCKS)},
+    }
+
+
+@MessageSerializer.register(UserMessage)
+def _user(serializer: MessageSerializer, message: UserMessage) -> dict[str, Any]:
+    return {"type": "user", "data": {"content": _blocks(message.content, USER_BLOCKS)}}
+
+
+@MessageSerializer.register(SystemMessage)
+def _system(serializer: MessageSerializer, message: SystemMessage) -> dict[str, Any]:
+    data = message.data
+    return {
+        "type": "system",
+        "data": {
+            "model": data.get("model"),
+            "session_id": data.get("session_id"),
+            "cwd": data.get("cwd"),
+            "tools": data.get("tools"),
+            "permission_mode": data.get("permissionMode"),
+        },
+    }
+
+
+@MessageSerializer.register(ResultMessage)
+def _result(serializer: MessageSerializer, message: ResultMessage) -> dict[str, Any]:
+    serializer.turn_count += 1
+    return {
+        "type": "result",
+        "data": {
+            "num_turns": message.num_turns,
+            "duration_api_ms": message.duration_api_ms,
+            "duration_ms": message.duration_ms,
+            "is_error": message.is_error,
+            "total_cost_usd": message.total_cost_usd,
+        },
+    }
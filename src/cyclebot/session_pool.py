@@ -0,0 +1,392 @@
+"""Pool of pre-warmed Claude agent sessions.
+
+Starting an agent session spawns the Claude CLI, loads its MCP servers and runs
+the initialize handshake before the first token can arrive. SessionPool keeps
+connected ClaudeSDKClient sessions ready, grouped by a fingerprint of their
+ClaudeCodeOptions, so a prompt only pays for the model call.
+
+A session carries its conversation, so by default a released session is closed
+and the pool warms a fresh one in the background; pass ``reusable=True`` to
+release() to keep a session's context for the next caller with the same options.
+Idle sessions beyond the per-options minimum are evicted after ``idle_timeout``,
+and dead sessions are replaced by a periodic health check.
+
+Example:
+    >>> pool = SessionPool(min_size=1, max_size=4)
+    >>> await pool.start([ClaudeCodeOptions()])
+    >>> async with pool.session(options) as session:
+    ...     await session.client.query("Hello")
+    ...     async for message in session.client.receive_response():
+    ...         print(message)
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from claude_code_sdk import ClaudeCodeOptions, ClaudeSDKClient
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[ClaudeCodeOptions], Any]
+
+
+def options_fingerprint(options: Optional[ClaudeCodeOptions]) -> str:
+    """Stable key for options; sessions are only shared between identical options.
+
+    Args:
+        options: Agent options (None means defaults)
+
+    Returns:
+        Hex digest of the option values
+    """
+    options = options if options is not None else ClaudeCodeOptions()
+    # Shallow on purpose: asdict() would deep-copy file objects such as debug_stderr
+    values = {field.name: getattr(options, field.name) for field in dataclasses.fields(options)}
+    encoded = json.dumps(values, sort_keys=True, default=repr)
+    return hashlib.sha1(encoded.encode(), usedforsecurity=False).hexdigest()
+
+
+class PooledSession:
+    """A connected agent client owned by the pool.
+
+    The SDK client must be connected and disconnected from the same task, so
+    each session runs a small lifecycle task that does both.
+    """
+
+    def __init__(self, key: str, options: ClaudeCodeOptions, factory: ClientFactory) -> None:
+        """Create an unconnected session; call open() to connect.
+
+        Args:
+            key: Options fingerprint
+            options: Options the client is created with
+            factory: Creates the client from options
+        """
+        self.key = key
+        self.options = options
+        self.client = factory(options)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self._close_requested = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def open(self) -> None:
+        """Connect the client (starts the CLI subprocess and runs the handshake)."""
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._lifecycle(ready))
+        await ready
+
+    async def _lifecycle(self, ready: "asyncio.Future[None]") -> None:
+        try:
+            await self.client.connect()
+        except BaseException as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(None)
+        try:
+            await self._close_requested.wait()
+        finally:
+            with contextlib.suppress(Exception):
+                await self.client.disconnect()
+
+    def healthy(self) -> bool:
+        """Whether the client's CLI process is still connected."""
+        if self._task is None or self._task.done() or self._close_requested.is_set():
+            return False
+        transport = getattr(self.client, "_transport", None)
+        if transport is None:
+            return False
+        is_ready = getattr(transport, "is_ready", None)
+        if is_ready is not None and not is_ready():
+            return False
+        process = getattr(transport, "_process", None)
+        return process is None or getattr(process, "returncode", None) is None
+
+    async def close(self) -> None:
+        """Disconnect the client and wait for its lifecycle task to finish."""
+        self._close_requested.set()
+        if self._task is not None:
+            with contextlib.suppress(Exception):
+                await self._task
+
+
+@dataclass
+class PoolStats:
+    """Counters for a session pool."""
+
+    warm_hits: int = 0
+    cold_starts: int = 0
+    created: int = 0
+    evicted: int = 0
+    unhealthy: int = 0
+    failed: int = 0
+
+
+class SessionPool:
+    """Warm, reusable agent sessions keyed by options fingerprint."""
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_interval: float = 30.0,
+        factory: ClientFactory = ClaudeSDKClient,
+    ) -> None:
+        """Initialize the pool. Call start() to warm it up.
+
+        Args:
+            min_size: Idle sessions kept ready for each warmed set of options
+            max_size: Maximum sessions across all options, idle or in use
+            idle_timeout: Seconds before an idle session above min_size is closed
+            health_interval: Seconds between eviction and health check passes
+            factory: Creates a client from options (ClaudeSDKClient by default)
+        """
+        if min_size > max_size:
+            msg = f"min_size ({min_size}) cannot exceed max_size ({max_size})"
+            raise ValueError(msg)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.factory = factory
+        self.stats = PoolStats()
+        self._idle: dict[str, deque[PooledSession]] = {}
+        self._warm_options: dict[str, ClaudeCodeOptions] = {}
+        self._starting: dict[str, int] = {}
+        self._total = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._background: set[asyncio.Task[None]] = set()
+        self._maintenance: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+    @property
+    def _changed(self) -> asyncio.Condition:
+        # Created on first use: on Python 3.9 a Condition binds to the event loop current
+        # at creation, and this object may be built at import time, before the server's loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @property
+    def size(self) -> int:
+        """Sessions currently open or opening, idle or in use."""
+        return self._total
+
+    def idle_count(self, options: Optional[ClaudeCodeOptions] = None) -> int:
+        """Idle sessions for the given options."""
+        return len(self._idle.get(options_fingerprint(options), ()))
+
+    async def start(self, warm: Iterable[Optional[ClaudeCodeOptions]] = ()) -> None:
+        """Start the maintenance loop and warm sessions for the given options.
+
+        Args:
+            warm: Options to keep min_size sessions ready for
+        """
+        for options in warm:
+            self.warm(options)
+        if self._maintenance is None:
+            self._maintenance = asyncio.create_task(self._maintain())
+
+    def warm(self, options: Optional[ClaudeCodeOptions] = None) -> None:
+        """Keep min_size idle sessions ready for these options from now on."""
+        options = options if options is not None else ClaudeCodeOptions()
+        key = options_fingerprint(options)
+        self._warm_options[key] = options
+        self._replenish(key)
+
+    def _replenish(self, key: str) -> None:
+        """Start sessions in the background until the key has min_size idle (or the pool is full)."""
+        options = self._warm_options.get(key)
+        if options is None or self._closed:
+            return
+        missing = self.min_size - len(self._idle.get(key, ())) - self._starting.get(key, 0)
+        for _ in range(max(0, min(missing, self.max_size - self._total))):
+            self._total += 1
+            self._starting[key] = self._starting.get(key, 0) + 1
+            self._schedule(self._spawn(key, options))
+
+    async def _spawn(self, key: str, options: ClaudeCodeOptions) -> None:
+        """Open a session that was already counted in _total and add it to the idle set."""
+        session = PooledSession(key, options, self.factory)
+        try:
+            await session.open()
+        except Exception as e:
+            logger.warning("Could not start agent session: %s", e)
+            self.stats.failed += 1
+            async with self._changed:
+                self._starting[key] -= 1
+                self._total -= 1
+                self._changed.notify_all()
+            return
+        self.stats.created += 1
+        async with self._changed:
+            self._starting[key] -= 1
+            if self._closed:
+                self._total -= 1
+                await session.close()
+                return
+            self._idle.setdefault(key, deque()).append(session)
+            self._changed.notify_all()
+
+    async def _discard(self, session: PooledSession) -> None:
+        await session.close()
+        async with self._changed:
+            self._total -= 1
+            self._changed.notify_all()
+
+    def _take_idle(self, key: str) -> Optional[PooledSession]:
+        """Pop the most recently used healthy idle session for a key; dead ones are discarded."""
+        idle = self._idle.get(key)
+        while idle:
+            session = idle.pop()
+            if session.healthy():
+                return session
+            self.stats.unhealthy += 1
+            self._schedule(self._discard(session))
+        return None
+
+    def _evict_one(self) -> bool:
+        """Close the longest idle session of any options to make room."""
+        candidates = [(sessions[0].last_used, key) for key, sessions in self._idle.items() if sessions]
+        if not candidates:
+            return False
+        _, key = min(candidates)
+        self.stats.evicted += 1
+        self._schedule(self._discard(self._idle[key].popleft()))
+        return True
+
+    def _schedule(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def acquire(self, options: Optional[ClaudeCodeOptions] = None) -> PooledSession:
+        """Check out a connected session for these options.
+
+        A warm idle session is returned immediately; otherwise a new one is
+        started (a cold start), waiting for capacity if the pool is full.
+
+        Args:
+            options: Agent options
+
+        Returns:
+            Session to use; hand it back with release()
+        """
+        options = options if options is not None else ClaudeCodeOptions()
+        key = options_fingerprint(options)
+        async with self._changed:
+            while True:
+                if self._closed:
+                    msg = "Session pool is closed"
+                    raise RuntimeError(msg)
+                session = self._take_idle(key)
+                if session is not None:
+                    self.stats.warm_hits += 1
+                    break
+                if self._total < self.max_size or self._evict_one():
+                    self._total += 1
+                    session = None
+                    break
+                await self._changed.wait()
+
+        if session is None:
+            self.stats.cold_starts += 1
+            session = PooledSession(key, options, self.factory)
+            try:
+                await session.open()
+            except BaseException:
+                self.stats.failed += 1
+                async with self._changed:
+                    self._total -= 1
+                    self._changed.notify_all()
+                raise
+            self.stats.created += 1
+
+        session.uses += 1
+        self._replenish(key)
+        return session
+
+    async def release(self, session: PooledSession, reusable: bool = False) -> None:
+        """Return a session to the pool.
+
+        Args:
+            session: Session from acquire()
+            reusable: Keep the session (and its conversation) for the next caller
+                with the same options. Otherwise it is closed and a fresh one warmed.
+        """
+        session.last_used = time.monotonic()
+        if reusable and session.healthy() and not self._closed:
+            async with self._changed:
+                self._idle.setdefault(session.key, deque()).append(session)
+                self._changed.notify_all()
+            return
+        await self._discard(session)
+        self._replenish(session.key)
+
+    @contextlib.asynccontextmanager
+    async def session(
+        self, options: Optional[ClaudeCodeOptions] = None, reusable: bool = False
+    ) -> AsyncIterator[PooledSession]:
+        """Acquire a session for the duration of a block.
+
+        If the block raises (or is cancelled) the session is never reused.
+        """
+        session = await self.acquire(options)
+        ok = False
+        try:
+            yield session
+            ok = True
+        finally:
+            await asyncio.shield(self.release(session, reusable=reusable and ok))
+
+    async def check(self) -> None:
+        """Evict expired idle sessions, drop dead ones and top up warmed options."""
+        now = time.monotonic()
+        async with self._changed:
+            for key, sessions in self._idle.items():
+                keep = self.min_size if key in self._warm_options else 0
+                for session in list(sessions):
+                    if not session.healthy():
+                        self.stats.unhealthy += 1
+                    elif len(sessions) > keep and now - session.last_used > self.idle_timeout:
+                        self.stats.evicted += 1
+                    else:
+                        continue
+                    sessions.remove(session)
+                    self._schedule(self._discard(session))
+        for key in self._warm_options:
+            self._replenish(key)
+
+    async def _maintain(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Session pool health check failed")
+
+    async def close(self) -> None:
+        """Close every idle session and stop maintenance. Checked-out sessions close on release."""
+        self._closed = True
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._maintenance
+        async with self._changed:
+            idle = [session for sessions in self._idle.values() for session in sessions]
+            self._idle.clear()
+            self._changed.notify_all()
+        for session in idle:
+            await self._discard(session)
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
@@ -0,0 +1,249 @@
+"""Registry of agent conversations that can be continued.
+
+Each completed prompt is recorded under the session id the CLI reported, with
+the options it ran with. The agent session itself is kept open for a while
+(up to ``max_live`` of them), so a follow-up prompt goes to a CLI that still has
+the conversation loaded. Once a session has been closed, continuing it starts a
+new one with ``resume=<session id>``, which reloads the transcript the CLI saved.
+
+Records are evicted least-recently-used beyond ``max_entries`` and after ``ttl``
+seconds without use.
+
+Example:
+    >>> registry = SessionRegistry(pool)
+    >>> async with registry.lease(None, options) as lease:
+    ...     await lease.client.query("Open the 1H chart")
+    ...     async for message in lease.client.receive_response():
+    ...         lease.observe(message)
+    >>> async with registry.lease(lease.session_id) as lease:
+    ...     await lease.client.query("Now the 15m chart")
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from claude_code_sdk import ClaudeCodeOptions, ResultMessage, SystemMessage
+
+from cyclebot.session_pool import PooledSession, SessionPool
+
+
+class SessionBusy(Exception):
+    """The session is already answering another prompt."""
+
+
+@dataclass
+class SessionRecord:
+    """A conversation that can be continued."""
+
+    session_id: str
+    options: ClaudeCodeOptions
+    created_at: float
+    last_used: float
+    prompts: int = 0
+    live: Optional[PooledSession] = None
+    busy: bool = False
+
+
+@dataclass
+class RegistryStats:
+    """Counters for a session registry."""
+
+    live_hits: int = 0
+    resumed: int = 0
+    started: int = 0
+    evicted: int = 0
+    expired: int = 0
+
+
+class Lease:
+    """A session checked out of the registry for one prompt."""
+
+    def __init__(self, session: PooledSession, session_id: Optional[str]) -> None:
+        """Wrap a pooled session.
+
+        Args:
+            session: Connected agent session
+            session_id: Conversation being continued, None for a new one
+        """
+        self.session = session
+        self.session_id = session_id
+
+    @property
+    def client(self) -> Any:
+        """The connected ClaudeSDKClient."""
+        return self.session.client
+
+    def observe(self, message: Any) -> None:
+        """Pick up the session id the CLI reports for this conversation."""
+        if isinstance(message, ResultMessage):
+            self.session_id = message.session_id
+        elif isinstance(message, SystemMessage) and message.data.get("session_id"):
+            self.session_id = message.data["session_id"]
+
+
+class SessionRegistry:
+    """LRU + TTL registry of conversations, keeping recent ones live in the pool."""
+
+    def __init__(self, pool: SessionPool, max_entries: int = 256, ttl: float = 3600.0, max_live: int = 4) -> None:
+        """Initialize the registry.
+
+        Args:
+            pool: Pool agent sessions are taken from
+            max_entries: Conversations remembered
+            ttl: Seconds a conversation is remembered after its last prompt
+            max_live: Sessions kept open for continuation; must leave room in the pool for new prompts
+        """
+        if max_live >= pool.max_size:
+            msg = f"max_live ({max_live}) must be smaller than the pool's max_size ({pool.max_size})"
+            raise ValueError(msg)
+        self.pool = pool
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_live = max_live
+        self.stats = RegistryStats()
+        self._records: OrderedDict[str, SessionRecord] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of remembered conversations."""
+        return len(self._records)
+
+    @property
+    def live_count(self) -> int:
+        """Sessions currently kept open for continuation."""
+        return sum(1 for record in self._records.values() if record.live is not None)
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        """Look up a conversation without touching its LRU position."""
+        return self._records.get(session_id)
+
+    async def purge_expired(self) -> int:
+        """Forget conversations unused for longer than the TTL.
+
+        Returns:
+            Number of records removed
+        """
+        cutoff = time.monotonic() - self.ttl
+        expired = [r for r in self._records.values() if not r.busy and r.last_used < cutoff]
+        for record in expired:
+            await self._forget(record)
+        self.stats.expired += len(expired)
+        return len(expired)
+
+    async def _forget(self, record: SessionRecord) -> None:
+        self._records.pop(record.session_id, None)
+        await self._close_live(record)
+
+    async def _close_live(self, record: SessionRecord) -> None:
+        if record.live is not None:
+            live, record.live = record.live, None
+            await self.pool.release(live)
+
+    async def _enforce_limits(self) -> None:
+        """Close the least recently used live sessions and records beyond the limits."""
+        live = [r for r in self._records.values() if r.live is not None and not r.busy]
+        for record in live[: max(0, len(live) - self.max_live)]:
+            await self._close_live(record)
+        idle = [r for r in self._records.values() if not r.busy]
+        for record in idle[: max(0, len(self._records) - self.max_entries)]:
+            await self._forget(record)
+            self.stats.evicted += 1
+
+    async def _checkout(self, session_id: Optional[str], options: Optional[ClaudeCodeOptions]) -> PooledSession:
+        if session_id is None:
+            self.stats.started += 1
+            return await self.pool.acquire(options)
+
+        record = self._records.get(session_id)
+        if record is not None:
+            if record.busy:
+                msg = f"Session {session_id} is busy"
+                raise SessionBusy(msg)
+            record.busy = True
+            live, record.live = record.live, None
+            if live is not None and live.healthy():
+                self.stats.live_hits += 1
+                return live
+            if live is not None:
+                await self.pool.release(live)
+            options = options or record.options
+
+        # Not live: start a session that reloads the saved transcript
+        self.stats.resumed += 1
+        base = options if options is not None else ClaudeCodeOptions()
+        try:
+            return await self.pool.acquire(dataclasses.replace(base, resume=session_id))
+        except BaseException:
+            if record is not None:
+                record.busy = False
+            raise
+
+    async def _checkin(self, lease: Lease, previous_id: Optional[str], ok: bool) -> None:
+        previous = self._records.get(previous_id) if previous_id is not None else None
+        if previous is not None:
+            previous.busy = False
+
+        if not ok or lease.session_id is None:
+            await self.pool.release(lease.session)
+            return
+
+        now = time.monotonic()
+        record = self._records.get(lease.session_id)
+        if record is None:
+            options = (
+                previous.options if previous is not None else dataclasses.replace(lease.session.options, resume=None)
+            )
+            record = SessionRecord(lease.session_id, options, created_at=now, last_used=now)
+            self._records[lease.session_id] = record
+        if previous is not None and previous is not record:
+            # The CLI reported a new id for the continued conversation; keep only the new one
+            record.prompts = previous.prompts
+            await self._forget(previous)
+
+        await self._close_live(record)
+        record.live = lease.session if lease.session.healthy() else None
+        if record.live is None:
+            await self.pool.release(lease.session)
+        record.prompts += 1
+        record.last_used = now
+        self._records.move_to_end(record.session_id)
+        await self._enforce_limits()
+
+    @contextlib.asynccontextmanager
+    async def lease(
+        self, session_id: Optional[str] = None, options: Optional[ClaudeCodeOptions] = None
+    ) -> AsyncIterator[Lease]:
+        """Check out a session for one prompt.
+
+        Args:
+            session_id: Conversation to continue, None to start a new one
+            options: Options for a new conversation, or for resuming one that is no longer live
+                (the options it was recorded with are used when omitted)
+
+        Raises:
+            SessionBusy: If the conversation is already answering a prompt
+        """
+        await self.purge_expired()
+        session = await self._checkout(session_id, options)
+        lease = Lease(session, session_id)
+        ok = False
+        try:
+            yield lease
+            ok = True
+        finally:
+            await asyncio.shield(self._checkin(lease, session_id, ok))
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counters and sizes for reporting."""
+        return {"sessions": len(self), "live": self.live_count, **dataclasses.asdict(self.stats)}
+
+    async def close(self) -> None:
+        """Close every live session and forget all conversations."""
+        for record in list(self._records.values()):
+            await self._close_live(record)
+        self._records.clear()
@@ -0,0 +1,237 @@
+"""State shared between web server workers.
+
+With several worker processes, a conversation's agent session lives in the
+worker that ran it. Workers record who owns what (sessions, running streams and
+their own heartbeat) as keys with a time to live, and message each other over
+publish/subscribe channels, for example to forward a follow-up prompt to the
+worker that owns the session or to wake up followers of a transcript.
+
+Two backends implement the SharedState protocol:
+
+- InProcessState: dictionaries and queues, for tests and single-process servers
+- RedisState: any Redis-compatible server (Redis, Valkey, KeyDB, ...) via
+  redis-py (pip install "cyclebot[redis]")
+
+Example:
+    >>> state = open_shared_state("redis://localhost:6379/0")
+    >>> await state.claim("session:abc", worker_id, ttl=3600)
+    >>> await state.publish("worker:other", b"...")
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, Optional, Protocol, cast
+
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+
+class SharedState(Protocol):
+    """Ownership keys and messaging shared by all workers."""
+
+    async def claim(self, key: str, owner: str, ttl: float, force: bool = False) -> str:
+        """Take ownership of a key unless someone else holds it; refreshes the TTL if we do.
+
+        Args:
+            key: Key to own
+            owner: Claiming owner
+            ttl: Seconds until the claim lapses unless renewed
+            force: Take the key over even if someone else holds it
+
+        Returns:
+            The owner after the call (``owner`` if the claim succeeded)
+        """
+        ...
+
+    async def owner(self, key: str) -> Optional[str]:
+        """Current owner of a key, or None."""
+        ...
+
+    async def release(self, key: str, owner: str) -> bool:
+        """Give up a key, but only if ``owner`` still holds it."""
+        ...
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Send a message to everyone subscribed to a channel."""
+        ...
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Subscribe to a channel; returns once subscribed, iterating over every message published since."""
+        ...
+
+    async def close(self) -> None:
+        """Release connections."""
+        ...
+
+
+async def _started(messages: AsyncGenerator[Optional[bytes], None]) -> AsyncIterator[bytes]:
+    """Run a listener up to its first yield, which it reaches once subscribed.
+
+    A plain async generator would only subscribe on its first iteration, losing
+    whatever is published in between.
+    """
+    await messages.__anext__()
+    return cast(AsyncIterator[bytes], messages)
+
+
+class InProcessState:
+    """SharedState for a single process."""
+
+    def __init__(self) -> None:
+        """Start empty."""
+        self._owners: dict[str, tuple[str, float]] = {}
+        self._subscribers: dict[str, set[asyncio.Queue[bytes]]] = {}
+
+    async def claim(self, key: str, owner: str, ttl: float, force: bool = False) -> str:
+        """Take ownership of a key unless someone else holds it."""
+        current = await self.owner(key)
+        if current is None or current == owner or force:
+            self._owners[key] = (owner, time.monotonic() + ttl)
+            return owner
+        return current
+
+    async def owner(self, key: str) -> Optional[str]:
+        """Current owner of a key, or None."""
+        entry = self._owners.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._owners[key]
+            return None
+        return entry[0]
+
+    async def release(self, key: str, owner: str) -> bool:
+        """Give up a key if ``owner`` still holds it."""
+        if await self.owner(key) != owner:
+            return False
+        del self._owners[key]
+        return True
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Queue a message for every subscriber of the channel."""
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Subscribe to a channel; returns once subscribed, iterating over every message published since."""
+        return await _started(self._listen(channel))
+
+    async def _listen(self, channel: str) -> AsyncGenerator[Optional[bytes], None]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield None
+            while True:
+                yield await queue.get()
+        finally:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+    async def close(self) -> None:
+        """Nothing to release."""
+
+
+class RedisState:
+    """SharedState on a Redis-compatible server."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "cyclebot:", client: Any = None) -> None:
+        """Create the client; it connects on first use.
+
+        Args:
+            url: Server URL (redis://, rediss:// or unix://)
+            prefix: Prepended to every key and channel, so several deployments can share a server
+            client: Existing redis.asyncio client to use instead of connecting to ``url``
+
+        Raises:
+            ImportError: If redis-py is not installed
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                msg = 'RedisState needs redis-py: pip install "cyclebot[redis]"'
+                raise ImportError(msg)
+            import redis.asyncio
+
+            client = redis.asyncio.from_url(url)
+        self.prefix = prefix
+        self._redis = client
+
+    async def claim(self, key: str, owner: str, ttl: float, force: bool = False) -> str:
+        """Take ownership of a key unless someone else holds it."""
+        name = self.prefix + key
+        ttl_ms = max(1, int(ttl * 1000))
+        if force or await self._redis.set(name, owner, nx=True, px=ttl_ms):
+            if force:
+                await self._redis.set(name, owner, px=ttl_ms)
+            return owner
+        current = await self._redis.get(name)
+        if current is None:
+            # Expired between the two calls
+            return await self.claim(key, owner, ttl)
+        current = current.decode()
+        if current == owner:
+            await self._redis.pexpire(name, ttl_ms)
+        return str(current)
+
+    async def owner(self, key: str) -> Optional[str]:
+        """Current owner of a key, or None."""
+        current = await self._redis.get(self.prefix + key)
+        return current.decode() if current is not None else None
+
+    async def release(self, key: str, owner: str) -> bool:
+        """Give up a key if ``owner`` still holds it (checked atomically)."""
+        import redis.exceptions
+
+        name = self.prefix + key
+        async with self._redis.pipeline() as pipe:
+            try:
+                await pipe.watch(name)
+                current = await pipe.get(name)
+                if current is None or current.decode() != owner:
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.delete(name)
+                await pipe.execute()
+            except redis.exceptions.WatchError:
+                return False
+        return True
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Publish a message on the server."""
+        await self._redis.publish(self.prefix + channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Subscribe on the server; returns once subscribed, iterating over every message published since."""
+        return await _started(self._listen(channel))
+
+    async def _listen(self, channel: str) -> AsyncGenerator[Optional[bytes], None]:
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            # The server has acknowledged the subscription once this returns
+            await pubsub.subscribe(self.prefix + channel)
+            yield None
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            with contextlib.suppress(Exception):
+                await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        await self._redis.aclose()
+
+
+def open_shared_state(url: Optional[str] = None) -> SharedState:
+    """Create the backend for a URL: "memory" (or None) for in-process, redis:// etc. for a server."""
+    if url is None or url == "memory":
+        return InProcessState()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisState(url)
+    msg = f"Unsupported shared state URL: {url}"
+    raise ValueError(msg)
@@ -10,6 +10,9 @@ class App {
         this.statusEl = document.getElementById('status');
         this.requestId = 0;
         this.pendingRequests = new Map();
+        // Unfinished prompts by request id: their stream id and the last sequence number seen
+        this.streams = new Map();
+        this.decoder = new TextDecoder();
 
         this.setupEventListeners();
         this.connect();
@@ -23,6 +26,10 @@ class App {
         this.promptInput.addEventListener('clear', () => {
             this.chatLog.clear();
         });
+
+        this.chatLog.addEventListener('cancel', (e) => {
+            this.cancelRequest(Number(e.detail.requestId));
+        });
     }
 
     connect() {
@@ -32,16 +39,30 @@ class App {
         const wsUrl = `${protocol}//${window.location.host}/ws`;
 
         this.ws = new WebSocket(wsUrl);
+        // The server sends UTF-8 JSON as binary frames
+        this.ws.binaryType = 'arraybuffer';
 
         this.ws.onopen = () => {
             this.updateStatus('connected', '✓ Connected to server');
             this.promptInput.setDisabled(false);
+            this.resumeStreams();
         };
 
         this.ws.onclose = () => {
             this.updateStatus('disconnected', '✗ Disconnected from server');
             this.promptInput.setDisabled(true);
 
+            // Prompts keep running on the server; the ones we know a stream id for are
+            // picked up again after reconnecting
+            for (const [id, request] of this.pendingRequests) {
+                const promptId = request.promptId ?? id;
+                if (request.method !== 'cancel' && !this.streams.get(promptId)?.streamId) {
+                    this.chatLog.setRunning(promptId, false);
+                    this.streams.delete(promptId);
+                }
+            }
+            this.pendingRequests.clear();
+
             // Attempt to reconnect after 3 seconds
             setTimeout(() => this.connect(), 3000);
         };
@@ -67,17 +88,15 @@ class App {
             return;
         }
 
-        // Add prompt to chat log
-        this.chatLog.addPrompt(content);
+        // Prompts run concurrently on the server, so the input stays enabled
+        const id = ++this.requestId;
+        this.chatLog.addPrompt(content, id);
+        this.chatLog.setRunning(id, true);
 
         // Clear input
         this.promptInput.clear();
 
-        // Disable input during execution
-        this.promptInput.setDisabled(true);
-
         // Create JSON-RPC request
-        const id = ++this.requestId;
         const request = {
             jsonrpc: '2.0',
             method: 'prompt',
@@ -89,36 +108,96 @@ class App {
         };
 
         // Store request for tracking
-        this.pendingRequests.set(id, { content, timestamp: Date.now() });
+        this.pendingRequests.set(id, { method: 'prompt', content, timestamp: Date.now() });
+        this.streams.set(id, { streamId: null, lastSeq: 0 });
 
         // Send request
         this.ws.send(JSON.stringify(request));
     }
 
-    handleMessage(data) {
-        try {
-            const message = JSON.parse(data);
+    cancelRequest(promptId) {
+        if (!this.ws || this.ws.readyState !== WebSocket.OPEN) {
+            return;
+        }
 
-            // Handle JSON-RPC notification (streaming message)
-            if (message.method === 'message' && message.params) {
-                this.handleStreamMessage(message.params);
-                return;
-            }
+        // A prompt started before a reconnect belongs to the old connection: cancel it by stream id
+        const streamId = this.streams.get(promptId)?.streamId;
+        const id = ++this.requestId;
+        this.pendingRequests.set(id, { method: 'cancel', promptId, timestamp: Date.now() });
+        this.ws.send(JSON.stringify({
+            jsonrpc: '2.0',
+            method: 'cancel',
+            params: streamId ? { stream_id: streamId } : { id: promptId },
+            id: id
+        }));
+    }
 
-            // Handle JSON-RPC response (final result)
-            if (message.id !== undefined) {
-                this.handleResponse(message);
-                return;
+    resumeStreams() {
+        // Fetch what streamed while we were away and follow the prompt until it finishes
+        for (const [promptId, stream] of this.streams) {
+            if (this.pendingRequests.has(promptId) || !stream.streamId) {
+                continue;
             }
+            const id = ++this.requestId;
+            this.pendingRequests.set(id, { method: 'subscribe', promptId, timestamp: Date.now() });
+            this.ws.send(JSON.stringify({
+                jsonrpc: '2.0',
+                method: 'subscribe',
+                params: { stream_id: stream.streamId, after_seq: stream.lastSeq },
+                id: id
+            }));
+        }
+    }
 
+    handleMessage(data) {
+        try {
+            const text = data instanceof ArrayBuffer ? this.decoder.decode(data) : data;
+            const message = JSON.parse(text);
+
+            // The server coalesces notifications into batch arrays when the socket is backed up
+            if (Array.isArray(message)) {
+                message.forEach((item) => this.dispatchMessage(item));
+            } else {
+                this.dispatchMessage(message);
+            }
         } catch (error) {
             console.error('Error parsing message:', error, data);
         }
     }
 
+    dispatchMessage(message) {
+        // Handle JSON-RPC notification (streaming message)
+        if (message.method === 'message' && message.params) {
+            this.handleStreamMessage(message.params);
+            return;
+        }
+
+        // The server is at capacity: the prompt waits at this place in its queue
+        if (message.method === 'queued' && message.params) {
+            this.chatLog.setQueued(message.params.request_id, message.params.position);
+            return;
+        }
+
+        // Handle JSON-RPC response (final result)
+        if (message.id !== undefined) {
+            this.handleResponse(message);
+        }
+    }
+
     handleStreamMessage(params) {
-        const { type, data } = params;
-        this.chatLog.addMessage(type, data);
+        const { type, data, request_id: requestId, stream_id: streamId, seq } = params;
+        const stream = this.streams.get(requestId);
+        if (stream && streamId) {
+            if (seq <= stream.lastSeq) {
+                return;
+            }
+            stream.streamId = streamId;
+            stream.lastSeq = seq;
+        }
+        if (requestId !== undefined) {
+            this.chatLog.setQueued(requestId, 0);
+        }
+        this.chatLog.addMessage(type, data, requestId ?? null);
     }
 
     handleResponse(response) {
@@ -131,20 +210,36 @@ class App {
 
         this.pendingRequests.delete(response.id);
 
+        if (request.method === 'cancel') {
+            if (!response.result || !response.result.cancelled) {
+                console.warn('Nothing to cancel for request:', request.promptId);
+            }
+            return;
+        }
+
+        if (request.method === 'subscribe') {
+            // The subscription ends with the prompt; report the prompt's own outcome
+            const outcome = response.error ? { error: response.error } : response.result?.outcome;
+            response = {
+                id: request.promptId,
+                ...(outcome || { error: { code: -32000, message: 'Prompt did not finish' } })
+            };
+        }
+
+        this.streams.delete(response.id);
+        this.chatLog.setRunning(response.id, false);
+
         if (response.error) {
             // Show error in chat log
             this.chatLog.addMessage('error', {
                 code: response.error.code,
                 message: response.error.message,
                 data: response.error.data
-            });
+            }, response.id);
             console.error('JSON-RPC error:', response.error);
         } else if (response.result) {
             console.log('Request completed:', response.result);
         }
-
-        // Re-enable input
-        this.promptInput.setDisabled(false);
     }
 }
 
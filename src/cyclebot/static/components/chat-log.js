@@ -6,7 +6,20 @@ class ChatLog extends HTMLElement {
         super();
         this.attachShadow({ mode: 'open' });
         this.messages = [];
+        this.running = new Set();
+        // Queue position of prompts waiting for the server to admit them
+        this.queued = new Map();
         this.render();
+
+        // Cancel buttons are re-rendered with every update, so listen on the shadow root
+        this.shadowRoot.addEventListener('click', (e) => {
+            const button = e.target.closest('[data-cancel]');
+            if (button) {
+                this.dispatchEvent(new CustomEvent('cancel', {
+                    detail: { requestId: button.dataset.cancel }
+                }));
+            }
+        });
     }
 
     connectedCallback() {
@@ -140,6 +153,31 @@ class ChatLog extends HTMLElement {
                     font-weight: 500;
                 }
 
+                .request-tag {
+                    margin-left: auto;
+                    opacity: 0.6;
+                    font-size: 0.75rem;
+                }
+
+                .queue-position {
+                    opacity: 0.6;
+                    font-size: 0.75rem;
+                }
+
+                .cancel-button {
+                    background: transparent;
+                    color: #f48771;
+                    border: 1px solid #f48771;
+                    border-radius: 4px;
+                    padding: 0.125rem 0.5rem;
+                    font-size: 0.75rem;
+                    cursor: pointer;
+                }
+
+                .cancel-button:hover {
+                    background: #3a1e1e;
+                }
+
                 .empty-state {
                     display: flex;
                     align-items: center;
@@ -173,13 +211,32 @@ class ChatLog extends HTMLElement {
         `;
     }
 
-    addMessage(type, data) {
-        this.messages.push({ type, data, timestamp: Date.now() });
+    addMessage(type, data, requestId = null) {
+        this.messages.push({ type, data, requestId, timestamp: Date.now() });
+        this.updateMessages();
+    }
+
+    addPrompt(content, requestId = null) {
+        this.addMessage('prompt', { content }, requestId);
+    }
+
+    setRunning(requestId, running) {
+        if (running) {
+            this.running.add(String(requestId));
+        } else {
+            this.running.delete(String(requestId));
+        }
+        this.queued.delete(String(requestId));
         this.updateMessages();
     }
 
-    addPrompt(content) {
-        this.addMessage('prompt', { content });
+    setQueued(requestId, position) {
+        if (position) {
+            this.queued.set(String(requestId), position);
+        } else {
+            this.queued.delete(String(requestId));
+        }
+        this.updateMessages();
     }
 
     clear() {
@@ -187,6 +244,13 @@ class ChatLog extends HTMLElement {
         this.updateMessages();
     }
 
+    renderRequestTag(requestId) {
+        if (requestId === null || requestId === undefined) {
+            return '';
+        }
+        return `<span class="request-tag">#${this.escapeHtml(String(requestId))}</span>`;
+    }
+
     updateMessages() {
         const container = this.shadowRoot.getElementById('messages');
 
@@ -199,13 +263,22 @@ class ChatLog extends HTMLElement {
         container.scrollTop = container.scrollHeight;
     }
 
-    renderMessage({ type, data }) {
+    renderMessage({ type, data, requestId }) {
+        const tag = this.renderRequestTag(requestId);
         switch (type) {
             case 'prompt':
+                const cancelHtml = requestId !== null && this.running.has(String(requestId))
+                    ? `<button class="cancel-button" data-cancel="${this.escapeHtml(String(requestId))}">Cancel</button>`
+                    : '';
+                const position = requestId !== null ? this.queued.get(String(requestId)) : undefined;
+                const queuedHtml = position ? `<span class="queue-position">Queued: position ${position}</span>` : '';
                 return `
                     <div class="message prompt">
                         <div class="message-header">
                             <span class="message-type">Prompt</span>
+                            ${queuedHtml}
+                            ${cancelHtml}
+                            ${tag}
                         </div>
                         <div class="message-content">${this.escapeHtml(data.content)}</div>
                     </div>
@@ -231,6 +304,7 @@ class ChatLog extends HTMLElement {
                         <div class="message-header">
                             <span class="message-type">Assistant</span>
                             <span style="opacity: 0.6; font-size: 0.75rem;">Turn ${data.turn}</span>
+                            ${tag}
                         </div>
                         ${contentHtml}
                     </div>
@@ -255,6 +329,7 @@ class ChatLog extends HTMLElement {
                     <div class="message user">
                         <div class="message-header">
                             <span class="message-type">Tool Response</span>
+                            ${tag}
                         </div>
                         ${userContentHtml}
                     </div>
@@ -265,6 +340,7 @@ class ChatLog extends HTMLElement {
                     <div class="message system">
                         <div class="message-header">
                             <span class="message-type">System Info</span>
+                            ${tag}
                         </div>
                         <div class="result-summary">
                             <span class="result-label">Model:</span>
@@ -285,6 +361,7 @@ class ChatLog extends HTMLElement {
                     <div class="message ${errorClass}">
                         <div class="message-header">
                             <span class="message-type">${data.is_error ? 'Error' : 'Completed'}</span>
+                            ${tag}
                         </div>
                         <div class="result-summary">
                             <span class="result-label">Turns:</span>
@@ -304,6 +381,7 @@ class ChatLog extends HTMLElement {
                     <div class="message">
                         <div class="message-header">
                             <span class="message-type">Unknown</span>
+                            ${tag}
                         </div>
                         <div class="message-content">${this.escapeHtml(JSON.stringify(data))}</div>
                     </div>
@@ -0,0 +1,255 @@
+"""Append-only transcripts of streamed agent output.
+
+Every notification a prompt streams is appended to its transcript under a
+per-stream sequence number before it is sent, and the stream's outcome is
+recorded when it ends. A client that lost its connection can then replay a
+stream from the last sequence number it saw, and follow it live if the prompt
+is still running, instead of running the prompt again.
+
+Transcripts are kept in a local SQLite database, which several worker
+processes on one host can share: a stream is appended to by the process that
+runs it, and any process can follow it.
+
+Example:
+    >>> store = TranscriptStore(DEFAULT_TRANSCRIPT_PATH)
+    >>> stream_id = store.create()
+    >>> seq = store.append(stream_id, {"type": "assistant", "data": {...}})
+    >>> store.finish(stream_id, "completed", {"turn_count": 1})
+    >>> async for seq, message in store.follow(stream_id, after_seq=0):
+    ...     print(seq, message)
+"""
+
+import asyncio
+import contextlib
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from cyclebot.serialization import dumps, loads
+
+DEFAULT_TRANSCRIPT_PATH = Path.home() / ".cache" / "cyclebot" / "transcripts.sqlite3"
+
+# Stream outcomes; a stream is "running" until finish() records one of the others
+STREAM_STATUSES = ("running", "completed", "cancelled", "failed")
+
+
+@dataclass
+class StreamInfo:
+    """State of one transcript stream."""
+
+    stream_id: str
+    status: str
+    last_seq: int
+    created_at: float
+    finished_at: Optional[float]
+    outcome: Optional[Any]
+
+    @property
+    def finished(self) -> bool:
+        """Whether the stream will receive no more messages."""
+        return self.status != "running"
+
+
+class TranscriptStore:
+    """Transcript streams persisted in a local SQLite database."""
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_TRANSCRIPT_PATH) -> None:
+        """Open (and create if needed) the transcript database.
+
+        Args:
+            db_path: SQLite database file, or ":memory:"
+        """
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._seq: dict[str, int] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS streams (
+                stream_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                last_seq INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                outcome BLOB
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                stream_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (stream_id, seq)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def mark_abandoned(self) -> int:
+        """Mark every stream still running as failed, e.g. after a restart when nothing will finish them.
+
+        Only call this when no other process is writing to the database.
+
+        Returns:
+            Number of streams marked
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE streams SET status = 'failed', finished_at = ? WHERE status = 'running'", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def create(self, stream_id: Optional[str] = None) -> str:
+        """Start a new stream that this process appends to.
+
+        Args:
+            stream_id: Id to use (e.g. one handed out to a client in advance); a new one by default
+
+        Returns:
+            The stream id
+        """
+        stream_id = stream_id or uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO streams (stream_id, status, last_seq, created_at) VALUES (?, 'running', 0, ?)",
+                (stream_id, time.time()),
+            )
+        self._seq[stream_id] = 0
+        return stream_id
+
+    def append(self, stream_id: str, message: dict[str, Any]) -> int:
+        """Append a message to a running stream.
+
+        Returns:
+            Sequence number of the message (1 for the first)
+
+        Raises:
+            ValueError: If the stream is unknown or already finished
+        """
+        if stream_id not in self._seq:
+            msg = f"Stream {stream_id} is not running"
+            raise ValueError(msg)
+        seq = self._seq[stream_id] + 1
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO events (stream_id, seq, payload) VALUES (?, ?, ?)", (stream_id, seq, dumps(message))
+            )
+            self._conn.execute("UPDATE streams SET last_seq = ? WHERE stream_id = ?", (seq, stream_id))
+        self._seq[stream_id] = seq
+        self._wake(stream_id)
+        return seq
+
+    def finish(self, stream_id: str, status: str, outcome: Optional[Any] = None) -> None:
+        """Record how a stream ended; followers stop once they have read everything.
+
+        Args:
+            stream_id: Stream to finish
+            status: One of "completed", "cancelled" or "failed"
+            outcome: Final result or error, returned to replaying clients
+        """
+        if status not in STREAM_STATUSES[1:]:
+            msg = f"Unknown stream status: {status}"
+            raise ValueError(msg)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE streams SET status = ?, finished_at = ?, outcome = ? WHERE stream_id = ?",
+                (status, time.time(), dumps(outcome), stream_id),
+            )
+        self._seq.pop(stream_id, None)
+        self._wake(stream_id)
+
+    def info(self, stream_id: str) -> Optional[StreamInfo]:
+        """State of a stream, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, last_seq, created_at, finished_at, outcome FROM streams WHERE stream_id = ?",
+                (stream_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, last_seq, created_at, finished_at, outcome = row
+        return StreamInfo(
+            stream_id, status, last_seq, created_at, finished_at, loads(outcome) if outcome is not None else None
+        )
+
+    def read(self, stream_id: str, after_seq: int = 0, limit: Optional[int] = None) -> list[tuple[int, Any]]:
+        """Stored messages of a stream with a sequence number above after_seq, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM events WHERE stream_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (stream_id, after_seq, -1 if limit is None else limit),
+            ).fetchall()
+        return [(seq, loads(payload)) for seq, payload in rows]
+
+    async def follow(
+        self, stream_id: str, after_seq: int = 0, batch: int = 256, poll: float = 1.0
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Yield stored messages after after_seq, then new ones as they are appended, until the stream finishes.
+
+        Appends in this process wake the follower at once. A stream written by
+        another process is checked every ``poll`` seconds, or sooner when wake()
+        is called for it.
+
+        Args:
+            stream_id: Stream to follow
+            after_seq: Last sequence number the caller already has
+            batch: Messages read from the database at a time
+            poll: Seconds between checks of a stream written by another process
+        """
+        while True:
+            rows = self.read(stream_id, after_seq, batch)
+            if rows:
+                for seq, message in rows:
+                    yield seq, message
+                after_seq = rows[-1][0]
+                continue
+            local = stream_id in self._seq
+            if not local:
+                info = self.info(stream_id)
+                if info is None or info.finished:
+                    # Read once more: the last messages may have landed after the read above
+                    for seq, message in self.read(stream_id, after_seq):
+                        yield seq, message
+                    return
+            wakeup = self._wakeups.setdefault(stream_id, asyncio.Event())
+            if local:
+                await wakeup.wait()
+            else:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(wakeup.wait(), poll)
+
+    def wake(self, stream_id: str) -> None:
+        """Wake followers of a stream, e.g. when another process reports an append."""
+        self._wake(stream_id)
+
+    def _wake(self, stream_id: str) -> None:
+        wakeup = self._wakeups.pop(stream_id, None)
+        if wakeup is not None:
+            wakeup.set()
+
+    def purge(self, max_age: float) -> int:
+        """Delete finished streams that ended more than max_age seconds ago.
+
+        Returns:
+            Number of streams removed
+        """
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM events WHERE stream_id IN "
+                "(SELECT stream_id FROM streams WHERE status != 'running' AND finished_at < ?)",
+                (cutoff,),
+            )
+            cursor = self._conn.execute("DELETE FROM streams WHERE status != 'running' AND finished_at < ?", (cutoff,))
+        return cursor.rowcount
@@ -1,25 +1,67 @@
-"""FastAPI web server for cyclebot with WebSocket and JSON-RPC support."""
-
+"""FastAPI web server for cyclebot with WebSocket and JSON-RPC support.
+
+Each ``prompt`` request runs as its own task, so one connection can stream several
+agent queries at once; every notification carries the ``request_id`` of the prompt
+it belongs to. A running prompt can be aborted with the ``cancel`` method.
+
+Outgoing messages go through a bounded per-connection OutboundQueue, so a slow
+browser tab does not stall the agent until the queue fills up; ``stats`` reports
+the queue depth and send latency.
+
+Prompts run on pre-warmed agent sessions from a SessionPool, so time to first
+token does not include starting the Claude CLI; the pool is warmed for default
+options when the server starts. Every completed prompt reports its ``session_id``,
+and the ``continue`` method sends a follow-up to that conversation.
+
+Everything a prompt streams is appended to a transcript (``stream_id`` + ``seq`` on
+every notification) and prompts keep running when their connection drops, so a
+client that reconnects uses ``subscribe`` to pick up where it left off, or
+``replay`` to fetch what was stored, instead of running the prompt again.
+
+The server can run as several worker processes (``--workers``) that share
+ownership records and messages through a SharedState backend
+(``CYCLEBOT_SHARED_STATE``, e.g. a Redis-compatible server). A conversation stays
+with the worker that owns its agent session: ``continue`` on another worker is
+forwarded to the owner, whose transcript is relayed back to the client.
+
+Agent queries are admitted by an AdmissionController: at most
+MAX_RUNNING_QUERIES run at once per worker, the rest wait in a priority queue and
+receive ``queued`` notifications with their position, and clients over their
+rate limit or ``total_cost_usd`` budget are shed with a REQUEST_SHED error.
+
+``/metrics`` serves Prometheus metrics for the agent pipeline (queue wait, time to
+first message, turn and tool-call latency, bytes sent, cost), per worker.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import importlib
 import json
+import os
+import socket
+import time
+import uuid
+from collections.abc import AsyncIterator
 from pathlib import Path
 from typing import Any, Optional, Union
 
-from claude_code_sdk import (
-    AssistantMessage,
-    ClaudeCodeOptions,
-    ResultMessage,
-    SystemMessage,
-    TextBlock,
-    ToolResultBlock,
-    ToolUseBlock,
-    UserMessage,
-    query,
-)
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from claude_code_sdk import ClaudeCodeOptions, ResultMessage
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 from pydantic import BaseModel
 
+from cyclebot.admission import PRIORITY_CONTINUE, PRIORITY_PROMPT, AdmissionController, AdmissionRejected
+from cyclebot.assets import AssetStore
+from cyclebot.metrics import CONTENT_TYPE, AgentMetrics
+from cyclebot.outbound import OutboundClosed, OutboundQueue
+from cyclebot.serialization import MessageSerializer, dumps, loads, notification
+from cyclebot.session_pool import ClientFactory, SessionPool
+from cyclebot.sessions import SessionBusy, SessionRegistry
+from cyclebot.shared_state import InProcessState, SharedState, open_shared_state
+from cyclebot.transcripts import DEFAULT_TRANSCRIPT_PATH, TranscriptStore
+
 
 class JSONRPCRequest(BaseModel):
     """JSON-RPC 2.0 request model."""
@@ -39,27 +81,438 @@ class JSONRPCResponse(BaseModel):
     id: Optional[Union[int, str]] = None
 
 
-app = FastAPI(title="CycleBot Web Interface")
+# JSON-RPC error codes beyond the standard -32xxx set
+REQUEST_CANCELLED = -32800
+SESSION_BUSY = -32001
+REQUEST_SHED = -32002
+
+# Prompts one connection may run at once; further prompts wait for a free slot
+MAX_CONCURRENT_PROMPTS = 4
+
+# Agent queries running at once per worker across all connections, and requests allowed to wait for one
+MAX_RUNNING_QUERIES = 8
+ADMISSION_QUEUE_MAX = 64
+ADMISSION_QUEUE_TIMEOUT = 300.0
+
+# Queries each client (remote address) may start: on average per second, and in a burst
+CLIENT_QUERY_RATE = 10 / 60
+CLIENT_QUERY_BURST = 5
+
+# Spend (total_cost_usd) allowed per client and per worker within BUDGET_WINDOW seconds; 0 for no limit
+CLIENT_BUDGET_USD = float(os.environ.get("CYCLEBOT_CLIENT_BUDGET_USD", "5")) or None
+SERVER_BUDGET_USD = float(os.environ.get("CYCLEBOT_BUDGET_USD", "0")) or None
+BUDGET_WINDOW = 24 * 3600.0
+
+# Warm agent sessions kept per set of options, and the cap across all of them
+SESSION_POOL_MIN = 1
+SESSION_POOL_MAX = 8
+
+# Conversations kept open for `continue`, and how long any conversation is remembered
+SESSION_LIVE_MAX = 4
+SESSION_TTL = 3600.0
+
+# Where transcripts are stored, and how long finished ones are kept (seconds)
+TRANSCRIPT_PATH = Path(os.environ.get("CYCLEBOT_TRANSCRIPTS", str(DEFAULT_TRANSCRIPT_PATH)))
+TRANSCRIPT_RETENTION = 7 * 24 * 3600.0
+
+# Methods that stream notifications and run as their own task
+STREAMING_METHODS = ("prompt", "continue", "subscribe", "replay")
 
-# Get the static directory path
+# Backend shared by worker processes: "memory" (single process) or a redis:// URL
+SHARED_STATE_URL = os.environ.get("CYCLEBOT_SHARED_STATE", "memory")
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Seconds between worker heartbeats, and without one after which a worker counts as gone
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TTL = 15.0
+
+# Seconds to wait for the owning worker to take a forwarded prompt before running it here
+FORWARD_TIMEOUT = 10.0
+
+# How long a running stream's owner record lasts (released when the stream finishes)
+STREAM_OWNER_TTL = 24 * 3600.0
+
+
+def load_agent_factory(spec: Optional[str]) -> ClientFactory:
+    """Resolve the agent client factory: "module:attribute", or ClaudeSDKClient by default.
+
+    Setting CYCLEBOT_AGENT_FACTORY lets load tests run the server against a synthetic agent.
+    """
+    if not spec:
+        from claude_code_sdk import ClaudeSDKClient
+
+        return ClaudeSDKClient
+    module_name, _, attribute = spec.partition(":")
+    factory: ClientFactory = getattr(importlib.import_module(module_name), attribute)
+    return factory
+
+
+session_pool = SessionPool(
+    min_size=SESSION_POOL_MIN,
+    max_size=SESSION_POOL_MAX,
+    factory=load_agent_factory(os.environ.get("CYCLEBOT_AGENT_FACTORY")),
+)
+session_registry = SessionRegistry(session_pool, ttl=SESSION_TTL, max_live=SESSION_LIVE_MAX)
+transcripts = TranscriptStore(TRANSCRIPT_PATH)
+shared_state: SharedState = open_shared_state(SHARED_STATE_URL)
+admission = AdmissionController(
+    max_concurrent=MAX_RUNNING_QUERIES,
+    max_queue=ADMISSION_QUEUE_MAX,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    rate=CLIENT_QUERY_RATE,
+    burst=CLIENT_QUERY_BURST,
+    client_budget_usd=CLIENT_BUDGET_USD,
+    budget_usd=SERVER_BUDGET_USD,
+    budget_window=BUDGET_WINDOW,
+)
+# Web UI files, loaded, fingerprinted and compressed at startup
 STATIC_DIR = Path(__file__).parent / "static"
+assets = AssetStore(STATIC_DIR)
+
+metrics = AgentMetrics()
+metrics.gauge("cyclebot_running_queries", "Agent queries admitted and running", lambda: admission.running)
+metrics.gauge("cyclebot_waiting_queries", "Agent queries waiting for admission", lambda: admission.waiting)
+metrics.gauge("cyclebot_running_streams", "Prompts running in this worker", lambda: len(running_streams))
+metrics.gauge("cyclebot_pool_sessions", "Agent sessions open in the pool", lambda: session_pool.size)
+
+# Prompts still running by stream id, including ones whose connection has closed
+running_streams: dict[str, "asyncio.Task[None]"] = {}
+
+
+class Connection:
+    """Per-connection state: running request tasks and the outbound message queue."""
+
+    def __init__(self, websocket: WebSocket, max_concurrent_prompts: int = MAX_CONCURRENT_PROMPTS) -> None:
+        """Initialize the connection state.
+
+        Args:
+            websocket: Accepted WebSocket
+            max_concurrent_prompts: Prompts allowed to run at once on this connection
+        """
+        self.websocket = websocket
+        # Rate limits and budgets apply per remote address
+        self.client = websocket.client.host if websocket.client else "unknown"
+        self.slots = asyncio.Semaphore(max_concurrent_prompts)
+        self.prompts: dict[Union[int, str], asyncio.Task[None]] = {}
+        self.tasks: set[asyncio.Task[None]] = set()
+        self.subscriptions: set[asyncio.Task[None]] = set()
+        self.sent_bytes = 0
+        self.outbound = OutboundQueue(self._send_frame)
+        self.outbound.start()
+
+    async def _send_frame(self, frame: bytes) -> None:
+        await self.websocket.send_bytes(frame)
+        self.sent_bytes += len(frame)
+        metrics.sent_bytes.inc(amount=len(frame))
+
+    async def notify(self, message: dict[str, Any]) -> None:
+        """Queue a JSON-RPC notification (may be batched, or shrunk when the client falls behind).
+
+        Dropped once the connection has closed; the transcript still has it.
+        """
+        with contextlib.suppress(OutboundClosed):
+            await self.outbound.notify(message)
+
+    async def send_response(self, response: JSONRPCResponse) -> None:
+        """Queue a JSON-RPC response (dropped once the connection has closed)."""
+        with contextlib.suppress(OutboundClosed):
+            await self.outbound.send(response.model_dump())
+
+    def start_prompt(self, rpc_request: JSONRPCRequest) -> bool:
+        """Schedule a streaming request (prompt, continue, subscribe or replay) as its own task.
+
+        Returns:
+            False if another running request already uses the request id
+        """
+        request_id = rpc_request.id
+        if request_id is not None and request_id in self.prompts:
+            return False
+        task = asyncio.create_task(self._run_prompt(rpc_request))
+        self.tasks.add(task)
+        if rpc_request.method in ("subscribe", "replay"):
+            self.subscriptions.add(task)
+        if request_id is not None:
+            self.prompts[request_id] = task
+        task.add_done_callback(lambda done: self._forget(request_id, done))
+        return True
+
+    def _forget(self, request_id: Optional[Union[int, str]], task: "asyncio.Task[None]") -> None:
+        self.tasks.discard(task)
+        self.subscriptions.discard(task)
+        if request_id is not None and self.prompts.get(request_id) is task:
+            del self.prompts[request_id]
+
+    async def _run_prompt(self, rpc_request: JSONRPCRequest) -> None:
+        if rpc_request.method in ("subscribe", "replay"):
+            # Reading a transcript does not run the agent, so it does not take a prompt slot
+            await handle_subscribe(self, rpc_request)
+            return
+        if rpc_request.method == "continue":
+            handler, priority = handle_continue, PRIORITY_CONTINUE
+        else:
+            handler, priority = handle_prompt, PRIORITY_PROMPT
+
+        async def report_position(position: int) -> None:
+            await self.notify(notification({"request_id": rpc_request.id, "position": position}, method="queued"))
+
+        started = False
+        try:
+            async with self.slots:
+                queued_at = time.perf_counter()
+                async with admission.admit(self.client, priority, on_position=report_position):
+                    started = True
+                    metrics.queue_wait.observe(time.perf_counter() - queued_at, rpc_request.method)
+                    await handler(self, rpc_request)
+        except AdmissionRejected as e:
+            metrics.shed.inc(e.reason)
+            error_response = JSONRPCResponse(
+                error={
+                    "code": REQUEST_SHED,
+                    "message": "Request shed",
+                    "data": {"reason": e.reason, "retry_after": e.retry_after},
+                },
+                id=rpc_request.id,
+            )
+            await self.send_response(error_response)
+        except asyncio.CancelledError:
+            # Once started, the handler answers the cancel itself; a request still
+            # waiting for a slot or admission has to be answered here
+            if not started:
+                error_response = JSONRPCResponse(
+                    error={"code": REQUEST_CANCELLED, "message": "Request cancelled", "data": {"queued": True}},
+                    id=rpc_request.id,
+                )
+                with contextlib.suppress(Exception):
+                    await self.send_response(error_response)
+            raise
+
+    def cancel(self, request_id: Union[int, str]) -> bool:
+        """Cancel a running request of this connection.
+
+        Returns:
+            True if a request with that id was running
+        """
+        task = self.prompts.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def close(self) -> None:
+        """Stop subscriptions and the writer.
+
+        Prompts keep running and finish into their transcripts, so a reconnecting
+        client can subscribe to them; cancel them by stream id to stop them.
+        """
+        for task in self.subscriptions:
+            task.cancel()
+        if self.subscriptions:
+            await asyncio.gather(*self.subscriptions, return_exceptions=True)
+        await self.outbound.close(timeout=1.0)
+        metrics.connection_bytes.observe(self.sent_bytes)
+
+
+class DetachedSink:
+    """Stands in for a connection when a prompt runs for another worker; output goes only to the transcript."""
+
+    def __init__(self, client: Optional[str] = None) -> None:
+        """Remember the client the prompt is run for, whose budget it is charged to."""
+        self.client = client
+
+    async def notify(self, message: dict[str, Any]) -> None:
+        """Drop the notification."""
+
+    async def send_response(self, response: JSONRPCResponse) -> None:
+        """Drop the response."""
+
+
+async def worker_alive(worker_id: str) -> bool:
+    """Whether a worker has sent a heartbeat recently."""
+    owner: Optional[str] = await shared_state.owner(f"worker:{worker_id}")
+    return owner == worker_id
+
+
+async def cancel_stream(stream_id: str) -> bool:
+    """Cancel a running prompt by stream id, whichever connection or worker started it.
+
+    Returns:
+        True if the stream was running here, or its worker was asked to cancel it
+    """
+    task = running_streams.get(stream_id)
+    if task is not None:
+        if task.done():
+            return False
+        task.cancel()
+        return True
+    owner = await shared_state.owner(f"stream:{stream_id}")
+    if owner is None or owner == WORKER_ID or not await worker_alive(owner):
+        return False
+    await shared_state.publish(f"worker:{owner}", dumps({"op": "cancel", "stream_id": stream_id}))
+    return True
+
+
+async def _heartbeat() -> None:
+    while True:
+        await shared_state.claim(f"worker:{WORKER_ID}", WORKER_ID, HEARTBEAT_TTL)
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+async def _serve_worker_channel() -> None:
+    """Run prompts and cancellations other workers forward to this one."""
+    forwarded: set[asyncio.Task[None]] = set()
+    async for data in await shared_state.subscribe(f"worker:{WORKER_ID}"):
+        command = loads(data)
+        if command["op"] == "continue":
+            task = asyncio.create_task(_run_forwarded(command))
+            forwarded.add(task)
+            task.add_done_callback(forwarded.discard)
+        elif command["op"] == "cancel":
+            await cancel_stream(command["stream_id"])
+
+
+async def _run_forwarded(command: dict[str, Any]) -> None:
+    """Run a continue forwarded by another worker, admitted like a local one.
+
+    Dropped if the forwarding worker already claimed the stream and ran it itself.
+    """
+    stream_id = command["stream_id"]
+    if await shared_state.claim(f"stream:{stream_id}", WORKER_ID, STREAM_OWNER_TTL) != WORKER_ID:
+        return
+    # Create the transcript at once: it tells the forwarding worker the command was taken
+    transcripts.create(stream_id)
+    running_streams[stream_id] = asyncio.current_task()  # type: ignore[assignment]
+    sink = DetachedSink(command.get("client"))
+    request = JSONRPCRequest(method="continue", params=command["params"], id=command["request_id"])
+    started = False
+    try:
+        async with admission.admit(sink.client or "unknown", PRIORITY_CONTINUE):
+            started = True
+            await stream_agent(
+                sink,
+                request,
+                command["params"]["content"],
+                _build_options(command["params"]),
+                session_id=command["params"]["session_id"],
+                stream_id=stream_id,
+            )
+    except AdmissionRejected as e:
+        metrics.shed.inc(e.reason)
+        error = {
+            "code": REQUEST_SHED,
+            "message": "Request shed",
+            "data": {"reason": e.reason, "retry_after": e.retry_after},
+        }
+        transcripts.finish(stream_id, "failed", {"error": error})
+    except asyncio.CancelledError:
+        if not started:
+            error = {"code": REQUEST_CANCELLED, "message": "Request cancelled", "data": {"stream_id": stream_id}}
+            transcripts.finish(stream_id, "cancelled", {"error": error})
+        raise
+    finally:
+        if not started:
+            # stream_agent did this itself once it ran
+            running_streams.pop(stream_id, None)
+            with contextlib.suppress(Exception):
+                await asyncio.shield(_announce_finished(stream_id))
+
+
+async def _watch_remote_stream(stream_id: str) -> None:
+    """Wake local followers when another worker appends, and fail the stream if that worker dies."""
+    appends = await shared_state.subscribe(f"stream:{stream_id}")
+
+    async def wake_on_publish() -> None:
+        async for _ in appends:
+            transcripts.wake(stream_id)
+
+    waker = asyncio.create_task(wake_on_publish())
+    # Catch anything appended before the subscription took effect
+    transcripts.wake(stream_id)
+    try:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            info = transcripts.info(stream_id)
+            if info is None or info.finished:
+                return
+            owner = await shared_state.owner(f"stream:{stream_id}")
+            if owner is None or not await worker_alive(owner):
+                error = {"code": -32000, "message": "Internal error", "data": "worker running the prompt stopped"}
+                transcripts.finish(stream_id, "failed", {"error": error})
+                transcripts.wake(stream_id)
+                return
+    finally:
+        waker.cancel()
+
+
+async def follow_stream(stream_id: str, after_seq: int = 0) -> AsyncIterator[tuple[int, Any]]:
+    """Follow a transcript until it finishes, whichever worker writes it."""
+    watcher = None if stream_id in running_streams else asyncio.create_task(_watch_remote_stream(stream_id))
+    try:
+        async for item in transcripts.follow(stream_id, after_seq):
+            yield item
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Load assets and warm the agent session pool on startup; stop prompts and close sessions on shutdown."""
+    assets.load()
+    if isinstance(shared_state, InProcessState):
+        # Single process: streams left running by a previous run will never finish
+        transcripts.mark_abandoned()
+    transcripts.purge(TRANSCRIPT_RETENTION)
+    await shared_state.claim(f"worker:{WORKER_ID}", WORKER_ID, HEARTBEAT_TTL)
+    background = [asyncio.create_task(_heartbeat()), asyncio.create_task(_serve_worker_channel())]
+    await session_pool.start([ClaudeCodeOptions()])
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        tasks = list(running_streams.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*background, *tasks, return_exceptions=True)
+        await session_registry.close()
+        await session_pool.close()
+        await shared_state.release(f"worker:{WORKER_ID}", WORKER_ID)
+        await shared_state.close()
+        transcripts.close()
 
-# Mount static files
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
+app = FastAPI(title="CycleBot Web Interface", lifespan=lifespan)
 
-@app.get("/", response_class=HTMLResponse)  # type: ignore[misc]
-async def get_index() -> str:
-    """Serve the main HTML page."""
-    index_path = STATIC_DIR / "index.html"
-    with index_path.open() as f:
-        return f.read()
+
+@app.get("/")  # type: ignore[misc]
+async def get_index(request: Request) -> Response:
+    """Serve the main HTML page, which refers to the fingerprinted assets."""
+    response = assets.response("index.html", request.headers)
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
+
+
+@app.get("/static/{path:path}")  # type: ignore[misc]
+async def get_static(path: str, request: Request) -> Response:
+    """Serve a static asset, precompressed and cacheable."""
+    response = assets.response(path, request.headers)
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
+
+
+@app.get("/metrics")  # type: ignore[misc]
+async def get_metrics() -> Response:
+    """Serve this worker's metrics in the Prometheus text format."""
+    return Response(metrics.registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.websocket("/ws")  # type: ignore[misc]
 async def websocket_endpoint(websocket: WebSocket) -> None:
     """WebSocket endpoint for JSON-RPC communication."""
     await websocket.accept()
+    connection = Connection(websocket)
 
     try:
         while True:
@@ -76,137 +529,321 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
                     error={"code": -32700, "message": "Parse error", "data": str(e)},
                     id=request_data.get("id"),
                 )
-                await websocket.send_text(error_response.model_dump_json())
+                await connection.send_response(error_response)
                 continue
 
             # Handle methods
-            if rpc_request.method == "prompt":
-                await handle_prompt(websocket, rpc_request)
+            if rpc_request.method in STREAMING_METHODS:
+                if not connection.start_prompt(rpc_request):
+                    await connection.send_response(
+                        JSONRPCResponse(
+                            error={"code": -32600, "message": "Invalid Request: id already in use"},
+                            id=rpc_request.id,
+                        )
+                    )
+            elif rpc_request.method == "cancel":
+                await handle_cancel(connection, rpc_request)
+            elif rpc_request.method == "stats":
+                stats = {
+                    "running_prompts": len(connection.prompts),
+                    "running_streams": len(running_streams),
+                    "worker": WORKER_ID,
+                    "admission": admission.snapshot(),
+                    "outbound": {**connection.outbound.stats.snapshot(), "sent_bytes": connection.sent_bytes},
+                    "session_pool": {"size": session_pool.size, **dataclasses.asdict(session_pool.stats)},
+                    "sessions": session_registry.snapshot(),
+                }
+                await connection.send_response(JSONRPCResponse(result=stats, id=rpc_request.id))
             else:
                 # Method not found
                 error_response = JSONRPCResponse(
                     error={"code": -32601, "message": "Method not found"},
                     id=rpc_request.id,
                 )
-                await websocket.send_text(error_response.model_dump_json())
+                await connection.send_response(error_response)
 
     except WebSocketDisconnect:
         print("Client disconnected")
+    finally:
+        await connection.close()
+
+
+async def handle_cancel(connection: Connection, rpc_request: JSONRPCRequest) -> None:
+    """Handle cancel method by aborting the request with the given id, or the prompt with the given stream id."""
+    params = rpc_request.params or {}
+    if "id" not in params and "stream_id" not in params:
+        error_response = JSONRPCResponse(
+            error={"code": -32602, "message": "Invalid params: 'id' or 'stream_id' required"},
+            id=rpc_request.id,
+        )
+        await connection.send_response(error_response)
+        return
+
+    cancelled = await cancel_stream(params["stream_id"]) if "stream_id" in params else connection.cancel(params["id"])
+    await connection.send_response(JSONRPCResponse(result={"cancelled": cancelled}, id=rpc_request.id))
+
+
+async def handle_subscribe(connection: Connection, rpc_request: JSONRPCRequest) -> None:
+    """Handle subscribe and replay methods by resending a prompt's transcript after a sequence number.
+
+    ``replay`` sends what is stored and completes; ``subscribe`` also follows the
+    stream live until the prompt finishes. Either way the response carries the
+    stream status and, once finished, the prompt's own result or error.
+    """
+    params = rpc_request.params or {}
+    stream_id = params.get("stream_id")
+    info = transcripts.info(stream_id) if isinstance(stream_id, str) else None
+    if info is None:
+        error_response = JSONRPCResponse(
+            error={"code": -32602, "message": "Invalid params: unknown 'stream_id'"},
+            id=rpc_request.id,
+        )
+        await connection.send_response(error_response)
+        return
 
+    after_seq = int(params.get("after_seq", 0))
+    if rpc_request.method == "subscribe":
+        async for seq, msg_data in follow_stream(info.stream_id, after_seq):
+            await connection.notify(notification({**msg_data, "seq": seq}))
+    else:
+        for seq, msg_data in transcripts.read(info.stream_id, after_seq):
+            await connection.notify(notification({**msg_data, "seq": seq}))
 
-async def handle_prompt(websocket: WebSocket, rpc_request: JSONRPCRequest) -> None:
-    """Handle prompt method by streaming messages back to client."""
+    info = transcripts.info(info.stream_id) or info
+    result = {"stream_id": info.stream_id, "status": info.status, "last_seq": info.last_seq, "outcome": info.outcome}
+    await connection.send_response(JSONRPCResponse(result=result, id=rpc_request.id))
+
+
+async def handle_prompt(connection: Connection, rpc_request: JSONRPCRequest) -> None:
+    """Handle prompt method by streaming messages of a new conversation back to client."""
     if not rpc_request.params or "content" not in rpc_request.params:
         error_response = JSONRPCResponse(
             error={"code": -32602, "message": "Invalid params: 'content' required"},
             id=rpc_request.id,
         )
-        await websocket.send_text(error_response.model_dump_json())
+        await connection.send_response(error_response)
         return
 
-    content = rpc_request.params["content"]
-    options_dict = rpc_request.params.get("options", {})
+    await stream_agent(connection, rpc_request, rpc_request.params["content"], _build_options(rpc_request.params))
 
-    # Build options
-    options = None
-    if options_dict:
-        options = ClaudeCodeOptions(**options_dict)
 
-    turn_count = 0
+async def handle_continue(connection: Connection, rpc_request: JSONRPCRequest) -> None:
+    """Handle continue method by sending a follow-up prompt to an existing conversation."""
+    if not rpc_request.params or "content" not in rpc_request.params or "session_id" not in rpc_request.params:
+        error_response = JSONRPCResponse(
+            error={"code": -32602, "message": "Invalid params: 'session_id' and 'content' required"},
+            id=rpc_request.id,
+        )
+        await connection.send_response(error_response)
+        return
+
+    # The conversation's agent session lives in the worker that owns it
+    session_id = rpc_request.params["session_id"]
+    stream_id = uuid.uuid4().hex
+    owner = await shared_state.owner(f"session:{session_id}")
+    if (
+        owner is not None
+        and owner != WORKER_ID
+        and await worker_alive(owner)
+        and await forward_continue(connection, rpc_request, owner, stream_id)
+    ):
+        return
+
+    await stream_agent(
+        connection,
+        rpc_request,
+        rpc_request.params["content"],
+        _build_options(rpc_request.params),
+        session_id=session_id,
+        stream_id=stream_id,
+    )
+
+
+async def forward_continue(connection: Connection, rpc_request: JSONRPCRequest, owner: str, stream_id: str) -> bool:
+    """Have the owning worker run a continue request and relay its transcript to the client.
+
+    Whichever worker claims the stream id first runs the prompt: the owner when it
+    takes the command, or this worker once FORWARD_TIMEOUT has passed, so a command
+    that reaches the owner late is dropped instead of running the prompt twice.
+
+    Returns:
+        False if this worker claimed the stream (the caller then runs it itself)
+    """
+    command = {
+        "op": "continue",
+        "stream_id": stream_id,
+        "request_id": rpc_request.id,
+        "params": rpc_request.params,
+        "client": connection.client,
+    }
+    await shared_state.publish(f"worker:{owner}", dumps(command))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + FORWARD_TIMEOUT
+    # The owner claims the stream, then creates its transcript
+    while transcripts.info(stream_id) is None:
+        if loop.time() > deadline:
+            if await shared_state.claim(f"stream:{stream_id}", WORKER_ID, STREAM_OWNER_TTL) == WORKER_ID:
+                return False
+            deadline = loop.time() + FORWARD_TIMEOUT
+        await asyncio.sleep(0.05)
 
     try:
-        async for message in query(prompt=content, options=options):
-            msg_data: dict[str, Any] = {"type": "unknown", "data": {}}
-
-            if isinstance(message, AssistantMessage):
-                turn_count += 1
-                msg_data = {
-                    "type": "assistant",
-                    "data": {
-                        "turn": turn_count,
-                        "content": [],
-                    },
-                }
-                for block in message.content:
-                    if isinstance(block, TextBlock):
-                        msg_data["data"]["content"].append({"type": "text", "text": block.text})
-                    elif isinstance(block, ToolUseBlock):
-                        msg_data["data"]["content"].append(
-                            {
-                                "type": "tool_use",
-                                "name": block.name,
-                                "input": block.input,
-                            }
-                        )
+        async for seq, msg_data in follow_stream(stream_id):
+            await connection.notify(notification({**msg_data, "seq": seq}))
+    except asyncio.CancelledError:
+        await cancel_stream(stream_id)
+        error_response = JSONRPCResponse(
+            error={"code": REQUEST_CANCELLED, "message": "Request cancelled", "data": {"stream_id": stream_id}},
+            id=rpc_request.id,
+        )
+        with contextlib.suppress(Exception):
+            await connection.send_response(error_response)
+        raise
 
-            elif isinstance(message, SystemMessage):
-                msg_data = {
-                    "type": "system",
-                    "data": {
-                        "model": message.data.get("model"),
-                        "session_id": message.data.get("session_id"),
-                        "cwd": message.data.get("cwd"),
-                        "tools": message.data.get("tools"),
-                        "permission_mode": message.data.get("permissionMode"),
-                    },
-                }
+    info = transcripts.info(stream_id)
+    outcome = (
+        info.outcome if info is not None and info.outcome else {"error": {"code": -32000, "message": "Internal error"}}
+    )
+    await connection.send_response(JSONRPCResponse(**outcome, id=rpc_request.id))
+    return True
 
-            elif isinstance(message, UserMessage):
-                msg_data = {
-                    "type": "user",
-                    "data": {
-                        "content": [],
-                    },
-                }
-                for block in message.content:
-                    if isinstance(block, TextBlock):
-                        msg_data["data"]["content"].append({"type": "text", "text": block.text})
-                    elif isinstance(block, ToolResultBlock):
-                        msg_data["data"]["content"].append(
-                            {
-                                "type": "tool_result",
-                                "content": block.content,
-                                "is_error": block.is_error,
-                            }
-                        )
 
-            elif isinstance(message, ResultMessage):
-                turn_count += 1
-                msg_data = {
-                    "type": "result",
-                    "data": {
-                        "num_turns": message.num_turns,
-                        "duration_api_ms": message.duration_api_ms,
-                        "duration_ms": message.duration_ms,
-                        "is_error": message.is_error,
-                        "total_cost_usd": message.total_cost_usd,
-                    },
-                }
+def _build_options(params: dict[str, Any]) -> Optional[ClaudeCodeOptions]:
+    options_dict = params.get("options", {})
+    if options_dict:
+        return ClaudeCodeOptions(**options_dict)
+    return None
+
+
+async def stream_agent(
+    connection: Union[Connection, DetachedSink],
+    rpc_request: JSONRPCRequest,
+    content: str,
+    options: Optional[ClaudeCodeOptions],
+    session_id: Optional[str] = None,
+    stream_id: Optional[str] = None,
+) -> None:
+    """Run one prompt on a registry session and stream its messages as notifications.
+
+    Args:
+        connection: Connection to send to
+        rpc_request: Request being answered
+        content: Prompt text
+        options: Agent options (for a resumed conversation, None reuses the recorded ones)
+        session_id: Conversation to continue, None to start a new one
+        stream_id: Transcript stream to write, created unless a forwarded prompt's already was; new by default
+    """
+    serializer = MessageSerializer()
+    if stream_id is None or transcripts.info(stream_id) is None:
+        stream_id = transcripts.create(stream_id)
+    running_streams[stream_id] = asyncio.current_task()  # type: ignore[assignment]
+    await shared_state.claim(f"stream:{stream_id}", WORKER_ID, STREAM_OWNER_TTL)
+    status, outcome = "failed", None
+    trace = None
 
-            # Send message as JSON-RPC notification
-            notification = {"jsonrpc": "2.0", "method": "message", "params": msg_data}
-            await websocket.send_text(json.dumps(notification))
+    try:
+        # Leaving the block keeps the session for continuation, or closes it (stopping
+        # its CLI subprocess) when the prompt failed or was cancelled
+        async with session_registry.lease(session_id, options) as lease:
+            trace = metrics.query(rpc_request.method, **{"cyclebot.stream_id": stream_id})
+            await lease.client.query(content)
+            async for message in lease.client.receive_response():
+                lease.observe(message)
+                trace.observe(message)
+                if isinstance(message, ResultMessage):
+                    admission.charge(connection.client, message.total_cost_usd)
+                # Record the message, then send it as a JSON-RPC notification tagged with the
+                # prompt it belongs to and its place in the transcript
+                msg_data = serializer.serialize(message)
+                msg_data["request_id"] = rpc_request.id
+                msg_data["stream_id"] = stream_id
+                seq = transcripts.append(stream_id, msg_data)
+                await shared_state.publish(f"stream:{stream_id}", b"")
+                await connection.notify(notification({**msg_data, "seq": seq}))
 
         # Send final response
         final_response = JSONRPCResponse(
-            result={"turn_count": turn_count, "status": "completed"},
+            result={
+                "turn_count": serializer.turn_count,
+                "status": "completed",
+                "session_id": lease.session_id,
+                "stream_id": stream_id,
+            },
             id=rpc_request.id,
         )
-        await websocket.send_text(final_response.model_dump_json())
+        status, outcome = "completed", {"result": final_response.result}
+        if lease.session_id is not None:
+            await shared_state.claim(f"session:{lease.session_id}", WORKER_ID, SESSION_TTL, force=True)
+        await connection.send_response(final_response)
 
+    except asyncio.CancelledError:
+        error_response = JSONRPCResponse(
+            error={
+                "code": REQUEST_CANCELLED,
+                "message": "Request cancelled",
+                "data": {"turn_count": serializer.turn_count, "stream_id": stream_id},
+            },
+            id=rpc_request.id,
+        )
+        status, outcome = "cancelled", {"error": error_response.error}
+        with contextlib.suppress(Exception):
+            await connection.send_response(error_response)
+        raise
+    except SessionBusy as e:
+        error_response = JSONRPCResponse(
+            error={"code": SESSION_BUSY, "message": "Session busy", "data": str(e)},
+            id=rpc_request.id,
+        )
+        outcome = {"error": error_response.error}
+        await connection.send_response(error_response)
     except Exception as e:
         error_response = JSONRPCResponse(
             error={"code": -32000, "message": "Internal error", "data": str(e)},
             id=rpc_request.id,
         )
-        await websocket.send_text(error_response.model_dump_json())
+        outcome = {"error": error_response.error}
+        await connection.send_response(error_response)
+    finally:
+        if trace is not None:
+            trace.finish(status)
+        transcripts.finish(stream_id, status, outcome)
+        running_streams.pop(stream_id, None)
+        with contextlib.suppress(Exception):
+            await asyncio.shield(_announce_finished(stream_id))
+
+
+async def _announce_finished(stream_id: str) -> None:
+    await shared_state.publish(f"stream:{stream_id}", b"")
+    await shared_state.release(f"stream:{stream_id}", WORKER_ID)
 
 
 def main() -> None:
-    """Run the FastAPI server."""
+    """Run the FastAPI server, optionally as several worker processes."""
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)  # noqa: S104
+    global shared_state
+
+    parser = argparse.ArgumentParser(description="CycleBot web server")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on")  # noqa: S104
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument(
+        "--shared-state",
+        default=SHARED_STATE_URL,
+        help='"memory", or a redis:// URL of a Redis-compatible server (required for more than one worker)',
+    )
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        shared_state = open_shared_state(args.shared_state)
+        uvicorn.run(app, host=args.host, port=args.port)
+        return
+    if args.shared_state == "memory":
+        parser.error("--workers above 1 needs --shared-state redis://... so workers can route sessions to each other")
+    # Workers import this module afresh and read their settings from the environment
+    os.environ["CYCLEBOT_SHARED_STATE"] = args.shared_state
+    uvicorn.run("cyclebot.web:app", host=args.host, port=args.port, workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -1 +1,141 @@
 """Configuration for pytest."""
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+import pytest
+
+
+class StubOpenRouter:
+    """Local stand-in for the OpenRouter chat completions endpoint.
+
+    Responses are served from a script, one per request; once the script runs
+    out, every request gets a completion echoing the requested model.
+    """
+
+    def __init__(self) -> None:
+        """Start with an empty script."""
+        self.script: list[tuple[int, dict[str, str], Any]] = []
+        self.requests: list[dict[str, Any]] = []
+        self.headers: list[dict[str, str]] = []
+        self.delay = 0.0
+        self.model_delays: dict[str, float] = {}
+        self.model_errors: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.url = ""
+        self._lock = threading.Lock()
+
+    def respond(self, status: int, body: Any, headers: Optional[dict[str, str]] = None) -> None:
+        """Queue a scripted response."""
+        self.script.append((status, headers or {}, body))
+
+    def next_response(self, payload: dict[str, Any]) -> tuple[int, dict[str, str], Any]:
+        """Pop the next scripted response, or build a default completion."""
+        with self._lock:
+            if self.script:
+                return self.script.pop(0)
+        model = str(payload.get("model"))
+        if model in self.model_errors:
+            return self.model_errors[model], {}, {"error": {"message": f"{model} failed"}}
+        return 200, {}, completion(f"reply from {payload.get('model')}")
+
+
+def completion(text: str) -> dict[str, Any]:
+    """Build a chat completion response body."""
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+
+def sse_body(tokens: list[str], usage: Optional[dict[str, int]] = None) -> bytes:
+    """Build a streamed chat completion body as OpenRouter sends it."""
+    events = [": OPENROUTER PROCESSING"]
+    events.extend(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}" for token in tokens)
+    if usage is not None:
+        events.append(f"data: {json.dumps({'choices': [], 'usage': usage})}")
+    events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode()
+
+
+@pytest.fixture
+def openrouter_stub() -> Iterator[StubOpenRouter]:
+    """Run a stub OpenRouter server on a free local port."""
+    stub = StubOpenRouter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with stub._lock:
+                stub.requests.append(payload)
+                stub.headers.append(dict(self.headers))
+                stub.in_flight += 1
+                stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+            try:
+                delay = stub.model_delays.get(payload.get("model"), stub.delay)
+                if delay:
+                    time.sleep(delay)
+                status, headers, body = stub.next_response(payload)
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            finally:
+                with stub._lock:
+                    stub.in_flight -= 1
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+class FakeTransport:
+    """Transport stand-in whose readiness the test controls."""
+
+    def __init__(self) -> None:
+        """Start ready."""
+        self.ready = True
+
+    def is_ready(self) -> bool:
+        """Whether the fake CLI is still connected."""
+        return self.ready
+
+
+class FakeClient:
+    """ClaudeSDKClient stand-in that records connect and disconnect and the task doing each."""
+
+    instances: list["FakeClient"] = []
+
+    def __init__(self, options: Any) -> None:
+        """Create an unconnected client."""
+        self.options = options
+        self._transport: Any = None
+        self.connect_task: Any = None
+        self.disconnect_task: Any = None
+        FakeClient.instances.append(self)
+
+    async def connect(self) -> None:
+        """Pretend to start the CLI."""
+        await asyncio.sleep(0)
+        self.connect_task = asyncio.current_task()
+        self._transport = FakeTransport()
+
+    async def disconnect(self) -> None:
+        """Pretend to stop the CLI."""
+        self.disconnect_task = asyncio.current_task()
+        self._transport = None
@@ -0,0 +1,153 @@
+"""Tests for query admission control."""
+
+import asyncio
+
+import pytest
+
+from cyclebot.admission import PRIORITY_CONTINUE, AdmissionController, AdmissionRejected
+
+
+def test_queue_order_and_positions() -> None:
+    """Test that excess requests wait by priority, then arrival, and hear their position."""
+
+    async def run() -> tuple[list[str], dict[str, list[int]]]:
+        admission = AdmissionController(max_concurrent=1, rate=100, burst=100)
+        order: list[str] = []
+        positions: dict[str, list[int]] = {}
+        release = asyncio.Event()
+
+        async def request(name: str, priority: int = 1) -> None:
+            async def report(position: int) -> None:
+                positions.setdefault(name, []).append(position)
+
+            async with admission.admit("client", priority, on_position=report):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(request("a")), asyncio.create_task(request("b"))]
+        await asyncio.sleep(0.01)
+        waiting.append(asyncio.create_task(request("continue", PRIORITY_CONTINUE)))
+        await asyncio.sleep(0.01)
+        assert admission.running == 1
+        assert admission.waiting == 3
+        release.set()
+        await asyncio.gather(first, *waiting)
+        assert admission.running == 0
+        assert admission.stats.admitted == 4
+        assert admission.stats.queued == 3
+        return order, positions
+
+    order, positions = asyncio.run(run())
+
+    assert order == ["first", "continue", "a", "b"]
+    # A higher-priority request moved in ahead of both; later moves may be skipped when the queue drains at once
+    assert positions["a"][:2] == [1, 2]
+    assert positions["b"][:2] == [2, 3]
+    assert positions["continue"] == [1]
+    assert "first" not in positions
+
+
+def test_rate_limit_per_client() -> None:
+    """Test that a client's burst is shed with a retry delay while other clients get through."""
+
+    async def run() -> tuple[AdmissionController, AdmissionRejected]:
+        admission = AdmissionController(rate=0.5, burst=2)
+        for _ in range(2):
+            async with admission.admit("greedy"):
+                pass
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with admission.admit("greedy"):
+                pass
+        async with admission.admit("other"):
+            pass
+        return admission, excinfo.value
+
+    admission, rejected = asyncio.run(run())
+
+    assert rejected.reason == "rate_limited"
+    assert 0 < rejected.retry_after <= 2
+    assert admission.stats.rate_limited == 1
+    assert admission.stats.admitted == 3
+
+
+def test_budgets() -> None:
+    """Test that clients and the server stop being admitted once their spend reaches the budget."""
+
+    async def run() -> AdmissionController:
+        admission = AdmissionController(rate=100, burst=100, client_budget_usd=1.0, budget_usd=1.5)
+        admission.charge("a", 0.6)
+        async with admission.admit("a"):
+            pass
+        admission.charge("a", 0.4)
+        with pytest.raises(AdmissionRejected, match="budget_exceeded"):
+            async with admission.admit("a"):
+                pass
+        async with admission.admit("b"):
+            pass
+        admission.charge("b", 0.5)
+        with pytest.raises(AdmissionRejected, match="budget_exceeded"):
+            async with admission.admit("c"):
+                pass
+        return admission
+
+    admission = asyncio.run(run())
+
+    assert admission.spent("a") == pytest.approx(1.0)
+    assert admission.spent() == pytest.approx(1.5)
+    assert admission.stats.budget_exceeded == 2
+
+
+def test_queue_full_timeout_and_cancel() -> None:
+    """Test shedding when the queue is full or a request waits too long, and leaving the queue on cancel."""
+
+    async def run() -> AdmissionController:
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05, rate=100, burst=100)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with admission.admit("a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected, match="queue_timeout"):
+            async with admission.admit("b"):
+                pass
+
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected, match="queue_full"):
+            async with admission.admit("c"):
+                pass
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert admission.waiting == 0
+
+        release.set()
+        await holder
+        async with admission.admit("c"):
+            assert admission.running == 1
+        return admission
+
+    admission = asyncio.run(run())
+
+    assert admission.stats.queue_timeout == 1
+    assert admission.stats.queue_full == 1
+    assert admission.snapshot()["running"] == 0
+
+
+def test_built_outside_event_loop() -> None:
+    """Test a controller created before any loop runs (as the web server's is) under a fresh loop."""
+    admission = AdmissionController(max_concurrent=1, rate=100, burst=100)
+
+    async def run() -> int:
+        async def hold() -> None:
+            async with admission.admit("client"):
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(hold(), hold())
+        return admission.stats.queued
+
+    assert asyncio.run(run()) == 1
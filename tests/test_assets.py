@@ -0,0 +1,63 @@
+"""Tests for the static asset store."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from cyclebot.assets import IMMUTABLE_CACHE, REVALIDATE_CACHE, AssetStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> AssetStore:
+    """An asset store over a small static directory."""
+    (tmp_path / "components").mkdir()
+    (tmp_path / "app.js").write_text("console.log('app');\n" * 100)
+    (tmp_path / "components" / "widget.js").write_text("export class Widget {}\n")
+    (tmp_path / "index.html").write_text(
+        '<script src="/static/components/widget.js"></script><script src="/static/app.js"></script>'
+    )
+    store = AssetStore(tmp_path)
+    store.load()
+    return store
+
+
+def test_fingerprints_and_rewrites_pages(store: AssetStore) -> None:
+    """Test content-hashed URLs and pages rewritten to use them."""
+    app_url = store.url("app.js")
+    widget_url = store.url("components/widget.js")
+
+    assert len(store) == 3
+    assert app_url.startswith("/static/app.") and app_url.endswith(".js")
+    assert widget_url.startswith("/static/components/widget.")
+    index = store.get("index.html")
+    assert index is not None
+    assert index.body.decode() == f'<script src="{widget_url}"></script><script src="{app_url}"></script>'
+
+
+def test_response_headers_and_encoding(store: AssetStore) -> None:
+    """Test cache headers, compressed variants and revalidation."""
+    fingerprinted = store.url("app.js").removeprefix("/static/")
+    response = store.response(fingerprinted, {"accept-encoding": "gzip, deflate"})
+    assert response is not None
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "text/javascript; charset=utf-8"
+    assert gzip.decompress(response.body) == store.get("app.js").body
+
+    plain = store.response("app.js", {})
+    assert plain is not None
+    assert plain.headers["cache-control"] == REVALIDATE_CACHE
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != response.headers["etag"]
+
+    cached = store.response("app.js", {"if-none-match": plain.headers["etag"]})
+    assert cached is not None
+    assert cached.status_code == 304
+    assert cached.body == b""
+
+    # Too small to be worth compressing
+    small = store.response("components/widget.js", {"accept-encoding": "gzip"})
+    assert small is not None
+    assert "content-encoding" not in small.headers
+    assert store.response("missing.js", {}) is None
@@ -0,0 +1,92 @@
+"""Tests for chart directory resolution."""
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from cyclebot.chart import (
+    ChartDirectoryResolver,
+    get_chart_directory,
+    get_chart_directory_async,
+    get_chart_filename,
+    get_date_directory,
+    get_directory_resolver,
+)
+
+
+def local_time(*args: int) -> datetime:
+    """Build an aware datetime in the local timezone."""
+    return datetime(*args).astimezone()  # noqa: DTZ001
+
+
+def test_get_date_directory(tmp_path: Path) -> None:
+    """Test the {YEAR}/{Mon}/{YYYY-MM-DD} layout."""
+    assert get_date_directory(tmp_path, local_time(2025, 11, 19, 15)) == tmp_path / "2025" / "Nov" / "2025-11-19"
+
+
+def test_resolve_does_not_create(tmp_path: Path) -> None:
+    """Test that resolving the directory never touches the filesystem."""
+    resolver = ChartDirectoryResolver(tmp_path)
+    date_dir = resolver.resolve(local_time(2025, 11, 19, 15))
+    assert date_dir == tmp_path / "2025" / "Nov" / "2025-11-19"
+    assert not date_dir.exists()
+
+
+def test_ensure_creates_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that ensure only calls mkdir the first time for each date."""
+    resolver = ChartDirectoryResolver(tmp_path)
+    calls = []
+    original_mkdir = Path.mkdir
+
+    def counting_mkdir(self: Path, *args: object, **kwargs: object) -> None:
+        calls.append(self)
+        original_mkdir(self, *args, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+    now = local_time(2025, 11, 19, 15)
+    first = resolver.ensure(now)
+    assert first.is_dir()
+    assert calls[0] == first
+
+    calls.clear()
+    assert resolver.ensure(now + timedelta(hours=1)) == first
+    assert calls == []
+
+
+def test_rollover_at_local_midnight(tmp_path: Path) -> None:
+    """Test that the cached directory changes at local midnight."""
+    resolver = ChartDirectoryResolver(tmp_path)
+    before = resolver.resolve(local_time(2025, 11, 19, 23, 59, 59))
+    after = resolver.resolve(local_time(2025, 11, 20, 0, 0, 1))
+    assert before.name == "2025-11-19"
+    assert after.name == "2025-11-20"
+    # Going back in time (e.g. tests or clock changes) is resolved too
+    assert resolver.resolve(local_time(2025, 11, 19, 12)).name == "2025-11-19"
+
+
+def test_ensure_async(tmp_path: Path) -> None:
+    """Test the async variant creates the directory and then serves it from cache."""
+    resolver = ChartDirectoryResolver(tmp_path)
+    now = local_time(2025, 11, 19, 15)
+    date_dir = asyncio.run(resolver.ensure_async(now))
+    assert date_dir.is_dir()
+    assert asyncio.run(resolver.ensure_async(now)) == date_dir
+
+
+def test_module_helpers_share_resolver(tmp_path: Path) -> None:
+    """Test get_chart_directory and its async variant use one cached resolver per base."""
+    assert get_directory_resolver(tmp_path) is get_directory_resolver(str(tmp_path))
+
+    date_dir = get_chart_directory(tmp_path, create=False)
+    assert not date_dir.exists()
+    assert asyncio.run(get_chart_directory_async(tmp_path, create=False)) == date_dir
+    assert asyncio.run(get_chart_directory_async(tmp_path)) == date_dir
+    assert date_dir.is_dir()
+    assert get_chart_directory(tmp_path) == date_dir
+
+
+def test_get_chart_filename() -> None:
+    """Test chart filename format."""
+    assert get_chart_filename("1h", "2025-11-19_15-30-45") == "2025-11-19_15-30-45-1h.png"
@@ -0,0 +1,90 @@
+"""Tests for feature-based chart analysis."""
+
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from cyclebot.chart_analysis import (
+    ANALYSIS_QUESTIONS,
+    AnalysisRun,
+    comparison_report,
+    feature_prompt,
+    load_market_summary,
+    parse_mode,
+)
+from cyclebot.chart_data import Series, save_series
+from cyclebot.chart_index import ChartIndex
+from cyclebot.openrouter import CompletionStats
+
+pytest.importorskip("numpy")
+
+
+def save_waves(date_dir: Path, timestamp: str, timeframe: str, bars: int, step: int) -> Path:
+    """Save a rising wave of candles as a series file."""
+    series = Series("sds_1", "BINANCE:BTCUSDT", str(step // 60))
+    for i in range(bars):
+        close = 100 + 5 * math.sin(i / 4) + i / 10
+        series.bars[float(i * step)] = [i * step, close - 0.5, close + 1, close - 1, close, 10]
+    path = date_dir / f"{timestamp}-{timeframe}.npz"
+    save_series(series, path)
+    return path
+
+
+def test_parse_mode() -> None:
+    """Test mode validation and the features default."""
+    assert parse_mode(None) == "features"
+    assert parse_mode(" Compare ") == "compare"
+    with pytest.raises(ValueError, match="analysis mode"):
+        parse_mode("pixels")
+
+
+def test_feature_prompt_from_captured_series(tmp_path: Path) -> None:
+    """Test building the feature prompt from the latest indexed series."""
+    base = tmp_path / "charts"
+    date_dir = base / "2025" / "Nov" / "2025-11-19"
+    date_dir.mkdir(parents=True)
+    with ChartIndex(base, tmp_path / "index.sqlite3") as index:
+        assert load_market_summary(date_dir, index) is None
+        for path in (
+            save_waves(date_dir, "2025-11-19_15-00-00", "5m", 600, 300),
+            save_waves(date_dir, "2025-11-19_15-00-00", "1h", 300, 3600),
+        ):
+            index.add_series(path)
+        summary = load_market_summary(date_dir, index)
+
+        # Only series saved by the capture of the charts being analyzed are used
+        newer_chart = date_dir / "2025-11-19_16-00-00-5m.webp"
+        assert load_market_summary(date_dir, index, charts={"5m": newer_chart}) is None
+        charts = {"1h": date_dir / "2025-11-19_15-00-00-1h.webp", "5m": newer_chart}
+        matching = load_market_summary(date_dir, index, charts=charts)
+        assert matching is not None
+        assert list(matching.timeframes) == ["1h"]
+
+    assert summary is not None
+    assert list(summary.timeframes) == ["1h", "5m"]
+    assert summary.symbol == "BINANCE:BTCUSDT"
+
+    prompt = feature_prompt(summary)
+    features = json.loads(prompt.split("\n\n")[2])
+    assert features["timeframes"]["5m"]["bars"] == 600
+    assert features["levels"]
+    assert prompt.endswith(ANALYSIS_QUESTIONS)
+    assert len(prompt.encode()) < 4096
+
+
+def test_comparison_report() -> None:
+    """Test the side-by-side report and the ratios against vision."""
+    runs = [
+        AnalysisRun("features", "cheap/text", "...", CompletionStats(1500.0, 2048, 700, 300, 0.0005)),
+        AnalysisRun("vision", "big/vision", "...", CompletionStats(6000.0, 819200, 6500, 300, 0.002)),
+    ]
+    report = comparison_report(runs)
+    assert "2.0 KB" in report
+    assert "$0.000500" in report
+    assert report.splitlines()[-1] == "features vs vision: 400.0x smaller request, 4.0x faster, 4.0x cheaper"
+
+    slow = AnalysisRun("features", "cheap/text", "...", CompletionStats(12000.0, 2048, cached=False))
+    assert "2.0x slower" in comparison_report([slow, runs[1]])
+    assert len(comparison_report(runs[:1]).splitlines()) == 2
@@ -0,0 +1,112 @@
+"""Tests for chart retention and day archives."""
+
+import os
+from collections.abc import Iterator
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from cyclebot.chart_archive import ChartReader, RetentionPolicy, compact, main
+from cyclebot.chart_index import ChartIndex
+from tests.test_chart_index import make_chart
+
+Image = pytest.importorskip("PIL.Image")
+
+TODAY = date(2025, 11, 20)
+
+
+def save_chart(base: Path, timestamp: str, timeframe: str, shade: int) -> Path:
+    """Write a small PNG chart in the {YEAR}/{Mon}/{date} layout."""
+    path = make_chart(base, timestamp, timeframe)
+    Image.new("RGB", (320, 180), (shade, 255 - shade, 128)).save(path)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> Iterator[ChartIndex]:
+    """Chart index over three days of charts: one to archive, one to re-encode and today's."""
+    base = tmp_path / "charts"
+    paths = [
+        save_chart(base, "2025-11-01_10-00-00", "1h", 10),
+        save_chart(base, "2025-11-01_10-00-00", "5m", 20),
+        save_chart(base, "2025-11-15_10-00-00", "1h", 30),
+        save_chart(base, "2025-11-20_10-00-00", "1h", 40),
+    ]
+    duplicate = paths[2].with_name("2025-11-15_11-00-00-1h.png")
+    os.link(paths[2], duplicate)
+    chart_index = ChartIndex(base, tmp_path / "index.sqlite3")
+    chart_index.add_many([*paths, duplicate], {duplicate: paths[2]})
+    yield chart_index
+    chart_index.close()
+
+
+def test_compact_tiers(index: ChartIndex) -> None:
+    """Test that old days are archived, middle days re-encoded with links kept, and recent days left alone."""
+    base = index.base_path
+    policy = RetentionPolicy(keep_days=2, archive_days=10)
+
+    dry = compact(index, policy, today=TODAY, dry_run=True)
+    assert (dry.charts_archived, dry.charts_reencoded, dry.bytes_after) == (2, 2, 0)
+    assert (base / "2025" / "Nov" / "2025-11-01").is_dir()
+
+    report = compact(index, policy, today=TODAY)
+
+    archive = base / "2025" / "Nov" / "2025-11-01.zip"
+    assert report.days_archived == 1
+    assert report.charts_archived == 2
+    assert report.charts_reencoded == 2
+    assert report.bytes_saved > 0
+    assert archive.is_file()
+    assert not (base / "2025" / "Nov" / "2025-11-01").exists()
+    webp = base / "2025" / "Nov" / "2025-11-15" / "2025-11-15_10-00-00-1h.webp"
+    duplicate = webp.with_name("2025-11-15_11-00-00-1h.webp")
+    assert webp.stat().st_ino == duplicate.stat().st_ino
+    assert (base / "2025" / "Nov" / "2025-11-20" / "2025-11-20_10-00-00-1h.png").is_file()
+
+    records = index.range("2025-11-01", "2025-11-15")
+    assert [r.path for r in records] == [
+        archive / "2025-11-01_10-00-00-1h.webp",
+        archive / "2025-11-01_10-00-00-5m.webp",
+        webp,
+        duplicate,
+    ]
+    assert index.same_as(duplicate) == webp
+    assert index.latest(["5m"]) == {"5m": archive / "2025-11-01_10-00-00-5m.webp"}
+
+    with ChartReader() as reader:
+        data = reader.read(records[1].path)
+        with pytest.raises(FileNotFoundError):
+            reader.read(archive / "2025-11-01_12-00-00-1h.webp")
+    assert data[8:12] == b"WEBP"
+
+    # Nothing left to do, and a rebuild finds the archived charts again
+    assert compact(index, policy, today=TODAY).bytes_before == 0
+    assert index.rebuild() == 5
+    assert index.same_as(duplicate) == webp
+
+
+def test_failed_index_update_keeps_originals(index: ChartIndex, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that charts are not removed when the index could not be pointed at their replacements."""
+
+    def fail(moves: object) -> int:
+        msg = "database is locked"
+        raise OSError(msg)
+
+    monkeypatch.setattr(index, "move", fail)
+    with pytest.raises(OSError, match="locked"):
+        compact(index, RetentionPolicy(keep_days=2, archive_days=10), today=TODAY)
+
+    record = index.range("2025-11-01", "2025-11-01")[0]
+    assert record.path.is_file()
+
+
+def test_policy_and_cli(index: ChartIndex, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test policy validation and the command line dry run."""
+    with pytest.raises(ValueError, match="archive_days"):
+        RetentionPolicy(keep_days=30, archive_days=7)
+    with pytest.raises(ValueError, match="format"):
+        RetentionPolicy(format="gif")
+
+    main(["--base", str(index.base_path), "--db", str(index.db_path), "--dry-run", "--no-archive"])
+    assert "Would have re-encoded 5 charts in 3 days" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+"""Tests for chart capture readiness and series saving."""
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from cyclebot.chart_capture import ChartTiming, save_chart_series, wait_for_chart_ready
+from cyclebot.chart_data import SeriesCollector
+
+
+class SlowPage:
+    """A page whose canvas never shows up in time; records the timeouts it is given."""
+
+    def __init__(self) -> None:
+        """Start with no recorded waits."""
+        self.timeouts: list[float] = []
+        self.waited: list[float] = []
+
+    async def wait_for_selector(self, selector: str, state: str, timeout: float) -> None:
+        """Time out like Playwright would, unless the timeout means "forever"."""
+        self.timeouts.append(timeout)
+        if timeout:
+            msg = f"waiting for {selector}"
+            raise PlaywrightTimeoutError(msg)
+
+    async def wait_for_load_state(self, state: str, timeout: float) -> None:
+        """Record the network idle wait."""
+        self.timeouts.append(timeout)
+
+    async def evaluate(self, script: str, arg: Any) -> str:
+        """Return a constant canvas fingerprint."""
+        return "frame"
+
+    async def wait_for_timeout(self, timeout: float) -> None:
+        """Record fixed waits."""
+        self.waited.append(timeout)
+
+
+def test_expired_deadline_never_waits_forever() -> None:
+    """Test that a spent readiness budget times out instead of passing Playwright a timeout of 0."""
+    page = SlowPage()
+    result = asyncio.run(wait_for_chart_ready(page, timeout=0, fallback_wait=5))  # type: ignore[arg-type]
+    assert page.timeouts == [1.0]
+    assert not result.ready
+    assert result.fell_back
+    assert page.waited == [5]
+
+
+def test_unsavable_series_keeps_capture(tmp_path: Path) -> None:
+    """Test that a series with a malformed bar is reported without failing the capture."""
+    pytest.importorskip("numpy")
+    collector = SeriesCollector()
+    collector._add_bars("sds_1", [{"i": 0, "v": [100, {"price": 1}, 2, 0.5, 2]}])
+    timing = ChartTiming("1h", "https://example.com", str(tmp_path / "2025-11-19_15-30-45-1h.png"))
+
+    save_chart_series(collector, timing)
+
+    assert timing.ok
+    assert timing.series_path is None
+    assert not list(tmp_path.iterdir())
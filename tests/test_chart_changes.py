@@ -0,0 +1,81 @@
+"""Tests for chart change detection."""
+
+from pathlib import Path
+
+import pytest
+
+from cyclebot.chart_changes import ChangeDetector, dhash, link_duplicate
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+
+def draw_chart(path: Path, candles: int, countdown: str = "59:00") -> Path:
+    """Draw a fake chart with some candles and a ticking label on the price axis."""
+    image = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(candles):
+        x = 40 + i * 24
+        top = 300 - (i * 37) % 160
+        draw.rectangle((x, top, x + 12, top + 120), fill="green" if i % 2 else "red")
+    draw.text((1220, 360), countdown, fill="black")
+    image.save(path)
+    return path
+
+
+def test_unchanged_chart_is_linked(tmp_path: Path) -> None:
+    """Test that a chart matching the previous one, apart from ignored regions, becomes a hard link."""
+    first = draw_chart(tmp_path / "first.png", 20)
+    second = draw_chart(tmp_path / "second.png", 20, countdown="58:59")
+    moved = draw_chart(tmp_path / "moved.png", 21)
+
+    detector = ChangeDetector(ignore=[(1200, 0, 1280, 720)])
+    change = detector.check(second, first, timeframe="1h")
+    assert change.unchanged
+    assert change.same_as == first
+    assert change.linked
+    assert second.stat().st_ino == first.stat().st_ino
+
+    change = detector.check(moved, second, original=first, timeframe="1h")
+    assert not change.unchanged
+    assert change.changed_fraction is None or change.changed_fraction > detector.max_changed_fraction
+    assert moved.stat().st_ino != first.stat().st_ino
+
+    # Without the ignored region only a zero tolerance notices the countdown ticking
+    tick = draw_chart(tmp_path / "tick.png", 21, "58:58")
+    assert ChangeDetector(link=False).check(tick, moved).unchanged
+    assert not ChangeDetector(max_changed_fraction=0).check(tick, moved).unchanged
+    assert detector.check(first, None).same_as is None
+
+
+def test_previous_fingerprint_is_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that checking captures in a row fingerprints each file only once."""
+    charts = [draw_chart(tmp_path / f"{i}.png", 20 + i) for i in range(3)]
+    detector = ChangeDetector()
+    read: list[Path] = []
+    fingerprint = detector._fingerprint
+
+    def counting(path: Path) -> object:
+        read.append(path)
+        return fingerprint(path)
+
+    monkeypatch.setattr(detector, "_fingerprint", counting)
+    detector.check(charts[0], None, timeframe="1h")
+    detector.check(charts[1], charts[0], timeframe="1h")
+    detector.check(charts[2], charts[1], timeframe="1h")
+    assert read == charts
+
+
+def test_dhash_and_link_fallback(tmp_path: Path) -> None:
+    """Test hash stability and that a failed link keeps the copy."""
+    first = draw_chart(tmp_path / "first.png", 20)
+    with Image.open(first) as image:
+        value = dhash(image)
+        assert bin(value ^ dhash(image.resize((640, 360)))).count("1") <= 2
+    assert 0 < value < 2**64
+
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(first.read_bytes())
+    assert not link_duplicate(copy, tmp_path / "missing.png")
+    assert copy.read_bytes() == first.read_bytes()
+    assert not list(tmp_path.glob(".*.link"))
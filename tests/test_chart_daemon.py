@@ -0,0 +1,78 @@
+"""Tests for the chart capture daemon's scheduling and stats."""
+
+import asyncio
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+from cyclebot import chart_daemon
+from cyclebot.chart_capture import ChartTiming
+from cyclebot.chart_daemon import CaptureDaemon, CaptureStats, next_run_time
+from cyclebot.chart_index import ChartIndex
+
+
+def timing(total_ms: float = 0.0, error: Optional[str] = None, same_as: Optional[str] = None) -> ChartTiming:
+    """A capture record for the 5m chart."""
+    return ChartTiming("5m", "https://example.com", "5m.png", total_ms=total_ms, error=error, same_as=same_as)
+
+
+def test_next_run_time() -> None:
+    """Test that runs land on interval boundaries plus the offset, strictly in the future."""
+    assert next_run_time(1000, 300) == 1200
+    assert next_run_time(1200, 300) == 1500
+    assert next_run_time(1000, 300, offset=5) == 1205
+    assert next_run_time(1203, 300, offset=5) == 1205
+    assert next_run_time(1205, 300, offset=5) == 1505
+    assert next_run_time(3599.5, 3600, offset=5) == 3605
+
+
+def test_stats_record_and_percentiles() -> None:
+    """Test counting outcomes and nearest-rank latency percentiles."""
+    stats = CaptureStats()
+    assert stats.percentile(50) is None
+
+    for ms in (400, 100, 300, 200):
+        stats.record(timing(ms))
+    stats.record(timing(50, same_as="earlier.png"))
+    stats.record(timing(error="timeout"))
+
+    assert (stats.captures, stats.unchanged, stats.failures) == (5, 1, 1)
+    assert stats.percentile(50) == 200
+    assert stats.percentile(95) == 400
+    assert stats.percentile(0) == 50
+    summary = stats.summary()
+    assert (summary["p50_ms"], summary["p95_ms"]) == (200, 400)
+
+
+def test_missing_schedule() -> None:
+    """Test that every captured timeframe needs a schedule."""
+    with pytest.raises(ValueError, match="No schedule"):
+        CaptureDaemon(charts=[("https://example.com", "2m")])
+
+
+def test_cycle_survives_detection_and_index_errors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that errors from change detection and indexing are logged and the cycle still counts."""
+    monkeypatch.setattr(chart_daemon, "ChartIndex", lambda: ChartIndex(tmp_path, tmp_path / "index.sqlite3"))
+
+    async def capture(*args: Any) -> list[ChartTiming]:
+        return [timing(120)]
+
+    def fail(*args: Any) -> None:
+        msg = "database is locked"
+        raise OSError(msg)
+
+    monkeypatch.setattr(chart_daemon, "get_chart_directory_async", lambda: asyncio.sleep(0, tmp_path))
+    monkeypatch.setattr(chart_daemon, "capture_charts_parallel", capture)
+    monkeypatch.setattr(chart_daemon, "detect_changes", fail)
+    monkeypatch.setattr(chart_daemon, "index_captures", fail)
+
+    daemon = CaptureDaemon(charts=[("https://example.com", "5m")])
+    monkeypatch.setattr(daemon, "_ensure_browser", lambda playwright: asyncio.sleep(0))
+    try:
+        timings = asyncio.run(daemon.run_cycle(None, ["5m"]))  # type: ignore[arg-type]
+    finally:
+        daemon.index.close()
+
+    assert len(timings) == 1
+    assert (daemon.stats.cycles, daemon.stats.captures) == (1, 1)
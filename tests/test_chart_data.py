@@ -0,0 +1,142 @@
+"""Tests for OHLCV series capture."""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from cyclebot.chart import get_latest_series, get_series_filename
+from cyclebot.chart_data import SeriesCollector, load_series, parse_frames, save_series
+from cyclebot.chart_index import ChartIndex
+
+np = pytest.importorskip("numpy")
+
+
+def frames(*messages: Any) -> str:
+    """Pack messages the way TradingView does: ~m~<length>~m~<payload> per message."""
+    payloads = [m if isinstance(m, str) else json.dumps(m) for m in messages]
+    return "".join(f"~m~{len(p)}~m~{p}" for p in payloads)
+
+
+def bars(*rows: list[float]) -> list[dict[str, Any]]:
+    """Bars as TradingView sends them."""
+    return [{"i": i, "v": row} for i, row in enumerate(rows)]
+
+
+class FakeWebSocket:
+    """Just enough of a Playwright WebSocket to register frame handlers."""
+
+    def __init__(self, url: str) -> None:
+        """Open a socket to a URL."""
+        self.url = url
+        self.handlers: dict[str, Callable[[str], None]] = {}
+
+    def on(self, event: str, handler: Callable[[str], None]) -> None:
+        """Register a frame handler."""
+        self.handlers[event] = handler
+
+
+class FakePage:
+    """Just enough of a Playwright Page to attach a collector."""
+
+    def __init__(self) -> None:
+        """Start with no listeners."""
+        self.listeners: dict[str, Callable[[FakeWebSocket], None]] = {}
+
+    def on(self, event: str, handler: Callable[[FakeWebSocket], None]) -> None:
+        """Register an event listener."""
+        self.listeners[event] = handler
+
+    def remove_listener(self, event: str, handler: Callable[[FakeWebSocket], None]) -> None:
+        """Remove an event listener."""
+        assert self.listeners.pop(event) == handler
+
+
+def test_parse_frames() -> None:
+    """Test splitting websocket messages into JSON frames, skipping heartbeats and junk."""
+    payload = frames({"m": "a", "p": []}, "~h~12", "not json", {"m": "b", "p": ["é"]})
+    assert parse_frames(payload) == [{"m": "a", "p": []}, {"m": "b", "p": ["é"]}]
+    assert parse_frames(payload.encode()) == parse_frames(payload)
+    assert parse_frames("~m~x~m~{}") == []
+    assert parse_frames("plain") == []
+
+
+def test_collect_and_save(tmp_path: Path) -> None:
+    """Test collecting the main series from page traffic and saving it as columns."""
+    collector = SeriesCollector()
+    page = FakePage()
+    collector.attach(page)  # type: ignore[arg-type]
+    websocket = FakeWebSocket("wss://data.tradingview.com/socket.io/websocket?type=chart")
+    page.listeners["websocket"](websocket)
+    collector.detach(page)  # type: ignore[arg-type]
+    sent, received = websocket.handlers["framesent"], websocket.handlers["framereceived"]
+
+    sent(frames({"m": "create_series", "p": ["cs_1", "sds_1", "s1", "sds_sym_1", "60", 300, ""]}))
+    received(
+        frames(
+            {"m": "symbol_resolved", "p": ["cs_1", "sds_sym_1", {"pro_name": "BINANCE:BTCUSDT"}]},
+            {
+                "m": "timescale_update",
+                "p": ["cs_1", {"sds_1": {"s": bars([200, 2, 3, 1, 2.5, 10], [100, 1, 2, 0.5, 2])}}],
+            },
+        )
+    )
+    # Live update of the last bar, and a compare series with fewer bars
+    received(frames({"m": "du", "p": ["cs_1", {"sds_1": {"s": bars([200, 2, 4, 1, 3.5, 12])}, "sds_2": {"s": []}}]}))
+
+    series = collector.main_series()
+    assert series is not None
+    assert (series.symbol, series.resolution, len(series)) == ("BINANCE:BTCUSDT", "60", 2)
+
+    path = tmp_path / get_series_filename("1h", "2025-11-19_15-30-45")
+    assert save_series(series, path) == 2
+    data = load_series(path)
+    assert (data.symbol, data.resolution, len(data)) == ("BINANCE:BTCUSDT", "60", 2)
+    assert data.time.tolist() == [100, 200]
+    assert data.close.tolist() == [2, 3.5]
+    assert np.isnan(data.volume[0])
+    assert data.volume[1] == 12
+    assert SeriesCollector().main_series() is None
+
+
+def test_null_values(tmp_path: Path) -> None:
+    """Test that null prices are saved as NaN and bars without a time are skipped."""
+    collector = SeriesCollector()
+    collector._add_bars("sds_1", bars([None, 1, 2, 0.5, 2], [100, 1, None, 0.5, 2, None]))
+    series = collector.main_series()
+    assert series is not None
+
+    path = tmp_path / get_series_filename("1h", "2025-11-19_15-30-45")
+    assert save_series(series, path) == 1
+    data = load_series(path)
+    assert data.time.tolist() == [100]
+    assert np.isnan(data.high[0])
+    assert np.isnan(data.volume[0])
+
+
+def test_index_series(tmp_path: Path) -> None:
+    """Test indexing series files, looking up the latest and finding them again on rebuild."""
+    base = tmp_path / "charts"
+    date_dir = base / "2025" / "Nov" / "2025-11-19"
+    date_dir.mkdir(parents=True)
+    older, newer = date_dir / "2025-11-19_14-00-00-1h.npz", date_dir / "2025-11-19_15-00-00-1h.npz"
+    older.touch()
+    newer.touch()
+
+    with ChartIndex(base, tmp_path / "index.sqlite3") as index:
+        assert index.add_series(newer, "BINANCE:BTCUSDT", 300) is not None
+        assert index.add_series(older) is not None
+        assert index.add_series(date_dir / "2025-11-19_15-00-00-1h.png") is None
+        assert index.latest_series(["1h", "5m"]) == {"1h": newer}
+        assert get_latest_series(date_dir, ["1h"], index=index) == {"1h": newer}
+        assert index.latest_series(["1h"], date="2025-11-18") == {}
+        assert len(index) == 0
+
+        assert index.rebuild() == 0
+        assert index.latest_series(["1h"]) == {"1h": newer}
+        row = index._conn.execute("SELECT symbol, bars FROM series WHERE path LIKE '%15-00-00%'").fetchone()
+        assert row == ("BINANCE:BTCUSDT", 300)
+
+    assert get_latest_series(date_dir, ["1h"]) == {"1h": newer}
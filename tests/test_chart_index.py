@@ -0,0 +1,185 @@
+"""Tests for the chart index."""
+
+import sqlite3
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from cyclebot.chart import get_latest_charts
+from cyclebot.chart_index import ChartIndex, default_index_path, main, parse_chart_filename
+
+
+def make_chart(base: Path, timestamp: str, timeframe: str) -> Path:
+    """Create an empty chart file in the {YEAR}/{Mon}/{date} layout."""
+    date = datetime.strptime(timestamp[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    date_dir = base / str(date.year) / date.strftime("%b") / timestamp[:10]
+    date_dir.mkdir(parents=True, exist_ok=True)
+    path = date_dir / f"{timestamp}-{timeframe}.png"
+    path.touch()
+    return path
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> Iterator[ChartIndex]:
+    """Chart index over an empty base directory, stored next to it."""
+    base = tmp_path / "charts"
+    base.mkdir()
+    chart_index = ChartIndex(base, tmp_path / "index.sqlite3")
+    yield chart_index
+    chart_index.close()
+
+
+def test_parse_chart_filename() -> None:
+    """Test splitting chart filenames into timestamp and timeframe."""
+    assert parse_chart_filename("2025-11-19_15-30-45-1h.png") == ("2025-11-19_15-30-45", "1h")
+    assert parse_chart_filename("2025-11-19_15-30-45-30m.png") == ("2025-11-19_15-30-45", "30m")
+    assert parse_chart_filename("notes.txt") is None
+    assert parse_chart_filename("2025-11-19-1h.png") is None
+
+
+def test_default_index_path_is_per_base(tmp_path: Path) -> None:
+    """Test that different base directories get different index files."""
+    assert default_index_path(tmp_path / "a") != default_index_path(tmp_path / "b")
+    assert default_index_path(tmp_path / "a") == default_index_path(tmp_path / "a")
+
+
+def test_add_and_latest(index: ChartIndex) -> None:
+    """Test that latest returns the newest chart per timeframe regardless of insert order."""
+    newer = make_chart(index.base_path, "2025-11-19_15-30-45", "1h")
+    older = make_chart(index.base_path, "2025-11-19_14-30-45", "1h")
+    five = make_chart(index.base_path, "2025-11-19_15-30-45", "5m")
+
+    assert index.add(newer) is not None
+    assert index.add(older) is not None
+    assert index.add(five) is not None
+    assert index.add(index.base_path / "readme.txt") is None
+
+    assert index.latest() == {"1h": newer, "5m": five}
+    assert index.latest(["1h"]) == {"1h": newer}
+    assert len(index) == 3
+
+
+def test_latest_for_date(index: ChartIndex) -> None:
+    """Test restricting latest lookups to a single day."""
+    yesterday = make_chart(index.base_path, "2025-11-18_23-55-00", "5m")
+    today = make_chart(index.base_path, "2025-11-19_00-05-00", "5m")
+    index.add_many([yesterday, today])
+
+    assert index.latest(["5m"], date="2025-11-19") == {"5m": today}
+    assert index.latest(["5m"], date="2025-11-18") == {"5m": yesterday}
+    assert index.latest(["5m"], date="2025-11-17") == {}
+    assert index.latest(["5m"], date="2025-11-20") == {}
+
+
+def test_range_queries(index: ChartIndex) -> None:
+    """Test range queries by prefix and datetime across days, months and years."""
+    paths = [
+        make_chart(index.base_path, "2024-12-31_23-55-00", "5m"),
+        make_chart(index.base_path, "2025-01-01_00-05-00", "5m"),
+        make_chart(index.base_path, "2025-01-01_00-05-00", "1h"),
+        make_chart(index.base_path, "2025-02-10_12-00-00", "1h"),
+    ]
+    index.add_many(paths)
+
+    assert [r.path for r in index.range("2025", "2025")] == [paths[2], paths[1], paths[3]]
+    assert [r.path for r in index.range("2025-01", "2025-01", ["5m"])] == [paths[1]]
+    assert [r.path for r in index.range("2024-12-31", "2025-01-01")] == paths[:1] + [paths[2], paths[1]]
+    records = index.range(datetime(2025, 2, 1, tzinfo=timezone.utc), datetime(2025, 3, 1, tzinfo=timezone.utc))
+    assert [r.path for r in records] == [paths[3]]
+    assert records[0].date == "2025-02-10"
+    assert records[0].timeframe == "1h"
+
+
+def test_rebuild_rescans_tree(index: ChartIndex) -> None:
+    """Test that rebuild finds charts on disk and drops stale entries."""
+    stale = make_chart(index.base_path, "2025-11-18_10-00-00", "1h")
+    index.add(stale)
+    stale.unlink()
+
+    charts = [
+        make_chart(index.base_path, "2025-11-19_10-00-00", "1h"),
+        make_chart(index.base_path, "2025-11-19_10-05-00", "5m"),
+        make_chart(index.base_path, "2025-12-01_09-00-00", "1h"),
+    ]
+    (index.base_path / "2025" / "Nov" / "2025-11-19" / "notes.txt").touch()
+    (index.base_path / "misc").mkdir()
+
+    assert index.rebuild() == 3
+    assert index.latest() == {"1h": charts[2], "5m": charts[1]}
+    assert stale not in [r.path for r in index.range("2025", "2025")]
+
+
+def test_failed_rebuild_keeps_index(index: ChartIndex, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a rebuild failing partway leaves the previous index intact."""
+    charts = [
+        make_chart(index.base_path, "2025-11-19_10-00-00", "1h"),
+        make_chart(index.base_path, "2025-11-19_10-05-00", "5m"),
+    ]
+    index.add_many(charts)
+    make_chart(index.base_path, "2025-11-19_11-00-00", "1h")
+    insert = index._insert
+
+    def fail_on_second(*args: Any) -> None:
+        if len(calls) == 1:
+            msg = "disk I/O error"
+            raise sqlite3.OperationalError(msg)
+        calls.append(args)
+        insert(*args)
+
+    calls: list[tuple[Any, ...]] = []
+    monkeypatch.setattr(index, "_insert", fail_on_second)
+    with pytest.raises(sqlite3.OperationalError):
+        index.rebuild()
+
+    assert len(index) == 2
+    assert index.latest() == {"1h": charts[0], "5m": charts[1]}
+
+
+def test_same_as_survives_migration_and_rebuild(tmp_path: Path) -> None:
+    """Test recording unchanged charts, upgrading an old index and keeping duplicates across a rebuild."""
+    base = tmp_path / "charts"
+    db = tmp_path / "index.sqlite3"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE charts (path TEXT PRIMARY KEY, timeframe TEXT NOT NULL, captured_at TEXT NOT NULL)")
+    first = make_chart(base, "2025-11-19_10-00-00", "1h")
+    second = make_chart(base, "2025-11-19_11-00-00", "1h")
+    third = make_chart(base, "2025-11-19_12-00-00", "1h")
+
+    with ChartIndex(base, db) as index:
+        index.add(first)
+        record = index.add(second, same_as=first)
+        index.add_many([third], {third: first})
+        assert record is not None
+        assert record.same_as == first
+        assert index.same_as(first) is None
+        assert index.same_as(third) == first
+        assert [r.same_as for r in index.range("2025", "2025")] == [None, first, first]
+        assert index.rebuild() == 3
+        assert index.same_as(second) == first
+
+
+def test_get_latest_charts_uses_index(index: ChartIndex) -> None:
+    """Test that get_latest_charts answers from the index when one is given."""
+    chart = make_chart(index.base_path, "2025-11-19_10-00-00", "15m")
+    index.add(chart)
+
+    assert get_latest_charts(chart.parent, index=index) == {"15m": chart}
+
+
+def test_cli_rebuild_latest_and_range(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test the command line interface."""
+    base = tmp_path / "charts"
+    chart = make_chart(base, "2025-11-19_10-00-00", "1h")
+    db = str(tmp_path / "index.sqlite3")
+
+    main(["--base", str(base), "--db", db, "rebuild"])
+    assert "Indexed 1 charts" in capsys.readouterr().out
+
+    main(["--base", str(base), "--db", db, "latest"])
+    assert f"1h: {chart}" in capsys.readouterr().out
+
+    main(["--base", str(base), "--db", db, "range", "2025-11", "2025-11", "--timeframe", "1h"])
+    assert str(chart) in capsys.readouterr().out
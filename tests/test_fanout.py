@@ -0,0 +1,114 @@
+"""Tests for multi-model fan-out, run against a local stub server."""
+
+import asyncio
+
+import pytest
+
+from cyclebot.fanout import FanOutResult, ModelFanOut
+from cyclebot.openrouter import OpenRouterClient, text_message
+from tests.conftest import StubOpenRouter
+
+MESSAGES = [text_message("Analyze")]
+
+
+def run(stub: StubOpenRouter, models: list[str], mode: str, **kwargs: float) -> tuple[FanOutResult, ModelFanOut]:
+    """Run one fan-out against the stub and return the result with the fan-out."""
+
+    async def go() -> tuple[FanOutResult, ModelFanOut]:
+        async with OpenRouterClient("test-key", base_url=stub.url, http2=False, max_retries=0) as client:
+            fan_out = ModelFanOut(client, models)
+            result = await getattr(fan_out, mode)(MESSAGES, **kwargs)
+            return result, fan_out
+
+    return asyncio.run(go())
+
+
+def test_first_success_wins_and_cancels_the_rest(openrouter_stub: StubOpenRouter) -> None:
+    """Test that the fastest successful model wins and slower ones are cancelled."""
+    openrouter_stub.model_delays = {"slow": 1.0, "fast": 0.05}
+    openrouter_stub.model_errors = {"broken": 400}
+
+    result, fan_out = run(openrouter_stub, ["slow", "fast", "broken"], "first")
+
+    assert result.winner is not None
+    assert result.winner.model == "fast"
+    assert result.winner.text == "reply from fast"
+    by_model = {r.model: r for r in result.results}
+    assert by_model["broken"].error is not None
+    assert not by_model["broken"].cancelled
+    assert by_model["slow"].cancelled
+    assert by_model["slow"].latency_ms < 1000
+    assert fan_out.latency["broken"].failures == 1
+    assert fan_out.latency["slow"].failures == 0
+
+
+def test_first_without_any_success(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a fan-out where every model fails has no winner."""
+    openrouter_stub.model_errors = {"a": 400, "b": 401}
+
+    result, fan_out = run(openrouter_stub, ["a", "b"], "first")
+
+    assert result.winner is None
+    assert len(result.results) == 2
+    assert fan_out.fastest() is None
+
+
+class FlakyClient:
+    """Answers every model but "buggy", which raises an unexpected exception."""
+
+    async def acomplete(self, model: str, messages: object, **kwargs: object) -> str:
+        """Answer, or fail for the buggy model."""
+        if model == "buggy":
+            msg = "unexpected response shape"
+            raise ValueError(msg)
+        await asyncio.sleep(0.01)
+        return f"reply from {model}"
+
+
+def test_unexpected_errors_fail_only_their_model() -> None:
+    """Test that an exception other than OpenRouterError is recorded as that model's failure."""
+    fan_out = ModelFanOut(FlakyClient(), ["buggy", "good"])  # type: ignore[arg-type]
+    result = asyncio.run(fan_out.collect(MESSAGES, deadline=5.0))
+
+    assert result.answers == {"good": "reply from good"}
+    failed = next(r for r in result.results if r.model == "buggy")
+    assert failed.error == "ValueError: unexpected response shape"
+    assert fan_out.latency["buggy"].failures == 1
+
+
+def test_collect_within_deadline(openrouter_stub: StubOpenRouter) -> None:
+    """Test that answers before the deadline are kept and late models are cancelled."""
+    openrouter_stub.model_delays = {"slow": 1.0}
+
+    result, fan_out = run(openrouter_stub, ["a", "b", "slow"], "collect", deadline=0.3)
+
+    assert result.answers == {"a": "reply from a", "b": "reply from b"}
+    assert result.results[-1].model == "slow"
+    assert result.results[-1].error == "deadline exceeded"
+    assert fan_out.fastest() in ("a", "b")
+    assert "slow: median n/a" in fan_out.latency_report()
+
+
+def test_fastest_respects_success_rate(openrouter_stub: StubOpenRouter) -> None:
+    """Test that an unreliable model is not picked even if it is fast."""
+
+    async def go() -> ModelFanOut:
+        async with OpenRouterClient("test-key", base_url=openrouter_stub.url, http2=False, max_retries=0) as client:
+            fan_out = ModelFanOut(client, ["flaky", "steady"])
+            openrouter_stub.model_delays = {"steady": 0.05}
+            await fan_out.collect(MESSAGES, deadline=5)
+            openrouter_stub.model_errors = {"flaky": 500}
+            await fan_out.collect(MESSAGES, deadline=5)
+            return fan_out
+
+    fan_out = asyncio.run(go())
+
+    assert fan_out.latency["flaky"].success_rate == 0.5
+    assert fan_out.fastest(min_success_rate=0.8) == "steady"
+    assert fan_out.fastest(min_success_rate=0.5) == "flaky"
+
+
+def test_requires_models() -> None:
+    """Test that an empty model list is rejected."""
+    with pytest.raises(ValueError, match="At least one model"):
+        ModelFanOut(OpenRouterClient("test-key"), [])
@@ -0,0 +1,125 @@
+"""Tests for image preprocessing and the encode cache."""
+
+import base64
+import io
+from pathlib import Path
+
+import pytest
+
+from cyclebot.images import (
+    ORIGINAL,
+    ImageEncodeCache,
+    ImageOptions,
+    ImagePipeline,
+    mime_type_for,
+    parse_crop,
+    preprocess_image,
+)
+
+
+def decode(data_url: str) -> tuple[str, bytes]:
+    """Split a data URL into its MIME type and raw bytes."""
+    header, encoded = data_url.split(",", 1)
+    return header[len("data:") : -len(";base64")], base64.b64decode(encoded)
+
+
+@pytest.fixture
+def chart_png(tmp_path: Path) -> Path:
+    """A 1920x1080 PNG with some detail to compress."""
+    image_module = pytest.importorskip("PIL.Image")
+    image = image_module.new("RGB", (1920, 1080), "white")
+    for x in range(0, 1920, 40):
+        image.paste((20, 120, 200), (x, 300, x + 20, 800))
+    path = tmp_path / "2025-11-19_15-30-45-1h.png"
+    image.save(path)
+    return path
+
+
+def test_mime_type_and_crop_parsing() -> None:
+    """Test small helpers."""
+    assert mime_type_for(Path("a.PNG")) == "image/png"
+    assert mime_type_for(Path("a.jpg")) == "image/jpeg"
+    assert mime_type_for(Path("a.bin")) == "image/png"
+    assert parse_crop("0,40,1920,1040") == (0, 40, 1920, 1040)
+    assert parse_crop("") is None
+    with pytest.raises(ValueError, match="4 values"):
+        parse_crop("1,2,3")
+
+
+def test_original_options_pass_bytes_through() -> None:
+    """Test that ORIGINAL leaves the image untouched."""
+    assert preprocess_image(b"not really a png", ORIGINAL) == (b"not really a png", None)
+
+
+def test_preprocess_downscales_crops_and_reencodes(chart_png: Path) -> None:
+    """Test crop, downscale and WebP/JPEG re-encoding."""
+    from PIL import Image
+
+    data = chart_png.read_bytes()
+    webp, mime = preprocess_image(data, ImageOptions(max_width=960, crop=(0, 40, 1920, 1040), format="webp"))
+    assert mime == "image/webp"
+    assert len(webp) < len(data)
+    with Image.open(io.BytesIO(webp)) as image:
+        assert image.size == (960, 500)
+
+    jpeg, mime = preprocess_image(data, ImageOptions(max_width=None, format="jpg", quality=70))
+    assert mime == "image/jpeg"
+    with Image.open(io.BytesIO(jpeg)) as image:
+        assert image.size == (1920, 1080)
+
+    png, mime = preprocess_image(data, ImageOptions(max_width=640, format="png"))
+    assert mime == "image/png"
+
+
+def test_pipeline_caches_by_content(chart_png: Path) -> None:
+    """Test that repeated encodes hit the cache and changed content misses it."""
+    pipeline = ImagePipeline(ImageOptions(max_width=640, format="jpeg"))
+    first = pipeline.encode(chart_png)
+    assert decode(first)[0] == "image/jpeg"
+    assert pipeline.encode(chart_png) == first
+    assert (pipeline.cache.hits, pipeline.cache.misses) == (1, 1)
+
+    other_settings = ImagePipeline(ImageOptions(max_width=320, format="jpeg"), pipeline.cache)
+    assert other_settings.encode(chart_png) != first
+    assert pipeline.cache.misses == 2
+
+
+def test_pipeline_without_preprocessing(tmp_path: Path) -> None:
+    """Test that ORIGINAL keeps the file's own MIME type and bytes."""
+    path = tmp_path / "chart.png"
+    path.write_bytes(b"\x89PNG fake")
+    data_url = ImagePipeline(ORIGINAL).encode(path)
+    assert decode(data_url) == ("image/png", b"\x89PNG fake")
+
+
+def test_memory_lru_eviction() -> None:
+    """Test eviction by entry count and by total size."""
+    cache = ImageEncodeCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # a is now most recent
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert len(cache) == 2
+
+    sized = ImageEncodeCache(max_bytes=10)
+    sized.put("a", "x" * 6)
+    sized.put("b", "y" * 6)
+    assert sized.get("a") is None
+    assert sized.get("b") == "y" * 6
+
+
+def test_disk_tier_survives_new_cache(tmp_path: Path) -> None:
+    """Test that a fresh cache reads entries written by an earlier one, and disk eviction."""
+    ImageEncodeCache(disk_dir=tmp_path).put("key1", "data:image/png;base64,AAAA")
+
+    cache = ImageEncodeCache(disk_dir=tmp_path, disk_max_bytes=40)
+    assert cache.get("key1") == "data:image/png;base64,AAAA"
+    assert cache.disk_hits == 1
+    assert cache.get("key1") is not None
+    assert cache.hits == 1
+
+    cache.put("key2", "data:image/png;base64,BBBB")
+    # Both entries are 26 bytes; the budget only fits one, so the older file goes
+    assert sorted(p.name for p in tmp_path.glob("*.txt")) == ["key2.txt"]
@@ -0,0 +1,174 @@
+"""Tests for the technical indicators."""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from cyclebot.chart_data import COLUMNS, OHLCV  # noqa: E402
+from cyclebot.indicators import (  # noqa: E402
+    IncrementalIndicators,
+    IndicatorConfig,
+    analyze,
+    atr,
+    cluster_levels,
+    compute,
+    ema,
+    pattern_flags,
+    rsi,
+    sma,
+    summarize,
+    swing_points,
+)
+
+
+def random_series(bars: int, seed: int = 0, step: int = 300) -> OHLCV:
+    """A random walk of candles starting at 100."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, bars))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) + rng.uniform(0, 1, bars)
+    low = np.minimum(open_, close) - rng.uniform(0, 1, bars)
+    time = np.arange(bars, dtype=np.int64) * step
+    return OHLCV("TEST", str(step // 60), time, open_, high, low, close, rng.uniform(1, 10, bars))
+
+
+def reference_smooth(values: list[float], alpha: float, period: int) -> list[float]:
+    """Exponential smoothing one value at a time, seeded with the mean of the first period values."""
+    out = [math.nan] * len(values)
+    out[period - 1] = sum(values[:period]) / period
+    for i in range(period, len(values)):
+        out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])
+    return out
+
+
+def test_indicators_match_reference() -> None:
+    """Test the vectorized indicators against straightforward loops, also batched over rows."""
+    data = random_series(2000)
+    close = data.close.tolist()
+
+    expected_sma = [math.nan] * 9 + [sum(close[i - 9 : i + 1]) / 10 for i in range(9, len(close))]
+    np.testing.assert_allclose(sma(data.close, 10), expected_sma, rtol=1e-12)
+    np.testing.assert_allclose(ema(data.close, 20), reference_smooth(close, 2 / 21, 20), rtol=1e-10)
+
+    deltas = np.diff(data.close).tolist()
+    gains = reference_smooth([max(d, 0) for d in deltas], 1 / 14, 14)
+    losses = reference_smooth([max(-d, 0) for d in deltas], 1 / 14, 14)
+    expected_rsi = [math.nan] + [100 - 100 / (1 + g / v) for g, v in zip(gains, losses)]
+    np.testing.assert_allclose(rsi(data.close, 14), expected_rsi, rtol=1e-9)
+
+    ranges = [data.high[0] - data.low[0]] + [
+        max(h - lo, abs(h - c), abs(lo - c)) for h, lo, c in zip(data.high[1:], data.low[1:], close[:-1])
+    ]
+    np.testing.assert_allclose(atr(data.high, data.low, data.close, 14), reference_smooth(ranges, 1 / 14, 14))
+
+    # Rows of a 2-D array are independent series
+    stacked = np.stack([data.close, data.close[::-1]])
+    np.testing.assert_allclose(ema(stacked, 50)[1], ema(data.close[::-1], 50))
+    np.testing.assert_allclose(rsi(stacked, 14)[1], rsi(data.close[::-1], 14))
+
+    # Too short for the period, and a series that only goes up
+    assert np.isnan(ema(data.close[:5], 10)).all()
+    assert rsi(np.arange(30.0), 14)[-1] == 100
+
+
+def test_swings_and_levels() -> None:
+    """Test finding swing points and clustering them into levels."""
+    high = np.array([1, 2, 5, 2, 1, 2, 5, 5, 3, 1, 0], dtype=float)
+    highs, lows = swing_points(high, high - 1, width=2)
+    assert highs.tolist() == [2, 7]
+    assert lows.tolist() == [4]
+    assert swing_points(high[:4], high[:4], width=2)[0].size == 0
+
+    levels = cluster_levels(
+        prices=np.array([100.0, 110.2, 100.4, 110.0, 99.8, 130.0]),
+        weights=np.array([2.0, 1.0, 1.0, 2.0, 1.0, 1.0]),
+        sources=np.array([0, 1, 1, 0, 1, 1]),
+        names=("1h", "5m"),
+        tolerance=1.0,
+        reference=105.0,
+        max_levels=2,
+    )
+    assert [(level.kind, level.touches, level.timeframes) for level in levels] == [
+        ("resistance", 2, ("1h", "5m")),
+        ("support", 3, ("1h", "5m")),
+    ]
+    assert levels[0].price == pytest.approx((110.2 + 2 * 110.0) / 3)
+    assert (levels[1].low, levels[1].high) == (99.8, 100.4)
+
+
+def test_pattern_flags() -> None:
+    """Test flagging a sharp reversal and a flat market."""
+
+    def candles(close: "np.ndarray") -> OHLCV:
+        return OHLCV(None, None, np.arange(len(close)), close, close + 0.1, close - 0.1, close, np.ones(len(close)))
+
+    rally = candles(np.concatenate([np.linspace(100, 80, 80), np.linspace(80, 100, 16)]))
+    assert pattern_flags(rally, compute(rally)) == (
+        "ema_cross_up",
+        "rsi_overbought",
+        "breakout_up",
+        "volatility_expansion",
+    )
+    selloff = candles(np.concatenate([np.linspace(80, 100, 80), np.linspace(100, 80, 16)]))
+    assert pattern_flags(selloff, compute(selloff))[:3] == ("ema_cross_down", "rsi_oversold", "breakout_down")
+    flat = candles(np.full(100, 50.0))
+    assert pattern_flags(flat, compute(flat)) == ()
+
+    waves = candles(100 + np.sin(np.arange(200) / 3) + np.arange(200) / 100)
+    assert {"higher_highs", "higher_lows"} <= set(pattern_flags(waves, compute(waves)))
+
+
+def test_analyze_timeframes() -> None:
+    """Test summarising several timeframes into trends and levels."""
+    series = {"1h": random_series(500, 1, 3600), "5m": random_series(3000, 2, 300), "15m": random_series(0)}
+    summary = analyze(series)
+
+    assert list(summary.timeframes) == ["1h", "5m"]
+    assert summary.timeframes["5m"].close == series["5m"].close[-1]
+    assert 0 < len(summary.levels) <= IndicatorConfig().max_levels
+    reference = series["5m"].close[-1]
+    assert all((level.kind == "resistance") == (level.price > reference) for level in summary.levels)
+    assert summary.alignment in ("up", "down", "mixed")
+    assert summary.as_dict()["timeframes"]["1h"]["bars"] == 500  # type: ignore[index]
+    assert set(summary.flags) == {"1h", "5m"}
+    assert summary.symbol == "TEST"
+    assert summary.format().startswith("TEST trend alignment")
+    assert analyze({}).levels == []
+
+
+def test_incremental_matches_batch() -> None:
+    """Test that updating bar by bar, including replacing the forming bar, gives the batch values."""
+    data = random_series(400)
+    config = IndicatorConfig()
+    with pytest.raises(ValueError, match="at least"):
+        IncrementalIndicators.from_series("5m", random_series(10), config)
+
+    start = 300
+    head = OHLCV(data.symbol, data.resolution, *(getattr(data, column)[:start] for column in COLUMNS))
+    incremental = IncrementalIndicators.from_series("5m", head, config)
+    for i in range(start, len(data)):
+        # First a partial bar, then the closed bar replacing it
+        incremental.update(data.time[i], data.high[i] - 0.5, data.low[i] + 0.5, data.open[i])
+        latest = incremental.update(data.time[i], data.high[i], data.low[i], data.close[i])
+
+    expected = summarize("5m", data, compute(data, config))
+    assert latest.bars == expected.bars
+    for name in ("close", "sma", "ema_fast", "ema_slow", "rsi", "atr", "swing_high", "swing_low"):
+        assert getattr(latest, name) == pytest.approx(getattr(expected, name), rel=1e-9), name
+    assert latest.trend == expected.trend
+
+
+def test_incremental_replaces_last_batch_bar() -> None:
+    """Test that the last bar of the batch series can be replaced right after from_series()."""
+    data = random_series(200)
+    config = IndicatorConfig()
+    incremental = IncrementalIndicators.from_series("5m", data, config)
+    incremental.update(data.time[-1], data.high[-1] + 3, data.low[-1] - 3, data.close[-1] + 2)
+    latest = incremental.update(data.time[-1], data.high[-1], data.low[-1], data.close[-1])
+
+    expected = summarize("5m", data, compute(data, config))
+    assert latest.bars == expected.bars == 200
+    for name in ("close", "sma", "ema_fast", "ema_slow", "rsi", "atr", "swing_high", "swing_low"):
+        assert getattr(latest, name) == pytest.approx(getattr(expected, name), rel=1e-9), name
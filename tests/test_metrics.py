@@ -0,0 +1,71 @@
+"""Tests for pipeline metrics."""
+
+import pytest
+from claude_code_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from cyclebot.metrics import AgentMetrics, Counter, Histogram, MetricsRegistry
+
+
+def test_render_text_format() -> None:
+    """Test counters, gauges and histograms in the Prometheus text format."""
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("requests_total", "Requests", ("method",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    requests.inc("prompt")
+    requests.inc("prompt", amount=2)
+    requests.inc('say "hi"')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter\n" in text
+    assert 'requests_total{method="prompt"} 3\n' in text
+    assert 'requests_total{method="say \\"hi\\""} 1\n' in text
+    assert "# TYPE latency_seconds histogram\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_sum 5.55\n" in text
+    assert "latency_seconds_count 3\n" in text
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(Counter("requests_total", "Again"))
+    with pytest.raises(ValueError, match="takes labels"):
+        requests.inc()
+
+
+def test_query_trace() -> None:
+    """Test the timings and result fields a query trace records."""
+    metrics = AgentMetrics()
+    metrics.gauge("cyclebot_test_gauge", "A gauge", lambda: 7)
+    trace = metrics.query("prompt", stream="s1")
+    for message in (
+        SystemMessage("init", {"session_id": "s"}),
+        AssistantMessage(content=[TextBlock("Reading"), ToolUseBlock("t1", "Read", {"path": "a"})], model="m"),
+        AssistantMessage(content=[ToolUseBlock("t2", "Grep", {"pattern": "x"})], model="m"),
+        UserMessage(content=[ToolResultBlock("t1", "text", False), ToolResultBlock("t2", "", True)]),
+        AssistantMessage(content=[TextBlock("Done")], model="m"),
+        ResultMessage("success", 2500, 2000, False, 3, "s", total_cost_usd=0.02),
+    ):
+        trace.observe(message)
+    trace.finish("completed")
+
+    assert metrics.first_message.count("prompt") == 1
+    assert metrics.turn.count() == 3
+    assert metrics.tool_call.count("Read") == 1
+    assert metrics.tool_call.count("Grep") == 1
+    assert metrics.turns.count() == 1
+    assert metrics.cost_total.value() == pytest.approx(0.02)
+    assert metrics.queries.value("prompt", "completed") == 1
+    text = metrics.registry.render()
+    assert 'cyclebot_query_cost_usd_bucket{le="0.025"} 1\n' in text
+    assert "cyclebot_query_duration_seconds_sum 2.5\n" in text
+    assert "cyclebot_test_gauge 7\n" in text
@@ -0,0 +1,343 @@
+"""Tests for the OpenRouter client, run against a local stub server."""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from cyclebot.openrouter import (
+    CompletionStats,
+    OpenRouterClient,
+    OpenRouterError,
+    SSEDecoder,
+    StreamStats,
+    backoff_delay,
+    extract_content,
+    get_client,
+    parse_retry_after,
+    text_message,
+    vision_message,
+)
+from cyclebot.response_cache import MemoryResponseCache
+from tests.conftest import StubOpenRouter, completion, sse_body
+
+SSE = {"Content-Type": "text/event-stream"}
+
+
+def make_client(stub: StubOpenRouter, **kwargs: object) -> OpenRouterClient:
+    """Client pointed at the stub with near-zero backoff."""
+    options: dict = {"backoff_base": 0.001, "backoff_max": 0.01, "http2": False}
+    options.update(kwargs)
+    return OpenRouterClient("test-key", base_url=stub.url, **options)
+
+
+def test_message_builders() -> None:
+    """Test text and vision message construction."""
+    assert text_message("hi") == {"role": "user", "content": "hi"}
+    message = vision_message("look", ["data:image/png;base64,AAA"])
+    assert message["content"][0] == {"type": "text", "text": "look"}
+    assert message["content"][1] == {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAA"}}
+
+
+def test_parse_retry_after() -> None:
+    """Test Retry-After in seconds and HTTP-date form."""
+    now = datetime(2025, 11, 19, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 19 Nov 2025 12:00:05 GMT", now=now) == 5.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_delay_is_bounded() -> None:
+    """Test that jittered backoff stays within the exponential envelope and cap."""
+    for attempt in range(6):
+        delay = backoff_delay(attempt, 0.5, 4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2**attempt)
+
+
+def test_extract_content_raises_on_error_body() -> None:
+    """Test that an error object in a 200 response is surfaced."""
+    assert extract_content(completion("ok")) == "ok"
+    with pytest.raises(OpenRouterError, match="overloaded"):
+        extract_content({"error": {"message": "overloaded", "code": 503}})
+    with pytest.raises(OpenRouterError, match="no message"):
+        extract_content({"id": "gen-1", "choices": []})
+
+
+def test_complete_reuses_connection(openrouter_stub: StubOpenRouter) -> None:
+    """Test a basic completion and that headers and payload are sent."""
+    with make_client(openrouter_stub) as client:
+        assert client.complete("model-a", [text_message("hi")]) == "reply from model-a"
+        assert client.complete("model-a", [text_message("again")], temperature=0) == "reply from model-a"
+
+    assert openrouter_stub.requests[1] == {
+        "model": "model-a",
+        "messages": [{"role": "user", "content": "again"}],
+        "temperature": 0,
+    }
+    assert openrouter_stub.headers[0]["Authorization"] == "Bearer test-key"
+
+
+def test_complete_stats(openrouter_stub: StubOpenRouter) -> None:
+    """Test that completion stats ask for usage accounting without changing the cache key."""
+    body = completion("ok")
+    body["usage"] = {"prompt_tokens": 120, "completion_tokens": 30, "cost": 0.00042}
+    openrouter_stub.respond(200, body)
+    with make_client(openrouter_stub, cache=MemoryResponseCache()) as client:
+        stats = CompletionStats()
+        assert client.complete("model-a", [text_message("hi")], stats=stats) == "ok"
+        assert openrouter_stub.requests[0]["usage"] == {"include": True}
+        assert (stats.prompt_tokens, stats.completion_tokens, stats.cost) == (120, 30, 0.00042)
+        assert stats.request_bytes > len('{"model": "model-a"}')
+        assert stats.latency_ms > 0
+        assert "$0.000420" in stats.summary()
+
+        cached = CompletionStats()
+        assert client.complete("model-a", [text_message("hi")], stats=cached) == "ok"
+        assert cached.cached
+        assert cached.summary().startswith("cached")
+
+        untracked = CompletionStats()
+        asyncio.run(client.acomplete("model-b", [text_message("hi")], stats=untracked))
+        assert (untracked.prompt_tokens, untracked.cost) == (None, None)
+        assert "cost n/a" in untracked.summary()
+    assert len(openrouter_stub.requests) == 2
+
+
+def test_retries_rate_limits_honouring_retry_after(openrouter_stub: StubOpenRouter) -> None:
+    """Test that 429 and 5xx responses are retried until success."""
+    openrouter_stub.respond(429, {"error": "slow down"}, {"Retry-After": "0"})
+    openrouter_stub.respond(503, {"error": "unavailable"})
+
+    client = make_client(openrouter_stub)
+    assert client.complete("model-a", [text_message("hi")]) == "reply from model-a"
+    assert client.retries == 2
+    assert client.requests_sent == 3
+    client.close()
+
+
+def test_retry_after_is_capped(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a Retry-After longer than backoff_max waits only backoff_max."""
+    openrouter_stub.respond(429, {"error": "slow down"}, {"Retry-After": "3600"})
+
+    client = make_client(openrouter_stub)
+    started = time.perf_counter()
+    assert client.complete("model-a", [text_message("hi")]) == "reply from model-a"
+    assert time.perf_counter() - started < 5
+    assert client.retries == 1
+    client.close()
+
+
+def test_invalid_json_body(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a 200 response that is not a JSON object raises OpenRouterError."""
+    openrouter_stub.respond(200, b"<html>gateway</html>")
+    openrouter_stub.respond(200, [1, 2])
+
+    client = make_client(openrouter_stub)
+    with pytest.raises(OpenRouterError, match="invalid JSON") as exc_info:
+        client.chat("model-a", [text_message("hi")])
+    assert exc_info.value.body == "<html>gateway</html>"
+    client.close()
+
+    async def run() -> None:
+        async with make_client(openrouter_stub) as async_client:
+            await async_client.achat("model-a", [text_message("hi")])
+
+    with pytest.raises(OpenRouterError, match="JSON list"):
+        asyncio.run(run())
+
+
+def test_gives_up_after_max_retries(openrouter_stub: StubOpenRouter) -> None:
+    """Test that retries are bounded and the last error is raised."""
+    for _ in range(3):
+        openrouter_stub.respond(502, {"error": "bad gateway"})
+
+    client = make_client(openrouter_stub, max_retries=2)
+    with pytest.raises(OpenRouterError) as exc_info:
+        client.complete("model-a", [text_message("hi")])
+    assert exc_info.value.status_code == 502
+    assert client.requests_sent == 3
+    client.close()
+
+
+def test_client_errors_are_not_retried(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a 400 fails immediately."""
+    openrouter_stub.respond(400, {"error": "bad request"})
+
+    client = make_client(openrouter_stub)
+    with pytest.raises(OpenRouterError, match="HTTP 400"):
+        client.complete("model-a", [text_message("hi")])
+    assert client.requests_sent == 1
+    client.close()
+
+
+def test_connection_errors_are_retried_then_raised() -> None:
+    """Test transport failures against a closed port."""
+    client = OpenRouterClient(
+        "test-key", base_url="http://127.0.0.1:9/api/v1", max_retries=1, backoff_base=0.001, http2=False
+    )
+    with pytest.raises(OpenRouterError, match="request failed"):
+        client.complete("model-a", [text_message("hi")])
+    assert client.requests_sent == 2
+    client.close()
+
+
+def test_async_concurrency_is_bounded(openrouter_stub: StubOpenRouter) -> None:
+    """Test that concurrent async prompts share the client and respect max_concurrency."""
+    openrouter_stub.delay = 0.05
+    openrouter_stub.respond(429, {"error": "slow down"}, {"Retry-After": "0"})
+
+    async def run() -> list[str]:
+        async with make_client(openrouter_stub, max_concurrency=2) as client:
+            return await client.acomplete_many("model-b", [[text_message(str(i))] for i in range(6)])
+
+    results = asyncio.run(run())
+    assert results == ["reply from model-b"] * 6
+    assert openrouter_stub.max_in_flight == 2
+
+
+def test_async_errors(openrouter_stub: StubOpenRouter) -> None:
+    """Test that async requests raise after a non-retryable status."""
+    openrouter_stub.respond(401, {"error": "unauthorized"})
+
+    async def run() -> None:
+        async with make_client(openrouter_stub) as client:
+            await client.acomplete("model-a", [text_message("hi")])
+
+    with pytest.raises(OpenRouterError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.status_code == 401
+
+
+def test_get_client_is_shared() -> None:
+    """Test that the module-level client is reused per API key."""
+    assert get_client("key-1") is get_client("key-1")
+    assert get_client("key-1") is not get_client("key-2")
+
+
+def test_sse_decoder() -> None:
+    """Test SSE line decoding, comments and multi-line data."""
+    decoder = SSEDecoder()
+    assert decoder.feed(": keep-alive") is None
+    assert decoder.feed("data: a") is None
+    assert decoder.feed("data:b") is None
+    assert decoder.feed("event: message") is None
+    assert decoder.feed("") == "a\nb"
+    assert decoder.feed("") is None
+    assert decoder.feed("data: tail") is None
+    assert decoder.flush() == "tail"
+
+
+def test_stream_yields_tokens_and_stats(openrouter_stub: StubOpenRouter) -> None:
+    """Test that streamed tokens arrive in order and stats are recorded."""
+    openrouter_stub.respond(200, sse_body(["Hel", "lo", "!"], {"completion_tokens": 2}), dict(SSE))
+
+    stats = StreamStats()
+    with make_client(openrouter_stub) as client:
+        tokens = list(client.stream("model-a", [text_message("hi")], stats=stats))
+
+    assert tokens == ["Hel", "lo", "!"]
+    assert openrouter_stub.requests[0]["stream"] is True
+    assert stats.text == "Hello!"
+    assert stats.chunks == 3
+    assert stats.tokens == 2
+    assert stats.ttft_ms is not None
+    assert stats.ttft_ms >= 0
+    assert "time to first token" in stats.summary()
+
+
+def test_stream_retries_before_first_byte(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a rate-limited stream is retried and then succeeds."""
+    openrouter_stub.respond(429, {"error": "slow down"}, {"Retry-After": "0"})
+    openrouter_stub.respond(200, sse_body(["ok"]), dict(SSE))
+
+    with make_client(openrouter_stub) as client:
+        assert list(client.stream("model-a", [text_message("hi")])) == ["ok"]
+        assert client.retries == 1
+
+
+def test_stream_error_mid_stream(openrouter_stub: StubOpenRouter) -> None:
+    """Test that an error event inside the stream is raised."""
+    body = b'data: {"choices": [{"delta": {"content": "par"}}]}\n\ndata: {"error": {"message": "boom"}}\n\n'
+    openrouter_stub.respond(200, body, dict(SSE))
+
+    with make_client(openrouter_stub) as client, pytest.raises(OpenRouterError, match="boom"):
+        list(client.stream("model-a", [text_message("hi")]))
+
+
+def test_stream_malformed_chunk(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a chunk that is not a JSON object raises OpenRouterError."""
+    openrouter_stub.respond(200, b"data: {truncated\n\n", dict(SSE))
+
+    with make_client(openrouter_stub) as client, pytest.raises(OpenRouterError, match="malformed") as exc_info:
+        list(client.stream("model-a", [text_message("hi")]))
+    assert exc_info.value.body == "{truncated"
+
+
+def test_stream_backoff_releases_slot(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a stream waiting out Retry-After does not keep other requests from its slot."""
+    openrouter_stub.respond(429, {"error": "slow down"}, {"Retry-After": "0.5"})
+    openrouter_stub.respond(200, completion("during backoff"))
+    openrouter_stub.respond(200, sse_body(["ok"]), dict(SSE))
+
+    async def run() -> tuple[list[str], str, float, float]:
+        async with make_client(openrouter_stub, max_concurrency=1, backoff_max=1.0) as client:
+            finished: dict[str, float] = {}
+
+            async def stream() -> list[str]:
+                tokens = [token async for token in client.astream("model-a", [text_message("hi")])]
+                finished["stream"] = time.perf_counter()
+                return tokens
+
+            async def ask() -> str:
+                await asyncio.sleep(0.1)
+                text = await client.acomplete("model-b", [text_message("meanwhile")])
+                finished["ask"] = time.perf_counter()
+                return text
+
+            tokens, text = await asyncio.gather(stream(), ask())
+            return tokens, text, finished["ask"], finished["stream"]
+
+    tokens, text, asked, streamed = asyncio.run(run())
+    assert tokens == ["ok"]
+    assert text == "during backoff"
+    assert asked < streamed
+
+
+def test_stream_stats_without_tokens() -> None:
+    """Test stats before anything has been received."""
+    stats = StreamStats()
+    assert stats.ttft_ms is None
+    assert stats.tokens_per_second is None
+    assert stats.summary() == "time to first token n/a, 0 tokens at n/a"
+
+
+def test_astream(openrouter_stub: StubOpenRouter) -> None:
+    """Test the async streaming API."""
+    openrouter_stub.respond(503, {"error": "busy"})
+    openrouter_stub.respond(200, sse_body(["a", "b"]), dict(SSE))
+    stats = StreamStats()
+
+    async def run() -> list[str]:
+        async with make_client(openrouter_stub) as client:
+            return [token async for token in client.astream("model-a", [text_message("hi")], stats=stats)]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert stats.tokens == 2
+    assert stats.finished_at is not None
+
+
+def test_astream_gives_up(openrouter_stub: StubOpenRouter) -> None:
+    """Test that async streams raise once retries are exhausted."""
+    openrouter_stub.respond(500, {"error": "down"})
+    openrouter_stub.respond(500, {"error": "down"})
+
+    async def run() -> list[str]:
+        async with make_client(openrouter_stub, max_retries=1) as client:
+            return [token async for token in client.astream("model-a", [text_message("hi")])]
+
+    with pytest.raises(OpenRouterError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.status_code == 500
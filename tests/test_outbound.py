@@ -0,0 +1,142 @@
+"""Tests for the bounded outbound message queue."""
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from cyclebot.outbound import OutboundClosed, OutboundQueue, shrink_tool_results
+
+
+class SlowSocket:
+    """Records sent frames; sending blocks until released."""
+
+    def __init__(self) -> None:
+        """Start closed, with nothing sent."""
+        self.frames: list[Any] = []
+        self.gate = asyncio.Event()
+        self.fail = False
+
+    async def send(self, data: bytes) -> None:
+        """Wait for the gate, then record the frame."""
+        await self.gate.wait()
+        if self.fail:
+            msg = "socket closed"
+            raise RuntimeError(msg)
+        self.frames.append(json.loads(data))
+
+
+def note(n: int) -> dict[str, Any]:
+    """A small message notification."""
+    return {"jsonrpc": "2.0", "method": "message", "params": {"type": "assistant", "data": {"n": n}}}
+
+
+def tool_result(size: int) -> dict[str, Any]:
+    """A notification carrying one tool result of the given size."""
+    block = {"type": "tool_result", "content": "x" * size, "is_error": False}
+    return {"jsonrpc": "2.0", "method": "message", "params": {"type": "user", "data": {"content": [block]}}}
+
+
+def test_shrink_tool_results() -> None:
+    """Test the truncate, drop and keep policies."""
+    message = tool_result(100)
+
+    truncated, changed = shrink_tool_results(message, 10, "truncate")
+    assert changed
+    block = truncated["params"]["data"]["content"][0]
+    assert block["content"].startswith("x" * 10)
+    assert "90 characters truncated" in block["content"]
+    assert message["params"]["data"]["content"][0]["content"] == "x" * 100  # input untouched
+
+    dropped, changed = shrink_tool_results(message, 10, "drop")
+    assert changed
+    assert dropped["params"]["data"]["content"][0]["content"] == "[tool result omitted: 100 characters]"
+
+    assert shrink_tool_results(message, 10, "keep") == (message, False)
+    assert shrink_tool_results(message, 1000, "truncate") == (message, False)
+    assert shrink_tool_results(note(1), 10, "truncate") == (note(1), False)
+
+
+def test_backed_up_notifications_are_batched_in_order() -> None:
+    """Test that queued small notifications go out as batch arrays, responses alone."""
+
+    async def run() -> tuple[list[Any], dict[str, Any]]:
+        socket = SlowSocket()
+        queue = OutboundQueue(socket.send, batch_max=3)
+        queue.start()
+        await queue.notify(note(0))
+        await asyncio.sleep(0)  # let the writer take it and block on the socket
+        for n in range(1, 5):
+            await queue.notify(note(n))
+        await queue.send({"jsonrpc": "2.0", "result": "done", "id": 1})
+        await queue.notify(note(5))
+        socket.gate.set()
+        await queue.close()
+        return socket.frames, queue.stats.snapshot()
+
+    frames, stats = asyncio.run(run())
+
+    # The writer picked up the first notification before the rest were queued
+    assert frames[0] == note(0)
+    assert frames[1] == [note(1), note(2), note(3)]
+    assert frames[2] == note(4)
+    assert frames[3]["result"] == "done"
+    assert frames[4] == note(5)
+    assert stats["messages"] == 7
+    assert stats["batches"] == 1
+    assert stats["max_depth"] == 6
+    assert stats["send_p50_ms"] is not None
+
+
+def test_bounded_queue_applies_backpressure_and_oversize_policy() -> None:
+    """Test that producers wait when full and tool results shrink under pressure."""
+
+    async def run() -> tuple[OutboundQueue, SlowSocket, bool]:
+        socket = SlowSocket()
+        queue = OutboundQueue(socket.send, max_size=4, oversize_bytes=50, oversize_policy="drop")
+        queue.start()
+        await queue.notify(note(0))  # taken by the writer, which blocks on the socket
+        await asyncio.sleep(0)
+        for n in range(1, 4):
+            await queue.notify(note(n))
+        await queue.notify(tool_result(500))  # queue is at least half full: dropped
+        blocked = asyncio.create_task(queue.notify(note(5)))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+        socket.gate.set()
+        await blocked
+        await queue.close()
+        return queue, socket, was_blocked
+
+    queue, socket, was_blocked = asyncio.run(run())
+
+    assert was_blocked
+    assert queue.stats.dropped == 1
+    flat = [m for frame in socket.frames for m in (frame if isinstance(frame, list) else [frame])]
+    assert len(flat) == 6
+    assert flat[4]["params"]["data"]["content"][0]["content"] == "[tool result omitted: 500 characters]"
+
+
+def test_send_failure_closes_queue() -> None:
+    """Test that a failed send stops the writer and rejects further messages."""
+
+    async def run() -> None:
+        socket = SlowSocket()
+        socket.fail = True
+        socket.gate.set()
+        queue = OutboundQueue(socket.send)
+        queue.start()
+        await queue.notify(note(0))
+        await asyncio.sleep(0.01)
+        with pytest.raises(OutboundClosed):
+            await queue.notify(note(1))
+        await queue.abort()
+
+    asyncio.run(run())
+
+
+def test_rejects_unknown_policy() -> None:
+    """Test policy validation."""
+    with pytest.raises(ValueError, match="oversize policy"):
+        OutboundQueue(SlowSocket().send, oversize_policy="compress")
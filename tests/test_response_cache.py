@@ -0,0 +1,185 @@
+"""Tests for the OpenRouter response cache."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from cyclebot.openrouter import OpenRouterClient, StreamStats, text_message, vision_message
+from cyclebot.response_cache import (
+    MemoryResponseCache,
+    SqliteResponseCache,
+    TieredResponseCache,
+    response_cache_key,
+)
+from tests.conftest import StubOpenRouter, sse_body
+
+
+def make_client(stub: StubOpenRouter, cache: object, **kwargs: object) -> OpenRouterClient:
+    """Client pointed at the stub with a response cache."""
+    return OpenRouterClient("test-key", base_url=stub.url, http2=False, cache=cache, **kwargs)  # type: ignore[arg-type]
+
+
+def test_key_normalizes_messages_and_hashes_images() -> None:
+    """Test that keys ignore surrounding whitespace and depend on image content, model and params."""
+    image_a = "data:image/webp;base64," + "A" * 10000
+    image_b = "data:image/webp;base64," + "B" * 10000
+    key = response_cache_key("m", [vision_message("Analyze", [image_a])])
+
+    assert key == response_cache_key("m", [vision_message("  Analyze\n", [image_a])])
+    assert key != response_cache_key("m", [vision_message("Analyze", [image_b])])
+    assert key != response_cache_key("other", [vision_message("Analyze", [image_a])])
+    assert key != response_cache_key("m", [vision_message("Analyze", [image_a])], {"temperature": 0})
+    assert response_cache_key("m", [text_message("hi")], {"stream": True}) == response_cache_key(
+        "m", [text_message("hi")]
+    )
+
+
+def test_memory_cache_lru_and_ttl() -> None:
+    """Test LRU eviction, expiry and counters."""
+    cache = MemoryResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")  # evicts b, the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+    cache.put("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 2
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_sqlite_cache_persists_and_expires(tmp_path: Path) -> None:
+    """Test that entries survive reopening and expired ones are purged."""
+    db = tmp_path / "responses.sqlite3"
+    cache = SqliteResponseCache(db)
+    cache.put("k", "answer")
+    cache.put("old", "stale", ttl=-1)
+    cache.close()
+
+    cache = SqliteResponseCache(db)
+    assert cache.get("k") == "answer"
+    assert cache.get("old") is None
+    assert cache.purge_expired() == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    cache.close()
+
+
+def test_tiered_cache_promotes_persistent_hits() -> None:
+    """Test that a persistent hit is copied into memory."""
+    persistent = SqliteResponseCache(":memory:")
+    persistent.put("k", "v")
+    cache = TieredResponseCache(MemoryResponseCache(), persistent)
+
+    assert cache.get("k") == "v"
+    assert cache.memory.get("k") == "v"
+    assert cache.get("missing") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    cache.put("new", "value")
+    assert persistent.get("new") == "value"
+
+
+def test_tiered_cache_keeps_persistent_ttl() -> None:
+    """Test that a promoted entry expires from memory when it expires in the persistent tier."""
+    persistent = SqliteResponseCache(":memory:")
+    persistent.put("k", "v", ttl=0.05)
+    persistent.put("forever", "v")
+    cache = TieredResponseCache(MemoryResponseCache(), persistent)
+
+    assert cache.get("k") == "v"
+    assert cache.get("forever") == "v"
+    time.sleep(0.1)
+    assert cache.memory.get("k") is None
+    assert cache.get("k") is None
+    assert cache.memory.get("forever") == "v"
+    persistent.close()
+
+
+def test_complete_is_served_from_cache(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a repeated prompt only reaches the server once, unless bypassed."""
+    cache = MemoryResponseCache()
+    with make_client(openrouter_stub, cache, cache_ttl=60) as client:
+        assert client.complete("model-a", [text_message("hi")]) == "reply from model-a"
+        assert client.complete("model-a", [text_message("hi")]) == "reply from model-a"
+        assert len(openrouter_stub.requests) == 1
+
+        client.complete("model-a", [text_message("hi")], bypass_cache=True)
+        assert len(openrouter_stub.requests) == 2
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 1, 1)
+
+
+def test_stream_is_cached_only_when_complete(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a finished stream is cached and replayed as one token."""
+    openrouter_stub.respond(200, sse_body(["Hel", "lo"]), {"Content-Type": "text/event-stream"})
+    cache = MemoryResponseCache()
+
+    with make_client(openrouter_stub, cache) as client:
+        assert list(client.stream("model-a", [text_message("hi")])) == ["Hel", "lo"]
+        stats = StreamStats()
+        assert list(client.stream("model-a", [text_message("hi")], stats=stats)) == ["Hello"]
+
+    assert len(openrouter_stub.requests) == 1
+    assert stats.text == "Hello"
+    assert stats.ttft_ms == 0
+
+
+def test_stream_closed_early_is_not_cached(openrouter_stub: StubOpenRouter) -> None:
+    """Test that a partially consumed stream does not leave a truncated answer behind."""
+    openrouter_stub.respond(200, sse_body(["Hel", "lo"]), {"Content-Type": "text/event-stream"})
+    cache = MemoryResponseCache()
+
+    with make_client(openrouter_stub, cache) as client:
+        tokens = client.stream("model-a", [text_message("hi")])
+        assert next(tokens) == "Hel"
+        tokens.close()
+
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("body", [sse_body(["Hel", "lo"]).replace(b"data: [DONE]\n\n", b""), sse_body([])])
+def test_dropped_or_empty_stream_is_not_cached(openrouter_stub: StubOpenRouter, body: bytes) -> None:
+    """Test that a stream ending without [DONE], or without any content, is not cached."""
+    cache = MemoryResponseCache()
+    for _ in range(2):
+        openrouter_stub.respond(200, body, {"Content-Type": "text/event-stream"})
+
+    async def consume(client: OpenRouterClient) -> str:
+        return "".join([t async for t in client.astream("model-a", [text_message("hi")])])
+
+    with make_client(openrouter_stub, cache) as client:
+        text = "".join(client.stream("model-a", [text_message("hi")]))
+        assert asyncio.run(consume(client)) == text
+
+    assert len(cache) == 0
+    assert len(openrouter_stub.requests) == 2
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_async_api_uses_cache(openrouter_stub: StubOpenRouter, streaming: bool) -> None:
+    """Test the async complete and stream APIs against the cache."""
+    if streaming:
+        openrouter_stub.respond(200, sse_body(["a", "b"]), {"Content-Type": "text/event-stream"})
+    cache = MemoryResponseCache()
+
+    async def run() -> list[str]:
+        async with make_client(openrouter_stub, cache) as client:
+            results = []
+            for _ in range(2):
+                if streaming:
+                    results.append("".join([t async for t in client.astream("model-a", [text_message("hi")])]))
+                else:
+                    results.append(await client.acomplete("model-a", [text_message("hi")]))
+            return results
+
+    expected = "ab" if streaming else "reply from model-a"
+    assert asyncio.run(run()) == [expected, expected]
+    assert len(openrouter_stub.requests) == 1
@@ -0,0 +1,118 @@
+"""Tests for agent message serialization."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from claude_code_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ThinkingBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from cyclebot.serialization import ASSISTANT_BLOCKS, MessageSerializer, dumps, notification
+
+
+def test_assistant_and_result_count_turns() -> None:
+    """Test assistant content blocks and turn numbering."""
+    serializer = MessageSerializer()
+    message = AssistantMessage(
+        content=[
+            TextBlock("Looking"),
+            ThinkingBlock("hmm", "sig"),
+            ToolUseBlock("t1", "Read", {"path": "a.py"}),
+        ],
+        model="m",
+    )
+
+    assert serializer.serialize(message) == {
+        "type": "assistant",
+        "data": {
+            "turn": 1,
+            "content": [
+                {"type": "text", "text": "Looking"},
+                {"type": "tool_use", "name": "Read", "input": {"path": "a.py"}},
+            ],
+        },
+    }
+    result = ResultMessage("success", 120, 80, False, 2, "s", total_cost_usd=0.01)
+    assert serializer.serialize(result)["data"] == {
+        "num_turns": 2,
+        "duration_api_ms": 80,
+        "duration_ms": 120,
+        "is_error": False,
+        "total_cost_usd": 0.01,
+    }
+    assert serializer.turn_count == 2
+
+
+def test_user_and_system_messages() -> None:
+    """Test tool results, plain string content and system info."""
+    serializer = MessageSerializer()
+    user = UserMessage(content=[ToolResultBlock("t1", "file contents", False), ToolUseBlock("x", "y", {})])
+    assert serializer.serialize(user)["data"]["content"] == [
+        {"type": "tool_result", "content": "file contents", "is_error": False}
+    ]
+    assert serializer.serialize(UserMessage(content="hi"))["data"]["content"] == [{"type": "text", "text": "hi"}]
+
+    system = SystemMessage("init", {"model": "m", "session_id": "s", "cwd": "/", "permissionMode": "default"})
+    assert serializer.serialize(system)["data"]["permission_mode"] == "default"
+    assert serializer.turn_count == 0
+
+
+def test_unknown_and_registered_types() -> None:
+    """Test the fallback for unknown messages and dispatch to registered subclasses."""
+
+    class Custom:
+        pass
+
+    class CustomChild(Custom):
+        pass
+
+    serializer = MessageSerializer()
+    assert serializer.serialize(object()) == {"type": "unknown", "data": {}}
+
+    @MessageSerializer.register(Custom)
+    def _custom(serializer: MessageSerializer, message: Any) -> dict[str, Any]:
+        return {"type": "custom", "data": {}}
+
+    try:
+        assert serializer.serialize(CustomChild())["type"] == "custom"
+        assert CustomChild in MessageSerializer.handlers
+    finally:
+        MessageSerializer.handlers.pop(Custom, None)
+        MessageSerializer.handlers.pop(CustomChild, None)
+
+
+def test_block_subclasses_use_base_handler() -> None:
+    """Test that a subclass of a handled content block is serialized like its base."""
+
+    class CitedText(TextBlock):
+        pass
+
+    message = AssistantMessage(content=[CitedText("quoted")], model="m")
+    try:
+        params = MessageSerializer().serialize(message)
+        assert params["data"]["content"] == [{"type": "text", "text": "quoted"}]
+        assert CitedText in ASSISTANT_BLOCKS
+    finally:
+        ASSISTANT_BLOCKS.pop(CitedText, None)
+
+
+def test_dumps_is_compact_utf8() -> None:
+    """Test that dumps produces compact UTF-8 bytes and copes with odd values."""
+    encoded = dumps(notification({"text": "naïve ✓", "path": Path("/charts/x.png"), "tags": {"a"}}))
+
+    assert isinstance(encoded, bytes)
+    assert b", " not in encoded
+    assert "✓".encode() in encoded
+    assert json.loads(encoded) == {
+        "jsonrpc": "2.0",
+        "method": "message",
+        "params": {"text": "naïve ✓", "path": "/charts/x.png", "tags": ["a"]},
+    }
@@ -0,0 +1,131 @@
+"""Tests for the pre-warmed agent session pool."""
+
+import asyncio
+
+import pytest
+from claude_code_sdk import ClaudeCodeOptions
+
+from cyclebot.session_pool import SessionPool, options_fingerprint
+from tests.conftest import FakeClient
+
+
+@pytest.fixture(autouse=True)
+def _reset_instances() -> None:
+    FakeClient.instances = []
+
+
+def test_fingerprint_distinguishes_options() -> None:
+    """Test that equal options share a key and different options do not."""
+    assert options_fingerprint(None) == options_fingerprint(ClaudeCodeOptions())
+    assert options_fingerprint(ClaudeCodeOptions(model="a")) == options_fingerprint(ClaudeCodeOptions(model="a"))
+    assert options_fingerprint(ClaudeCodeOptions(model="a")) != options_fingerprint(ClaudeCodeOptions(model="b"))
+
+
+def test_warm_sessions_are_handed_out_and_replaced() -> None:
+    """Test warm hits, background refill after release, and same-task disconnect."""
+
+    async def run() -> SessionPool:
+        pool = SessionPool(min_size=1, max_size=3, factory=FakeClient)
+        await pool.start([None])
+        await asyncio.sleep(0.01)
+        assert pool.idle_count() == 1
+
+        async with pool.session() as session:
+            assert session.healthy()
+            first = session.client
+        await asyncio.sleep(0.01)
+
+        # The used session was closed and a fresh one warmed in its place
+        assert first._transport is None
+        assert first.connect_task is first.disconnect_task
+        assert pool.idle_count() == 1
+        assert pool.size == 1
+
+        async with pool.session() as session:
+            assert session.client is not first
+        await pool.close()
+        assert pool.size == 0
+        return pool
+
+    pool = asyncio.run(run())
+
+    assert pool.stats.warm_hits == 2
+    assert pool.stats.cold_starts == 0
+    assert all(client._transport is None for client in FakeClient.instances)
+
+
+def test_reusable_release_and_failed_block() -> None:
+    """Test that reusable sessions come back, but not after an error."""
+
+    async def run() -> SessionPool:
+        pool = SessionPool(min_size=0, max_size=2, factory=FakeClient)
+        options = ClaudeCodeOptions(model="m")
+        async with pool.session(options, reusable=True) as session:
+            first = session.client
+        async with pool.session(options, reusable=True) as session:
+            assert session.client is first
+        with pytest.raises(RuntimeError):
+            async with pool.session(options, reusable=True) as session:
+                msg = "boom"
+                raise RuntimeError(msg)
+        assert pool.idle_count(options) == 0
+        assert first._transport is None
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(run())
+
+    assert pool.stats.cold_starts == 1
+    assert pool.stats.warm_hits == 2
+
+
+def test_full_pool_waits_then_evicts_idle_sessions() -> None:
+    """Test max_size: callers wait for in-use sessions and evict idle ones of other options."""
+
+    async def run() -> SessionPool:
+        pool = SessionPool(min_size=0, max_size=1, factory=FakeClient)
+        held = await pool.acquire(ClaudeCodeOptions(model="a"))
+        waiting = asyncio.create_task(pool.acquire(ClaudeCodeOptions(model="b")))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await pool.release(held, reusable=True)  # idle now, so the waiter evicts it
+        other = await waiting
+        assert pool.stats.evicted == 1
+        assert pool.size == 1
+        await pool.release(other)
+        await pool.close()
+        return pool
+
+    asyncio.run(run())
+
+
+def test_check_evicts_idle_and_unhealthy_sessions() -> None:
+    """Test idle timeout above min_size and replacement of dead sessions."""
+
+    async def run() -> SessionPool:
+        pool = SessionPool(min_size=1, max_size=4, idle_timeout=0.0, factory=FakeClient)
+        pool.warm(None)
+        sessions = [await pool.acquire(None) for _ in range(3)]
+        for session in sessions:
+            await pool.release(session, reusable=True)
+        await asyncio.sleep(0.01)
+        sessions[-1].client._transport.ready = False  # most recently used dies
+        await pool.check()
+        await asyncio.sleep(0.01)
+        assert pool.idle_count() == 1
+        remaining = await pool.acquire(None)
+        assert remaining.healthy()
+        await pool.release(remaining)
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(run())
+
+    assert pool.stats.unhealthy == 1
+    assert pool.stats.evicted >= 2
+
+
+def test_rejects_min_above_max() -> None:
+    """Test size validation."""
+    with pytest.raises(ValueError, match="min_size"):
+        SessionPool(min_size=3, max_size=2)
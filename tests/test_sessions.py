@@ -0,0 +1,121 @@
+"""Tests for the conversation registry."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from claude_code_sdk import ClaudeCodeOptions, ResultMessage
+
+from cyclebot.session_pool import SessionPool
+from cyclebot.sessions import SessionBusy, SessionRegistry
+from tests.conftest import FakeClient
+
+
+def result(session_id: str) -> ResultMessage:
+    """A result message reporting the given session id."""
+    return ResultMessage("success", 1, 1, False, 1, session_id)
+
+
+async def run_prompt(registry: SessionRegistry, session_id: Any, reported: str, **kwargs: Any) -> Any:
+    """Lease a session, report a session id as the CLI would, and return the client used."""
+    async with registry.lease(session_id, **kwargs) as lease:
+        lease.observe(result(reported))
+        return lease.client
+
+
+def test_continue_reuses_live_session_then_resumes() -> None:
+    """Test warm continuation, and resume with recorded options once the session was closed."""
+
+    async def run() -> SessionRegistry:
+        pool = SessionPool(min_size=0, max_size=3, factory=FakeClient)
+        registry = SessionRegistry(pool, max_live=1)
+        options = ClaudeCodeOptions(model="m")
+
+        first = await run_prompt(registry, None, "s1", options=options)
+        assert registry.get("s1").options == options
+        again = await run_prompt(registry, "s1", "s1")
+        assert again is first
+        assert registry.get("s1").prompts == 2
+
+        await run_prompt(registry, None, "s2")  # only one live session: s1 is closed
+        assert registry.get("s1").live is None
+        assert first._transport is None
+
+        resumed = await run_prompt(registry, "s1", "s1")
+        assert resumed is not first
+        assert resumed.options.resume == "s1"
+        assert resumed.options.model == "m"
+        assert registry.live_count == 1
+        await registry.close()
+        assert pool.size == 0
+        await pool.close()
+        return registry
+
+    registry = asyncio.run(run())
+
+    assert registry.stats.started == 2
+    assert registry.stats.live_hits == 1
+    assert registry.stats.resumed == 1
+
+
+def test_busy_session_and_failed_prompt() -> None:
+    """Test that a conversation answers one prompt at a time and failures drop the live session."""
+
+    async def run() -> SessionRegistry:
+        pool = SessionPool(min_size=0, max_size=3, factory=FakeClient)
+        registry = SessionRegistry(pool, max_live=2)
+        await run_prompt(registry, None, "s1")
+
+        async with registry.lease("s1"):
+            with pytest.raises(SessionBusy):
+                async with registry.lease("s1"):
+                    pass
+
+        with pytest.raises(RuntimeError):
+            async with registry.lease("s1") as lease:
+                msg = "boom"
+                raise RuntimeError(msg)
+        assert lease.session.client._transport is None
+        assert registry.get("s1").live is None
+        assert not registry.get("s1").busy
+
+        # A session that was never seen here is resumed from the CLI's saved transcript
+        client = await run_prompt(registry, "elsewhere", "elsewhere")
+        assert client.options.resume == "elsewhere"
+        await registry.close()
+        await pool.close()
+        return registry
+
+    asyncio.run(run())
+
+
+def test_lru_and_ttl_eviction() -> None:
+    """Test that the registry forgets the least recently used and expired conversations."""
+
+    async def run() -> SessionRegistry:
+        pool = SessionPool(min_size=0, max_size=3, factory=FakeClient)
+        registry = SessionRegistry(pool, max_entries=2, max_live=2)
+        for session_id in ("a", "b"):
+            await run_prompt(registry, None, session_id)
+        await run_prompt(registry, "a", "a")  # a is now most recent
+        await run_prompt(registry, None, "c")
+        assert registry.get("b") is None
+        assert len(registry) == 2
+
+        registry.ttl = 0.0
+        assert await registry.purge_expired() == 2
+        assert len(registry) == 0
+        assert pool.size == 0
+        await pool.close()
+        return registry
+
+    registry = asyncio.run(run())
+
+    assert registry.stats.evicted == 1
+    assert registry.stats.expired == 2
+
+
+def test_rejects_live_sessions_filling_the_pool() -> None:
+    """Test that live sessions must leave room in the pool."""
+    with pytest.raises(ValueError, match="max_live"):
+        SessionRegistry(SessionPool(min_size=0, max_size=2), max_live=2)
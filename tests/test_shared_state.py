@@ -0,0 +1,59 @@
+"""Tests for the shared state backends."""
+
+import asyncio
+
+import pytest
+
+from cyclebot.shared_state import InProcessState, RedisState, SharedState, open_shared_state
+
+
+async def _exercise(state: SharedState) -> None:
+    assert await state.claim("session:a", "w1", ttl=60) == "w1"
+    assert await state.claim("session:a", "w2", ttl=60) == "w1"
+    assert await state.claim("session:a", "w1", ttl=60) == "w1"
+    assert await state.owner("session:a") == "w1"
+    assert await state.release("session:a", "w2") is False
+    assert await state.claim("session:a", "w2", ttl=60, force=True) == "w2"
+    assert await state.release("session:a", "w2") is True
+    assert await state.owner("session:a") is None
+
+    assert await state.claim("short", "w1", ttl=0.05) == "w1"
+    await asyncio.sleep(0.1)
+    assert await state.owner("short") is None
+    assert await state.claim("short", "w2", ttl=60) == "w2"
+
+    received: list[bytes] = []
+    messages = await state.subscribe("worker:w1")
+    # Published before anyone iterates, but after subscribing: must not be lost
+    await state.publish("worker:w1", b"one")
+    await state.publish("worker:other", b"ignored")
+    await state.publish("worker:w1", b"two")
+
+    async def listen() -> None:
+        async for message in messages:
+            received.append(message)
+            if len(received) == 2:
+                return
+
+    await asyncio.wait_for(listen(), 2)
+    assert received == [b"one", b"two"]
+    await state.close()
+
+
+def test_in_process_state() -> None:
+    """Test claims, expiry, release and pub/sub in one process."""
+    asyncio.run(_exercise(InProcessState()))
+
+
+def test_redis_state() -> None:
+    """Test the same behaviour against a Redis-compatible server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    asyncio.run(_exercise(RedisState(client=fakeredis.aioredis.FakeRedis(), prefix="test:")))
+
+
+def test_open_shared_state() -> None:
+    """Test backend selection from a URL."""
+    assert isinstance(open_shared_state(None), InProcessState)
+    assert isinstance(open_shared_state("memory"), InProcessState)
+    with pytest.raises(ValueError, match="Unsupported"):
+        open_shared_state("etcd://localhost")
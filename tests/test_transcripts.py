@@ -0,0 +1,100 @@
+"""Tests for the transcript store."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from cyclebot.transcripts import TranscriptStore
+
+
+def test_append_read_and_finish(tmp_path: Path) -> None:
+    """Test sequence numbers, reads after a sequence number and stream outcomes."""
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    stream_id = store.create()
+    other = store.create()
+
+    assert [store.append(stream_id, {"n": n}) for n in range(3)] == [1, 2, 3]
+    assert store.append(other, {"n": "other"}) == 1
+    assert store.read(stream_id, after_seq=1) == [(2, {"n": 1}), (3, {"n": 2})]
+    assert store.read(stream_id, after_seq=1, limit=1) == [(2, {"n": 1})]
+    assert store.info(stream_id).status == "running"
+
+    store.finish(stream_id, "completed", {"result": {"turn_count": 2}})
+    info = store.info(stream_id)
+    assert info.finished
+    assert info.last_seq == 3
+    assert info.outcome == {"result": {"turn_count": 2}}
+    assert store.info("missing") is None
+    with pytest.raises(ValueError, match="not running"):
+        store.append(stream_id, {"n": 4})
+    with pytest.raises(ValueError, match="status"):
+        store.finish(other, "paused")
+    store.close()
+
+    # Reopening keeps transcripts; streams nobody can finish any more can be marked failed
+    reopened = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    assert reopened.read(stream_id) == [(1, {"n": 0}), (2, {"n": 1}), (3, {"n": 2})]
+    assert reopened.info(other).status == "running"
+    assert reopened.mark_abandoned() == 1
+    assert reopened.info(other).status == "failed"
+    assert reopened.purge(max_age=-1) == 2
+    assert reopened.read(stream_id) == []
+    reopened.close()
+
+
+def test_follow_replays_then_streams_live() -> None:
+    """Test that a follower gets stored messages, then live ones, and stops when the stream ends."""
+
+    async def run() -> list[tuple[int, object]]:
+        store = TranscriptStore(":memory:")
+        stream_id = store.create()
+        store.append(stream_id, {"n": 1})
+        store.append(stream_id, {"n": 2})
+        received: list[tuple[int, object]] = []
+
+        async def follow() -> None:
+            async for item in store.follow(stream_id, after_seq=1, batch=1):
+                received.append(item)
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0.01)
+        assert received == [(2, {"n": 2})]
+        store.append(stream_id, {"n": 3})
+        await asyncio.sleep(0.01)
+        store.finish(stream_id, "cancelled")
+        await asyncio.wait_for(follower, 1)
+        store.close()
+        return received
+
+    assert asyncio.run(run()) == [(2, {"n": 2}), (3, {"n": 3})]
+
+
+def test_follow_stream_written_by_another_store(tmp_path: Path) -> None:
+    """Test following a stream that another process (here: another connection) appends to."""
+
+    async def run() -> list[tuple[int, object]]:
+        writer = TranscriptStore(tmp_path / "transcripts.sqlite3")
+        reader = TranscriptStore(tmp_path / "transcripts.sqlite3")
+        stream_id = writer.create()
+        writer.append(stream_id, {"n": 1})
+        received: list[tuple[int, object]] = []
+
+        async def follow() -> None:
+            async for item in reader.follow(stream_id, poll=0.05):
+                received.append(item)
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0.01)
+        writer.append(stream_id, {"n": 2})
+        reader.wake(stream_id)  # what a published notification from the writer does
+        await asyncio.sleep(0.01)
+        assert received == [(1, {"n": 1}), (2, {"n": 2})]
+        writer.append(stream_id, {"n": 3})
+        writer.finish(stream_id, "completed")
+        await asyncio.wait_for(follower, 1)  # noticed by polling
+        writer.close()
+        reader.close()
+        return received
+
+    assert asyncio.run(run())[-1] == (3, {"n": 3})
@@ -0,0 +1,71 @@
+"""Tests for the web server's per-connection request handling."""
+
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+# Keep the server's module-level transcript store out of the home directory
+os.environ.setdefault("CYCLEBOT_TRANSCRIPTS", ":memory:")
+
+from cyclebot import web  # noqa: E402
+from cyclebot.web import REQUEST_CANCELLED, Connection, JSONRPCRequest  # noqa: E402
+
+
+class FakeWebSocket:
+    """Records the frames sent to the client."""
+
+    def __init__(self) -> None:
+        """Start with nothing sent."""
+        self.client = SimpleNamespace(host="127.0.0.1")
+        self.frames: list[Any] = []
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Record the frame."""
+        self.frames.append(json.loads(data))
+
+
+def test_cancel_queued_prompt() -> None:
+    """Test that cancelling a prompt still waiting for a slot answers it with REQUEST_CANCELLED."""
+
+    async def scenario() -> list[Any]:
+        websocket = FakeWebSocket()
+        connection = Connection(websocket, max_concurrent_prompts=1)  # type: ignore[arg-type]
+        async with connection.slots:
+            assert connection.start_prompt(JSONRPCRequest(method="prompt", params={"content": "hi"}, id=7))
+            await asyncio.sleep(0.01)
+            assert connection.cancel(7)
+            await asyncio.gather(*connection.tasks, return_exceptions=True)
+        assert not connection.prompts
+        await connection.outbound.close(timeout=1.0)
+        return websocket.frames
+
+    frames = asyncio.run(scenario())
+    assert len(frames) == 1
+    assert frames[0]["id"] == 7
+    assert frames[0]["error"]["code"] == REQUEST_CANCELLED
+
+
+def test_late_owner_drops_forwarded_continue(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a continue the caller ran itself after the timeout is not run again by the owner."""
+    monkeypatch.setattr(web, "FORWARD_TIMEOUT", 0.01)
+    monkeypatch.setattr(web, "WORKER_ID", "caller")
+    request = JSONRPCRequest(method="continue", params={"session_id": "s1", "content": "more"}, id=3)
+
+    async def scenario() -> None:
+        connection = Connection(FakeWebSocket())  # type: ignore[arg-type]
+        assert not await web.forward_continue(connection, request, "owner", "stream-1")
+        assert await web.shared_state.owner("stream:stream-1") == "caller"
+
+        # The command reaches the owner only now
+        monkeypatch.setattr(web, "WORKER_ID", "owner")
+        command = {"op": "continue", "stream_id": "stream-1", "request_id": 3, "params": request.params}
+        await web._run_forwarded(command)
+        assert web.transcripts.info("stream-1") is None
+        assert "stream-1" not in web.running_streams
+        await connection.outbound.close(timeout=1.0)
+
+    asyncio.run(scenario())